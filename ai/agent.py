@@ -10,6 +10,8 @@ import pickle
 from collections import deque, namedtuple
 from ai.dqn import DQN, NoisyLinear
 from ai.sumtree import SumTree
+from ai.expert_dataset import ExpertDataset, BatchPrefetcher
+from ai.checkpoint import detach_copy, read_checkpoint, CHECKPOINT_VERSION
 from torch.amp import autocast, GradScaler
 from config import *
 Transition = namedtuple('Transition', ('state', 'action', 'reward', 'next_state', 'done'))
@@ -46,6 +48,7 @@ class DQNAgent:
         self.memory = SumTree(buffer_size)
         self.n_step_memory = deque(maxlen=n_step)
         self.max_priority = 1.0
+        self.last_q_values = None  # 最近一次 choose_action 的 Q 值（NumPy 陣列）
 
     def update_expert_prob(self):
         """
@@ -61,9 +64,10 @@ class DQNAgent:
         state = torch.FloatTensor(state).unsqueeze(0).to(self.device)
         self.model.eval()
         with torch.no_grad():
-            q_values, _ = self.model(state)
+            q_values = self.model(state)
         self.model.train()
-        return q_values.argmax(1).item()
+        self.last_q_values = q_values[0].cpu().numpy()  # 一次裝置同步，供遙測重用此次前向傳播的 Q 值
+        return int(self.last_q_values.argmax())
 
     def store_transition(self, state, action, reward, next_state, done):
         """
@@ -145,35 +149,44 @@ class DQNAgent:
     def pretrain(self, expert_data, pretrain_steps=1000):
         """
         模仿學習預訓練。
+
+        原理：
+        - 專家數據一次載入為設備上的 ExpertDataset，每個 epoch 打亂索引切出小批量，
+          由 BatchPrefetcher 在背景執行緒準備下一批，訓練迴圈只剩前向與反向傳播。
+
+        Args:
+            expert_data (ExpertData | ExpertDataset): 專家數據。
+            pretrain_steps (int): 預訓練步數。
         """
-        print(f"開始預訓練，專家數據量：{len(expert_data)}，預訓練步數：{pretrain_steps}")
+        dataset = expert_data if isinstance(expert_data, ExpertDataset) else ExpertDataset(expert_data, self.device)
+        print(f"開始預訓練，專家數據量：{len(dataset)}，預訓練步數：{pretrain_steps}")
         self.model.train()
         scaler = GradScaler("cuda" if self.device.type == "cuda" else "cpu")
-        for step in range(pretrain_steps):
-            batch = random.sample(expert_data, min(self.batch_size, len(expert_data)))
-            states, actions = zip(*batch)
-            states = torch.FloatTensor(np.array(states)).to(self.device)
-            actions = torch.LongTensor(actions).to(self.device).squeeze()
-            if self.device.type == "cuda":
-                with autocast("cuda"):
-                    q_values, _ = self.model(states)
+        prefetcher = BatchPrefetcher(dataset.batches(self.batch_size, pretrain_steps))
+        try:
+            for step, (states, actions) in enumerate(prefetcher):
+                if self.device.type == "cuda":
+                    with autocast("cuda"):
+                        q_values = self.model(states)
+                        loss = F.cross_entropy(q_values, actions)
+                else:
+                    q_values = self.model(states)
                     loss = F.cross_entropy(q_values, actions)
-            else:
-                q_values, _ = self.model(states)
-                loss = F.cross_entropy(q_values, actions)
-            self.optimizer.zero_grad()
-            if self.device.type == "cuda":
-                scaler.scale(loss).backward()
-                scaler.unscale_(self.optimizer)
-                torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=2.0)
-                scaler.step(self.optimizer)
-                scaler.update()
-            else:
-                loss.backward()
-                torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=2.0)
-                self.optimizer.step()
-            if (step + 1) % 100 == 0:
-                print(f"預訓練步數 {step + 1}/{pretrain_steps}，損失：{loss.item():.2f}")
+                self.optimizer.zero_grad()
+                if self.device.type == "cuda":
+                    scaler.scale(loss).backward()
+                    scaler.unscale_(self.optimizer)
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=2.0)
+                    scaler.step(self.optimizer)
+                    scaler.update()
+                else:
+                    loss.backward()
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=2.0)
+                    self.optimizer.step()
+                if (step + 1) % 100 == 0:
+                    print(f"預訓練步數 {step + 1}/{pretrain_steps}，損失：{loss.item():.2f}")
+        finally:
+            prefetcher.close()
         print("預訓練完成")
 
     def learn(self, expert_action=False):
@@ -192,11 +205,11 @@ class DQNAgent:
         scaler = GradScaler("cuda")
         self.model.train()
         with autocast("cuda"):
-            q_values, _ = self.model(states)
+            q_values = self.model(states)
             q_values = q_values.gather(1, actions)
             with torch.no_grad():
-                next_actions = self.model(next_states)[0].max(1, keepdim=True)[1]
-                next_q_values = self.target_model(next_states)[0].gather(1, next_actions)
+                next_actions = self.model(next_states).max(1, keepdim=True)[1]
+                next_q_values = self.target_model(next_states).gather(1, next_actions)
                 target_q_values = rewards + (1 - dones) * (self.gamma ** self.n_step) * next_q_values
             td_errors = (q_values - target_q_values).abs()
             loss = (td_errors * weights).mean()
@@ -225,6 +238,70 @@ class DQNAgent:
             pickle.dump(list(self.memory.data), f)
         print(f"保存模型到 {model_path}，記憶到 {memory_path}")
 
+    def checkpoint_state(self):
+        """
+        在記憶體中複製代理的完整訓練狀態，供 CheckpointWriter 在背景寫入。
+
+        原理：
+        - state_dict 中的張量會被後續訓練原地更新，因此以 detach_copy 複製到 CPU。
+        - 回放緩衝區複製 SumTree 的優先級陣列與數據陣列（只複製對轉換元組的引用，轉換本身不會被修改），
+          以及尚未組成 n-step 轉換的 n_step_memory。
+        - 計數器（steps、beta、expert_prob、max_priority）一併保存，還原後專家概率衰減、
+          重要性採樣權重與目標網絡更新週期從中斷處繼續。
+
+        Returns:
+            dict: 可直接以 torch.save 保存的狀態（含格式版本）。
+        """
+        return {
+            "version": CHECKPOINT_VERSION,
+            "model": detach_copy(self.model.state_dict()),
+            "target_model": detach_copy(self.target_model.state_dict()),
+            "optimizer": detach_copy(self.optimizer.state_dict()),
+            "memory": {
+                "tree": self.memory.tree.copy(),
+                "data": self.memory.data.copy(),
+                "data_pointer": self.memory.data_pointer,
+                "n_step": list(self.n_step_memory),
+            },
+            "agent": {
+                "steps": self.steps,
+                "beta": self.beta,
+                "expert_prob": self.expert_prob,
+                "max_priority": self.max_priority,
+            },
+        }
+
+    def load_checkpoint(self, path):
+        """
+        從 checkpoint_state 保存的檢查點還原代理的完整訓練狀態。
+
+        Args:
+            path (str): 檢查點路徑。
+
+        Returns:
+            dict: 檢查點狀態（呼叫者可從中還原訓練進度等其他欄位）。
+
+        Raises:
+            ValueError: 若檢查點版本不符。
+        """
+        state = read_checkpoint(path, map_location=self.device)
+        self.model.load_state_dict(state["model"])
+        self.target_model.load_state_dict(state["target_model"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        memory = state["memory"]
+        self.memory.tree[:] = memory["tree"]
+        self.memory.data[:] = memory["data"]
+        self.memory.data_pointer = memory["data_pointer"]
+        self.n_step_memory.clear()
+        self.n_step_memory.extend(memory["n_step"])
+        counters = state["agent"]
+        self.steps = counters["steps"]
+        self.beta = counters["beta"]
+        self.expert_prob = counters["expert_prob"]
+        self.max_priority = counters["max_priority"]
+        print(f"已從檢查點 {path} 載入完整訓練狀態（步數 {self.steps}）")
+        return state
+
     def load(self, model_path, memory_path=None):
         """
         Load model and memory data.
@@ -236,6 +313,6 @@ class DQNAgent:
                 data = pickle.load(f)
                 for d in data:
                     if d is not None:
-                        self.memory.add(self.memory_priority, d)
+                        self.memory.add(self.max_priority, d)
             print(f"從 {memory_path} 載入記憶")
         print(f"已從 {model_path} 載入模型")
\ No newline at end of file
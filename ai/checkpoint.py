@@ -0,0 +1,204 @@
+# ai/checkpoint.py
+"""
+非同步檢查點寫入：訓練執行緒只在記憶體中複製模型與優化器狀態，序列化與寫入磁碟由背景執行緒完成，
+檔案以「暫存檔 + 重新命名」原子寫入，並只保留最近 K 個檢查點。
+"""
+
+import glob
+import os
+import random
+import re
+import threading
+from typing import Optional
+import numpy as np
+import torch
+
+CHECKPOINT_PATTERN = re.compile(r"_(\d+)\.pt$")  # 檔名中的步數（例如 checkpoint_000120.pt）
+CHECKPOINT_VERSION = 1  # 檢查點格式版本，欄位變更時遞增
+
+def detach_copy(obj):
+    """
+    遞迴複製狀態中的張量到 CPU（state_dict 中的張量會被後續訓練原地修改，必須複製）。
+
+    Args:
+        obj: 張量，或由 dict / list / tuple 組成的巢狀結構。
+
+    Returns:
+        與 obj 結構相同、張量已複製到 CPU 的物件。
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: detach_copy(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(detach_copy(value) for value in obj)
+    return obj
+
+def rng_state() -> dict:
+    """返回 Python、NumPy 與 PyTorch（含 CUDA）全域隨機數生成器的狀態。"""
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+def restore_rng_state(state: dict) -> None:
+    """還原 rng_state 保存的隨機數生成器狀態（CUDA 狀態只在可用時還原）。"""
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+def read_checkpoint(path: str, map_location=None) -> dict:
+    """
+    讀取檢查點並檢查格式版本。
+
+    Args:
+        path (str): 檢查點路徑。
+        map_location: torch.load 的 map_location。
+
+    Returns:
+        dict: 檢查點狀態。
+
+    Raises:
+        ValueError: 若檢查點版本與 CHECKPOINT_VERSION 不符。
+    """
+    state = torch.load(path, map_location=map_location, weights_only=False)
+    version = state.get("version", 0)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"不支援的檢查點版本：{version}（目前版本為 {CHECKPOINT_VERSION}）：{path}")
+    return state
+
+def checkpoint_paths(directory: str, prefix: str = "checkpoint"):
+    """
+    返回目錄中的檢查點路徑，按步數由小到大排序。
+
+    Args:
+        directory (str): 檢查點目錄。
+        prefix (str): 檔名前綴。
+
+    Returns:
+        List[str]: 檢查點路徑。
+    """
+    paths = []
+    for path in glob.glob(os.path.join(directory, f"{prefix}_*.pt")):
+        match = CHECKPOINT_PATTERN.search(path)
+        if match:
+            paths.append((int(match.group(1)), path))
+    return [path for _, path in sorted(paths)]
+
+def latest_checkpoint(directory: str, prefix: str = "checkpoint") -> Optional[str]:
+    """返回步數最大的檢查點路徑，沒有檢查點時為 None。"""
+    paths = checkpoint_paths(directory, prefix)
+    return paths[-1] if paths else None
+
+class CheckpointWriter(threading.Thread):
+    """
+    背景檢查點寫入執行緒。
+
+    原理：
+    - submit 只接收已在記憶體中複製好的狀態（見 detach_copy），放入單一待寫入槽後立即返回，訓練不等待磁碟。
+    - 若前一個檢查點仍在等待寫入，新的檢查點直接取代它（較舊的狀態已無保存價值），
+      因此無論寫入多慢，記憶體中最多只有「正在寫入」與「等待寫入」兩份狀態。
+    - 寫入時先以 torch.save 寫入暫存檔，再以 os.replace 原子替換，程式中斷時不會留下不完整的檢查點；
+      寫入成功後刪除超過 keep 個的舊檢查點。
+    """
+    def __init__(self, directory: str, keep: int = 3, prefix: str = "checkpoint"):
+        """
+        初始化並啟動寫入執行緒。
+
+        Args:
+            directory (str): 檢查點目錄。
+            keep (int): 保留的檢查點數量。
+            prefix (str): 檔名前綴。
+
+        Raises:
+            ValueError: 若 keep 小於 1。
+        """
+        super().__init__(daemon=True)
+        if keep < 1:
+            raise ValueError(f"保留的檢查點數量必須至少為 1，得到 {keep}")
+        self.directory = directory
+        self.keep = keep
+        self.prefix = prefix
+        self.error = None  # 寫入執行緒中發生的例外
+        self.written = []  # 已寫入的檢查點路徑
+        self._pending = None  # 等待寫入的 (步數, 狀態)
+        self._closing = False
+        self._condition = threading.Condition()
+        os.makedirs(directory, exist_ok=True)
+        self.start()
+
+    def path_for(self, step: int) -> str:
+        """返回指定步數的檢查點路徑。"""
+        return os.path.join(self.directory, f"{self.prefix}_{step:06d}.pt")
+
+    def submit(self, step: int, state: dict) -> None:
+        """
+        提交一個檢查點（立即返回）。
+
+        Args:
+            step (int): 檢查點步數（例如已完成的回合數），用於檔名與排序。
+            state (dict): 已複製到記憶體的狀態。
+
+        Raises:
+            RuntimeError: 若先前的寫入發生錯誤或寫入器已關閉。
+        """
+        if self.error is not None:
+            raise RuntimeError(f"檢查點寫入失敗：{self.error}")
+        with self._condition:
+            if self._closing:
+                raise RuntimeError("檢查點寫入器已關閉")
+            self._pending = (step, state)
+            self._condition.notify()
+
+    def run(self) -> None:
+        """
+        寫入迴圈，直到關閉且沒有等待寫入的檢查點。
+        """
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closing:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                step, state = self._pending
+                self._pending = None
+            try:
+                self._write(step, state)
+            except Exception as e:
+                self.error = e
+
+    def _write(self, step: int, state: dict) -> None:
+        """
+        原子寫入一個檢查點並刪除多餘的舊檢查點。
+
+        Args:
+            step (int): 檢查點步數。
+            state (dict): 狀態。
+        """
+        path = self.path_for(step)
+        temp_path = f"{path}.tmp"
+        torch.save(state, temp_path)
+        os.replace(temp_path, path)
+        self.written.append(path)
+        for old in checkpoint_paths(self.directory, self.prefix)[:-self.keep]:
+            os.remove(old)
+
+    def close(self) -> None:
+        """
+        寫入最後一個等待中的檢查點並結束執行緒。
+
+        Raises:
+            RuntimeError: 若寫入過程中發生錯誤。
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self.join()
+        if self.error is not None:
+            raise RuntimeError(f"檢查點寫入失敗：{self.error}")
@@ -49,9 +49,13 @@ class NoisyLinear(nn.Module):
         weight_noise = self.eps_out.unsqueeze(1) * self.eps_in
         weight = self.weight_mu + self.weight_sigma * weight_noise
         bias = self.bias_mu + self.bias_sigma * self.eps_out
-        weight_sigma_mean = self.weight_sigma.abs().mean().item()
-        bias_sigma_mean = self.bias_sigma.abs().mean().item()
-        return x @ weight.transpose(0, 1) + bias, {"weight_sigma_mean": weight_sigma_mean, "bias_sigma_mean": bias_sigma_mean}
+        return x @ weight.transpose(0, 1) + bias
+
+    def sigma_means(self):
+        """
+        Mean absolute noise scales (weight, bias) as device tensors, without a host sync.
+        """
+        return self.weight_sigma.detach().abs().mean(), self.bias_sigma.detach().abs().mean()
 
 class DQN(nn.Module):
     def __init__(self, state_dim, action_dim, num_conv_layers=3, sigma = SIGMA):
@@ -86,21 +90,26 @@ class DQN(nn.Module):
         x = self.conv(x)
         batch_size = x.size(0)
         x = x.contiguous().view(batch_size, -1)
-        x, fc1_metrics = self.fc1(x)
+        x = self.fc1(x)
         x = F.relu(x)
         x = F.dropout(x, p=0.3, training=self.training)
-        value, value_metrics = self.fc2_value(x)
-        advantage, advantage_metrics = self.fc2_advantage(x)
-        noise_metrics = {
-            'fc1_weight_sigma_mean': fc1_metrics['weight_sigma_mean'],
-            'fc1_bias_sigma_mean': fc1_metrics['bias_sigma_mean'],
-            'value_weight_sigma_mean': value_metrics['weight_sigma_mean'],
-            'value_bias_sigma_mean': value_metrics['bias_sigma_mean'],
-            'advantage_weight_sigma_mean': advantage_metrics['weight_sigma_mean'],
-            'advantage_bias_sigma_mean': advantage_metrics['bias_sigma_mean']
-        }
+        value = self.fc2_value(x)
+        advantage = self.fc2_advantage(x)
         q_values = value + (advantage - advantage.mean(dim=1, keepdim=True))
-        return q_values, noise_metrics
+        return q_values
+
+    def noise_metrics(self):
+        """
+        Mean absolute noise scales of every noisy layer, gathered with a single device-to-host copy.
+        Computed on demand (e.g. at a telemetry flush) instead of on every forward pass.
+        """
+        names = []
+        means = []
+        for prefix, layer in (('fc1', self.fc1), ('value', self.fc2_value), ('advantage', self.fc2_advantage)):
+            weight_mean, bias_mean = layer.sigma_means()
+            names += [f'{prefix}_weight_sigma_mean', f'{prefix}_bias_sigma_mean']
+            means += [weight_mean, bias_mean]
+        return dict(zip(names, torch.stack(means).tolist()))
 
     def reset_noise(self):
         """
@@ -5,26 +5,34 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import numpy as np
 from gym.spaces import Discrete, Box
 from game.game import Game
-from config import MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED, CELL_SIZE, FPS, EDIBLE_DURATION, GHOST_SCORES, TILE_PATH, TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN
+from game.game_config import GameConfig, default_config, validate_config
+from game.map_index import get_index
+from config import CELL_SIZE, FPS, EDIBLE_DURATION, GHOST_SCORES, TILE_PATH, TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN
 import random
 from typing import Callable
 
 class PacManEnv(Game):
-    def __init__(self, width=MAZE_WIDTH, height=MAZE_HEIGHT, seed=MAZE_SEED, ghost_penalty_weight=3.0):
+    SNAPSHOT_FIELDS = Game.SNAPSHOT_FIELDS + ("frame_count", "current_score", "old_score", "game_over", "eaten_pellets")
+
+    def __init__(self, width=None, height=None, seed=None, ghost_penalty_weight=3.0, game_config: GameConfig = None):
         """
         初始化 Pac-Man 環境，提供強化學習接口。
+        迷宮以 width、height、seed 覆蓋 game_config 後的設定生成，狀態形狀與迷宮尺寸一致。
 
         Args:
-            width (int): 迷宮寬度。
-            height (int): 迷宮高度。
-            seed (int): 隨機種子。
+            width (int, optional): 迷宮寬度，None 表示使用 game_config 的寬度。
+            height (int, optional): 迷宮高度，None 表示使用 game_config 的高度。
+            seed (int, optional): 隨機種子，None 表示使用 game_config 的種子。
             ghost_penalty_weight (float): 鬼魂距離懲罰權重。
-        """
-        super().__init__(player_name="RL_Agent")  # 固定 4 隻鬼魂（由 Game 類控制）
-        self.width = width
-        self.height = height
+            game_config (GameConfig, optional): 遊戲設定，None 表示 config 模組中的預設設定。
+        """
+        overrides = {"width": width, "height": height, "seed": seed}
+        game_config = (game_config or default_config())._replace(
+            **{field: value for field, value in overrides.items() if value is not None})
+        super().__init__(player_name="RL_Agent", game_config=validate_config(game_config))
+        self.width = self.game_config.width
+        self.height = self.game_config.height
         self.cell_size = CELL_SIZE
-        self.seed = seed
         self.ghost_penalty_weight = ghost_penalty_weight
         self.total_pellets = len(self.score_pellets) + len(self.power_pellets)
         self.eaten_pellets = 0
@@ -33,12 +41,13 @@ class PacManEnv(Game):
         self.old_score = 0
         self.frame_count = 0
         self.ghost_move_counter = 2
+        self.wall_mask = self._build_wall_mask()
+        self.recorder = None  # 重播錄製器（game.replay.ReplayRecorder），None 表示不錄製
         self.state_channels = 6  # 6 通道狀態
         self.state_shape = (self.state_channels, self.height, self.width)
         self.action_space = Discrete(4)
         self.observation_space = Box(low=0, high=1, shape=self.state_shape, dtype=np.float32)
-        np.random.seed(seed)
-        print(f"初始化 PacManEnv：寬度={width}，高度={height}，種子={seed}，鬼魂數=4")
+        print(f"初始化 PacManEnv：寬度={self.width}，高度={self.height}，種子={self.seed}，鬼魂數={len(self.ghosts)}")
 
     def _get_state(self):
         """
@@ -49,20 +58,16 @@ class PacManEnv(Game):
         - 通道 3：可食用鬼魂
         - 通道 4：普通鬼魂
         - 通道 5：牆壁
+        彈丸通道直接複製 PelletGrid 的布林網格，牆壁通道使用預先計算的遮罩。
         """
         state = np.zeros(self.state_shape, dtype=np.float32)
         # 設置牆壁
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.maze.get_tile(x, y) in [TILE_BOUNDARY,TILE_WALL]:
-                    state[5, y, x] = 1.0
+        state[5] = self.wall_mask
         # 設置 Pac-Man
         state[0, self.pacman.y, self.pacman.x] = 1.0
         # 設置能量球和分數球
-        for pellet in self.power_pellets:
-            state[1, pellet.y, pellet.x] = 1.0
-        for pellet in self.score_pellets:
-            state[2, pellet.y, pellet.x] = 1.0
+        state[1] = self.power_pellets.grid
+        state[2] = self.score_pellets.grid
         # 設置鬼魂
         for ghost in self.ghosts:
             if ghost.returning_to_spawn or ghost.waiting:
@@ -73,6 +78,17 @@ class PacManEnv(Game):
                 state[4, ghost.target_y, ghost.target_x] = 1.0
         return state
 
+    def _build_wall_mask(self):
+        """
+        計算牆壁遮罩（迷宮為靜態，每次重建遊戲時計算一次）。
+        """
+        mask = np.zeros((self.height, self.width), dtype=np.float32)
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.maze.get_tile(x, y) in [TILE_BOUNDARY, TILE_WALL]:
+                    mask[y, x] = 1.0
+        return mask
+
     def get_expert_action(self):
         """
         使用規則基礎 AI 提供專家動作。
@@ -87,22 +103,18 @@ class PacManEnv(Game):
         safe_directions = [i for i, (dx, dy) in enumerate(directions) 
                           if self.maze.xy_valid(self.pacman.x + dx, self.pacman.y + dy)
                           and self.maze.get_tile(self.pacman.x + dx, self.pacman.y + dy) not in [TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN]]
-        return random.choice(safe_directions) if safe_directions else 0
+        return self.pacman.rng.choice(safe_directions) if safe_directions else 0
 
-    def reset(self, seed=MAZE_SEED, random_spawn_seed=0):
+    def reset(self, seed=None, random_spawn_seed=0):
         """
-        重置環境，重新初始化遊戲。
+        重置環境，重新初始化遊戲（seed 為 None 時沿用目前的設定）。
+        遊戲、鬼魂與出生點各自使用由種子推導的獨立隨機數生成器，不重新播種全域 random / np.random。
         """
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
-            self.seed = seed
-        super().__init__(player_name="RL_Agent")  # 固定 4 隻鬼魂
+        super().__init__(player_name="RL_Agent", seed=seed, game_config=self.game_config)
         if random_spawn_seed != 0:
-            random.seed(self.seed + random_spawn_seed)
-            valid_positions = [(x, y) for y in range(1, self.maze.height - 1) for x in range(1, self.maze.width - 1)
-                              if self.maze.get_tile(x, y) == TILE_PATH]
-            self.pacman.x, self.pacman.y = random.choice(valid_positions)
+            spawn_rng = random.Random(self.seed + random_spawn_seed)
+            valid_positions = get_index(self.maze).positions_of(TILE_PATH)
+            self.pacman.x, self.pacman.y = spawn_rng.choice(valid_positions)
             self.pacman.initial_x = self.pacman.x
             self.pacman.initial_y = self.pacman.y
         self.total_pellets = len(self.score_pellets) + len(self.power_pellets)
@@ -112,6 +124,7 @@ class PacManEnv(Game):
         self.old_score = 0
         self.frame_count = 0
         self.ghost_move_counter = 2
+        self.wall_mask = self._build_wall_mask()
         state = self._get_state()
         return np.array(state, dtype=np.float32), {}
 
@@ -125,8 +138,9 @@ class PacManEnv(Game):
             for ghost in self.ghosts:
                 ghost.set_edible(EDIBLE_DURATION)
         self.pacman.eat_score_pellet(self.score_pellets)
-        for ghost in self.ghosts:
-            if ghost.move_towards_target(FPS):
+        arrived = self.store.move_towards_target(self.ghost_rows, FPS)  # 向量化移動所有鬼魂
+        for ghost, ghost_arrived in zip(self.ghosts, arrived):
+            if ghost_arrived:
                 if ghost.returning_to_spawn and self.maze.get_tile(ghost.x, ghost.y) == TILE_GHOST_SPAWN:
                     ghost.set_waiting(FPS)
                 elif ghost.returning_to_spawn:
@@ -138,6 +152,7 @@ class PacManEnv(Game):
                         ghost.current_y = ghost.target_y * CELL_SIZE + CELL_SIZE // 2
                         ghost.x = ghost.target_x
                         ghost.y = ghost.target_y
+        self.occupancy.rebuild(self.ghosts)
         self._check_collision(FPS)
         if not self.power_pellets and not self.score_pellets:
             print(f"遊戲勝利！最終分數：{self.pacman.score}")
@@ -146,27 +161,24 @@ class PacManEnv(Game):
 
     def _check_collision(self, fps: int) -> None:
         """
-        檢查 Pac-Man 與鬼魂的碰撞。
+        檢查 Pac-Man 與鬼魂的碰撞（由 _colliding_ghosts 經佔用網格只檢查周圍 3x3 格子內的鬼魂）。
         """
         if not self.running:
             return
-        for ghost in self.ghosts:
-            distance = ((self.pacman.current_x - ghost.current_x) ** 2 + 
-                        (self.pacman.current_y - ghost.current_y) ** 2) ** 0.5
-            if distance < CELL_SIZE / 2:
-                if ghost.edible and ghost.edible_timer > 0:
-                    self.pacman.score += GHOST_SCORES[self.ghost_score_index]
-                    self.ghost_score_index = min(self.ghost_score_index + 1, len(GHOST_SCORES) - 1)
-                    ghost.set_returning_to_spawn(FPS)
-                elif not ghost.edible and not ghost.returning_to_spawn and not ghost.waiting:
-                    self.pacman.lose_life(self.maze)
-                    for g in self.ghosts:
-                        g.set_returning_to_spawn(FPS)
-                    if self.pacman.lives <= 0:
-                        self.running = False
-                        self.game_over = True
-                    else:
-                        break
+        for ghost in self._colliding_ghosts():
+            if ghost.edible and ghost.edible_timer > 0:
+                self.pacman.score += GHOST_SCORES[self.ghost_score_index]
+                self.ghost_score_index = min(self.ghost_score_index + 1, len(GHOST_SCORES) - 1)
+                ghost.set_returning_to_spawn(FPS)
+            elif not ghost.edible and not ghost.returning_to_spawn and not ghost.waiting:
+                self.pacman.lose_life(self.maze)
+                for g in self.ghosts:
+                    g.set_returning_to_spawn(FPS)
+                if self.pacman.lives <= 0:
+                    self.running = False
+                    self.game_over = True
+                else:
+                    break
 
     def step(self, action):
         """
@@ -190,6 +202,8 @@ class PacManEnv(Game):
                     self.pacman.y = self.pacman.target_y
             else:
                 moved = False
+        if self.recorder is not None:
+            self.recorder.before_step(action)
         try:
             self.update(FPS, move_pacman)
         except Exception as e:
@@ -201,7 +215,8 @@ class PacManEnv(Game):
         if wall_collision:
             reward -= 5
         ghost_penalty = 0
-        for ghost in self.ghosts:
+        tx, ty = self.occupancy.tile_of(self.pacman)
+        for ghost in self.occupancy.near(tx, ty, radius=9):  # 懲罰只涉及 8 格內的鬼魂
             dist = ((self.pacman.current_x - ghost.current_x) ** 2 + 
                         (self.pacman.current_y - ghost.current_y) ** 2) ** 0.5
             if ghost.returning_to_spawn or ghost.waiting:
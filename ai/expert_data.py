@@ -0,0 +1,253 @@
+# ai/expert_data.py
+"""
+並行收集規則 AI 的專家示範數據，並以位元壓縮的 NumPy 陣列快取到磁碟。
+快取鍵涵蓋迷宮種子、環境版本、規則 AI 參數與隨機行動概率等會影響數據的設定，
+重複訓練與 Optuna 試驗直接載入快取，不需重新模擬。
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+
+import hashlib
+import json
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+from config import (PACMAN_AI_SPEED, MAX_STUCK_FRAMES, ENV_VERSION, EXPERT_EPISODES, EXPERT_MAX_STEPS_PER_EPISODE,
+                    EXPERT_RANDOM_PROB, MAX_EXPERT_DATA, GHOST_PENALTY_WEIGHT, EXPERT_CACHE_DIR)
+from game.game_config import GameConfig, load_config
+from game.pathfinding import PLAN_THREAT_RADIUS, PLAN_DANGER_RADIUS
+
+try:
+    from ai.environment import PacManEnv
+except ImportError:  # 未安裝 gym 時仍可讀取已快取的數據
+    PacManEnv = None
+
+# 專家數據：狀態以 np.packbits 按列壓縮為 uint8（每個 0/1 通道值佔 1 位元），state_shape 用於還原
+ExpertData = namedtuple('ExpertData', ['states', 'actions', 'rewards', 'next_states', 'dones', 'state_shape'])
+
+_worker_env = None  # 進程池工作進程中的環境
+
+def pack_states(states: np.ndarray) -> np.ndarray:
+    """
+    將 (N, C, H, W) 的 0/1 狀態壓縮為 (N, ⌈C×H×W / 8⌉) 的 uint8 陣列。
+
+    Args:
+        states (np.ndarray): 0/1 狀態陣列。
+
+    Returns:
+        np.ndarray: 位元壓縮後的狀態。
+    """
+    states = np.asarray(states)
+    return np.packbits(states.reshape(len(states), -1) > 0, axis=1)
+
+def unpack_states(packed: np.ndarray, state_shape) -> np.ndarray:
+    """
+    將 pack_states 的結果還原為 (N, *state_shape) 的 float32 陣列。
+
+    Args:
+        packed (np.ndarray): 位元壓縮後的狀態。
+        state_shape (tuple): 單一狀態的形狀。
+
+    Returns:
+        np.ndarray: float32 狀態陣列。
+    """
+    size = int(np.prod(state_shape))
+    bits = np.unpackbits(packed, axis=1, count=size)
+    return bits.reshape((len(packed),) + tuple(state_shape)).astype(np.float32)
+
+def rule_ai_params() -> dict:
+    """返回影響規則 AI 決策的參數（變更時專家數據需重新收集）。"""
+    return {
+        "speed": PACMAN_AI_SPEED,
+        "max_stuck_frames": MAX_STUCK_FRAMES,
+        "plan_threat_radius": PLAN_THREAT_RADIUS,
+        "plan_danger_radius": PLAN_DANGER_RADIUS,
+    }
+
+def cache_key(game_config: GameConfig, num_episodes: int, max_steps_per_episode: int, expert_random_prob: float,
+              max_expert_data: int, ghost_penalty_weight: float) -> str:
+    """
+    計算專家數據的快取鍵。
+
+    原理：
+    - 將所有影響數據內容的設定（迷宮種子與尺寸、鬼魂數、環境版本、規則 AI 參數、
+      隨機行動概率、回合數與步數上限、獎勵中的鬼魂懲罰權重）序列化為排序後的 JSON，取 SHA-1 摘要。
+    - 任一設定改變都會得到新的鍵，舊快取自然失效。
+
+    Args:
+        game_config (GameConfig): 遊戲設定（迷宮尺寸、種子與鬼魂數量）。
+
+    Returns:
+        str: 16 位十六進位的快取鍵。
+    """
+    settings = {
+        "seed": game_config.seed,
+        "maze": [game_config.width, game_config.height],
+        "ghost_count": game_config.ghost_count,
+        "env_version": ENV_VERSION,
+        "rule_ai": rule_ai_params(),
+        "expert_random_prob": expert_random_prob,
+        "num_episodes": num_episodes,
+        "max_steps_per_episode": max_steps_per_episode,
+        "max_expert_data": max_expert_data,
+        "ghost_penalty_weight": ghost_penalty_weight,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def save_expert_data(path: str, data: ExpertData) -> None:
+    """
+    以 np.savez_compressed 保存專家數據（先寫入暫存檔再替換，避免並行訓練讀到不完整的檔案）。
+
+    Args:
+        path (str): 檔案路徑。
+        data (ExpertData): 專家數據。
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez_compressed(f, **data._replace(state_shape=np.array(data.state_shape))._asdict())
+    os.replace(temp_path, path)
+
+def load_expert_data(path: str) -> ExpertData:
+    """
+    讀取 save_expert_data 保存的專家數據。
+
+    Args:
+        path (str): 檔案路徑。
+
+    Returns:
+        ExpertData: 專家數據。
+    """
+    with np.load(path) as f:
+        fields = {name: f[name] for name in ExpertData._fields}
+    fields["state_shape"] = tuple(int(n) for n in fields["state_shape"])
+    return ExpertData(**fields)
+
+def _init_worker(game_config: GameConfig, ghost_penalty_weight: float) -> None:
+    """進程池初始化：每個工作進程建立一個環境並重複使用。"""
+    global _worker_env
+    _worker_env = PacManEnv(game_config=game_config, ghost_penalty_weight=ghost_penalty_weight)
+
+def _collect_episode(episode: int, max_steps: int, expert_random_prob: float):
+    """
+    在工作進程的環境中執行一個專家回合，返回壓縮後的有效步。
+
+    原理：
+    - 以 random_spawn_seed=episode 重置環境，隨機行動使用由 (種子, 回合) 推導的獨立隨機數生成器，
+      同一設定下的每個回合結果固定，與由哪個進程執行無關。
+    - 只保留 valid_step 的步（Pac-Man 實際移動且未結束），與序列收集時相同。
+
+    Args:
+        episode (int): 回合編號。
+        max_steps (int): 每回合最大步數。
+        expert_random_prob (float): 隨機行動概率。
+
+    Returns:
+        ExpertData: 本回合的數據，狀態已位元壓縮，state_shape 取自環境。
+    """
+    env = _worker_env
+    rng = random.Random(f"{env.seed}-{episode}")
+    state, _ = env.reset(seed=env.seed, random_spawn_seed=episode)
+    states, actions, rewards, next_states, dones = [], [], [], [], []
+    done = False
+    steps = 0
+    while not done and steps < max_steps:
+        if rng.random() < expert_random_prob:
+            action = rng.randrange(env.action_space.n)
+        else:
+            action = env.get_expert_action()
+        next_state, reward, done, info = env.step(action)
+        if info.get('valid_step', False):
+            states.append(state)
+            actions.append(action)
+            rewards.append(reward)
+            next_states.append(next_state)
+            dones.append(done)
+        state = next_state
+        steps += 1
+    shape = (-1,) + env.state_shape  # 空列表也能得到正確的形狀
+    return ExpertData(pack_states(np.array(states, dtype=np.float32).reshape(shape)), np.array(actions, dtype=np.int8),
+                      np.array(rewards, dtype=np.float32),
+                      pack_states(np.array(next_states, dtype=np.float32).reshape(shape)),
+                      np.array(dones, dtype=np.bool_), env.state_shape)
+
+def _episode_results(game_config: GameConfig, num_episodes: int, max_steps: int, expert_random_prob: float,
+                     ghost_penalty_weight: float, workers: int):
+    """依回合順序產生每個回合的結果；workers 為 0 時在主進程中執行。"""
+    if workers <= 0:
+        _init_worker(game_config, ghost_penalty_weight)
+        for episode in range(num_episodes):
+            yield _collect_episode(episode, max_steps, expert_random_prob)
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(game_config, ghost_penalty_weight)) as pool:
+        results = pool.map(_collect_episode, range(num_episodes), [max_steps] * num_episodes,
+                           [expert_random_prob] * num_episodes)
+        try:
+            yield from results
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)  # 數據已足夠時取消尚未開始的回合
+
+def collect_expert_data(game_config: Optional[GameConfig] = None, num_episodes: int = EXPERT_EPISODES,
+                        max_steps_per_episode: int = EXPERT_MAX_STEPS_PER_EPISODE,
+                        expert_random_prob: float = EXPERT_RANDOM_PROB, max_expert_data: int = MAX_EXPERT_DATA,
+                        ghost_penalty_weight: float = GHOST_PENALTY_WEIGHT, workers: Optional[int] = None,
+                        cache_dir: Optional[str] = EXPERT_CACHE_DIR) -> ExpertData:
+    """
+    收集（或從快取載入）專家數據。
+
+    原理：
+    - 快取檔案為 cache_dir/expert_<cache_key>.npz；存在時直接載入，不建立環境。
+    - 否則將回合分配給進程池並行模擬，按回合順序合併結果，數據量達到 max_expert_data 後
+      取消剩餘回合並截斷，內容與序列收集相同（與 workers 數無關），再寫入快取。
+    - 狀態為 0/1 的 6 通道網格，以 np.packbits 壓縮後約為 float32 的 1/32，再以 zip 壓縮保存。
+
+    Args:
+        game_config (GameConfig, optional): 遊戲設定（迷宮尺寸、種子與鬼魂數量），None 表示以 load_config 載入。
+        num_episodes (int): 最多收集的回合數。
+        max_steps_per_episode (int): 每回合最大步數。
+        expert_random_prob (float): 隨機行動概率。
+        max_expert_data (int): 最大數據量。
+        ghost_penalty_weight (float): 環境獎勵的鬼魂懲罰權重（影響保存的獎勵）。
+        workers (int, optional): 工作進程數，None 表示 CPU 核心數，0 表示在主進程中收集。
+        cache_dir (str, optional): 快取目錄，None 表示不使用快取。
+
+    Returns:
+        ExpertData: 專家數據。
+
+    Raises:
+        ImportError: 若需要模擬但環境依賴（gym）未安裝。
+    """
+    game_config = game_config or load_config()
+    path = None
+    if cache_dir is not None:
+        key = cache_key(game_config, num_episodes, max_steps_per_episode, expert_random_prob, max_expert_data,
+                        ghost_penalty_weight)
+        path = os.path.join(cache_dir, f"expert_{key}.npz")
+        if os.path.exists(path):
+            data = load_expert_data(path)
+            print(f"從快取載入專家數據：{path}，數據量：{len(data.actions)}")
+            return data
+    if PacManEnv is None:
+        raise ImportError("收集專家數據需要 gym（PacManEnv），請先安裝")
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    parts = []
+    total = 0
+    for episode, part in enumerate(_episode_results(game_config, num_episodes, max_steps_per_episode, expert_random_prob,
+                                                    ghost_penalty_weight, workers)):
+        parts.append(part)
+        total += len(part.actions)
+        print(f"專家回合 {episode + 1}/{num_episodes}，數據量：{total}")
+        if total >= max_expert_data:
+            break
+    columns = [np.concatenate(column)[:max_expert_data] for column in zip(*(part[:5] for part in parts))]
+    data = ExpertData(*columns, state_shape=parts[0].state_shape)  # 狀態形狀取自環境
+    if path is not None:
+        save_expert_data(path, data)
+        print(f"專家數據已快取：{path}")
+    return data
@@ -0,0 +1,133 @@
+# ai/expert_dataset.py
+"""
+預訓練用的張量數據集：專家數據一次轉換為連續張量並放在訓練設備上，
+以每個 epoch 重新打亂的索引切出小批量，並由背景執行緒預先取出下一批。
+"""
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import torch
+from ai.expert_data import ExpertData
+
+class ExpertDataset:
+    def __init__(self, data: ExpertData, device="cpu"):
+        """
+        將專家數據載入為設備上的連續張量。
+
+        原理：
+        - 磁碟上的狀態為位元壓縮的 uint8（ExpertData.states），此處只解壓縮一次為 uint8 網格，
+          再整體複製到設備並轉為 float32，之後每個批量只需以索引取出，不再經過 Python 列表或 NumPy。
+        - 動作轉為 int64 張量，可直接用於 cross_entropy。
+
+        Args:
+            data (ExpertData): collect_expert_data 返回的專家數據。
+            device (str | torch.device): 訓練設備。
+        """
+        self.device = torch.device(device)
+        size = int(np.prod(data.state_shape))
+        bits = np.unpackbits(data.states, axis=1, count=size).reshape((len(data.states),) + tuple(data.state_shape))
+        self.states = torch.from_numpy(bits).to(self.device).float()
+        self.actions = torch.from_numpy(data.actions.astype(np.int64)).to(self.device)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def batches(self, batch_size: int, steps: int, seed: Optional[int] = None) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        """
+        產生 steps 個打亂的小批量。
+
+        原理：
+        - 每個 epoch 以 torch.randperm 打亂索引，依序切出 batch_size 個索引，
+          每筆數據在一個 epoch 內恰好出現一次；不足一個批量的尾段捨棄，批量形狀固定。
+        - 數據量少於 batch_size 時，每個批量為整個數據集（與原先 min(batch_size, N) 的取樣相同）。
+
+        Args:
+            batch_size (int): 批量大小。
+            steps (int): 批量數。
+            seed (int, optional): 打亂順序的種子，None 表示不固定。
+
+        Yields:
+            Tuple[torch.Tensor, torch.Tensor]: (狀態, 動作)。
+        """
+        if len(self) == 0:
+            raise ValueError("專家數據集為空，無法產生批量")
+        generator = torch.Generator()
+        if seed is None:
+            generator.seed()
+        else:
+            generator.manual_seed(seed)
+        batch_size = min(batch_size, len(self))
+        per_epoch = len(self) // batch_size
+        produced = 0
+        while produced < steps:
+            order = torch.randperm(len(self), generator=generator).to(self.device)
+            for start in range(0, min(per_epoch, steps - produced) * batch_size, batch_size):
+                index = order[start:start + batch_size]
+                yield self.states.index_select(0, index), self.actions.index_select(0, index)
+            produced += min(per_epoch, steps - produced)
+
+class BatchPrefetcher(threading.Thread):
+    """
+    背景預取執行緒：在主執行緒執行前向與反向傳播時準備下一個批量。
+
+    原理：
+    - 執行緒消耗批量產生器並放入有界佇列（預設 2 個），佇列已滿時等待，提供背壓。
+    - PyTorch 的索引與設備運算會釋放 GIL，批量準備能與訓練步驟重疊。
+    - 產生器中的例外會在主執行緒迭代時重新拋出。
+    """
+    _DONE = object()  # 產生器結束標記
+
+    def __init__(self, batches: Iterator, depth: int = 2):
+        """
+        初始化並啟動預取執行緒。
+
+        Args:
+            batches (Iterator): 批量產生器（例如 ExpertDataset.batches）。
+            depth (int): 預取的批量數。
+        """
+        super().__init__(daemon=True)
+        self.batches = batches
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None  # 產生器中發生的例外
+        self.stop_event = threading.Event()
+        self.start()
+
+    def _put(self, item) -> bool:
+        """
+        將項目放入佇列，佇列已滿時每 0.1 秒檢查一次是否已要求停止。
+
+        Returns:
+            bool: 是否成功放入（False 表示已要求停止）。
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self) -> None:
+        try:
+            for batch in self.batches:
+                if not self._put(batch):
+                    return
+        except Exception as e:
+            self.error = e
+        self._put(self._DONE)  # 結束標記同樣不可無限期阻塞，close 時消費者已不再讀取
+
+    def __iter__(self):
+        while True:
+            batch = self.queue.get()
+            if batch is self._DONE:
+                break
+            yield batch
+        if self.error is not None:
+            raise RuntimeError(f"批量預取失敗：{self.error}")
+
+    def close(self) -> None:
+        """停止預取並等待執行緒結束（提前結束迭代時呼叫）。"""
+        self.stop_event.set()
+        self.join()
@@ -0,0 +1,159 @@
+# ai/metrics_store.py
+"""
+列式（columnar）訓練指標儲存：每個訓練執行一個目錄，每張表（例如每步 step、每回合 episode）
+的每個欄位按區塊保存為獨立的 .npy 檔案。繪圖時只讀取需要的欄位，並以 min / max / mean
+降採樣到螢幕解析度，千萬步的訓練也能在數秒內繪製。
+"""
+
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+STEP_COLUMN = "step"  # 每張表的步數欄位（int64），其餘欄位為 float32
+DEFAULT_CHUNK_ROWS = 65536  # 每個區塊的列數
+DEFAULT_FLUSH_INTERVAL = 60.0  # 未滿區塊的最長緩衝時間（秒）
+
+class MetricsWriter:
+    def __init__(self, run_dir: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        初始化指標寫入器。
+
+        原理：
+        - 每張表在記憶體中累積一個區塊（chunk_rows 列），滿了即寫出，每個欄位一個 run_dir/表/欄位/XXXXXX.npy；
+          寫出頻率極低，不需要背景執行緒。
+        - 每筆資料少的表（例如每回合一列的 episode）可能數小時才滿一個區塊，因此距上次寫出超過
+          flush_interval 秒時也寫出所有未滿的區塊（呼叫端亦可在檢查點時呼叫 flush）；
+          訓練中斷最多遺失 flush_interval 秒的指標，訓練中也能即時繪圖。讀取時會合併所有區塊。
+        - 同一區塊中未記錄某欄位的列（例如未學習的步沒有 Loss）以 NaN 填補；
+          讀取時缺少該欄位的區塊也視為 NaN。
+        - 繼續寫入已存在的執行目錄時，區塊編號接在現有區塊之後。
+
+        Args:
+            run_dir (str): 此次執行的指標目錄。
+            chunk_rows (int): 每個區塊的列數。
+            flush_interval (float, optional): 未滿區塊的最長緩衝時間（秒），None 表示只在區塊滿或 flush 時寫出。
+            timer (Callable[[], float]): 時間來源（秒），測試時可替換。
+        """
+        self.run_dir = run_dir
+        self.chunk_rows = chunk_rows
+        self._rows: Dict[str, List[Tuple[int, dict]]] = {}  # 表 -> 尚未寫出的 (步數, 欄位值) 列
+        self._next_chunk: Dict[str, int] = {}  # 表 -> 下一個區塊編號
+        self.flush_interval = flush_interval
+        self._timer = timer
+        self._last_flush = timer()  # 上次寫出所有表的時間
+        os.makedirs(run_dir, exist_ok=True)
+
+    def log(self, table: str, step: int, **values: float) -> None:
+        """
+        記錄一列指標。
+
+        Args:
+            table (str): 表名稱（例如 "step" 或 "episode"）。
+            step (int): 步數（x 軸）。
+            **values (float): 欄位名稱與數值。
+        """
+        rows = self._rows.setdefault(table, [])
+        rows.append((step, values))
+        if len(rows) >= self.chunk_rows:
+            self._flush_table(table)
+        elif self.flush_interval is not None and self._timer() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _flush_table(self, table: str) -> None:
+        """將表的緩衝列寫出為一個區塊。"""
+        rows = self._rows.get(table)
+        if not rows:
+            return
+        if table not in self._next_chunk:
+            self._next_chunk[table] = len(chunk_names(self.run_dir, table))
+        chunk = self._next_chunk[table]
+        columns = {STEP_COLUMN: np.fromiter((step for step, _ in rows), dtype=np.int64, count=len(rows))}
+        names = sorted({name for _, values in rows for name in values})
+        for name in names:
+            columns[name] = np.fromiter((values.get(name, np.nan) for _, values in rows), dtype=np.float32,
+                                        count=len(rows))
+        for name, array in columns.items():
+            directory = os.path.join(self.run_dir, table, name)
+            os.makedirs(directory, exist_ok=True)
+            np.save(os.path.join(directory, f"{chunk:06d}.npy"), array)
+        self._next_chunk[table] = chunk + 1
+        self._rows[table] = []
+
+    def flush(self) -> None:
+        """寫出所有表的緩衝列（不足一個區塊也寫出）。"""
+        for table in list(self._rows):
+            self._flush_table(table)
+        self._last_flush = self._timer()
+
+    def close(self) -> None:
+        """寫出剩餘的緩衝列。"""
+        self.flush()
+
+def chunk_names(run_dir: str, table: str) -> List[str]:
+    """返回表的區塊檔名（按編號排序），以步數欄位為準。"""
+    directory = os.path.join(run_dir, table, STEP_COLUMN)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith(".npy"))
+
+def list_runs(metrics_dir: str) -> List[str]:
+    """返回指標目錄下的執行目錄（按名稱排序）。"""
+    if not os.path.isdir(metrics_dir):
+        return []
+    return sorted(os.path.join(metrics_dir, name) for name in os.listdir(metrics_dir)
+                  if os.path.isdir(os.path.join(metrics_dir, name)))
+
+def read_column(run_dir: str, table: str, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    讀取一個欄位及其步數，只開啟該欄位與步數欄位的檔案。
+
+    Args:
+        run_dir (str): 執行目錄。
+        table (str): 表名稱。
+        column (str): 欄位名稱。
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (步數, 數值)，已移除 NaN（未記錄）的列。
+    """
+    steps, values = [], []
+    for name in chunk_names(run_dir, table):
+        chunk_steps = np.load(os.path.join(run_dir, table, STEP_COLUMN, name), mmap_mode="r")
+        path = os.path.join(run_dir, table, column, name)
+        if not os.path.exists(path):
+            continue  # 此區塊沒有記錄該欄位
+        chunk_values = np.load(path, mmap_mode="r")
+        recorded = ~np.isnan(chunk_values)
+        steps.append(chunk_steps[recorded])
+        values.append(chunk_values[recorded])
+    if not steps:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    return np.concatenate(steps), np.concatenate(values)
+
+def downsample(steps: np.ndarray, values: np.ndarray, buckets: int) -> Optional[Tuple[np.ndarray, ...]]:
+    """
+    將數據依序分成最多 buckets 段，每段返回起始步數、最小值、最大值與平均值。
+
+    原理：
+    - 螢幕寬度只有數千像素，千萬個點繪製出來與每個像素一段的 min / max 包絡加平均線相同，
+      以 np.minimum.reduceat / np.maximum.reduceat / np.add.reduceat 一次計算所有段，複雜度 O(N)。
+    - 點數不超過 buckets 時原樣返回（min = max = mean = 數值）。
+
+    Args:
+        steps (np.ndarray): 步數。
+        values (np.ndarray): 數值。
+        buckets (int): 段數（通常為圖表寬度的像素數）。
+
+    Returns:
+        Tuple[np.ndarray, ...]: (步數, 最小值, 最大值, 平均值)。
+    """
+    if len(values) <= buckets:
+        values = np.asarray(values, dtype=np.float64)
+        return np.asarray(steps), values, values, values
+    starts = np.linspace(0, len(values), buckets, endpoint=False).astype(np.int64)
+    counts = np.diff(np.append(starts, len(values)))
+    values = np.asarray(values, dtype=np.float64)
+    return (np.asarray(steps)[starts], np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts),
+            np.add.reduceat(values, starts) / counts)
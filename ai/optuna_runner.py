@@ -0,0 +1,166 @@
+# ai/optuna_runner.py
+"""
+並行 Optuna 超參數搜尋：多個工作進程共用同一個 SQLite study，每個試驗在獨立的子進程中執行並限制 CPU 執行緒數，
+以逐次減半（Successive Halving）在少量回合後淘汰表現差的試驗，迷宮與專家數據快取在試驗之間共用。
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+
+import argparse
+import multiprocessing
+import optuna
+from config import EXPERT_CACHE_DIR
+from game.game_config import GameConfig, add_config_arguments, config_from_args, load_config
+from game.maze_generator import generated_maze
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+def limit_threads(threads: int) -> None:
+    """
+    限制數值庫的執行緒數（需在載入 torch / NumPy 的 BLAS 之前呼叫）。
+
+    原理：
+    - 多個試驗同時執行時，若每個進程都使用全部核心，執行緒會互相搶佔並頻繁切換，總吞吐量反而下降；
+      將每個進程限制為 CPU 核心數 / 工作進程數，核心被平均分配。
+
+    Args:
+        threads (int): 每個進程可使用的執行緒數。
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+def make_storage(url: str):
+    """
+    建立 study 的儲存後端；SQLite 使用較長的鎖等待時間與心跳，讓多個進程可同時寫入，
+    並將異常終止的進程遺留的試驗標記為失敗。
+    """
+    if url.startswith("sqlite"):
+        return optuna.storages.RDBStorage(url, engine_kwargs={"connect_args": {"timeout": 60}},
+                                          heartbeat_interval=60, grace_period=180)
+    return url
+
+def make_pruner(min_episodes: int, reduction_factor: int):
+    """逐次減半剪枝器：第 k 輪在 min_episodes × reduction_factor^k 回合時只保留前 1/reduction_factor 的試驗。"""
+    return optuna.pruners.SuccessiveHalvingPruner(min_resource=min_episodes, reduction_factor=reduction_factor)
+
+def _init_worker(threads: int) -> None:
+    """工作進程初始化：在載入 torch 之前限制執行緒數。"""
+    limit_threads(threads)
+
+def run_trial(storage_url: str, study_name: str, episodes: int, min_episodes: int, reduction_factor: int,
+              output_dir: str, expert_cache_dir: str, threads: int, game_config: GameConfig) -> None:
+    """
+    在當前（獨立的）工作進程中執行一個試驗。
+
+    原理：
+    - 工作進程以 maxtasksperchild=1 建立，每個試驗結束後進程即退出，
+      GPU 記憶體、全域狀態與洩漏的資源不會影響下一個試驗。
+    - 試驗在 output_dir/trial_XXXX 目錄中執行，模型、回放緩衝區、TensorBoard 日誌與獎勵記錄互不覆蓋。
+    - 專家數據使用共用的快取目錄，並在進程內收集（進程池的工作進程不能再建立子進程）。
+
+    Args:
+        storage_url (str): study 的儲存位置（例如 sqlite:///optuna.db）。
+        study_name (str): study 名稱。
+        episodes (int): 完整訓練的回合數。
+        min_episodes (int): 逐次減半第一輪的回合數。
+        reduction_factor (int): 逐次減半的淘汰比例。
+        output_dir (str): 試驗輸出目錄（絕對路徑）。
+        expert_cache_dir (str): 專家數據快取目錄（絕對路徑）。
+        threads (int): 每個進程的執行緒數。
+        game_config (GameConfig): 遊戲設定（所有試驗使用同一迷宮）。
+    """
+    import torch  # 執行緒環境變數已在 _init_worker 中設定
+    torch.set_num_threads(threads)
+    from train import train
+
+    study = optuna.load_study(study_name=study_name, storage=make_storage(storage_url),
+                              sampler=optuna.samplers.TPESampler(constant_liar=True),
+                              pruner=make_pruner(min_episodes, reduction_factor))
+
+    def objective(trial):
+        trial_dir = os.path.join(output_dir, f"trial_{trial.number:04d}")
+        os.makedirs(trial_dir, exist_ok=True)
+        os.chdir(trial_dir)
+        return train(trial=trial, episodes=episodes, early_stop_reward=10000,
+                     model_path=os.path.join(trial_dir, "pacman_dqn.pth"),
+                     memory_path=os.path.join(trial_dir, "replay_buffer.pkl"),
+                     expert_workers=0, expert_cache_dir=expert_cache_dir, game_config=game_config,
+                     min_episodes=min_episodes)  # 從剪枝器第一輪的回合數起回報
+
+    study.optimize(objective, n_trials=1, catch=(Exception,))
+
+def run_search(n_trials: int = 50, workers: int = None, threads: int = None, storage_url: str = "sqlite:///optuna.db",
+               study_name: str = "pacman_dqn", episodes: int = 500, min_episodes: int = 50, reduction_factor: int = 3,
+               output_dir: str = "optuna_runs", expert_cache_dir: str = EXPERT_CACHE_DIR, game_config: GameConfig = None):
+    """
+    以多個工作進程執行 n_trials 個試驗。
+
+    原理：
+    - 主進程建立（或沿用）study，再以進程池同時執行 workers 個試驗，每個試驗一個全新進程；
+      TPE 採樣器使用 constant_liar，避免並行的試驗在同一區域重複採樣。
+    - 逐次減半：試驗在 min_episodes、min_episodes × reduction_factor … 回合時與同輪的試驗比較，
+      只有前 1/reduction_factor 能繼續訓練，大多數試驗只花費完整預算的一小部分。
+    - 在支援 fork 的平台上，主進程先生成迷宮（連同特徵索引），子進程直接繼承而不重新生成；
+      專家數據以磁碟快取在試驗之間共用（train 的專家參數以固定步長採樣，使快取鍵可以重複命中）。
+
+    Args:
+        n_trials (int): 試驗總數。
+        workers (int, optional): 同時執行的試驗數，None 表示 CPU 核心數。
+        threads (int, optional): 每個試驗的執行緒數，None 表示 CPU 核心數 / workers。
+        storage_url (str): study 的儲存位置。
+        study_name (str): study 名稱。
+        episodes (int): 完整訓練的回合數。
+        min_episodes (int): 逐次減半第一輪的回合數。
+        reduction_factor (int): 逐次減半的淘汰比例。
+        output_dir (str): 試驗輸出目錄。
+        expert_cache_dir (str): 專家數據快取目錄。
+        game_config (GameConfig, optional): 遊戲設定，None 表示以 load_config 載入。
+
+    Returns:
+        optuna.Study: 搜尋完成後的 study。
+    """
+    cpus = os.cpu_count() or 1
+    workers = cpus if workers is None else workers
+    threads = max(1, cpus // workers) if threads is None else threads
+    if storage_url.startswith("sqlite:///"):  # 試驗會切換工作目錄，SQLite 路徑需為絕對路徑
+        storage_url = "sqlite:///" + os.path.abspath(storage_url[len("sqlite:///"):])
+    output_dir = os.path.abspath(output_dir)
+    expert_cache_dir = os.path.abspath(expert_cache_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    study = optuna.create_study(study_name=study_name, storage=make_storage(storage_url), direction="maximize",
+                                pruner=make_pruner(min_episodes, reduction_factor), load_if_exists=True)
+    game_config = game_config or load_config()
+    generated_maze(game_config.width, game_config.height, game_config.seed)  # fork 的子進程繼承已生成的迷宮
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    print(f"開始並行搜尋：{n_trials} 個試驗，{workers} 個工作進程，每個進程 {threads} 個執行緒")
+    args = (storage_url, study_name, episodes, min_episodes, reduction_factor, output_dir, expert_cache_dir, threads,
+            game_config)
+    with context.Pool(workers, initializer=_init_worker, initargs=(threads,), maxtasksperchild=1) as pool:
+        pool.starmap(run_trial, [args] * n_trials, chunksize=1)
+    return study
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel Optuna search for the Pac-Man DQN agent")
+    parser.add_argument('--trials', type=int, default=50, help='Number of trials')
+    parser.add_argument('--workers', type=int, default=None, help='Concurrent trials (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads per trial (default: CPU count / workers)')
+    parser.add_argument('--storage', type=str, default="sqlite:///optuna.db", help='Optuna storage URL')
+    parser.add_argument('--study_name', type=str, default="pacman_dqn", help='Optuna study name')
+    parser.add_argument('--episodes', type=int, default=500, help='Full training budget per trial (episodes)')
+    parser.add_argument('--min_episodes', type=int, default=50, help='Episodes in the first successive-halving rung')
+    parser.add_argument('--reduction_factor', type=int, default=3, help='Successive-halving reduction factor')
+    parser.add_argument('--output_dir', type=str, default="optuna_runs", help='Directory for per-trial outputs')
+    parser.add_argument('--expert_cache_dir', type=str, default=EXPERT_CACHE_DIR, help='Shared expert data cache')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    study = run_search(n_trials=args.trials, workers=args.workers, threads=args.threads, storage_url=args.storage,
+                       study_name=args.study_name, episodes=args.episodes, min_episodes=args.min_episodes,
+                       reduction_factor=args.reduction_factor, output_dir=args.output_dir,
+                       expert_cache_dir=args.expert_cache_dir, game_config=config_from_args(args))
+    completed = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    if completed:
+        print("最佳試驗：", study.best_trial.params)
+        print(f"最佳值：{study.best_value:.2f}")
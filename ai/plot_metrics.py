@@ -1,14 +1,24 @@
 # ai/plot_metrics.py
 """
-繪製 DQN 訓練過程中的獎勵和損失圖表，從 TensorBoard 日誌或 JSON 檔案提取數據。
+繪製 DQN 訓練過程中的獎勵和損失圖表，優先從列式指標儲存（ai.metrics_store）讀取並降採樣，
+否則從 TensorBoard 日誌或 JSON 檔案提取數據。
 使用 Matplotlib 生成圖表並保存為 PNG 檔案，支援離線分析。
 """
 
 import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+
+import argparse
 import json
 import matplotlib.pyplot as plt
-from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
 import numpy as np
+from config import METRICS_DIR
+from ai.metrics_store import list_runs, read_column, downsample
+try:
+    from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
+except ImportError:  # 只使用列式指標儲存時不需要 TensorBoard
+    EventAccumulator = None
 
 def extract_metrics_from_runs(runs_dir="runs"):
     """
@@ -64,14 +74,61 @@ def load_rewards_from_json(json_path="episode_rewards.json"):
         return [(i + 1, r) for i, r in enumerate(rewards)]  # 轉為 (回合, 獎勵) 格式
     return []  # 檔案不存在時返回空列表
 
-def plot_metrics(runs_dir="runs", json_path="episode_rewards.json"):
+def latest_run(metrics_dir=METRICS_DIR):
+    """返回最近修改的執行目錄，沒有時為 None。"""
+    runs = list_runs(metrics_dir)
+    return max(runs, key=os.path.getmtime) if runs else None
+
+def plot_store_metrics(run_dir, output="training_metrics.png", width=10, dpi=100):
     """
-    繪製訓練過程中的獎勵和損失圖表，優先從 JSON 檔案載入獎勵，否則從 runs 目錄提取。
+    從列式指標儲存繪製獎勵與損失，每條曲線降採樣為每像素一段的平均線與 min / max 包絡。
+
+    原理：
+    - 只讀取 episode 表的 Reward 欄位與 step 表的 Loss 欄位（及各自的步數），其他欄位不開啟。
+    - 段數 = 圖寬（英寸）× dpi，繪製的點數與訓練長度無關。
+
+    Args:
+        run_dir (str): 執行目錄（metrics_dir 下的子目錄）。
+        output (str): 輸出 PNG 路徑。
+        width (float): 圖寬（英寸）。
+        dpi (int): 每英寸像素數。
+    """
+    buckets = int(width * dpi)
+    fig, axes = plt.subplots(2, 1, figsize=(width, 8))
+    for ax, (table, column, xlabel, color) in zip(axes, [("episode", "Reward", "Episode", "blue"),
+                                                        ("step", "Loss", "Training Step", "red")]):
+        steps, values = read_column(run_dir, table, column)
+        if len(values):
+            x, low, high, mean = downsample(steps, values, buckets)
+            ax.fill_between(x, low, high, color=color, alpha=0.2, linewidth=0, label=f'{column} (min/max)')
+            ax.plot(x, mean, color=color, label=f'{column} (mean)')
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(column)
+        ax.set_title(f'Training {column} ({len(values):,} points)')
+        ax.grid(True)
+        ax.legend()
+    plt.tight_layout()
+    plt.savefig(output, dpi=dpi)
+    plt.close(fig)
+
+def plot_metrics(runs_dir="runs", json_path="episode_rewards.json", metrics_dir=METRICS_DIR, run_dir=None):
+    """
+    繪製訓練過程中的獎勵和損失圖表。
+    有列式指標時繪製指定（或最近）的執行；否則優先從 JSON 檔案載入獎勵，再從 runs 目錄提取。
 
     Args:
         runs_dir (str): TensorBoard 日誌目錄，預設為 "runs"。
         json_path (str): 獎勵 JSON 檔案路徑，預設為 "episode_rewards.json"。
+        metrics_dir (str): 列式指標目錄。
+        run_dir (str, optional): 要繪製的執行目錄，None 表示 metrics_dir 中最近的執行。
     """
+    run_dir = run_dir or latest_run(metrics_dir)
+    if run_dir is not None:
+        plot_store_metrics(run_dir)
+        return
+    if EventAccumulator is None:
+        print("No metrics store found and TensorBoard is not installed")
+        return
     # 嘗試從 JSON 載入獎勵數據，失敗則從 TensorBoard 提取
     rewards = load_rewards_from_json(json_path)
     if not rewards:
@@ -112,5 +169,9 @@ def plot_metrics(runs_dir="runs", json_path="episode_rewards.json"):
     plt.savefig("training_metrics.png")  # 保存為 PNG
     
 if __name__ == "__main__":
-    plot_metrics()  # 執行繪圖函數
+    parser = argparse.ArgumentParser(description="Plot Pac-Man DQN training metrics")
+    parser.add_argument('--metrics_dir', type=str, default=METRICS_DIR, help='Columnar metrics directory')
+    parser.add_argument('--run', type=str, default=None, help='Run directory to plot (default: most recent)')
+    args = parser.parse_args()
+    plot_metrics(metrics_dir=args.metrics_dir, run_dir=args.run)  # 執行繪圖函數
     print("Metrics plotted and saved as 'training_metrics.png'.")  # 提示完成
\ No newline at end of file
@@ -0,0 +1,139 @@
+# ai/telemetry.py
+"""
+低開銷訓練遙測：在進程內彙總指標（執行中的平均、最小、最大值與固定分箱直方圖），
+每隔 interval 步才寫出一次到列式指標儲存（及可選的 TensorBoard 直方圖），取代每步寫入與裝置同步。
+"""
+
+import bisect
+from typing import Callable, Dict, Iterable, Optional
+
+class RunningStat:
+    __slots__ = ("count", "total", "total_squares", "minimum", "maximum", "edges", "counts")
+
+    def __init__(self, edges: Optional[list] = None):
+        """
+        初始化一個指標的彙總。
+
+        Args:
+            edges (list, optional): 直方圖分箱邊界（遞增），None 表示不記錄直方圖。
+        """
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1) if edges is not None else None  # 含兩端溢出箱
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        if self.counts is not None:
+            self.counts = [0] * len(self.counts)
+
+    def add(self, value: float) -> None:
+        """加入一個數值（純 Python 運算，每次約數百奈秒）。"""
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if self.counts is not None:
+            self.counts[bisect.bisect_right(self.edges, value)] += 1
+
+class Telemetry:
+    def __init__(self, metrics, interval: int = 1000, table: str = "step", summary_writer=None):
+        """
+        初始化遙測。
+
+        原理：
+        - record / record_values 只更新進程內的 RunningStat，不觸發裝置同步或檔案寫入。
+        - gauge 為寫出時才呼叫的函數（例如 DQN 的噪聲統計需要 GPU → CPU 同步），每個寫出週期只計算一次。
+        - 每 interval 步寫出一列：每個指標的平均值（欄位名即指標名）與 _min、_max、_count；
+          有分箱的指標另以 add_histogram_raw 寫入 TensorBoard（若提供 summary_writer）。
+
+        Args:
+            metrics (MetricsWriter): 列式指標寫入器。
+            interval (int): 寫出間隔（步）。
+            table (str): 寫入的表名稱。
+            summary_writer (SummaryWriter, optional): TensorBoard 寫入器，用於直方圖。
+
+        Raises:
+            ValueError: 若 interval 不為正。
+        """
+        if interval <= 0:
+            raise ValueError(f"遙測寫出間隔必須大於 0，得到 {interval}")
+        self.metrics = metrics
+        self.interval = interval
+        self.table = table
+        self.summary_writer = summary_writer
+        self.stats: Dict[str, RunningStat] = {}
+        self.gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self.last_flush = None  # 上次寫出的步數
+
+    def histogram(self, name: str, edges: Iterable[float]) -> None:
+        """為指標設置直方圖分箱邊界（需在第一次記錄前呼叫）。"""
+        self.stats[name] = RunningStat(sorted(edges))
+
+    def add_gauge(self, name: str, read: Callable[[], Dict[str, float]]) -> None:
+        """註冊寫出時才讀取的指標組（read 返回 名稱 -> 數值）。"""
+        self.gauges[name] = read
+
+    def record(self, name: str, value: float) -> None:
+        """記錄一個數值。"""
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = RunningStat()
+        stat.add(value)
+
+    def record_values(self, name: str, values) -> None:
+        """記錄一組數值（例如一次前向傳播的所有 Q 值）。"""
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = RunningStat()
+        for value in values:
+            stat.add(value)
+
+    def step(self, step: int) -> None:
+        """
+        每個訓練步呼叫一次，距離上次寫出達到 interval 步時寫出。
+
+        Args:
+            step (int): 目前的訓練步數。
+        """
+        if self.last_flush is None:
+            self.last_flush = step
+        elif step - self.last_flush >= self.interval:
+            self.flush(step)
+
+    def flush(self, step: int) -> None:
+        """
+        寫出目前的彙總並重置。
+
+        Args:
+            step (int): 寫出時的訓練步數。
+        """
+        row = {}
+        for read in self.gauges.values():
+            row.update(read())
+        for name, stat in self.stats.items():
+            if stat.count == 0:
+                continue
+            row[name] = stat.total / stat.count
+            row[f"{name}_min"] = stat.minimum
+            row[f"{name}_max"] = stat.maximum
+            row[f"{name}_count"] = stat.count
+            if stat.counts is not None and self.summary_writer is not None:
+                self._write_histogram(name, stat, step)
+            stat.reset()
+        if row:
+            self.metrics.log(self.table, step, **row)
+        self.last_flush = step
+
+    def _write_histogram(self, name: str, stat: RunningStat, step: int) -> None:
+        """以分箱計數寫入 TensorBoard 直方圖（溢出箱的上界取最大值）。"""
+        limits = list(stat.edges) + [max(stat.maximum, stat.edges[-1])]
+        self.summary_writer.add_histogram_raw(
+            name, min=stat.minimum, max=stat.maximum, num=stat.count, sum=stat.total,
+            sum_squares=stat.total_squares, bucket_limits=limits, bucket_counts=stat.counts, global_step=step)
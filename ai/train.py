@@ -7,35 +7,24 @@ import json
 from torch.utils.tensorboard import SummaryWriter
 from environment import PacManEnv
 from agent import DQNAgent
+from ai.expert_data import collect_expert_data, unpack_states
+from ai.metrics_store import MetricsWriter
+from ai.telemetry import Telemetry
+from ai.checkpoint import CheckpointWriter, latest_checkpoint, rng_state, restore_rng_state
+from game.game_config import add_config_arguments, config_from_args, load_config
 from config import *
 import random
 import optuna
 
-def collect_expert_data(env, agent, num_episodes=EXPERT_EPISODES, max_steps_per_episode=EXPERT_MAX_STEPS_PER_EPISODE, expert_random_prob=EXPERT_RANDOM_PROB, max_expert_data=MAX_EXPERT_DATA):
-    """
-    收集專家數據用於預訓練。
-    """
-    expert_data = []
-    for episode in range(num_episodes):
-        if len(expert_data) >= max_expert_data:
-            break
-        state, _ = env.reset(random_spawn_seed=episode)
-        done = False
-        steps = 0
-        while not done and steps < max_steps_per_episode:
-            if random.random() < expert_random_prob:
-                action = np.random.randint(0, env.action_space.n)
-            else:
-                action = env.get_expert_action()
-            next_state, reward, done, info = env.step(action)
-            # done = terminated or truncated
-            if info.get('valid_step', False):
-                expert_data.append((state, action))
-                agent.store_transition(state, action, reward, next_state, done)
-            state = next_state
-            steps += 1
-        print(f"專家回合 {episode + 1}/{num_episodes}，步數：{steps}，數據量：{len(expert_data)}")
-    return expert_data[:max_expert_data]
+NOISE_METRICS = [  # (指標名稱, DQN 噪聲統計鍵)
+    ('FC1_Weight_Sigma', 'fc1_weight_sigma_mean'),
+    ('FC1_Bias_Sigma', 'fc1_bias_sigma_mean'),
+    ('Value_Weight_Sigma', 'value_weight_sigma_mean'),
+    ('Value_Bias_Sigma', 'value_bias_sigma_mean'),
+    ('Advantage_Weight_Sigma', 'advantage_weight_sigma_mean'),
+    ('Advantage_Bias_Sigma', 'advantage_bias_sigma_mean'),
+]
+Q_VALUE_EDGES = list(range(-100, 101, 10))  # Q 值直方圖的分箱邊界
 
 def train(trial=None, resume=False,
     model_path=MODEL_PATH, memory_path=MEMORY_PATH, episodes=TRAIN_EPISODES,
@@ -44,9 +33,22 @@ def train(trial=None, resume=False,
     sigma=SIGMA, n_step=N_STEP, gamma=GAMMA, alpha=ALPHA, beta=BETA,
     beta_increment=BETA_INCREMENT, expert_prob_start=EXPERT_PROB_START,
     expert_prob_end=EXPERT_PROB_END, expert_prob_decay_steps=EXPERT_PROB_DECAY_STEPS,
-    expert_random_prob=EXPERT_RANDOM_PROB, max_expert_data=MAX_EXPERT_DATA, ghost_penalty_weight=GHOST_PENALTY_WEIGHT):
+    expert_random_prob=EXPERT_RANDOM_PROB, max_expert_data=MAX_EXPERT_DATA, ghost_penalty_weight=GHOST_PENALTY_WEIGHT,
+    expert_workers=None, expert_cache_dir=EXPERT_CACHE_DIR, checkpoint_dir=CHECKPOINT_DIR, checkpoint_keep=CHECKPOINT_KEEP,
+    metrics_dir=METRICS_DIR, telemetry_interval=TELEMETRY_INTERVAL, game_config=None, min_episodes=50):
     """
     訓練 DQN 代理，支援 Optuna 超參數優化。
+    影響專家數據的參數（隨機行動概率、數據量、鬼魂懲罰權重）以固定步長採樣，使不同試驗可共用專家數據快取。
+    每 5 回合的檢查點在記憶體中複製後交給背景執行緒寫入 checkpoint_dir，訓練不等待磁碟。
+    檢查點包含代理的完整狀態、回合進度、統計列表、隨機數狀態與 TensorBoard 日誌目錄，
+    resume 時從最新的檢查點精確地繼續，不重新收集專家數據或預訓練。
+    每步的 Q 值與損失只在進程內彙總，每 telemetry_interval 步才連同噪聲統計寫入列式指標儲存
+    （metrics_dir/執行名稱）與 TensorBoard 的 Q 值直方圖；Q 值直接取自選擇動作時的前向傳播，不再額外前向。
+    列式指標在每次提交檢查點時（以及 flush_interval 到期時）寫出未滿的區塊，訓練中即可繪圖，中斷時不會遺失整段指標。
+    迷宮尺寸、種子與鬼魂數量來自 game_config（None 表示以 load_config 載入設定檔、環境變數與預設值），
+    環境與專家數據使用同一設定，與遊戲中設定頁面選擇的迷宮一致。
+    Optuna 試驗從完成 min_episodes 回合起每回合回報一次，步數為已完成的回合數，
+    與逐次減半剪枝器的 min_resource（optuna_runner 的 --min_episodes）一致，第一輪在該回合數比較。
     """
     # Optuna 超參數建議（若啟用）
     lr = trial.suggest_float("lr", 1e-4, 1e-2, log=True) if trial else lr
@@ -61,9 +63,9 @@ def train(trial=None, resume=False,
     expert_prob_start = trial.suggest_float("expert_prob_start", 0.2, 0.5) if trial else expert_prob_start
     expert_prob_end = trial.suggest_float("expert_prob_end", 0.01, 0.1) if trial else expert_prob_end
     expert_prob_decay_steps = trial.suggest_int("expert_prob_decay_steps", 100000, 1000000) if trial else expert_prob_decay_steps
-    expert_random_prob = trial.suggest_float("expert_random_prob", 0.05, 0.2) if trial else expert_random_prob
-    max_expert_data = trial.suggest_int("max_expert_data", 5000, 20000) if trial else max_expert_data
-    ghost_penalty_weight = trial.suggest_float("ghost_penalty_weight", 2.0, 10.0) if trial else ghost_penalty_weight
+    expert_random_prob = trial.suggest_float("expert_random_prob", 0.05, 0.2, step=0.05) if trial else expert_random_prob
+    max_expert_data = trial.suggest_int("max_expert_data", 5000, 20000, step=5000) if trial else max_expert_data
+    ghost_penalty_weight = trial.suggest_float("ghost_penalty_weight", 2.0, 10.0, step=2.0) if trial else ghost_penalty_weight
 
     # 參數驗證
     for param, valid, name, desc in [
@@ -91,8 +93,8 @@ def train(trial=None, resume=False,
           f"expert_random_prob={expert_random_prob:.2f}, max_expert_data={max_expert_data:,}, "
           f"ghost_penalty_weight={ghost_penalty_weight:.2f}")
 
-    env = PacManEnv(width=MAZE_WIDTH, height=MAZE_HEIGHT, seed=MAZE_SEED, 
-                    ghost_penalty_weight=ghost_penalty_weight)
+    game_config = game_config or load_config()
+    env = PacManEnv(game_config=game_config, ghost_penalty_weight=ghost_penalty_weight)
     state_dim = env.observation_space.shape
     action_dim = env.action_space.n
     agent = DQNAgent(
@@ -113,25 +115,57 @@ def train(trial=None, resume=False,
         sigma=sigma
     )
 
-    if resume and os.path.exists(model_path):
+    checkpoint = latest_checkpoint(checkpoint_dir) if resume else None
+    resumed = None  # 完整檢查點的狀態（含訓練進度與隨機數狀態）
+    if checkpoint is not None:
+        resumed = agent.load_checkpoint(checkpoint)
+    elif resume and os.path.exists(model_path):
         agent.load(model_path, memory_path)
         print(f"從 {model_path} 載入模型")
 
     if not resume:
         print(f"收集 {pretrain_episodes} 回合的專家數據...")
         expert_data = collect_expert_data(
-            env, agent, pretrain_episodes, max_steps_per_episode=200,
-            expert_random_prob=expert_random_prob, max_expert_data=max_expert_data)
+            game_config=game_config, num_episodes=pretrain_episodes, max_steps_per_episode=200,
+            expert_random_prob=expert_random_prob, max_expert_data=max_expert_data,
+            ghost_penalty_weight=ghost_penalty_weight, workers=expert_workers, cache_dir=expert_cache_dir)
+        states = unpack_states(expert_data.states, expert_data.state_shape)
+        next_states = unpack_states(expert_data.next_states, expert_data.state_shape)
+        for transition in zip(states, expert_data.actions.tolist(), expert_data.rewards.tolist(), next_states,
+                              expert_data.dones.tolist()):
+            agent.store_transition(*transition)
         agent.pretrain(expert_data, pretrain_steps=5000)
 
-    writer = SummaryWriter()
-    episode_rewards = []
-    recent_rewards = []
-    avg_ghost_distances = []
-    ghost_encounters = []
-    lives_lost_list = []
+    checkpoints = CheckpointWriter(checkpoint_dir, keep=checkpoint_keep)
+    if resumed is not None:  # 從中斷的回合繼續，TensorBoard 寫入同一個日誌目錄
+        progress = resumed["training"]
+        start_episode = progress["episode"]
+        episode_rewards = progress["episode_rewards"]
+        recent_rewards = progress["recent_rewards"]
+        avg_ghost_distances = progress["avg_ghost_distances"]
+        ghost_encounters = progress["ghost_encounters"]
+        lives_lost_list = progress["lives_lost_list"]
+        writer = SummaryWriter(log_dir=progress["log_dir"])
+        restore_rng_state(resumed["rng"])
+        print(f"從回合 {start_episode} 繼續訓練")
+    else:
+        start_episode = 0
+        episode_rewards = []
+        recent_rewards = []
+        avg_ghost_distances = []
+        ghost_encounters = []
+        lives_lost_list = []
+        writer = SummaryWriter()
+    metrics = MetricsWriter(os.path.join(metrics_dir, os.path.basename(os.path.normpath(writer.log_dir))))
+    telemetry = Telemetry(metrics, interval=telemetry_interval, summary_writer=writer)
+    telemetry.histogram('Q_Value', Q_VALUE_EDGES)
+
+    def noise_gauge():
+        noise = agent.model.noise_metrics()  # 每個寫出週期一次裝置同步
+        return {name: noise[key] for name, key in NOISE_METRICS}
+    telemetry.add_gauge('noise', noise_gauge)
 
-    for episode in range(episodes):
+    for episode in range(start_episode, episodes):
         total_reward = 0
         steps = 0
         lives_lost = 0
@@ -141,7 +175,8 @@ def train(trial=None, resume=False,
         state, _ = env.reset(random_spawn_seed=episode)
         agent.model.reset_noise()
         action_counts = np.zeros(action_dim)
-        q_values_list = []
+        q_value_total = 0.0
+        q_value_count = 0
         while not done:
             if random.random() < agent.expert_prob:
                 action = env.get_expert_action()
@@ -149,9 +184,10 @@ def train(trial=None, resume=False,
             else:
                 action = agent.choose_action(state)
                 expert_action = False
+                telemetry.record_values('Q_Value', agent.last_q_values.tolist())
+                q_value_total += float(agent.last_q_values.mean())
+                q_value_count += 1
             action_counts[action] += 1
-            q_values, noise_metrics = agent.model(torch.FloatTensor(state).unsqueeze(0).to(device))
-            q_values_list.append(q_values.detach().cpu().numpy().mean())
             # 計算鬼魂距離
             ghost_distances = []
             for i in range(3, 5):  # 索引 3 和 4 是鬼魂通道
@@ -162,27 +198,22 @@ def train(trial=None, resume=False,
                     ghost_y = np.argmax(state[i].max(axis=0))  # 鬼魂 y 座標
                     dist = np.sqrt((pacman_x - ghost_x)**2 + (pacman_y - ghost_y)**2)
                     ghost_distances.append(dist)
-            min_ghost_dist = min(ghost_distances) if ghost_distances else MAZE_WIDTH + MAZE_HEIGHT  # 預設最大距離
+            min_ghost_dist = min(ghost_distances) if ghost_distances else env.width + env.height  # 預設最大距離
             total_ghost_dist += min_ghost_dist
             if min_ghost_dist < 2.0:
                 encounter_count += 1
-            writer.add_scalar('FC1_Weight_Sigma', noise_metrics['fc1_weight_sigma_mean'], agent.steps)
-            writer.add_scalar('FC1_Bias_Sigma', noise_metrics['fc1_bias_sigma_mean'], agent.steps)
-            writer.add_scalar('Value_Weight_Sigma', noise_metrics['value_weight_sigma_mean'], agent.steps)
-            writer.add_scalar('Value_Bias_Sigma', noise_metrics['value_bias_sigma_mean'], agent.steps)
-            writer.add_scalar('Advantage_Weight_Sigma', noise_metrics['advantage_weight_sigma_mean'], agent.steps)
-            writer.add_scalar('Advantage_Bias_Sigma', noise_metrics['advantage_bias_sigma_mean'], agent.steps)
             next_state, reward, done, info = env.step(action)
             # done = terminated or truncated
             if info.get('valid_step', False):
                 agent.store_transition(state, action, reward, next_state, done)
                 loss = agent.learn(expert_action=expert_action)
                 if loss is not None:
-                    writer.add_scalar('Loss', loss, agent.steps)
+                    telemetry.record('Loss', loss)
                 total_reward += reward
                 steps += 1
             if info.get('lives_lost', False):
                 lives_lost += 1
+            telemetry.step(agent.steps)
             state = next_state
         episode_rewards.append(total_reward)
         recent_rewards.append(total_reward)
@@ -194,33 +225,55 @@ def train(trial=None, resume=False,
             avg_ghost_distances.pop(0)
             ghost_encounters.pop(0)
             lives_lost_list.pop(0)
-        writer.add_scalar('Mean_Q_Value', np.mean(q_values_list) if q_values_list else 0, episode)
+        mean_q_value = q_value_total / q_value_count if q_value_count else 0.0
+        writer.add_scalar('Mean_Q_Value', mean_q_value, episode)
         writer.add_scalar('Lives_Lost', lives_lost, episode)
         writer.add_scalar('Avg_Ghost_Distance', avg_ghost_distances[-1], episode)
         writer.add_scalar('Ghost_Encounters', encounter_count, episode)
         for i in range(action_dim):
             writer.add_scalar(f'Action_{i}_Ratio', action_counts[i] / max(steps, 1), episode)
         print(f"回合 {episode + 1}/{episodes}, 獎勵：{total_reward:.2f}, 步數：{steps}, "
-              f"專家概率：{agent.expert_prob:.2f}, 平均 Q 值：{np.mean(q_values_list):.2f}, "
+              f"專家概率：{agent.expert_prob:.2f}, 平均 Q 值：{mean_q_value:.2f}, "
               f"平均鬼距離：{avg_ghost_distances[-1]:.2f}, 鬼遭遇：{encounter_count}, "
               f"生命損失：{lives_lost}")
         writer.add_scalar('Reward', total_reward, episode)
         writer.add_scalar('Expert_Probability', agent.expert_prob, episode)
+        metrics.log('episode', episode, Reward=total_reward, Expert_Probability=agent.expert_prob,
+                    Lives_Lost=lives_lost, Avg_Ghost_Distance=avg_ghost_distances[-1], Ghost_Encounters=encounter_count)
         if (episode + 1) % 5 == 0:
-            agent.save(model_path, memory_path)
-            print(f"回合 {episode + 1} 保存模型")
-        if trial and episode >= 50:
+            checkpoint_state = agent.checkpoint_state()
+            checkpoint_state["training"] = {
+                "episode": episode + 1,  # 下一個要執行的回合
+                "episode_rewards": list(episode_rewards),
+                "recent_rewards": list(recent_rewards),
+                "avg_ghost_distances": list(avg_ghost_distances),
+                "ghost_encounters": list(ghost_encounters),
+                "lives_lost_list": list(lives_lost_list),
+                "log_dir": writer.log_dir,
+            }
+            checkpoint_state["rng"] = rng_state()
+            checkpoints.submit(episode + 1, checkpoint_state)
+            metrics.flush()  # 指標與檢查點同步落盤，未滿的區塊也寫出
+            print(f"回合 {episode + 1} 提交檢查點")
+        if trial and episode + 1 >= min_episodes:
             avg_reward = np.mean(recent_rewards[-100:])
             avg_ghost_dist = np.mean(avg_ghost_distances[-100:])
             avg_lives_lost = np.mean(lives_lost_list[-100:])
-            trial.report(avg_reward + 10 * avg_ghost_dist - 50 * avg_lives_lost, episode)
+            trial.report(avg_reward + 10 * avg_ghost_dist - 50 * avg_lives_lost, episode + 1)  # 步數 = 已完成回合數
             if trial.should_prune():
+                telemetry.flush(agent.steps)
                 writer.close()
+                metrics.close()
+                checkpoints.close()
                 env.close()
                 raise optuna.TrialPruned()
         if len(recent_rewards) >= 100 and np.mean(recent_rewards[-100:]) >= early_stop_reward:
             print( f"早期停止：最近 100 回合平均獎勵 {np.mean(recent_rewards[-100:]):.2f} >= {early_stop_reward:.2f}" )
             break
+    checkpoints.close()
+    telemetry.flush(agent.steps)
+    metrics.close()
+    agent.save(model_path, memory_path)
     agent.save("pacman_dqn_final.pth", "replay_buffer_final.pkl")
     with open("episode_rewards.json", "w") as f:
         json.dump(episode_rewards, f)
@@ -229,11 +282,11 @@ def train(trial=None, resume=False,
     print("訓練完成")
     return np.mean(recent_rewards[-100:]) + np.mean(avg_ghost_distances[-100:]) * 10 - np.mean(lives_lost_list[-100:]) * 50 if recent_rewards else total_reward
 
-def objective(trial):
+def objective(trial, game_config=None):
     """
     Optuna 優化目標函數。
     """
-    return train(trial=trial, episodes=500, early_stop_reward=10000)
+    return train(trial=trial, episodes=500, early_stop_reward=10000, game_config=game_config)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Train Pac-Man DQN Agent")
@@ -264,11 +317,14 @@ if __name__ == "__main__":
     parser.add_argument('--expert_max_steps_per_episode', type=int, default=EXPERT_MAX_STEPS_PER_EPISODE, help='Max steps per expert episode')
     parser.add_argument('--expert_random_prob', type=float, default=EXPERT_RANDOM_PROB, help='Expert random action probability')
     parser.add_argument('--max_expert_data', type=int, default=MAX_EXPERT_DATA, help='Maximum expert data size')
+    parser.add_argument('--telemetry_interval', type=int, default=TELEMETRY_INTERVAL, help='Steps between telemetry flushes')
+    add_config_arguments(parser)
 
     args = parser.parse_args()
+    game_config = config_from_args(args)
     if args.optuna:
         study = optuna.create_study(direction="maximize", storage="sqlite:///optuna.db")
-        study.optimize(objective, n_trials=50)
+        study.optimize(lambda trial: objective(trial, game_config), n_trials=50)
         print("最佳試驗：", study.best_trial.params)
         print(f"最佳值：{study.best_value:.2f}")
     else:
@@ -293,5 +349,7 @@ if __name__ == "__main__":
             expert_prob_decay_steps=args.expert_prob_decay_steps,
             expert_random_prob=args.expert_random_prob,
             max_expert_data=args.max_expert_data,
-            ghost_penalty_weight=args.ghost_penalty_weight
+            ghost_penalty_weight=args.ghost_penalty_weight,
+            telemetry_interval=args.telemetry_interval,
+            game_config=game_config
         )
\ No newline at end of file
@@ -16,11 +16,16 @@ TILE_TEMP_MARKER = 'A'
 # 遊戲參數
 CELL_SIZE = 30
 FPS = 30
+SIM_SPEEDS = (1, 4, 16, None)  # 觀戰倍速（每個渲染幀的模擬 tick 倍數），None 表示不限速
+SIM_MAX_TICKS_PER_FRAME = 64  # 限速模式下每個渲染幀最多執行的 tick 數，避免卡頓後追趕過久
+SIM_MAX_FRAME_TIME = 0.25  # 單幀計入的最長真實時間（秒），暫停或拖動視窗後不會累積大量 tick
 MAZE_WIDTH = 21
 MAZE_HEIGHT = 21
 MAZE_SEED = 1
 EDIBLE_DURATION = 20
 GHOST_SCORES = [50, 100, 150, 200]
+GHOST_COUNT = 4  # 鬼魂數量，超過 4 隻時循環使用 Ghost1-Ghost4 的行為（壓力測試可設為 16-64）
+GAME_CONFIG_PATH = "game_config.json"  # 遊戲設定檔（game.game_config），存在時覆蓋上方的迷宮預設值
 
 # Speed constants
 PACMAN_BASE_SPEED = 100.0
@@ -44,6 +49,10 @@ PRETRAIN_EPISODES = 100  # 預訓練回合數
 EARLY_STOP_REWARD = 10000  # 早期停止的獎勵閾值
 MODEL_PATH = "pacman_dqn.pth"  # 模型保存路徑
 MEMORY_PATH = "replay_buffer.pkl"  # 回放緩衝區保存路徑
+CHECKPOINT_DIR = "checkpoints"  # 背景檢查點目錄
+CHECKPOINT_KEEP = 3  # 保留的檢查點數量
+METRICS_DIR = "metrics"  # 列式訓練指標目錄（每個訓練執行一個子目錄）
+TELEMETRY_INTERVAL = 1000  # 訓練遙測寫出間隔（步），期間的指標在進程內彙總
 
 # DQN 模型參數
 BUFFER_SIZE = 100000
@@ -65,6 +74,13 @@ EXPERT_EPISODES = 100  # 專家數據收集回合數
 EXPERT_MAX_STEPS_PER_EPISODE = 200  # 每個回合的最大步數
 EXPERT_RANDOM_PROB = 0.1  # 專家數據收集的隨機行動概率
 MAX_EXPERT_DATA = 10000  # 最大專家數據量
+EXPERT_CACHE_DIR = "expert_cache"  # 專家數據快取目錄
+ENV_VERSION = 1  # PacManEnv 狀態與獎勵定義的版本，變更時遞增以使專家數據快取失效
+EVAL_CACHE_DIR = "eval_cache"  # 策略評估結果快取目錄
+EVAL_VERSION = 2  # 遊戲規則或評估流程的版本，變更時遞增以使評估快取失效
+EVAL_MAX_TICKS = 8000  # 評估時每局的 tick 上限
+SCORE_DB_PATH = "scores.db"  # 分數資料庫（SQLite）
+SCORE_JSON_PATH = "scores.json"  # 舊版分數檔，首次建立資料庫時匯入
 
 # 顏色
 BLACK = (0, 0, 0)
@@ -0,0 +1,237 @@
+# game/capture.py
+"""
+無頭（headless）高速畫面擷取，將 AI 對局離線輸出為 PNG 序列或壓縮 NumPy 檔案（NPZ）。
+在離屏 Surface 上執行 Game + Renderer，不受 FPS 限制，並以寫入執行緒讓編碼與模擬重疊。
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # 無頭模式：使用虛擬視訊驅動
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import queue
+import struct
+import threading
+import time
+import zipfile
+import zlib
+import numpy as np
+import pygame
+from config import CELL_SIZE, FPS
+from game.game import Game
+from game.game_config import add_config_arguments, config_from_args, load_config
+from game.renderer import Renderer
+from game.strategies import ControlManager
+
+CAPTURE_FORMATS = ("png", "npz")
+
+def encode_png(array: np.ndarray, level: int = 1) -> bytes:
+    """
+    將 (高, 寬, 3) 的 uint8 RGB 陣列編碼為 PNG 位元組。
+
+    原理：
+    - 每列前加上過濾位元組 0（None filter），整體以 zlib 壓縮後放入單一 IDAT 區塊。
+    - zlib 壓縮期間會釋放 GIL，因此寫入執行緒的編碼能與模擬真正並行；
+      pygame.image.save 的 PNG 編碼則會持有 GIL，成為擷取瓶頸。
+    - 使用低壓縮等級（預設 1），以少量檔案大小換取數倍的編碼速度。
+
+    Args:
+        array (np.ndarray): RGB 影像陣列，形狀為 (高, 寬, 3)。
+        level (int): zlib 壓縮等級（0-9）。
+
+    Returns:
+        bytes: PNG 檔案內容。
+    """
+    height, width, _ = array.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # 每列首位元組為過濾類型 0
+    raw[:, 1:] = array.reshape(height, width * 3)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 位元深度、RGB
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + chunk(b"IEND", b""))
+
+class FrameWriter(threading.Thread):
+    """
+    背景寫入執行緒，負責將擷取的畫面編碼並寫入磁碟。
+
+    原理：
+    - 主執行緒只複製原始 RGB 位元組（memcpy），編碼（PNG 壓縮或 NPZ deflate）在此執行緒完成。
+    - 使用有界佇列提供背壓：寫入跟不上時，模擬會短暫等待，避免記憶體無限增長。
+    - PNG 模式：每幀輸出一個 frame_XXXXXX.png 檔案。
+    - NPZ 模式：逐幀以 frame_XXXXXX.npy 條目寫入壓縮 ZIP，結束時附加 ticks 陣列，可直接用 np.load 讀取。
+    """
+    def __init__(self, output: str, fmt: str, frame_size, max_queue: int = 64):
+        """
+        初始化寫入執行緒。
+
+        Args:
+            output (str): 輸出路徑（PNG 為目錄，NPZ 為檔案路徑）。
+            fmt (str): 輸出格式（"png" 或 "npz"）。
+            frame_size (Tuple[int, int]): 畫面尺寸 (寬, 高)。
+            max_queue (int): 佇列最大長度（幀數）。
+        """
+        super().__init__(daemon=True)
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"不支援的擷取格式：{fmt}，可用格式：{CAPTURE_FORMATS}")
+        self.output = output
+        self.fmt = fmt
+        self.frame_size = frame_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.ticks = []  # 已寫入幀對應的遊戲 tick
+        self.error = None  # 寫入執行緒中發生的例外
+        self._archive = None
+        if fmt == "png":
+            os.makedirs(output, exist_ok=True)
+        else:
+            parent = os.path.dirname(os.path.abspath(output))
+            os.makedirs(parent, exist_ok=True)
+            self._archive = zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+
+    def submit(self, tick: int, frame: bytes) -> None:
+        """
+        提交一幀原始 RGB 位元組，佇列已滿時阻塞。
+
+        Args:
+            tick (int): 該幀對應的遊戲 tick。
+            frame (bytes): pygame.image.tobytes(surface, "RGB") 的結果。
+        """
+        if self.error is not None:
+            raise RuntimeError(f"畫面寫入失敗：{self.error}")
+        self.queue.put((tick, frame))
+
+    def run(self) -> None:
+        """
+        寫入迴圈，直到收到結束標記（None）。
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # 發生錯誤後只消耗佇列，避免生產者永久阻塞
+            tick, frame = item
+            try:
+                self._write(tick, frame)
+                self.ticks.append(tick)
+            except Exception as e:
+                self.error = e
+
+    def _write(self, tick: int, frame: bytes) -> None:
+        """
+        將單幀編碼並寫入輸出。
+
+        Args:
+            tick (int): 遊戲 tick。
+            frame (bytes): 原始 RGB 位元組。
+        """
+        width, height = self.frame_size
+        array = np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+        if self.fmt == "png":
+            with open(os.path.join(self.output, f"frame_{tick:06d}.png"), "wb") as f:
+                f.write(encode_png(array))
+        else:
+            with self._archive.open(f"frame_{tick:06d}.npy", mode="w", force_zip64=True) as f:
+                np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def close(self) -> None:
+        """
+        送出結束標記、等待佇列清空，NPZ 模式下附加 ticks 陣列並關閉檔案。
+
+        Raises:
+            RuntimeError: 若寫入過程中發生錯誤。
+        """
+        self.queue.put(None)
+        self.join()
+        if self._archive is not None:
+            if self.error is None:
+                with self._archive.open("ticks.npy", mode="w") as f:
+                    np.lib.format.write_array(f, np.asarray(self.ticks, dtype=np.int64), allow_pickle=False)
+            self._archive.close()
+        if self.error is not None:
+            raise RuntimeError(f"畫面寫入失敗：{self.error}")
+
+def capture_game(output: str, fmt: str = "png", stride: int = 1, mode: str = "rule_ai",
+                 max_ticks: int = None, player_name: str = "Capture", max_queue: int = 64, game_config=None) -> dict:
+    """
+    以無頭模式盡可能快速地執行一局遊戲，並按固定間隔擷取畫面。
+
+    原理：
+    - 使用離屏 Surface 作為渲染目標，不建立視窗，也不呼叫 clock.tick，因此模擬不受 FPS 限制。
+    - 每個 tick 仍以 FPS 作為時間步長呼叫 Game.update，遊戲邏輯與即時遊玩完全一致。
+    - 僅在 tick % stride == 0 時渲染並擷取，其餘 tick 只做模擬。
+    - 擷取的原始位元組交由 FrameWriter 執行緒編碼，使編碼與模擬重疊。
+    - 不呼叫 end_game，避免擷取的對局寫入排行榜。
+
+    Args:
+        output (str): 輸出路徑（PNG 為目錄，NPZ 為檔案）。
+        fmt (str): 輸出格式（"png" 或 "npz"）。
+        stride (int): 擷取間隔（每隔多少 tick 擷取一幀）。
+        mode (str): 控制模式（"rule_ai" 或 "dqn_ai"）。
+        max_ticks (int, optional): 最大模擬 tick 數，None 表示直到遊戲結束。
+        player_name (str): 遊戲中的玩家名稱。
+        max_queue (int): 寫入佇列最大長度。
+        game_config (GameConfig, optional): 遊戲設定，None 表示以 load_config 載入。
+
+    Returns:
+        dict: 擷取統計，包含 ticks、frames、elapsed（秒）和 game_seconds（遊戲內時間）。
+    """
+    if stride < 1:
+        raise ValueError(f"擷取間隔必須大於 0，得到 {stride}")
+    pygame.font.init()
+    game = Game(player_name, game_config=game_config or load_config())
+    screen_width = game.maze.width * CELL_SIZE
+    screen_height = game.maze.height * CELL_SIZE
+    screen = pygame.Surface((screen_width, screen_height))  # 離屏渲染目標
+    font = pygame.font.SysFont(None, 36)
+
+    renderer = Renderer(screen, font, screen_width, screen_height)
+    control_manager = ControlManager(game.maze.width, game.maze.height)
+    if mode == "dqn_ai" and control_manager.dqn_ai:
+        control_manager.current_strategy = control_manager.dqn_ai
+    else:
+        control_manager.current_strategy = control_manager.rule_based_ai
+    move = lambda: control_manager.move(game.get_pacman(), game.get_maze(), game.get_power_pellets(),
+                                        game.get_score_pellets(), game.get_ghosts())
+
+    writer = FrameWriter(output, fmt, (screen_width, screen_height), max_queue=max_queue)
+    writer.start()
+    start = time.perf_counter()
+    tick = 0
+    frames = 0
+    try:
+        while game.is_running() or game.is_death_animation_playing():
+            if max_ticks is not None and tick >= max_ticks:
+                break
+            game.update(FPS, move)
+            tick += 1
+            if tick % stride == 0:
+                renderer.render(game, control_manager.get_mode_name(), tick)
+                writer.submit(tick, pygame.image.tobytes(screen, "RGB"))
+                frames += 1
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    return {"ticks": tick, "frames": frames, "elapsed": elapsed, "game_seconds": tick / FPS}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Pac-Man frame capture")
+    parser.add_argument('--output', type=str, default="captures/capture", help='Output directory (png) or file (npz)')
+    parser.add_argument('--format', type=str, default="png", choices=CAPTURE_FORMATS, help='Output format')
+    parser.add_argument('--stride', type=int, default=1, help='Capture one frame every N ticks')
+    parser.add_argument('--mode', type=str, default="rule_ai", choices=["rule_ai", "dqn_ai"], help='Control strategy')
+    parser.add_argument('--max_ticks', type=int, default=None, help='Stop after N simulation ticks')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    output = args.output
+    if args.format == "npz" and not output.endswith(".npz"):
+        output += ".npz"
+    stats = capture_game(output, fmt=args.format, stride=args.stride, mode=args.mode, max_ticks=args.max_ticks,
+                         game_config=config_from_args(args))
+    print(f"擷取完成：{stats['frames']} 幀 / {stats['ticks']} tick（遊戲內 {stats['game_seconds']:.1f} 秒），"
+          f"耗時 {stats['elapsed']:.2f} 秒，輸出：{output}")
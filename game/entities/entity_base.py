@@ -1,13 +1,25 @@
 # game/entities/entity_base.py
 """
 定義遊戲中實體的基類，提供基本的移動和目標設置功能，適用於 Pac-Man、鬼魂和彈丸等實體。
+實體狀態存放在 EntityStore 的欄位陣列中，實體物件本身是只保存列號的 __slots__ 視圖。
 """
 
 from typing import Tuple
+from ..entity_store import EntityStore, StoreField
 from config import CELL_SIZE, TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, TILE_DOOR, ENTITY_DEFAULT_SPEED
 
 class Entity:
-    def __init__(self, x: int, y: int, symbol: str):
+    __slots__ = ("_store", "_row", "symbol")
+
+    x = StoreField()
+    y = StoreField()
+    target_x = StoreField()
+    target_y = StoreField()
+    current_x = StoreField()
+    current_y = StoreField()
+    speed = StoreField()
+
+    def __init__(self, x: int, y: int, symbol: str, store: EntityStore):
         """
         初始化基本實體，設置位置、符號和像素坐標。
 
@@ -16,12 +28,19 @@ class Entity:
         - 使用格子坐標 (x, y) 和像素坐標 (current_x, current_y) 分別表示邏輯位置和渲染位置。
         - 像素坐標計算公式：current_x = x * CELL_SIZE + CELL_SIZE // 2
         - 實體移動採用平滑的逐像素移動，確保視覺效果連貫。
+        - 位置、目標與速度存放在 store 中分配給本實體的一列，屬性讀寫經由 StoreField 轉發，
+          同一局遊戲的實體共用一個 store，移動與碰撞可對整列向量化計算。
+        - store 由擁有實體的一方（Game、initialize_entities 或測試）建立並傳入，實體本身不建立 store，
+          也不在回收時釋放列：列隨 store 一起釋放，需要提前歸還時由擁有者呼叫 store.release(entity._row)。
 
         Args:
             x (int): 迷宮中的 x 坐標（格子坐標）。
             y (int): 迷宮中的 y 坐標（格子坐標）。
             symbol (str): 實體的符號表示（例如 'P' 表示 Pac-Man，'G' 表示鬼魂）。
+            store (EntityStore): 實體狀態儲存（通常為遊戲的 store）。
         """
+        self._store = store
+        self._row = self._store.allocate()
         self.x = x  # 格子 x 坐標
         self.y = y  # 格子 y 坐標
         self.symbol = symbol  # 實體符號
@@ -47,23 +66,26 @@ class Entity:
         Returns:
             bool: 是否到達目標格子。
         """
-        target_pixel_x = self.target_x * CELL_SIZE + CELL_SIZE // 2  # 目標像素 x 坐標
-        target_pixel_y = self.target_y * CELL_SIZE + CELL_SIZE // 2  # 目標像素 y 坐標
-        dx = target_pixel_x - self.current_x  # x 方向距離
-        dy = target_pixel_y - self.current_y  # y 方向距離
+        target_x, target_y = self.target_x, self.target_y  # 每個欄位只從 store 讀取一次
+        current_x, current_y = self.current_x, self.current_y
+        step = self.speed / fps  # 每幀移動距離上限
+        target_pixel_x = target_x * CELL_SIZE + CELL_SIZE // 2  # 目標像素 x 坐標
+        target_pixel_y = target_y * CELL_SIZE + CELL_SIZE // 2  # 目標像素 y 坐標
+        dx = target_pixel_x - current_x  # x 方向距離
+        dy = target_pixel_y - current_y  # y 方向距離
         dist = (dx ** 2 + dy ** 2) ** 0.5  # 歐幾里得距離
 
-        if dist <= self.speed / fps:  # 若距離小於每幀移動距離，則到達目標
+        if dist <= step:  # 若距離小於每幀移動距離，則到達目標
             self.current_x = target_pixel_x
             self.current_y = target_pixel_y
-            self.x = self.target_x
-            self.y = self.target_y
+            self.x = target_x
+            self.y = target_y
             return True
         else:
             if dist != 0:  # 避免除以零
-                move_dist = min(self.speed / fps, dist)  # 每幀移動距離
-                self.current_x += (dx / dist) * move_dist  # 更新 x 坐標
-                self.current_y += (dy / dist) * move_dist  # 更新 y 坐標
+                move_dist = min(step, dist)  # 每幀移動距離
+                self.current_x = current_x + (dx / dist) * move_dist  # 更新 x 坐標
+                self.current_y = current_y + (dy / dist) * move_dist  # 更新 y 坐標
             return False
 
     def set_new_target(self, dx: int, dy: int, maze) -> bool:
@@ -5,35 +5,48 @@
 
 from .pacman import PacMan
 from .ghost import Ghost1, Ghost2, Ghost3, Ghost4
-from .pellets import PowerPellet, ScorePellet
+from .pellets import PelletGrid, POWER_PELLET_VALUE, SCORE_PELLET_VALUE
 from typing import Tuple, List
+from ..map_index import get_index
+from ..entity_store import EntityStore
 import random
-from config import TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN
+from config import TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, GHOST_COUNT
 
-def initialize_entities(maze) -> Tuple[PacMan, List, List[PowerPellet], List[ScorePellet]]:
+def initialize_entities(maze, rng=None, pacman_rng=None, ghost_count: int = GHOST_COUNT, store=None) -> Tuple[PacMan, List, PelletGrid, PelletGrid]:
     """
     初始化所有遊戲實體，包括 Pac-Man、鬼魂、能量球和分數球。
 
     原理：
     - 根據迷宮結構初始化遊戲實體，確保實體位置合理且不重疊。
     - Pac-Man 優先在靠近邊緣但非迷宮中心的有效路徑位置隨機生成，增加遊戲多樣性。
-    - 鬼魂生成在指定的重生點（TILE_GHOST_SPAWN），隨機分配位置。
+    - 鬼魂生成在指定的重生點（TILE_GHOST_SPAWN），隨機分配位置；共 ghost_count 隻，依序循環使用 Ghost1-Ghost4。
     - 能量球生成在迷宮的 TILE_POWER_PELLET 位置，分數球生成在所有有效路徑位置（排除 Pac-Man、鬼魂和能量球位置）。
+    - 彈丸以 PelletGrid（布林網格）儲存，吃彈丸與查詢皆為 O(1)，並保留列表式接口。
     - 隨機化處理確保訓練數據的多樣性和遊戲的可玩性。
+    - 各類格子位置取自迷宮特徵索引（get_index），只掃描迷宮一次。
+    - 隨機數來自傳入的遊戲專屬 rng，並由鬼魂共用；Pac-Man 使用獨立的 pacman_rng，
+      使控制器的隨機決策不影響鬼魂的隨機序列。未提供時回退到全域 random 模組。
+    - Pac-Man 與鬼魂的狀態分配在傳入的 store（EntityStore）中，遊戲可對其欄位向量化更新。
 
     Args:
         maze: 迷宮物件，提供瓦片信息和尺寸。
+        rng (random.Random, optional): 遊戲專屬的隨機數生成器。
+        pacman_rng (random.Random, optional): Pac-Man 專屬的隨機數生成器。
+        ghost_count (int): 鬼魂數量（預設為 GHOST_COUNT）。
+        store (EntityStore, optional): 實體狀態儲存，None 表示建立一個由本次建立的實體共用的新儲存。
 
     Returns:
         Tuple: (pacman, ghosts, power_pellets, score_pellets)
         - pacman: PacMan 物件。
-        - ghosts: 鬼魂列表（包含 Ghost1, Ghost2, Ghost3, Ghost4）。
-        - power_pellets: 能量球列表。
-        - score_pellets: 分數球列表。
+        - ghosts: 鬼魂列表（依序為 Ghost1, Ghost2, Ghost3, Ghost4, Ghost1, ...）。
+        - power_pellets: 能量球網格（PelletGrid）。
+        - score_pellets: 分數球網格（PelletGrid）。
     """
-    # 尋找 Pac-Man 的起始位置
-    valid_positions = [(x, y) for y in range(1, maze.height - 1) for x in range(1, maze.width - 1)
-                      if maze.get_tile(x, y) == TILE_PATH]
+    rng = rng if rng is not None else random
+    store = store if store is not None else EntityStore(ghost_count + 1)  # Pac-Man 與鬼魂各一列
+    index = get_index(maze)
+    # 尋找 Pac-Man 的起始位置（路徑格子不會位於邊界上）
+    valid_positions = index.positions_of(TILE_PATH)
     
     # 優先選擇靠近邊緣且非中心的有效位置
     edge_mid_positions = []
@@ -44,39 +57,36 @@ def initialize_entities(maze) -> Tuple[PacMan, List, List[PowerPellet], List[Sco
             edge_mid_positions.append((x, y))
     
     if edge_mid_positions:
-        pacman_pos = random.choice(edge_mid_positions)  # 優先選擇邊緣位置
+        pacman_pos = rng.choice(edge_mid_positions)  # 優先選擇邊緣位置
     else:
         if valid_positions:
-            pacman_pos = random.choice(valid_positions)  # 回退到隨機有效位置
+            pacman_pos = rng.choice(valid_positions)  # 回退到隨機有效位置
         else:
             raise ValueError("迷宮中沒有有效路徑（'.'）用於生成 Pac-Man")
     
-    pacman = PacMan(pacman_pos[0], pacman_pos[1])  # 初始化 Pac-Man
+    pacman = PacMan(pacman_pos[0], pacman_pos[1], store, rng=pacman_rng)  # 初始化 Pac-Man
     
     # 初始化鬼魂
     ghost_classes = [Ghost1, Ghost2, Ghost3, Ghost4]  # 四種鬼魂類型
-    ghost_spawn_points = [(x, y) for y in range(maze.height) for x in range(maze.width) if maze.get_tile(x, y) == TILE_GHOST_SPAWN]
+    ghost_spawn_points = index.positions_of(TILE_GHOST_SPAWN)
     if not ghost_spawn_points:
         raise ValueError("迷宮中沒有 'S' 格子，無法生成鬼魂！")
     
-    random.shuffle(ghost_spawn_points)  # 隨機分配鬼魂出生點
+    rng.shuffle(ghost_spawn_points)  # 隨機分配鬼魂出生點
     ghosts = []
-    for i, ghost_class in enumerate(ghost_classes):
+    for i in range(ghost_count):
+        ghost_class = ghost_classes[i % len(ghost_classes)]
         spawn_point = ghost_spawn_points[i % len(ghost_spawn_points)]  # 循環分配出生點
-        ghosts.append(ghost_class(spawn_point[0], spawn_point[1], f"Ghost{i+1}"))
+        ghosts.append(ghost_class(spawn_point[0], spawn_point[1], store, f"Ghost{i+1}", rng=rng))
     
     # 初始化能量球
-    power_pellets = []
-    a_positions = [(x, y) for y in range(1, maze.height - 1) for x in range(1, maze.width - 1)
-                   if maze.get_tile(x, y) == TILE_POWER_PELLET and (x, y) != (pacman.x, pacman.y)]
-    for x, y in a_positions:
-        power_pellets.append(PowerPellet(x, y))  # 在能量球位置生成 PowerPellet
+    a_positions = [pos for pos in index.positions_of(TILE_POWER_PELLET) if pos != (pacman.x, pacman.y)]
+    power_pellets = PelletGrid(maze.width, maze.height, POWER_PELLET_VALUE, a_positions)  # 在能量球位置生成能量球
     
     # 初始化分數球
-    all_path_positions = [(x, y) for y in range(1, maze.height - 1) for x in range(1, maze.width - 1)
-                         if maze.get_tile(x, y) == TILE_PATH]
-    excluded_positions = [(pacman.x, pacman.y)] + ghost_spawn_points + a_positions  # 排除 Pac-Man、鬼魂和能量球位置
+    all_path_positions = valid_positions
+    excluded_positions = set([(pacman.x, pacman.y)] + ghost_spawn_points + a_positions)  # 排除 Pac-Man、鬼魂和能量球位置
     score_positions = [pos for pos in all_path_positions if pos not in excluded_positions]
-    score_pellets = [ScorePellet(x, y) for x, y in score_positions]  # 在剩餘路徑生成分數球
+    score_pellets = PelletGrid(maze.width, maze.height, SCORE_PELLET_VALUE, score_positions)  # 在剩餘路徑生成分數球
     
     return pacman, ghosts, power_pellets, score_pellets
\ No newline at end of file
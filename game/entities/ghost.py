@@ -5,13 +5,25 @@
 
 from .entity_base import Entity
 from ..maze_generator import Map
-from typing import Tuple, List, Optional
-from collections import deque
+from typing import Tuple, Optional
+from ..maze_graph import GHOST_PASSABLE
+from ..map_index import get_index
+from ..entity_store import EntityStore, StoreField
 import random
 from config import RED, PINK, CYAN, LIGHT_BLUE, TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN, GHOST_DEFAULT_SPEED, GHOST_RETURN_SPEED, GHOST_WAIT_TIME, GHOST1_SPEED, GHOST2_SPEED, GHOST3_SPEED, GHOST4_SPEED, PACMAN_AI_SPEED
 
 class Ghost(Entity):
-    def __init__(self, x: int, y: int, name: str = "Ghost", color: Tuple[int, int, int] = RED):
+    __slots__ = ("rng", "name", "color", "default_speed", "return_speed", "death_count", "alpha",
+                 "last_x", "last_y", "memory_x", "memory_y")
+
+    edible = StoreField()
+    edible_timer = StoreField()
+    returning_to_spawn = StoreField()
+    waiting = StoreField()
+    wait_timer = StoreField()
+
+    def __init__(self, x: int, y: int, store: EntityStore, name: str = "Ghost", color: Tuple[int, int, int] = RED,
+                 rng=None):
         """
         初始化基礎鬼魂，設置位置、名稱、顏色和狀態屬性。
 
@@ -23,14 +35,18 @@ class Ghost(Entity):
           - returning_to_spawn：是否正在返回重生點（被吃後觸發）。
           - waiting：是否在重生點等待。
           - death_count：死亡次數，影響速度和等待時間。
+        - 狀態旗標與計時器和位置一樣存放在 EntityStore 中，其餘屬性存於 __slots__。
 
         Args:
             x (int): 迷宮中的 x 坐標（格子坐標）。
             y (int): 迷宮中的 y 坐標（格子坐標）。
+            store (EntityStore): 實體狀態儲存。
             name (str): 鬼魂名稱，預設為 "Ghost"。
             color (Tuple[int, int, int]): 鬼魂的 RGB 顏色，預設為紅色。
+            rng (random.Random, optional): 遊戲專屬的隨機數生成器，None 表示使用全域 random 模組。
         """
-        super().__init__(x, y, 'G')  # 調用基類 Entity 初始化
+        super().__init__(x, y, 'G', store)  # 調用基類 Entity 初始化
+        self.rng = rng if rng is not None else random  # 隨機數來源（同一局遊戲的鬼魂共用）
         self.name = name  # 鬼魂名稱
         self.color = color  # 鬼魂顏色
         self.default_speed = GHOST_DEFAULT_SPEED  # 默認移動速度
@@ -48,7 +64,7 @@ class Ghost(Entity):
         self.memory_x = x  # 記憶 Pac-Man 最近位置
         self.memory_y = y  # 記憶 Pac-Man 最近位置
 
-    def move(self, pacman, maze, fps: int, ghosts: List['Ghost'] = None):
+    def move(self, pacman, maze, fps: int):
         """
         根據鬼魂狀態執行移動邏輯（等待、可食用、返回重生點或追逐）。
 
@@ -64,7 +80,6 @@ class Ghost(Entity):
             pacman: PacMan 物件，提供位置信息。
             maze: 迷宮物件，提供路徑信息。
             fps (int): 每秒幀數，用於計算移動。
-            ghosts (List[Ghost], optional): 其他鬼魂列表，用於協作。
         """
         if self.waiting:
             self.wait_timer -= 1
@@ -84,7 +99,7 @@ class Ghost(Entity):
         elif self.edible and self.edible_timer > 0:
             self.escape_from_pacman(pacman, maze)
         else:
-            self.chase_pacman(pacman, maze, ghosts)
+            self.chase_pacman(pacman, maze)
 
     def bfs_path(self, start_x: int, start_y: int, target_x: int, target_y: int, maze) -> Optional[Tuple[int, int]]:
         """
@@ -93,7 +108,9 @@ class Ghost(Entity):
         原理：
         - BFS 保證找到最短路徑，適用於迷宮中的路徑規劃。
         - 檢查可通行格子（TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN）。
-        - 若無直接路徑，嘗試最近的可通行點作為替代目標。
+        - 搜尋在迷宮的路口圖（Map.junction_graph）上進行，只展開路口與死路節點，
+          走廊一次跨過；等長路徑的第一步與逐格 BFS 相同。
+        - 若無直接路徑，嘗試目標周圍最近的可通行點作為替代目標。
         - 返回第一步的方向 (dx, dy)，或 None 表示無路徑。
 
         Args:
@@ -106,32 +123,20 @@ class Ghost(Entity):
         Returns:
             Optional[Tuple[int, int]]: 第一步方向 (dx, dy)，或 None。
         """
-        queue = deque([(start_x, start_y, [])])  # 隊列儲存 (x, y, 路徑)
-        visited = {(start_x, start_y)}  # 已訪問節點
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # 下、上、右、左
+        graph = maze.junction_graph(GHOST_PASSABLE)
+        path = graph.route((start_x, start_y), (target_x, target_y))
+        if path is not None:
+            return (path[0][0] - start_x, path[0][1] - start_y) if path else None
 
-        while queue:
-            x, y, path = queue.popleft()
-            if x == target_x and y == target_y:
-                return path[0] if path else None
-
-            for dx, dy in directions:
-                new_x, new_y = x + dx, y + dy
-                if (maze.xy_valid(new_x, new_y) and
-                    maze.get_tile(new_x, new_y) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN] and
-                    (new_x, new_y) not in visited):
-                    visited.add((new_x, new_y))
-                    new_path = path + [(dx, dy)]
-                    queue.append((new_x, new_y, new_path))
-
-        # 若無直接路徑，尋找最近的可通行點
+        # 若無直接路徑，尋找目標周圍最近的可通行點
         nearby_targets = [
-            (new_x, new_y) for dx, dy in directions
-            if maze.xy_valid(new_x, new_y) and maze.get_tile(new_x, new_y) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
+            (target_x + dx, target_y + dy) for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]
+            if (target_x + dx, target_y + dy) in graph.passable
         ]
-        if nearby_targets:
-            target = min(nearby_targets, key=lambda p: (p[0] - target_x) ** 2 + (p[1] - target_y) ** 2)
-            return self.bfs_path(start_x, start_y, target[0], target[1], maze)
+        for target in nearby_targets:
+            direction = graph.first_step((start_x, start_y), target)
+            if direction is not None:
+                return direction
         return None
 
     def move_to_target(self, target_x: int, target_y: int, maze) -> bool:
@@ -159,7 +164,7 @@ class Ghost(Entity):
             return True
         return False
 
-    def chase_pacman(self, pacman, maze, ghosts: List['Ghost'] = None):
+    def chase_pacman(self, pacman, maze):
         """
         基礎追逐邏輯，子類需覆寫實現具體策略。
 
@@ -182,8 +187,7 @@ class Ghost(Entity):
             maze: 迷宮物件。
         """
         self.speed = self.return_speed  # 使用返回速度
-        spawn_points = [(x, y) for y in range(maze.height)
-                        for x in range(maze.width) if maze.get_tile(x, y) == TILE_GHOST_SPAWN]
+        spawn_points = get_index(maze).positions_of(TILE_GHOST_SPAWN)
         if not spawn_points:
             self.move_random(maze)
             return
@@ -212,6 +216,7 @@ class Ghost(Entity):
         """
         directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # 下、上、右、左
         valid_tiles = {TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, TILE_DOOR}
+        index = get_index(maze)
         
         # 預測 Pac-Man 的未來位置（基於目標方向）
         pacman_dx = pacman.target_x - pacman.x if pacman.target_x != pacman.x else 0
@@ -226,15 +231,11 @@ class Ghost(Entity):
             new_x, new_y = self.x + dx, self.y + dy
             if (maze.xy_valid(new_x, new_y) and 
                 maze.get_tile(new_x, new_y) in valid_tiles and
-                not (new_x == self.last_x and new_y == self.last_y and random.random() < 0.9)):
+                not (new_x == self.last_x and new_y == self.last_y and self.rng.random() < 0.9)):
                 # 計算曼哈頓距離到 Pac-Man 未來位置
                 distance = abs(new_x - pacman_future[0]) + abs(new_y - pacman_future[1])
-                # 計算連通性分數（可通行方向數）
-                connectivity = sum(
-                    maze.xy_valid(new_x + ddx, new_y + ddy) and 
-                    maze.get_tile(new_x + ddx, new_y + ddy) in valid_tiles
-                    for ddx, ddy in directions
-                )
+                # 連通性分數（可通行方向數），由特徵索引的度數網格查詢
+                connectivity = index.degree_at(new_x, new_y)
                 # 綜合評分：距離 + 連通性加權
                 score = distance + connectivity * 2  # 連通性權重可調整
                 valid_directions.append((dx, dy, score))
@@ -269,7 +270,7 @@ class Ghost(Entity):
             maze: 迷宮物件。
         """
         directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        random.shuffle(directions)
+        self.rng.shuffle(directions)
         for dx, dy in directions:
             if self.set_new_target(dx, dy, maze):
                 return
@@ -293,7 +294,7 @@ class Ghost(Entity):
         """
         new_x, new_y = self.x + dx, self.y + dy
         if (self.last_x is not None and new_x == self.last_x and new_y == self.last_y and
-            random.random() < 0.9):  # 90% 概率避免反覆移動
+            self.rng.random() < 0.9):  # 90% 概率避免反覆移動
             return False
         if maze.xy_valid(new_x, new_y) and maze.get_tile(new_x, new_y) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]:
             self.target_x, self.target_y = new_x, new_y
@@ -375,16 +376,17 @@ class Ghost(Entity):
         self.last_y = None
         self.memory_x = self.x
         self.memory_y = self.y
-        spawn_points = [(x, y) for y in range(maze.height)
-                        for x in range(maze.width) if maze.get_tile(x, y) == TILE_GHOST_SPAWN]
+        spawn_points = get_index(maze).positions_of(TILE_GHOST_SPAWN)
         if spawn_points:
-            self.x, self.y = random.choice(spawn_points)
+            self.x, self.y = self.rng.choice(spawn_points)
         self.target_x = self.x
         self.target_y = self.y
 
 # 子類定義
 class Ghost1(Ghost):
-    def __init__(self, x: int, y: int, name: str = "Ghost1"):
+    __slots__ = ()
+
+    def __init__(self, x: int, y: int, store: EntityStore, name: str = "Ghost1", rng=None):
         """
         初始化 Ghost1（紅色鬼魂），作為領頭追逐者。
 
@@ -392,17 +394,17 @@ class Ghost1(Ghost):
         - Ghost1 採用直接追逐策略，預測 Pac-Man 的未來位置。
         - 使用紅色，速度為 GHOST1_SPEED。
         """
-        super().__init__(x, y, name, color=RED)
+        super().__init__(x, y, store, name, color=RED, rng=rng)
         self.speed = GHOST1_SPEED
 
-    def chase_pacman(self, pacman, maze, ghosts: List['Ghost'] = None):
+    def chase_pacman(self, pacman, maze):
         """
-        領頭追逐策略：預測 Pac-Man 未來 1 步位置，優先使用 BFS 追逐，若無路徑則協調其他鬼魂。
+        領頭追逐策略：預測 Pac-Man 未來 1 步位置，優先使用 BFS 追逐，若無路徑則追蹤記憶位置。
 
         原理：
         - 預測 Pac-Man 的移動方向，計算未來 1 步位置：target_x = pacman.target_x
         - 使用 BFS 尋找最短路徑，若失敗則追蹤記憶位置或隨機移動。
-        - 與其他鬼魂協作，通知最近的鬼魂進行包抄。
+        - 決策不讀取也不改變其他鬼魂（Game.update 先向量化移動所有鬼魂再逐一決策，依賴此性質）。
         """
         if pacman.target_x and pacman.target_y:
             target_x = pacman.target_x
@@ -415,13 +417,6 @@ class Ghost1(Ghost):
 
         if self.move_to_target(self.memory_x, self.memory_y, maze):
             return
-
-        if ghosts:
-            closest_ghost = min(ghosts, key=lambda g: g != self and ((g.x - pacman.x) ** 2 + (g.y - pacman.y) ** 2) ** 0.5, default=None)
-            if closest_ghost:
-                flank_x = pacman.x + (pacman.x - self.x)
-                flank_y = pacman.y + (pacman.y - self.y)
-                closest_ghost.move_to_target(flank_x, flank_y, maze)
         self.move_random(maze)
     
     def escape_from_pacman(self, pacman, maze):
@@ -434,130 +429,61 @@ class Ghost1(Ghost):
         self.chase_pacman(pacman, maze)
 
 class Ghost2(Ghost):
-    def __init__(self, x: int, y: int, name: str = "Ghost2"):
+    __slots__ = ()
+
+    def __init__(self, x: int, y: int, store: EntityStore, name: str = "Ghost2", rng=None):
         """
         初始化 Ghost2（粉紅色鬼魂），作為側翼包抄者。
 
         原理：
-        - Ghost2 採用包抄策略，與 Ghost1 協作，阻塞 Pac-Man 的逃跑路線。
+        - Ghost2 沿最短路徑直接追逐 Pac-Man。
         - 使用粉紅色，速度為 GHOST2_SPEED。
         """
-        super().__init__(x, y, name, color=PINK)
+        super().__init__(x, y, store, name, color=PINK, rng=rng)
         self.speed = GHOST2_SPEED
 
-    def chase_pacman(self, pacman, maze, ghosts: List['Ghost'] = None):
+    def chase_pacman(self, pacman, maze):
         """
-        側翼包抄策略：根據 Ghost1 位置計算包抄點，阻塞 Pac-Man 逃跑路線。
+        直接追逐策略：沿 BFS 最短路徑追逐 Pac-Man，無路徑時隨機移動。
 
         原理：
-        - 計算與 Ghost1 的對稱點：target_x = pacman.x + (pacman.x - ghost1.x) * 2
-        - 若無對稱點，則阻塞 Pac-Man 附近的關鍵路口。
-        - 若失敗，則隨機移動。
+        - 鬼魂的決策不讀取其他鬼魂的位置（Game.update 先向量化移動所有鬼魂再逐一決策，依賴此性質），
+          因此不以 Ghost1 的位置計算對稱包抄點，直接追逐 Pac-Man 的格子位置。
         """
-        ghost1 = next((g for g in ghosts if g.name == "Ghost1"), None) if ghosts else None
-        if not ghost1:
-            if self.move_to_target(pacman.x, pacman.y, maze):
-                return
-            self.move_random(maze)
-            return
-        
-        distance = ((self.x - pacman.x) ** 2 + (self.y - pacman.y) ** 2) ** 0.5
-        threshold = 4
-        if distance <= threshold:
-            if pacman.target_x and pacman.target_y:
-                target_x = pacman.target_x
-                target_y = pacman.target_y
-                target_x = max(0, min(maze.width - 1, target_x))
-                target_y = max(0, min(maze.height - 1, target_y))
-                if self.move_to_target(target_x, target_y, maze):
-                    return
-                
-        dx = pacman.x - ghost1.x
-        dy = pacman.y - ghost1.y
-        target_x = pacman.x + dx * 2
-        target_y = pacman.y + dy * 2
-        target_x = max(0, min(maze.width - 1, target_x))
-        target_y = max(0, min(maze.height - 1, target_y))
-        if self.move_to_target(target_x, target_y, maze):
+        if self.move_to_target(pacman.x, pacman.y, maze):
             return
-
-        nearby_points = [
-            (pacman.x + dx, pacman.y + dy) for dx, dy in [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-            if maze.xy_valid(pacman.x + dx, pacman.y + dy) and
-            maze.get_tile(pacman.x + dx, pacman.y + dy) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
-        ]
-        if nearby_points:
-            target = max(nearby_points, key=lambda p: ((p[0] - pacman.target_x) ** 2 + (p[1] - pacman.target_y) ** 2) ** 0.5)
-            if self.move_to_target(target[0], target[1], maze):
-                return
         self.move_random(maze)
 
 class Ghost3(Ghost):
-    def __init__(self, x: int, y: int, name: str = "Ghost3"):
+    __slots__ = ()
+
+    def __init__(self, x: int, y: int, store: EntityStore, name: str = "Ghost3", rng=None):
         """
         初始化 Ghost3（青色鬼魂），作為圍堵者。
 
         原理：
-        - Ghost3 採用圍堵策略，與 Ghost1 和 Ghost2 協作，設置陷阱阻塞 Pac-Man。
+        - Ghost3 沿最短路徑直接追逐 Pac-Man。
         - 使用青色，速度為 GHOST3_SPEED。
         """
-        super().__init__(x, y, name, color=CYAN)
+        super().__init__(x, y, store, name, color=CYAN, rng=rng)
         self.speed = GHOST3_SPEED
 
-    def chase_pacman(self, pacman, maze, ghosts: List['Ghost'] = None):
+    def chase_pacman(self, pacman, maze):
         """
-        圍堵策略：計算 Pac-Man 可能的逃跑路徑，設置陷阱。
+        直接追逐策略：沿 BFS 最短路徑追逐 Pac-Man，無路徑時隨機移動。
 
         原理：
-        - 預測 Pac-Man 移動方向，計算中點並延長：target_x = (pacman.x + ghost1.x) // 2 + dx * 4
-        - 若目標太近，則選擇路口作為陷阱點（路口定義為有多於兩個可通行方向的格子）。
-        - 若失敗，則隨機移動。
+        - 鬼魂的決策不讀取其他鬼魂的位置（Game.update 先向量化移動所有鬼魂再逐一決策，依賴此性質），
+          因此不以 Ghost1 的位置計算圍堵點，直接追逐 Pac-Man 的格子位置。
         """
-        ghost1 = next((g for g in ghosts if g.name == "Ghost1"), None) if ghosts else None
-        ghost2 = next((g for g in ghosts if g.name == "Ghost2"), None) if ghosts else None
-        if not ghost1 or not ghost2:
-            if self.move_to_target(pacman.x, pacman.y, maze):
-                return
-            self.move_random(maze)
-            return
-
-        dx, dy = 0, 0
-        if pacman.target_x > pacman.x:
-            dx = 1
-        elif pacman.target_x < pacman.x:
-            dx = -1
-        elif pacman.target_y > pacman.y:
-            dy = 1
-        elif pacman.target_y < pacman.y:
-            dy = -1
-
-        mid_x = (pacman.x + ghost1.x) // 2
-        mid_y = (pacman.y + ghost1.y) // 2
-        target_x = mid_x + dx * 4
-        target_y = mid_y + dy * 4
-        target_x = max(0, min(maze.width - 1, target_x))
-        target_y = max(0, min(maze.height - 1, target_y))
-
-        if ((target_x - pacman.x) ** 2 + (target_y - pacman.y) ** 2) ** 0.5 < 6:
-            junctions = [
-                (x, y) for x, y in [(pacman.x + dx * 2, pacman.y + dy * 2),
-                                    (pacman.x + dy, pacman.y - dx),
-                                    (pacman.x - dy, pacman.y + dx)]
-                if maze.xy_valid(x, y) and maze.get_tile(x, y) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
-                and sum(maze.xy_valid(x + ddx, y + ddy) and maze.get_tile(x + ddx, y + ddy) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
-                        for ddx, ddy in [(0, 1), (0, -1), (1, 0), (-1, 0)]) > 2
-            ]
-            if junctions:
-                target = min(junctions, key=lambda p: ((p[0] - pacman.x) ** 2 + (p[1] - pacman.y) ** 2) ** 0.5)
-                if self.move_to_target(target[0], target[1], maze):
-                    return
-
-        if self.move_to_target(target_x, target_y, maze):
+        if self.move_to_target(pacman.x, pacman.y, maze):
             return
         self.move_random(maze)
 
 class Ghost4(Ghost):
-    def __init__(self, x: int, y: int, name: str = "Ghost4"):
+    __slots__ = ()
+
+    def __init__(self, x: int, y: int, store: EntityStore, name: str = "Ghost4", rng=None):
         """
         初始化 Ghost4（淺藍色鬼魂），作為攪亂者。
 
@@ -565,10 +491,10 @@ class Ghost4(Ghost):
         - Ghost4 採用攪亂策略，隨機阻塞路口或追逐 Pac-Man。
         - 使用淺藍色，速度為 GHOST4_SPEED。
         """
-        super().__init__(x, y, name, color=LIGHT_BLUE)
+        super().__init__(x, y, store, name, color=LIGHT_BLUE, rng=rng)
         self.speed = GHOST4_SPEED
 
-    def chase_pacman(self, pacman, maze, ghosts: List['Ghost'] = None):
+    def chase_pacman(self, pacman, maze):
         """
         攪亂策略：當距離 Pac-Man 小於 6 格時隨機阻塞路口，否則預測並追逐。
 
@@ -586,13 +512,10 @@ class Ghost4(Ghost):
                 if maze.xy_valid(self.x + dx, self.y + dy) and
                 maze.get_tile(self.x + dx, self.y + dy) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
             ]
-            junctions = [
-                (x, y) for x, y in nearby_points
-                if sum(maze.xy_valid(x + ddx, y + ddy) and maze.get_tile(x + ddx, y + ddy) in [TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN]
-                       for ddx, ddy in [(0, 1), (0, -1), (1, 0), (-1, 0)]) > 1
-            ]
+            index = get_index(maze)
+            junctions = [(x, y) for x, y in nearby_points if index.degree_at(x, y) > 1]
             if junctions:
-                target = random.choice(junctions)
+                target = self.rng.choice(junctions)
                 if self.move_to_target(target[0], target[1], maze):
                     return
             self.move_random(maze)
@@ -1,12 +1,17 @@
 # game/entities/pacman.py
 from enum import Enum
-from typing import Tuple, List, Optional
+from functools import cached_property
+from typing import Tuple, List, Optional, Dict
+import numpy as np
 from .entity_base import Entity
-from heapq import heappush, heappop
 import random
 from config import CELL_SIZE, TILE_BOUNDARY, TILE_WALL, TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, TILE_DOOR, PACMAN_BASE_SPEED, PACMAN_AI_SPEED, MAX_STUCK_FRAMES
-from .pellets import PowerPellet, ScorePellet
+from .pellets import PowerPellet, ScorePellet, PelletGrid, pellet_lookup
 from .ghost import Ghost
+from ..maze_graph import PACMAN_PASSABLE
+from ..entity_store import EntityStore
+from ..pathfinding import (danger_field, is_dangerous, is_chaseable, nearest_targets, pellet_distances, branch_guards,
+                           Target, PathPlan, UNREACHABLE, EDIBLE_CHASE_RADIUS, ENDGAME_PELLETS)
 
 # 行為樹節點狀態
 class NodeStatus(Enum):
@@ -14,9 +19,168 @@ class NodeStatus(Enum):
     FAILURE = "failure"
     RUNNING = "running"
 
+# 行為樹黑板：每次決策建立一次，惰性計算並快取各節點共用的衍生量
+class Blackboard:
+    def __init__(self, pacman: 'PacMan', maze, power_pellets, score_pellets, ghosts: List[Ghost]):
+        """
+        初始化黑板。
+
+        原理：
+        - 行為樹的多個條件與動作節點需要相同的衍生量（最近危險鬼魂距離、最近彈丸、可食用鬼魂列表）。
+        - 黑板在第一次存取時計算並快取（cached_property），同一次 rule_based_ai_move 中每項只計算一次。
+        - 彈丸為 PelletGrid 時以 NumPy 向量化計算距離。
+        - 危險場（多源 BFS）同樣只計算一次，供本次決策中所有 find_path 呼叫共用。
+        - 最近目標以單次 BFS 依迷宮距離選出，不會選中被牆隔開的彈丸或鬼魂。
+
+        Args:
+            pacman (PacMan): Pac-Man 物件。
+            maze (Map): 迷宮物件。
+            power_pellets (PelletGrid | List[PowerPellet]): 能量球。
+            score_pellets (PelletGrid | List[ScorePellet]): 分數球。
+            ghosts (List[Ghost]): 鬼魂列表。
+        """
+        self.pacman = pacman
+        self.maze = maze
+        self.power_pellets = power_pellets
+        self.score_pellets = score_pellets
+        self.ghosts = ghosts
+        self.position = (pacman.x, pacman.y)
+
+    @cached_property
+    def danger_ghosts(self) -> List[Ghost]:
+        """危險鬼魂（非可食用、非返回重生點、非等待）。"""
+        return [ghost for ghost in self.ghosts if is_dangerous(ghost)]
+
+    @cached_property
+    def danger_field(self) -> Optional[np.ndarray]:
+        """每個格子與最近危險鬼魂的迷宮距離（見 game.pathfinding.danger_field），無危險鬼魂時為 None。"""
+        return danger_field(self.maze, self.danger_ghosts) if self.danger_ghosts else None
+
+    @cached_property
+    def min_danger_dist(self) -> float:
+        """與最近危險鬼魂的歐幾里得距離，無危險鬼魂時為無限大。"""
+        x, y = self.position
+        return min((((x - ghost.x) ** 2 + (y - ghost.y) ** 2) ** 0.5 for ghost in self.danger_ghosts), default=float('inf'))
+
+    @cached_property
+    def edible_ghosts(self) -> List[Ghost]:
+        """可追擊的可食用鬼魂（剩餘時間大於 3 且未返回重生點或等待）。"""
+        return [ghost for ghost in self.ghosts if is_chaseable(ghost)]
+
+    @cached_property
+    def closest_edible_ghost(self) -> Optional[Ghost]:
+        """最近的可食用鬼魂。"""
+        x, y = self.position
+        return min(self.edible_ghosts, key=lambda g: (g.x - x) ** 2 + (g.y - y) ** 2, default=None)
+
+    @cached_property
+    def min_edible_dist(self) -> float:
+        """與最近可食用鬼魂的距離，無可食用鬼魂時為無限大。"""
+        ghost = self.closest_edible_ghost
+        if ghost is None:
+            return float('inf')
+        return ((ghost.x - self.position[0]) ** 2 + (ghost.y - self.position[1]) ** 2) ** 0.5
+
+    @cached_property
+    def nearest(self) -> Dict[str, Optional[Target]]:
+        """
+        迷宮距離最近的能量球、分數球與可食用鬼魂（見 game.pathfinding.nearest_targets）。
+
+        原理：
+        - 只查詢非空的目標類別，避免為不存在的目標遍歷整個迷宮。
+        - 能量球格子不繼續展開，前往分數球的路線不會途經能量球（與 find_path 的 power_penalty 一致）。
+        """
+        has_power = pellet_lookup(self.power_pellets)
+        targets = {}
+        if self.power_pellets:
+            targets["power"] = has_power
+        if self.score_pellets:
+            targets["score"] = pellet_lookup(self.score_pellets)
+        if self.edible_ghosts:
+            edible_tiles = {(ghost.target_x, ghost.target_y) for ghost in self.edible_ghosts}
+            targets["edible"] = lambda x, y: (x, y) in edible_tiles
+        found = nearest_targets(self.maze, self.position, targets, avoid=has_power) if targets else {}
+        return {name: found.get(name) for name in ("power", "score", "edible")}
+
+    def is_route_safe(self, target: Target) -> bool:
+        """
+        判斷前往目標的 BFS 最短路線是否遠離所有危險鬼魂。
+
+        原理：
+        - 路線上每個格子與 Pac-Man 的迷宮距離不超過 target.distance，鬼魂可通行的格子又包含
+          Pac-Man 可通行的格子，因此由三角不等式，路線上格子的危險距離至少為
+          danger[Pac-Man] - target.distance。
+        - 此值不小於 4 時，find_path 沿途的 danger_cost 皆為 0，A* 會得到同樣長度的最短路線，
+          可直接使用 BFS 的第一步而省去 A* 搜尋。
+
+        Args:
+            target (Target): nearest 中的目標。
+
+        Returns:
+            bool: 路線是否安全。
+        """
+        if self.danger_field is None:
+            return True
+        x, y = self.position
+        return int(self.danger_field[y, x]) - target.distance >= 4
+
+    def _pellet_distances(self, pellets) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        計算所有彈丸位置及其與 Pac-Man 的平方距離。
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (位置陣列 (N, 2), 平方距離陣列 (N,))。
+        """
+        return pellet_distances(pellets, self.position)
+
+    @cached_property
+    def guards(self) -> Tuple[bool, bool, bool]:
+        """規劃路線時的行為樹分支條件（見 game.pathfinding.branch_guards），保存於 PathPlan 以偵測選擇改變。"""
+        return branch_guards(self.position, self.power_pellets, self.score_pellets, self.ghosts)
+
+    @cached_property
+    def _power_distances(self):
+        return self._pellet_distances(self.power_pellets)
+
+    @cached_property
+    def _score_distances(self):
+        return self._pellet_distances(self.score_pellets)
+
+    @cached_property
+    def closest_power(self) -> Optional[Tuple[int, int]]:
+        """迷宮距離最近的能量球位置；皆無法到達時取歐幾里得距離最近者（平手時取列優先順序較前者）。"""
+        if self.nearest["power"] is not None:
+            return self.nearest["power"].position
+        positions, dist_sq = self._power_distances
+        if not len(positions):
+            return None
+        return tuple(positions[int(np.argmin(dist_sq))].tolist())
+
+    @cached_property
+    def closest_score(self) -> Optional[Tuple[int, int]]:
+        """迷宮距離最近的分數球位置；皆無法到達時取歐幾里得距離最近者（平手時取列優先順序較前者）。"""
+        if self.nearest["score"] is not None:
+            return self.nearest["score"].position
+        positions, dist_sq = self._score_distances
+        if not len(positions):
+            return None
+        return tuple(positions[int(np.argmin(dist_sq))].tolist())
+
+    @cached_property
+    def power_dist(self) -> float:
+        """與最近能量球的距離。"""
+        _, dist_sq = self._power_distances
+        return float(np.sqrt(dist_sq.min())) if len(dist_sq) else float('inf')
+
+    @cached_property
+    def avg_score_dist(self) -> float:
+        """與所有分數球的平均距離。"""
+        _, dist_sq = self._score_distances
+        return float(np.sqrt(dist_sq).mean()) if len(dist_sq) else float('inf')
+
 # 行為樹基類
 class BehaviorNode:
-    def execute(self, pacman: 'PacMan', maze, power_pellets: List[PowerPellet], score_pellets: List[ScorePellet], ghosts: List[Ghost]) -> NodeStatus:
+    def execute(self, pacman: 'PacMan', maze, power_pellets: List[PowerPellet], score_pellets: List[ScorePellet], ghosts: List[Ghost], blackboard: Blackboard) -> NodeStatus:
         raise NotImplementedError
 
 # 條件節點
@@ -24,25 +188,25 @@ class ConditionNode(BehaviorNode):
     def __init__(self, condition_func):
         self.condition_func = condition_func
 
-    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts):
-        return NodeStatus.SUCCESS if self.condition_func(pacman, maze, power_pellets, score_pellets, ghosts) else NodeStatus.FAILURE
+    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+        return NodeStatus.SUCCESS if self.condition_func(pacman, maze, power_pellets, score_pellets, ghosts, blackboard) else NodeStatus.FAILURE
 
 # 動作節點
 class ActionNode(BehaviorNode):
     def __init__(self, action_func):
         self.action_func = action_func
 
-    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts):
-        return self.action_func(pacman, maze, power_pellets, score_pellets, ghosts)
+    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+        return self.action_func(pacman, maze, power_pellets, score_pellets, ghosts, blackboard)
 
 # 選擇節點
 class SelectorNode(BehaviorNode):
     def __init__(self, children: List[BehaviorNode]):
         self.children = children
 
-    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts):
+    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
         for child in self.children:
-            status = child.execute(pacman, maze, power_pellets, score_pellets, ghosts)
+            status = child.execute(pacman, maze, power_pellets, score_pellets, ghosts, blackboard)
             if status == NodeStatus.SUCCESS:
                 return NodeStatus.SUCCESS
             elif status == NodeStatus.RUNNING:
@@ -54,9 +218,9 @@ class SequenceNode(BehaviorNode):
     def __init__(self, children: List[BehaviorNode]):
         self.children = children
 
-    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts):
+    def execute(self, pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
         for child in self.children:
-            status = child.execute(pacman, maze, power_pellets, score_pellets, ghosts)
+            status = child.execute(pacman, maze, power_pellets, score_pellets, ghosts, blackboard)
             if status == NodeStatus.FAILURE:
                 return NodeStatus.FAILURE
             elif status == NodeStatus.RUNNING:
@@ -64,8 +228,12 @@ class SequenceNode(BehaviorNode):
         return NodeStatus.SUCCESS
 
 class PacMan(Entity):
-    def __init__(self, x: int, y: int):
-        super().__init__(x, y, 'P')
+    __slots__ = ("rng", "score", "lives", "alive", "last_direction", "alternating_vertical_count", "stuck_count",
+                 "max_stuck_frames", "plan", "initial_x", "initial_y", "behavior_tree")
+
+    def __init__(self, x: int, y: int, store: EntityStore, rng=None):
+        super().__init__(x, y, 'P', store)
+        self.rng = rng if rng is not None else random  # 規則 AI 隨機移動的隨機數來源，與鬼魂分開
         self.score = 0
         self.lives = 3
         self.alive = True
@@ -74,6 +242,7 @@ class PacMan(Entity):
         self.alternating_vertical_count = 0
         self.stuck_count = 0
         self.max_stuck_frames = MAX_STUCK_FRAMES
+        self.plan = None  # 規則 AI 已規劃、跨 tick 沿用的路線（PathPlan）
         self.initial_x = x
         self.initial_y = y
         # 初始化行為樹
@@ -81,54 +250,36 @@ class PacMan(Entity):
 
     def _build_behavior_tree(self) -> BehaviorNode:
         """構建行為樹，模擬 rule_based_ai_move 的決策邏輯。"""
-        # 條件函數
-        def is_immediate_threat(pacman, maze, power_pellets, score_pellets, ghosts):
-            min_danger_dist = float('inf')
-            for ghost in ghosts:
-                if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible:
-                    dist = ((pacman.x - ghost.x) ** 2 + (pacman.y - ghost.y) ** 2) ** 0.5
-                    min_danger_dist = min(min_danger_dist, dist)
-            return min_danger_dist <= 1
-
-        def is_threat_nearby(pacman, maze, power_pellets, score_pellets, ghosts):
-            min_danger_dist = float('inf')
-            for ghost in ghosts:
-                if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible:
-                    dist = ((pacman.x - ghost.x) ** 2 + (pacman.y - ghost.y) ** 2) ** 0.5
-                    min_danger_dist = min(min_danger_dist, dist)
-            return min_danger_dist < 6
-
-        def has_power_pellet(pacman, maze, power_pellets, score_pellets, ghosts):
+        # 條件函數（衍生量由黑板快取，同一次決策只計算一次）
+        def is_immediate_threat(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            return blackboard.min_danger_dist <= 1
+
+        def is_threat_nearby(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            return blackboard.min_danger_dist < 6
+
+        def has_power_pellet(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
             return bool(power_pellets)
 
-        def is_endgame(pacman, maze, power_pellets, score_pellets, ghosts):
-            return len(score_pellets) <= 10
+        def is_endgame(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            return len(score_pellets) <= ENDGAME_PELLETS
 
-        def is_power_pellet_closer(pacman, maze, power_pellets, score_pellets, ghosts):
+        def is_power_pellet_closer(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
             if not power_pellets or not score_pellets:
                 return False
-            power_dist = min(((p.x - pacman.x) ** 2 + (p.y - pacman.y) ** 2) ** 0.5 for p in power_pellets)
-            score_dists = [((s.x - pacman.x) ** 2 + (s.y - pacman.y) ** 2) ** 0.5 for s in score_pellets]
-            avg_score_dist = sum(score_dists) / len(score_dists)
-            return power_dist < avg_score_dist
-
-        def has_edible_ghost(pacman, maze, power_pellets, score_pellets, ghosts):
-            for ghost in ghosts:
-                if ghost.edible and ghost.edible_timer > 3 and not ghost.returning_to_spawn and not ghost.waiting:
-                    dist = ((ghost.x - pacman.x) ** 2 + (ghost.y - pacman.y) ** 2) ** 0.5
-                    if dist < 10:
-                        return True
-            return False
-
-        def has_score_pellet(pacman, maze, power_pellets, score_pellets, ghosts):
+            return blackboard.power_dist < blackboard.avg_score_dist
+
+        def has_edible_ghost(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            return blackboard.min_edible_dist < EDIBLE_CHASE_RADIUS
+
+        def has_score_pellet(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
             return bool(score_pellets)
 
-        def is_stuck(pacman, maze, power_pellets, score_pellets, ghosts):
+        def is_stuck(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
             return pacman.stuck_count > pacman.max_stuck_frames
 
         # 動作函數
-        def flee_from_ghosts(pacman, maze, power_pellets, score_pellets, ghosts):
-            direction = pacman.find_path((pacman.x, pacman.y), None, maze, ghosts, score_pellets, power_pellets, mode="flee", target_type="none")
+        def flee_from_ghosts(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            direction = pacman.find_path((pacman.x, pacman.y), None, maze, ghosts, score_pellets, power_pellets, mode="flee", target_type="none", danger=blackboard.danger_field)
             if direction:
                 dx, dy = direction
                 if pacman.set_new_target(dx, dy, maze):
@@ -137,10 +288,10 @@ class PacMan(Entity):
                     return NodeStatus.SUCCESS
             return NodeStatus.FAILURE
 
-        def move_to_power_pellet(pacman, maze, power_pellets, score_pellets, ghosts):
-            closest_power = min(power_pellets, key=lambda p: (p.x - pacman.x) ** 2 + (p.y - pacman.y) ** 2)
-            goal = (closest_power.x, closest_power.y)
-            direction = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="power")
+        def move_to_power_pellet(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            goal = blackboard.closest_power
+            path = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="power", danger=blackboard.danger_field, return_path=True)
+            direction = pacman.commit_plan(path, "power", ghosts, blackboard.guards)
             if direction:
                 dx, dy = direction
                 if pacman.set_new_target(dx, dy, maze):
@@ -149,10 +300,14 @@ class PacMan(Entity):
                     return NodeStatus.SUCCESS
             return NodeStatus.FAILURE
 
-        def move_to_score_pellet(pacman, maze, power_pellets, score_pellets, ghosts):
-            closest_score = min(score_pellets, key=lambda s: (s.x - pacman.x) ** 2 + (s.y - pacman.y) ** 2)
-            goal = (closest_score.x, closest_score.y)
-            direction = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="score")
+        def move_to_score_pellet(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
+            target = blackboard.nearest["score"]
+            if target is not None and blackboard.is_route_safe(target):
+                path = target.path  # 路線安全時直接沿 BFS 最短路線前進，省去 A* 搜尋
+            else:
+                goal = blackboard.closest_score
+                path = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="score", danger=blackboard.danger_field, return_path=True)
+            direction = pacman.commit_plan(path, "score", ghosts, blackboard.guards)
             if direction:
                 dx, dy = direction
                 if pacman.set_new_target(dx, dy, maze):
@@ -161,13 +316,13 @@ class PacMan(Entity):
                     return NodeStatus.SUCCESS
             return NodeStatus.FAILURE
 
-        def move_to_edible_ghost(pacman : PacMan, maze, power_pellets, score_pellets, ghosts : List[Ghost]):
-            edible_ghosts = [g for g in ghosts if g.edible and g.edible_timer > 3 and not g.returning_to_spawn and not g.waiting]
-            if not edible_ghosts:
+        def move_to_edible_ghost(pacman : PacMan, maze, power_pellets, score_pellets, ghosts : List[Ghost], blackboard):
+            closest_edible = blackboard.closest_edible_ghost
+            if closest_edible is None:
                 return NodeStatus.FAILURE
-            closest_edible = min(edible_ghosts, key=lambda g: (g.x - pacman.x) ** 2 + (g.y - pacman.y) ** 2)
-            goal = (closest_edible.target_x, closest_edible.target_y)
-            direction = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="edible")
+            target = blackboard.nearest["edible"]
+            goal = target.position if target is not None else (closest_edible.target_x, closest_edible.target_y)
+            direction = pacman.find_path((pacman.x, pacman.y), goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="edible", danger=blackboard.danger_field)
             if direction:
                 dx, dy = direction
                 if pacman.set_new_target(dx, dy, maze):
@@ -176,13 +331,13 @@ class PacMan(Entity):
                     return NodeStatus.SUCCESS
             return NodeStatus.FAILURE
 
-        def random_safe_move(pacman, maze, power_pellets, score_pellets, ghosts):
+        def random_safe_move(pacman, maze, power_pellets, score_pellets, ghosts, blackboard):
             directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
             safe_directions = [(dx, dy) for dx, dy in directions 
                               if maze.xy_valid(pacman.x + dx, pacman.y + dy) 
                               and maze.get_tile(pacman.x + dx, pacman.y + dy) not in [TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN]]
             if safe_directions:
-                dx, dy = random.choice(safe_directions)
+                dx, dy = pacman.rng.choice(safe_directions)
                 if pacman.set_new_target(dx, dy, maze):
                     pacman.last_direction = (dx, dy)
                     pacman.stuck_count = 0
@@ -227,6 +382,8 @@ class PacMan(Entity):
     def rule_based_ai_move(self, maze, power_pellets: List['PowerPellet'], score_pellets: List['ScorePellet'], ghosts: List['Ghost']) -> bool:
         """
         使用行為樹執行 AI 移動邏輯，替代原有的多層決策。
+        每次決策建立一個黑板（Blackboard），各節點共用其中快取的衍生量。
+        若前往彈丸的路線仍有效（見 PathPlan.invalidation），直接沿路線前進而不執行行為樹。
 
         Args:
             maze: 迷宮物件。
@@ -238,9 +395,38 @@ class PacMan(Entity):
             bool: 是否成功設置新目標。
         """
         self.speed = PACMAN_AI_SPEED
-        status = self.behavior_tree.execute(self, maze, power_pellets, score_pellets, ghosts)
+        if self.plan is not None:
+            if self.plan.invalidation((self.x, self.y), power_pellets, score_pellets, ghosts) is None:
+                dx, dy = self.plan.next_step((self.x, self.y))
+                if self.set_new_target(dx, dy, maze):
+                    self.last_direction = (dx, dy)
+                    self.stuck_count = 0
+                    return True
+            self.plan = None
+        blackboard = Blackboard(self, maze, power_pellets, score_pellets, ghosts)
+        status = self.behavior_tree.execute(self, maze, power_pellets, score_pellets, ghosts, blackboard)
         return status == NodeStatus.SUCCESS
 
+    def commit_plan(self, path, target_type: str, ghosts: List[Ghost],
+                    guards: Optional[Tuple[bool, bool, bool]] = None) -> Optional[Tuple[int, int]]:
+        """
+        保存前往彈丸的路線並取出第一步。
+
+        Args:
+            path: find_path(return_path=True) 或 Target.path 的路線，None 表示無路線。
+            target_type (str): 目標類型（"score" 或 "power"）。
+            ghosts (List[Ghost]): 鬼魂列表。
+            guards (Tuple[bool, bool, bool], optional): 規劃時的行為樹分支條件（Blackboard.guards）。
+
+        Returns:
+            Optional[Tuple[int, int]]: 第一步方向 (dx, dy)，無路線時為 None。
+        """
+        if not path:
+            self.plan = None
+            return None
+        self.plan = PathPlan(path, target_type, ghosts, guards)
+        return self.plan.next_step((self.x, self.y))
+
     def eat_pellet(self, pellets: List['PowerPellet']) -> int:
         """
         檢查並吃能量球，更新分數並移除能量球。
@@ -248,14 +434,19 @@ class PacMan(Entity):
         原理：
         - 若 Pac-Man 位置與能量球重合，增加分數並移除該能量球。
         - 分數增量等於能量球的 value（預設 10）。
+        - PelletGrid 只需一次網格索引；普通列表則逐一比對。
 
         Args:
-            pellets (List[PowerPellet]): 能量球列表。
+            pellets (PelletGrid | List[PowerPellet]): 能量球網格或列表。
 
         Returns:
             int: 增加的分數（若未吃到則為 0）。
         """
-        for pellet in pellets[:]:
+        if isinstance(pellets, PelletGrid):
+            value = pellets.eat(self.x, self.y)
+            self.score += value
+            return value
+        for pellet in pellets:
             if pellet.x == self.x and pellet.y == self.y:
                 self.score += pellet.value
                 pellets.remove(pellet)
@@ -269,14 +460,19 @@ class PacMan(Entity):
         原理：
         - 若 Pac-Man 位置與分數球重合，增加分數並移除該分數球。
         - 分數增量等於分數球的 value（預設 2）。
+        - PelletGrid 只需一次網格索引；普通列表則逐一比對。
 
         Args:
-            score_pellets (List[ScorePellet]): 分數球列表。
+            score_pellets (PelletGrid | List[ScorePellet]): 分數球網格或列表。
 
         Returns:
             int: 增加的分數（若未吃到則為 0）。
         """
-        for score_pellet in score_pellets[:]:
+        if isinstance(score_pellets, PelletGrid):
+            value = score_pellets.eat(self.x, self.y)
+            self.score += value
+            return value
+        for score_pellet in score_pellets:
             if score_pellet.x == self.x and score_pellet.y == self.y:
                 self.score += score_pellet.value
                 score_pellets.remove(score_pellet)
@@ -297,6 +493,7 @@ class PacMan(Entity):
         """
         self.lives -= 1
         self.score -= 50  # 死亡扣分
+        self.plan = None
         # self.x = self.initial_x
         # self.y = self.initial_y
         # self.current_x = self.x * CELL_SIZE + CELL_SIZE // 2
@@ -307,21 +504,25 @@ class PacMan(Entity):
         # self.alternating_vertical_count = 0
         # self.stuck_count = 0
 
-    def find_path(self, start, goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="score"):
+    def find_path(self, start, goal, maze, ghosts, score_pellets, power_pellets, mode="approach", target_type="score", danger=None, return_path=False):
         """
         使用 A* 算法找到從 start 到 goal 的最短路徑，考慮鬼魂威脅和目標類型。
 
         原理：
         - A* 算法結合啟發式函數（歐幾里得距離）尋找最短路徑，考慮迷宮障礙和鬼魂威脅。
+        - 搜尋在迷宮的路口圖（Map.junction_graph）上進行，只在路口與死路節點展開，
+          走廊的成本為其格子成本之和。
         - 啟發式函數：h(a, b) = √((a[0] - b[0])^2 + (a[1] - b[1])^2)
         - 成本函數 g 包含：
           - 基本移動成本（1）。
-          - 鬼魂威脅成本（danger_cost，與距離成反比）。
+          - 鬼魂威脅成本（danger_cost，與危險場中最近危險鬼魂的迷宮距離成反比）。
           - 能量球懲罰（power_penalty，target_type="score" 時避免能量球）。
           - 分數球獎勵（score_reward，順路吃分數球）。
         - 模式：
           - approach：直接接近目標。
-          - flee：逃離危險鬼魂，選擇最遠的安全點。
+          - flee：逃離危險鬼魂，在搜尋窗口內選擇危險場距離最大的安全點。
+        - 危險場（danger）為多源 BFS 計算的每格迷宮距離，A* 展開鄰居與逃跑目標選擇皆以 O(1) 查詢，
+          不再對每個鄰居遍歷所有鬼魂。
         - 目標類型：score（分數球）、power（能量球）、edible（可食用鬼魂）、none（無目標）。
 
         Args:
@@ -329,21 +530,29 @@ class PacMan(Entity):
             goal (Tuple[int, int]): 目標位置 (x, y)，若為 None 則動態選擇。
             maze: 迷宮物件。
             ghosts (List[Ghost]): 鬼魂列表。
-            score_pellets (List[ScorePellet]): 分數球列表。
-            power_pellets (List[PowerPellet]): 能量球列表。
+            score_pellets (PelletGrid | List[ScorePellet]): 分數球網格或列表。
+            power_pellets (PelletGrid | List[PowerPellet]): 能量球網格或列表。
             mode (str): 移動模式（"approach" 或 "flee"）。
             target_type (str): 目標類型（"score", "power", "edible", "none"）。
+            danger (np.ndarray, optional): danger_field 的結果，None 時即時計算（無危險鬼魂則略過）。
+            return_path (bool): 是否返回完整路線而非第一步方向（無路線時返回 None，不隨機選擇方向）。
 
         Returns:
-            Tuple[int, int]: 第一步方向 (dx, dy)，或 None。
+            Tuple[int, int]: 第一步方向 (dx, dy)，或 None；return_path 為 True 時為路線（不含起點）。
         """
         def heuristic(a, b):
             return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5  # 歐幾里得距離
 
+        has_power = pellet_lookup(power_pellets)  # O(1) 彈丸查詢，取代逐一掃描彈丸列表
+        has_score = pellet_lookup(score_pellets)
+        if danger is None and any(is_dangerous(ghost) for ghost in ghosts):
+            danger = danger_field(maze, ghosts)
+        danger_rows = danger.tolist() if danger is not None else None  # 轉為巢狀列表，逐格查詢比 NumPy 純量存取快
+
         # 預測鬼魂下一個位置
         predicted_danger = set()
         for ghost in ghosts:
-            if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible:
+            if is_dangerous(ghost):
                 dx = 1 if ghost.x < start[0] else -1 if ghost.x > start[0] else 0
                 dy = 1 if ghost.y < start[1] else -1 if ghost.y > start[1] else 0
                 next_x, next_y = ghost.x + dx, ghost.y + dy
@@ -352,106 +561,56 @@ class PacMan(Entity):
 
         # 逃跑模式：選擇遠離危險鬼魂的安全點
         if mode == "flee" and goal is None:
-            danger_ghosts = [ghost for ghost in ghosts if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible]
-            if not danger_ghosts:
+            if not any(is_dangerous(ghost) for ghost in ghosts):
                 return None
-            best_goal = None
-            max_dist = -float('inf')
             center_x, center_y = start[0], start[1]
             search_radius = min(maze.width, maze.height) // 2
-            for y in range(max(0, center_y - search_radius), min(maze.height, center_y + search_radius + 1)):
-                for x in range(max(0, center_x - search_radius), min(maze.width, center_x + search_radius + 1)):
-                    if maze.get_tile(x, y) not in [TILE_BOUNDARY, TILE_WALL] and (x, y) not in predicted_danger:
-                        min_ghost_dist = min(((x - ghost.x) ** 2 + (y - ghost.y) ** 2) ** 0.5 for ghost in danger_ghosts)
-                        if min_ghost_dist > max_dist:
-                            max_dist = min_ghost_dist
-                            best_goal = (x, y)
-            goal = best_goal if best_goal else start
-
-        open_set = []
-        heappush(open_set, (0, start))
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: heuristic(start, goal)}  # 初始啟發值
-
-        closed_set = set()
-
-        # 定義威脅區域
-        danger_obstacles = set()
-        for ghost in ghosts:
-            if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible:
-                threat_radius = 1 + int(min(2, max(0, 6 - ((start[0] - ghost.x) ** 2 + (start[1] - ghost.y) ** 2) ** 0.5)))
-                for dx in range(-threat_radius, threat_radius + 1):
-                    for dy in range(-threat_radius, threat_radius + 1):
-                        x, y = ghost.x + dx, ghost.y + dy
-                        if maze.xy_valid(x, y):
-                            danger_obstacles.add((x, y))
-
-        while open_set:
-            _, current = heappop(open_set)
-
-            if current == goal:
-                path = []
-                while current in came_from:
-                    path.append(current)
-                    current = came_from[current]
-                path.reverse()
-                if path:
-                    next_pos = path[0]
-                    dx, dy = next_pos[0] - start[0], next_pos[1] - start[1]
-                    return (dx, dy)
-                return None
-
-            closed_set.add(current)
-
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                neighbor = (current[0] + dx, current[1] + dy)
-                if not maze.xy_valid(neighbor[0], neighbor[1]) or maze.get_tile(neighbor[0], neighbor[1]) in [TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN]:
-                    continue
-
-                danger_cost = 0
-                for ghost in ghosts:
-                    if not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible:
-                        dist = ((neighbor[0] - ghost.x) ** 2 + (neighbor[1] - ghost.y) ** 2) ** 0.5
-                        if dist < 4:
-                            danger_cost += 1500 / max(1, dist)  # 靠近鬼魂加重成本
-                        elif neighbor in predicted_danger:
-                            danger_cost += 2000  # 預測鬼魂位置加重成本
-                
-                power_avoidance_penalty = 0
-                if target_type == "edible" and power_pellets:
-                    for pellet in power_pellets:
-                        dist = ((neighbor[0] - pellet.x) ** 2 + (neighbor[1] - pellet.y) ** 2) ** 0.5
-                        if dist < 2:
-                            power_avoidance_penalty += 100 / max(1, dist)  # 避免能量球
-
-                power_penalty = 0
-                if target_type == "score" and power_pellets:
-                    for pellet in power_pellets:
-                        dist = (neighbor[0] == pellet.x) and (neighbor[1] == pellet.y)
-                        if dist:
-                            power_penalty += 1000  # 避免能量球
-
-                score_reward = 0
-                if target_type in ["edible", "none", "flee"] and maze.get_tile(neighbor[0], neighbor[1]) != TILE_WALL:
-                    for pellet in score_pellets:
-                        if pellet.x == neighbor[0] and pellet.y == neighbor[1]:
-                            score_reward -= 0.9  # 順路吃分數球
-
-                tentative_g_score = g_score[current] + 1 + danger_cost + power_avoidance_penalty + power_penalty + score_reward
-
-                if neighbor in closed_set and tentative_g_score >= g_score.get(neighbor, float('inf')):
-                    continue
-
-                if tentative_g_score < g_score.get(neighbor, float('inf')):
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal)
-                    heappush(open_set, (f_score[neighbor], neighbor))
+            x0, x1 = max(0, center_x - search_radius), min(maze.width, center_x + search_radius + 1)
+            y0, y1 = max(0, center_y - search_radius), min(maze.height, center_y + search_radius + 1)
+            window = np.where(danger[y0:y1, x0:x1] == UNREACHABLE, -1, danger[y0:y1, x0:x1])  # 排除牆壁與無法到達的格子
+            for x, y in predicted_danger:
+                if x0 <= x < x1 and y0 <= y < y1:
+                    window[y - y0, x - x0] = -1
+            best = int(np.argmax(window))  # 平手時取列優先順序較前者
+            goal = (x0 + best % (x1 - x0), y0 + best // (x1 - x0)) if window.flat[best] >= 0 else start
+
+        def tile_cost(x, y):
+            cost = 1
+            ghost_dist = danger_rows[y][x] if danger_rows is not None else UNREACHABLE
+            if ghost_dist < 4:
+                cost += 1500 / max(1, ghost_dist)  # 靠近鬼魂加重成本
+            elif (x, y) in predicted_danger:
+                cost += 2000  # 預測鬼魂位置加重成本
+
+            if target_type == "edible" and power_pellets:
+                for oy in (-1, 0, 1):  # 距離小於 2 的能量球只可能位於周圍 3x3 格子
+                    for ox in (-1, 0, 1):
+                        if has_power(x + ox, y + oy):
+                            dist = (ox ** 2 + oy ** 2) ** 0.5
+                            cost += 100 / max(1, dist)  # 避免能量球
+
+            if target_type == "score" and has_power(x, y):
+                cost += 1000  # 避免能量球
+
+            if target_type in ["edible", "none", "flee"] and has_score(x, y):
+                cost -= 0.9  # 順路吃分數球
+            return cost
+
+        # 在 Pac-Man 的路口圖上進行 A*，走廊成本為其格子成本之和
+        path = maze.junction_graph(PACMAN_PASSABLE).route(start, goal, tile_cost, lambda tile: heuristic(tile, goal))
+        if path is not None:
+            if return_path:
+                return path
+            if path:
+                return (path[0][0] - start[0], path[0][1] - start[1])
+            return None
+
+        if return_path:
+            return None
 
         # 若無路徑，選擇隨機安全方向
         safe_directions = [(dx, dy) for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)] 
                           if maze.xy_valid(start[0] + dx, start[1] + dy) 
                           and maze.get_tile(start[0] + dx, start[1] + dy) not in [TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN]]
-        return random.choice(safe_directions) if safe_directions else None
+        return self.rng.choice(safe_directions) if safe_directions else None
     
\ No newline at end of file
@@ -1,12 +1,22 @@
 # game/entities/pellets.py
 """
-定義遊戲中的能量球（PowerPellet）和分數球（ScorePellet），作為 Pac-Man 遊戲中的可收集物體。
+定義遊戲中的能量球（PowerPellet）和分數球（ScorePellet），作為 Pac-Man 遊戲中的可收集物體，
+以及以布林網格儲存彈丸的 PelletGrid。
 """
 
+from collections import namedtuple
+from typing import Callable, Iterable, Iterator, Tuple
+import numpy as np
 from .entity_base import Entity
+from ..entity_store import EntityStore
+
+POWER_PELLET_VALUE = 10  # 能量球分數值
+SCORE_PELLET_VALUE = 2  # 分數球分數值
 
 class PowerPellet(Entity):
-    def __init__(self, x: int, y: int, value: int = 10):
+    __slots__ = ("value",)
+
+    def __init__(self, x: int, y: int, store: EntityStore, value: int = POWER_PELLET_VALUE):
         """
         初始化能量球，設置其位置和分數值。
 
@@ -18,13 +28,16 @@ class PowerPellet(Entity):
         Args:
             x (int): 迷宮中的 x 坐標（格子坐標）。
             y (int): 迷宮中的 y 坐標（格子坐標）。
+            store (EntityStore): 實體狀態儲存。
             value (int): 能量球的分數值，預設為 10。
         """
-        super().__init__(x, y, 'o')  # 調用基類 Entity 初始化，設置坐標和符號
+        super().__init__(x, y, 'o', store)  # 調用基類 Entity 初始化，設置坐標和符號
         self.value = value  # 設置能量球的分數值
 
 class ScorePellet(Entity):
-    def __init__(self, x: int, y: int, value: int = 2):
+    __slots__ = ("value",)
+
+    def __init__(self, x: int, y: int, store: EntityStore, value: int = SCORE_PELLET_VALUE):
         """
         初始化分數球，設置其位置和分數值。
 
@@ -36,7 +49,167 @@ class ScorePellet(Entity):
         Args:
             x (int): 迷宮中的 x 坐標（格子坐標）。
             y (int): 迷宮中的 y 坐標（格子坐標）。
+            store (EntityStore): 實體狀態儲存。
             value (int): 分數球的分數值，預設為 2。
         """
-        super().__init__(x, y, 's')  # 調用基類 Entity 初始化，設置坐標和符號
-        self.value = value  # 設置分數球的分數值
\ No newline at end of file
+        super().__init__(x, y, 's', store)  # 調用基類 Entity 初始化，設置坐標和符號
+        self.value = value  # 設置分數球的分數值
+
+Pellet = namedtuple("Pellet", ["x", "y", "value"])  # PelletGrid 迭代時返回的輕量彈丸視圖
+
+class PelletGrid:
+    def __init__(self, width: int, height: int, value: int, positions: Iterable[Tuple[int, int]] = ()):
+        """
+        以布林網格儲存同一種彈丸，取代 PowerPellet / ScorePellet 物件列表。
+
+        原理：
+        - grid[y, x] 為 True 表示該格子有彈丸，吃彈丸只需一次索引檢查與賦值（O(1)）。
+        - 另外維護彈丸數量 count，len() 與真值判斷不需掃描網格。
+        - 保留列表式接口：len()、迭代、in、索引 / 切片與 remove()，迭代時依列優先順序
+          （與 initialize_entities 建立列表的順序相同）返回 Pellet(x, y, value)。
+        - 位置陣列（positions）按需計算並快取，直到彈丸被吃掉才失效。
+        - 每格只佔 1 位元組，取代數百個 Entity 物件。
+        - 網格資料存放在 bytearray 中，grid 為其零複製的 NumPy 視圖：
+          逐格查詢走 bytearray 索引（避免 NumPy 純量存取開銷），整體複製走 NumPy。
+
+        Args:
+            width (int): 迷宮寬度（格子數）。
+            height (int): 迷宮高度（格子數）。
+            value (int): 每個彈丸的分數值。
+            positions (Iterable[Tuple[int, int]]): 初始彈丸位置 (x, y)。
+        """
+        self.width = width
+        self.height = height
+        self.value = value
+        self._cells = bytearray(width * height)  # 扁平網格，索引為 x + y * width
+        self.grid = np.frombuffer(self._cells, dtype=bool).reshape(height, width)  # 共享記憶體的視圖，索引為 [y, x]
+        self.count = 0
+        self._positions = None  # 快取的 (N, 2) 位置陣列
+        self.reset(positions)
+
+    def reset(self, positions: Iterable[Tuple[int, int]]) -> None:
+        """
+        以指定位置重新填充網格（例如重播時還原關鍵幀）。
+
+        Args:
+            positions (Iterable[Tuple[int, int]]): 彈丸位置 (x, y)。
+        """
+        self.grid[:] = False
+        for x, y in positions:
+            self.grid[y, x] = True
+        self.count = int(self.grid.sum())
+        self._positions = None
+
+    def has(self, x: int, y: int) -> bool:
+        """
+        檢查 (x, y) 是否有彈丸，超出範圍時返回 False。
+        """
+        return 0 <= x < self.width and 0 <= y < self.height and self._cells[x + y * self.width] == 1
+
+    def eat(self, x: int, y: int) -> int:
+        """
+        吃掉 (x, y) 的彈丸。
+
+        Args:
+            x (int): x 坐標。
+            y (int): y 坐標。
+
+        Returns:
+            int: 獲得的分數（無彈丸時為 0）。
+        """
+        if not self.has(x, y):
+            return 0
+        self._cells[x + y * self.width] = 0
+        self.count -= 1
+        self._positions = None
+        return self.value
+
+    def remove(self, pellet) -> None:
+        """
+        移除指定彈丸（列表接口相容）。
+
+        Args:
+            pellet: 具有 x, y 屬性的彈丸。
+
+        Raises:
+            ValueError: 若該位置沒有彈丸。
+        """
+        if not self.eat(pellet.x, pellet.y):
+            raise ValueError(f"位置 ({pellet.x}, {pellet.y}) 沒有彈丸")
+
+    def positions(self) -> np.ndarray:
+        """
+        返回所有彈丸位置。
+
+        Returns:
+            np.ndarray: 形狀為 (N, 2) 的 int 陣列，每列為 (x, y)，依列優先順序排列。
+        """
+        if self._positions is None:
+            ys, xs = np.nonzero(self.grid)
+            self._positions = np.stack([xs, ys], axis=1)
+        return self._positions
+
+    def copy(self) -> 'PelletGrid':
+        """
+        複製彈丸網格。
+        """
+        clone = PelletGrid(self.width, self.height, self.value)
+        clone._cells[:] = self._cells
+        clone.count = self.count
+        return clone
+
+    def snapshot(self) -> bytes:
+        """
+        返回網格內容的不可變副本（每格 1 位元組），供遊戲快照使用。
+        """
+        return bytes(self._cells)
+
+    def restore(self, cells: bytes) -> None:
+        """
+        以 snapshot 的結果原地還原網格（grid 視圖保持有效）。
+
+        Args:
+            cells (bytes): snapshot 返回的網格內容。
+        """
+        self._cells[:] = cells
+        self.count = cells.count(1)
+        self._positions = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Pellet]:
+        value = self.value
+        for x, y in self.positions().tolist():
+            yield Pellet(x, y, value)
+
+    def __contains__(self, item) -> bool:
+        if hasattr(item, "x"):  # Pellet 本身也是 tuple，需先以屬性判斷
+            return self.has(item.x, item.y)
+        x, y = item
+        return self.has(x, y)
+
+    def __getitem__(self, index):
+        positions = self.positions()[index]
+        if positions.ndim == 1:
+            return Pellet(int(positions[0]), int(positions[1]), self.value)
+        return [Pellet(x, y, self.value) for x, y in positions.tolist()]
+
+def pellet_lookup(pellets) -> Callable[[int, int], bool]:
+    """
+    返回檢查 (x, y) 是否有彈丸的函數。
+
+    原理：
+    - PelletGrid 直接使用網格索引；普通列表則一次性建立位置集合，
+      避免在搜尋的每個鄰居格子上重複掃描整個列表。
+
+    Args:
+        pellets: PelletGrid 或彈丸列表。
+
+    Returns:
+        Callable[[int, int], bool]: 查詢函數。
+    """
+    if isinstance(pellets, PelletGrid):
+        return pellets.has
+    occupied = {(pellet.x, pellet.y) for pellet in pellets}
+    return lambda x, y: (x, y) in occupied
@@ -0,0 +1,143 @@
+# game/entity_store.py
+"""
+以結構陣列（Structure of Arrays）儲存實體狀態：位置、目標、速度與鬼魂狀態旗標
+各自存放在一個 NumPy 陣列中，實體物件只保存其所在的列號，屬性存取經由 StoreField 轉發。
+移動插值與碰撞檢測可對所有實體一次向量化計算。
+"""
+
+from typing import Dict
+import numpy as np
+from config import CELL_SIZE
+
+# 欄位名稱 -> NumPy 型別
+FIELDS = {
+    "x": np.int64,  # 格子 x 坐標
+    "y": np.int64,  # 格子 y 坐標
+    "target_x": np.int64,  # 目標格子 x 坐標
+    "target_y": np.int64,  # 目標格子 y 坐標
+    "current_x": np.float64,  # 像素 x 坐標
+    "current_y": np.float64,  # 像素 y 坐標
+    "speed": np.float64,  # 移動速度（像素/秒）
+    "edible": np.bool_,  # 鬼魂是否可食用
+    "edible_timer": np.int64,  # 可食用剩餘幀數
+    "returning_to_spawn": np.bool_,  # 鬼魂是否返回重生點
+    "waiting": np.bool_,  # 鬼魂是否在重生點等待
+    "wait_timer": np.int64,  # 等待剩餘幀數
+}
+RECORD_DTYPE = np.dtype(list(FIELDS.items()))  # 一個實體的完整狀態記錄
+
+class EntityStore:
+    def __init__(self, capacity: int = 8):
+        """
+        初始化實體儲存。
+
+        原理：
+        - 所有欄位存放在一個結構化陣列 data 中（每列一筆 RECORD_DTYPE 記錄），
+          columns 為各欄位的視圖，向量化計算按欄位進行，快照只需複製一次 data。
+        - 容量不足時以倍增方式擴充；釋放的列放入空閒列表重複使用。
+
+        Args:
+            capacity (int): 初始容量（列數）。
+        """
+        self.capacity = max(1, capacity)
+        self.data = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self.columns: Dict[str, np.ndarray] = {name: self.data[name] for name in FIELDS}
+        self.size = 0  # 已使用過的列數（包含已釋放的列）
+        self._free = []  # 已釋放、可重複使用的列
+
+    def allocate(self) -> int:
+        """
+        分配一列給新實體。
+
+        Returns:
+            int: 列號。
+        """
+        if self._free:
+            return self._free.pop()
+        if self.size == self.capacity:
+            self.capacity *= 2
+            grown = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+            grown[:self.size] = self.data
+            self.data = grown
+            self.columns = {name: self.data[name] for name in FIELDS}
+        self.size += 1
+        return self.size - 1
+
+    def release(self, row: int) -> None:
+        """
+        釋放實體佔用的列，之後 allocate 會重複使用。
+
+        原理：
+        - 實體不以終結器歸還列（回收時機取決於 GC），由擁有者在捨棄單個實體時顯式呼叫；
+          整局遊戲的實體隨 Game 的 store 一起捨棄，不需逐列釋放。
+
+        Args:
+            row (int): 實體的列號（entity._row）。
+        """
+        self._free.append(row)
+
+    def snapshot(self) -> np.ndarray:
+        """返回已使用各列的狀態副本（一次陣列複製）。"""
+        return self.data[:self.size].copy()
+
+    def restore(self, data: np.ndarray) -> None:
+        """
+        將 snapshot 的結果寫回原位，實體視圖與欄位視圖保持有效。
+
+        Args:
+            data (np.ndarray): snapshot 返回的狀態陣列。
+        """
+        self.data[:len(data)] = data
+
+    def move_towards_target(self, rows, fps: int) -> np.ndarray:
+        """
+        向量化執行多個實體的逐像素移動（與 Entity.move_towards_target 相同的公式）。
+
+        原理：
+        - 目標像素坐標：target_pixel = target * CELL_SIZE + CELL_SIZE // 2。
+        - 距離 dist 不大於每幀移動距離 speed / fps 的實體直接到達目標，更新格子坐標；
+          其餘實體沿目標方向前進 speed / fps 像素（未到達時 dist > speed / fps，不會超過目標點）。
+        - 以 np.where 一次寫回整段欄位；rows 為連續列的 slice 時讀取皆為視圖，不需複製。
+        - dist 以 np.sqrt 計算，與純量版本的 ** 0.5 同為正確捨入，結果逐位相同。
+
+        Args:
+            rows (slice | np.ndarray): 要移動的實體列（slice 或列號陣列）。
+            fps (int): 每秒幀數。
+
+        Returns:
+            np.ndarray: 與 rows 對應的布林陣列，表示是否到達目標格子。
+        """
+        c = self.columns
+        target_x, target_y = c["target_x"][rows], c["target_y"][rows]
+        current_x, current_y = c["current_x"][rows], c["current_y"][rows]
+        pixel_x = target_x * CELL_SIZE + CELL_SIZE // 2
+        pixel_y = target_y * CELL_SIZE + CELL_SIZE // 2
+        dx = pixel_x - current_x
+        dy = pixel_y - current_y
+        dist = np.sqrt(dx * dx + dy * dy)
+        step = c["speed"][rows] / fps
+        arrived = dist <= step
+        if arrived.any():
+            divisor = np.where(arrived, 1.0, dist)  # 到達者不使用移動結果，避免除以零
+            c["current_x"][rows] = np.where(arrived, pixel_x, current_x + dx / divisor * step)
+            c["current_y"][rows] = np.where(arrived, pixel_y, current_y + dy / divisor * step)
+            c["x"][rows] = np.where(arrived, target_x, c["x"][rows])
+            c["y"][rows] = np.where(arrived, target_y, c["y"][rows])
+        else:  # 大多數幀沒有實體到達目標，只需前進
+            c["current_x"][rows] = current_x + dx / dist * step
+            c["current_y"][rows] = current_y + dy / dist * step
+        return arrived
+
+class StoreField:
+    """將實體屬性轉發到其 EntityStore 中對應欄位的描述器，讀取時返回 Python 純量。"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        return entity._store.columns[self.name].item(entity._row)  # item() 直接返回 Python 純量
+
+    def __set__(self, entity, value):
+        entity._store.columns[self.name][entity._row] = value
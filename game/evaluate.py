@@ -0,0 +1,301 @@
+# game/evaluate.py
+"""
+多種子並行策略評估：每個控制策略（規則 AI、DQN 模型或檢查點、MCTS 等）在一組迷宮種子上各無頭遊玩一局，
+以進程池並行執行，報告分數分布、勝率、存活時間與決策速度。
+每局結果以「策略設定 + 模型檔案雜湊 + 種子」為鍵快取到磁碟，重新評估未變更的模型不需再模擬。
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # 無頭模式：使用虛擬視訊驅動
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from config import CELL_SIZE, FPS, PACMAN_AI_SPEED, MAX_STUCK_FRAMES, EVAL_CACHE_DIR, EVAL_VERSION, EVAL_MAX_TICKS
+from game.game import Game
+from game.game_config import GameConfig, add_config_arguments, config_from_args, load_config
+from game.pathfinding import PLAN_THREAT_RADIUS, PLAN_DANGER_RADIUS
+from game.strategies import RuleBasedAIControl, DQNAIControl, MCTSControl, PYTORCH_AVAILABLE
+
+# 單局評估結果；decision_time 為策略 move 呼叫的累計耗時（秒）
+GameResult = namedtuple('GameResult', ['seed', 'score', 'won', 'ticks', 'lives', 'decisions', 'decision_time'])
+
+def _rule_strategy(arg: Optional[str], game_config: GameConfig):
+    """規則 AI（無參數）。"""
+    return RuleBasedAIControl()
+
+def _dqn_strategy(arg: Optional[str], game_config: GameConfig):
+    """DQN 模型（.pth）或訓練檢查點（.pt），參數為檔案路徑。"""
+    if not arg:
+        raise ValueError("DQN 策略需要模型路徑，例如 dqn:pacman_dqn_final.pth")
+    return DQNAIControl(game_config.width, game_config.height, model_path=arg)
+
+def _mcts_strategy(arg: Optional[str], game_config: GameConfig):
+    """MCTS 規劃，參數為「時間預算[:模擬策略]」；模擬在工作進程內執行（進程池的工作進程不能再建立子進程）。"""
+    budget, _, policy = (arg or "").partition(":")
+    return MCTSControl(time_budget=float(budget) if budget else 0.1, workers=0, policy=policy or "rule")
+
+# 策略名稱 -> 工廠函數（參數為規格中冒號後的字串與遊戲設定）；新的規劃器在此註冊即可評估
+STRATEGIES = {
+    "rule": _rule_strategy,
+    "dqn": _dqn_strategy,
+    "mcts": _mcts_strategy,
+}
+MODEL_STRATEGIES = ("dqn",)  # 參數為模型檔案的策略，快取鍵使用檔案內容的雜湊
+
+def parse_spec(spec: str):
+    """
+    解析策略規格（例如 "rule"、"mcts:0.05:random"、"dqn:checkpoints/checkpoint_000120.pt"）。
+
+    Returns:
+        Tuple[str, Optional[str]]: (策略名稱, 參數)。
+
+    Raises:
+        ValueError: 若策略名稱未註冊。
+    """
+    name, _, arg = spec.partition(":")
+    if name not in STRATEGIES:
+        raise ValueError(f"未知的策略：{name}，可用策略：{sorted(STRATEGIES)}")
+    return name, arg or None
+
+def file_digest(path: str) -> str:
+    """返回檔案內容的 SHA-1 摘要（分塊讀取）。"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def strategy_key(spec: str, max_ticks: int, game_config: GameConfig) -> str:
+    """
+    計算策略的評估快取鍵。
+
+    原理：
+    - 將策略名稱與參數、tick 上限、迷宮尺寸、鬼魂數、Pac-Man AI 參數與 EVAL_VERSION 序列化為排序後的 JSON，取 SHA-1 摘要；
+      迷宮尺寸與鬼魂數取自 game_config（種子是各局結果的鍵，不在策略鍵中）。
+    - 模型類策略以檔案內容的雜湊取代路徑：同一模型換路徑仍命中快取，覆寫模型檔案則自動失效。
+
+    Args:
+        spec (str): 策略規格。
+        max_ticks (int): 每局的 tick 上限。
+        game_config (GameConfig): 遊戲設定。
+
+    Returns:
+        str: 16 位十六進位的快取鍵。
+
+    Raises:
+        FileNotFoundError: 若模型檔案不存在。
+    """
+    name, arg = parse_spec(spec)
+    settings = {
+        "strategy": name,
+        "arg": file_digest(arg) if name in MODEL_STRATEGIES else arg,
+        "max_ticks": max_ticks,
+        "maze": [game_config.width, game_config.height],
+        "ghost_count": game_config.ghost_count,
+        "eval_version": EVAL_VERSION,
+        "pacman_ai": [PACMAN_AI_SPEED, MAX_STUCK_FRAMES, PLAN_THREAT_RADIUS, PLAN_DANGER_RADIUS],
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def load_cached_results(path: str) -> Dict[int, GameResult]:
+    """讀取快取檔案中的各局結果（種子 -> 結果），檔案不存在時為空。"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)["results"]
+    return {int(seed): GameResult(**row) for seed, row in rows.items()}
+
+def save_cached_results(path: str, spec: str, results: Dict[int, GameResult]) -> None:
+    """以暫存檔 + 重新命名原子寫入快取檔案。"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"spec": spec, "results": {str(seed): result._asdict() for seed, result in sorted(results.items())}},
+                  f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+_worker_strategies = {}  # 工作進程內已建立的策略（(規格, 設定) -> 策略），DQN 模型每個進程只載入一次
+
+def _init_worker() -> None:
+    """進程池初始化：每個工作進程只使用一個 PyTorch 執行緒，避免並行的對局互相搶佔核心。"""
+    if PYTORCH_AVAILABLE:
+        import torch
+        torch.set_num_threads(1)
+
+def play_game(spec: str, seed: int, max_ticks: int = EVAL_MAX_TICKS,
+              game_config: Optional[GameConfig] = None) -> GameResult:
+    """
+    以指定策略無頭遊玩一局。
+
+    原理：
+    - 與 main.py 相同地以 Game.update 推進，直到遊戲結束或達到 max_ticks。
+    - Pac-Man 在 move 呼叫後位於格子中心即為一次決策；決策速度 = 決策數 / move 的累計耗時，
+      只計入策略本身的計算，不含鬼魂與碰撞的模擬。
+    - DQN 的噪聲由 PyTorch 全域隨機數產生，每局以種子設定，同一模型與種子的結果可重現。
+    - 遊戲與模型載入的訊息輸出被捨棄，評估只輸出報告。
+
+    Args:
+        spec (str): 策略規格。
+        seed (int): 迷宮種子（覆蓋 game_config 的種子）。
+        max_ticks (int): tick 上限。
+        game_config (GameConfig, optional): 遊戲設定（迷宮尺寸與鬼魂數量），None 表示以 load_config 載入。
+
+    Returns:
+        GameResult: 單局結果。
+    """
+    game_config = game_config or load_config()
+    with contextlib.redirect_stdout(io.StringIO()):
+        strategy = _worker_strategies.get((spec, game_config))
+        if strategy is None:
+            name, arg = parse_spec(spec)
+            strategy = _worker_strategies[spec, game_config] = STRATEGIES[name](arg, game_config)
+        game = Game("Eval", seed=seed, game_config=game_config)
+        if hasattr(strategy, "attach"):
+            strategy.attach(game)
+        if PYTORCH_AVAILABLE:
+            import torch
+            torch.manual_seed(seed)
+        moving = False
+        decisions = 0
+        decision_time = 0.0
+        center = CELL_SIZE // 2
+
+        def move():
+            nonlocal moving, decisions, decision_time
+            pacman = game.pacman
+            start = time.perf_counter()
+            moving = strategy.move(pacman, game.maze, game.power_pellets, game.score_pellets, game.ghosts, moving)
+            decision_time += time.perf_counter() - start
+            if pacman.current_x == pacman.x * CELL_SIZE + center and pacman.current_y == pacman.y * CELL_SIZE + center:
+                decisions += 1
+
+        while (game.is_running() or game.is_death_animation_playing()) and game.ticks < max_ticks:
+            game.update(FPS, move)
+        if hasattr(strategy, "planner"):
+            strategy.close()
+    return GameResult(seed=seed, score=game.pacman.score, won=game.did_player_win(), ticks=game.ticks,
+                      lives=game.pacman.lives, decisions=decisions, decision_time=decision_time)
+
+def evaluate(specs: List[str], seeds: List[int], max_ticks: int = EVAL_MAX_TICKS, workers: Optional[int] = None,
+             cache_dir: Optional[str] = EVAL_CACHE_DIR,
+             game_config: Optional[GameConfig] = None) -> Dict[str, List[GameResult]]:
+    """
+    在所有種子上評估每個策略。
+
+    原理：
+    - 先以 strategy_key 讀取每個策略的快取，只把缺少的 (策略, 種子) 對局送入進程池；
+      所有策略的對局放在同一個任務列表中，工作進程不會因某個策略較快而閒置。
+    - 結果由主進程合併後寫回快取，工作進程不寫檔案，不需要檔案鎖。
+
+    Args:
+        specs (List[str]): 策略規格。
+        seeds (List[int]): 迷宮種子。
+        max_ticks (int): 每局的 tick 上限。
+        workers (int, optional): 工作進程數，None 表示 CPU 核心數，0 表示在主進程中執行。
+        cache_dir (str, optional): 快取目錄，None 表示不使用快取。
+        game_config (GameConfig, optional): 遊戲設定（迷宮尺寸與鬼魂數量），None 表示以 load_config 載入。
+
+    Returns:
+        Dict[str, List[GameResult]]: 策略規格 -> 按種子順序排列的結果。
+    """
+    game_config = game_config or load_config()
+    cached = {}
+    paths = {}
+    for spec in specs:
+        if cache_dir is not None:
+            paths[spec] = os.path.join(cache_dir, f"{strategy_key(spec, max_ticks, game_config)}.json")
+            cached[spec] = load_cached_results(paths[spec])
+        else:
+            parse_spec(spec)  # 在啟動進程池前檢查規格
+            cached[spec] = {}
+    tasks = [(spec, seed) for spec in specs for seed in seeds if seed not in cached[spec]]
+    if tasks:
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        specs_arg, seeds_arg = zip(*tasks)
+        if workers <= 0:
+            results = map(play_game, specs_arg, seeds_arg, [max_ticks] * len(tasks), [game_config] * len(tasks))
+        else:
+            pool = ProcessPoolExecutor(min(workers, len(tasks)), initializer=_init_worker)
+            results = pool.map(play_game, specs_arg, seeds_arg, [max_ticks] * len(tasks), [game_config] * len(tasks))
+        try:
+            for (spec, seed), result in zip(tasks, results):
+                cached[spec][seed] = result
+        finally:
+            if workers > 0:
+                pool.shutdown(wait=True, cancel_futures=True)
+        if cache_dir is not None:
+            for spec in {spec for spec, _ in tasks}:
+                save_cached_results(paths[spec], spec, cached[spec])
+    return {spec: [cached[spec][seed] for seed in seeds] for spec in specs}
+
+def summarize(results: List[GameResult]) -> dict:
+    """
+    彙總一個策略的結果。
+
+    Returns:
+        dict: 局數、分數的平均 / 標準差 / 最小 / 10% / 中位數 / 90% / 最大值、勝率、
+              平均存活時間（遊戲內秒數）與決策速度（次/秒）。
+    """
+    scores = np.array([result.score for result in results], dtype=np.float64)
+    decision_time = sum(result.decision_time for result in results)
+    p10, median, p90 = np.percentile(scores, [10, 50, 90])
+    return {
+        "games": len(results),
+        "score_mean": float(scores.mean()),
+        "score_std": float(scores.std()),
+        "score_min": float(scores.min()),
+        "score_p10": float(p10),
+        "score_median": float(median),
+        "score_p90": float(p90),
+        "score_max": float(scores.max()),
+        "win_rate": sum(result.won for result in results) / len(results),
+        "survival_seconds": float(np.mean([result.ticks for result in results])) / FPS,
+        "decisions_per_sec": sum(result.decisions for result in results) / decision_time if decision_time > 0 else 0.0,
+    }
+
+def format_report(summaries: Dict[str, dict]) -> str:
+    """將各策略的彙總格式化為表格。"""
+    header = (f"{'strategy':<32} {'games':>5} {'mean':>8} {'std':>7} {'min':>6} {'p10':>7} {'median':>7} "
+              f"{'p90':>7} {'max':>6} {'win%':>6} {'surv(s)':>8} {'dec/s':>9}")
+    lines = [header, "-" * len(header)]
+    for spec, s in summaries.items():
+        lines.append(f"{spec:<32} {s['games']:>5} {s['score_mean']:>8.1f} {s['score_std']:>7.1f} {s['score_min']:>6.0f} "
+                     f"{s['score_p10']:>7.1f} {s['score_median']:>7.1f} {s['score_p90']:>7.1f} {s['score_max']:>6.0f} "
+                     f"{100 * s['win_rate']:>6.1f} {s['survival_seconds']:>8.1f} {s['decisions_per_sec']:>9.0f}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate Pac-Man control strategies over a grid of maze seeds")
+    parser.add_argument('strategies', nargs='+', type=str,
+                        help='Strategy specs: rule, dqn:<model.pth|checkpoint.pt>, mcts[:budget[:policy]]')
+    parser.add_argument('--games', type=int, default=20, help='Games (seeds) per strategy')
+    parser.add_argument('--seed_start', type=int, default=1, help='First maze seed')
+    parser.add_argument('--max_ticks', type=int, default=EVAL_MAX_TICKS, help='Tick limit per game')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count, 0: in-process)')
+    parser.add_argument('--cache_dir', type=str, default=EVAL_CACHE_DIR, help='Result cache directory')
+    parser.add_argument('--no_cache', action='store_true', help='Ignore and do not write the result cache')
+    parser.add_argument('--json', type=str, default=None, help='Also write the summaries to this JSON file')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    seeds = list(range(args.seed_start, args.seed_start + args.games))
+    start = time.perf_counter()
+    results = evaluate(args.strategies, seeds, max_ticks=args.max_ticks, workers=args.workers,
+                       cache_dir=None if args.no_cache else args.cache_dir, game_config=config_from_args(args))
+    summaries = {spec: summarize(spec_results) for spec, spec_results in results.items()}
+    print(format_report(summaries))
+    print(f"評估完成：{len(args.strategies)} 個策略 × {len(seeds)} 個種子，耗時 {time.perf_counter() - start:.1f} 秒")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
@@ -7,33 +7,72 @@ from typing import List, Tuple, Optional, Callable
 from .entities.pacman import PacMan
 from .entities.ghost import *
 from .entities.entity_initializer import initialize_entities
-from .entities.pellets import PowerPellet, ScorePellet
-from .maze_generator import Map
-from config import EDIBLE_DURATION, GHOST_SCORES, MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED, FPS, CELL_SIZE, TILE_GHOST_SPAWN
-import config
-from collections import deque
+from .entities.pellets import PelletGrid
+from .maze_generator import Map, generated_maze
+from .occupancy import OccupancyGrid
+from .map_index import get_index
+from .entity_store import EntityStore
+from .score_store import get_score_store
+from .game_config import GameConfig, default_config
+from config import EDIBLE_DURATION, GHOST_SCORES, FPS, CELL_SIZE, TILE_GHOST_SPAWN
+from collections import namedtuple
+from operator import attrgetter
+import numpy as np
+import random
 import pygame
 
+PACMAN_STATE_FIELDS = ("score", "lives", "alive", "last_direction", "alternating_vertical_count", "stuck_count",
+                       "initial_x", "initial_y")  # 不在 EntityStore 中的 Pac-Man 動態屬性
+GHOST_STATE_FIELDS = ("default_speed", "return_speed", "death_count", "alpha", "last_x", "last_y",
+                      "memory_x", "memory_y")  # 不在 EntityStore 中的鬼魂動態屬性
+
+# 遊戲動態狀態快照：EntityStore 記錄、Pac-Man 與鬼魂的其餘屬性、Pac-Man 的路線、彈丸網格、遊戲欄位與隨機數狀態
+GameSnapshot = namedtuple('GameSnapshot', ['entities', 'pacman', 'plan', 'ghosts', 'power_pellets', 'score_pellets',
+                                           'game', 'rng_state', 'pacman_rng_state'])
+_pacman_state = attrgetter(*PACMAN_STATE_FIELDS)
+_ghost_state = attrgetter(*GHOST_STATE_FIELDS)
+
 class Game:
-    def __init__(self, player_name: str):
+    SNAPSHOT_FIELDS = ("ghost_score_index", "running", "death_animation", "death_animation_timer", "ticks")  # 快照保存的遊戲欄位
+
+    def __init__(self, player_name: str, seed: Optional[int] = None, ghost_count: Optional[int] = None,
+                 game_config: Optional[GameConfig] = None):
         """
         初始化遊戲，設置迷宮、Pac-Man、鬼魂和其他實體。
 
         原理：
         - 創建遊戲實例，初始化迷宮、Pac-Man、鬼魂、能量球和分數球。
-        - 使用指定的迷宮寬高和種子生成隨機迷宮，確保每次遊戲地圖一致。
+        - 迷宮寬高、種子與鬼魂數量取自傳入的 GameConfig（每局獨立，不讀取 config 模組的全域常數），
+          同一進程中可同時存在不同尺寸與種子的遊戲；同一設定的迷宮在進程內只生成一次。
         - 記錄遊戲開始時間，用於計算遊玩時長。
         - 設置死亡動畫相關屬性，控制遊戲結束時的視覺效果。
+        - 每局遊戲擁有獨立的隨機數生成器（鬼魂與實體生成共用 rng，Pac-Man 使用 seed + 2000 的獨立序列），
+          不依賴全域 random 模組，同一進程內的多局遊戲互不干擾且可重現。
+        - 建立鬼魂的格子佔用網格（OccupancyGrid），每 tick 重建，供碰撞檢測與鄰近查詢使用。
+        - Pac-Man 與鬼魂的位置、速度與狀態旗標存放在遊戲擁有的 EntityStore 中，
+          ghost_rows 記錄鬼魂所在的列，鬼魂移動插值對整列向量化計算。
 
         Args:
             player_name (str): 玩家名稱，用於記錄分數。
-        """
-        self.seed = config.MAZE_SEED
-        self.maze = Map(width=MAZE_WIDTH, height=MAZE_HEIGHT, seed=self.seed)  # 初始化迷宮
-        self.maze.generate_maze()  # 生成隨機迷宮
+            seed (int, optional): 迷宮種子，覆蓋 game_config 中的種子（例如重播時指定錄製時的種子）。
+            ghost_count (int, optional): 鬼魂數量，覆蓋 game_config 中的鬼魂數量。
+            game_config (GameConfig, optional): 遊戲設定，None 表示 config 模組中的預設設定。
+        """
+        game_config = game_config or default_config()
+        if seed is not None:
+            game_config = game_config._replace(seed=seed)
+        if ghost_count is not None:
+            game_config = game_config._replace(ghost_count=ghost_count)
+        self.game_config = game_config
+        self.seed = game_config.seed
+        self.rng = random.Random(self.seed)  # 遊戲專屬隨機數生成器（實體生成與鬼魂移動）
+        self.pacman_rng = random.Random(self.seed + 2000)  # Pac-Man 控制器專屬隨機數生成器
+        self.ghost_count = game_config.ghost_count
+        self.maze = generated_maze(game_config.width, game_config.height, self.seed)  # 同一設定的迷宮在進程內只生成一次
+        self.store = EntityStore(self.ghost_count + 1)  # 實體狀態儲存（Pac-Man 與鬼魂）
         self.pacman, self.ghosts, self.power_pellets, self.score_pellets = self._initialize_entities()  # 初始化所有實體
-        self.respawn_points = [(x, y) for y in range(self.maze.height) for x in range(self.maze.width) 
-                               if self.maze.get_tile(x, y) == TILE_GHOST_SPAWN]  # 收集鬼魂重生點坐標
+        self.ghost_rows = self._ghost_rows()  # 鬼魂在 store 中的列
+        self.respawn_points = get_index(self.maze).positions_of(TILE_GHOST_SPAWN)  # 鬼魂重生點坐標
         self.ghost_score_index = 0  # 鬼魂分數索引，追蹤連續吃鬼魂的分數遞增
         self.running = True  # 遊戲運行狀態
         self.player_name = player_name  # 玩家名稱
@@ -41,24 +80,46 @@ class Game:
         self.death_animation = False  # 死亡動畫狀態
         self.death_animation_timer = 0  # 死亡動畫計時器（幀數）
         self.death_animation_duration = FPS  # 死亡動畫持續時間（預設 60 幀，相當於 1 秒）
+        self.ticks = 0  # 已完成的 update 次數（遊戲 tick），供重播與擷取定位
+        self.occupancy = OccupancyGrid(self.maze.width, self.maze.height)  # 鬼魂格子佔用網格（碰撞與鄰近查詢）
+        self.occupancy.rebuild(self.ghosts)
 
-    def _initialize_entities(self) -> Tuple[PacMan, List[Ghost], List[PowerPellet], List[ScorePellet]]:
+    def _initialize_entities(self) -> Tuple[PacMan, List[Ghost], PelletGrid, PelletGrid]:
         """
         初始化遊戲中的所有實體（Pac-Man、鬼魂、能量球、分數球）。
 
         原理：
         - 調用 entity_initializer 模塊的 initialize_entities 函數，根據迷宮結構生成實體。
         - 確保 Pac-Man、鬼魂和彈丸的初始位置合理且不重疊。
+        - 傳入遊戲專屬的隨機數生成器，實體不使用全域 random 模組。
+        - 傳入遊戲的 EntityStore，Pac-Man 與鬼魂的狀態分配在同一個儲存中。
         - 返回一個包含所有實體的元組，供遊戲主循環使用。
 
         Returns:
             Tuple: (pacman, ghosts, power_pellets, score_pellets)
             - pacman: PacMan 物件。
             - ghosts: 鬼魂列表。
-            - power_pellets: 能量球列表。
-            - score_pellets: 分數球列表。
+            - power_pellets: 能量球網格（PelletGrid）。
+            - score_pellets: 分數球網格（PelletGrid）。
+        """
+        return initialize_entities(self.maze, rng=self.rng, pacman_rng=self.pacman_rng, ghost_count=self.ghost_count,
+                                   store=self.store)
+
+    def _ghost_rows(self):
+        """
+        返回鬼魂在 EntityStore 中的列。
+
+        原理：
+        - 新建的 store 中鬼魂依序分配到連續的列，此時返回 slice，向量化計算時讀寫皆為視圖；
+          否則返回列號陣列。
+
+        Returns:
+            slice | np.ndarray: 鬼魂所在的列（順序與 self.ghosts 相同）。
         """
-        return initialize_entities(self.maze)
+        rows = [ghost._row for ghost in self.ghosts]
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return slice(rows[0], rows[0] + len(rows))
+        return np.array(rows, dtype=np.intp)
 
     def update(self, fps: int, move_pacman: Callable[[], None]) -> None:
         """
@@ -70,6 +131,9 @@ class Game:
         - 當 Pac-Man 吃到能量球時，設置所有鬼魂為可食用狀態。
         - 當所有彈丸被吃完時，遊戲勝利並結束。
         - 鬼魂移動邏輯根據其狀態（追逐、逃跑、返回重生點）執行。
+        - 所有鬼魂的逐像素移動由 EntityStore.move_towards_target 一次向量化完成，
+          之後按鬼魂列表順序為到達目標的鬼魂決定下一步；鬼魂的決策不讀取其他鬼魂的位置，
+          結果與逐一移動並決策相同。
 
         Args:
             fps (int): 每秒幀數，用於計算每幀時間。
@@ -79,6 +143,7 @@ class Game:
             self.death_animation_timer += 1
             if self.death_animation_timer >= self.death_animation_duration:
                 self.death_animation = False  # 動畫結束，重置狀態
+            self.ticks += 1
             return
 
         move_pacman()  # 執行 Pac-Man 移動
@@ -93,14 +158,16 @@ class Game:
         self.pacman.eat_score_pellet(self.score_pellets)
 
         # 移動所有鬼魂
-        for ghost in self.ghosts:
-            if ghost.move_towards_target(FPS):  # 若鬼魂到達目標格子
+        arrived = self.store.move_towards_target(self.ghost_rows, FPS)
+        for ghost, ghost_arrived in zip(self.ghosts, arrived):
+            if ghost_arrived:  # 若鬼魂到達目標格子
                 if ghost.returning_to_spawn and self.maze.get_tile(ghost.x, ghost.y) == TILE_GHOST_SPAWN:
                     ghost.set_waiting(fps)  # 到達重生點後進入等待狀態
                 elif ghost.returning_to_spawn:
                     ghost.return_to_spawn(self.maze)  # 繼續返回重生點
                 else:
                     ghost.move(self.pacman, self.maze, fps)  # 執行正常移動邏輯（追逐或逃跑）
+        self.occupancy.rebuild(self.ghosts)  # 鬼魂移動後重建佔用網格
 
         # 檢查碰撞
         self._check_collision(fps)
@@ -110,13 +177,17 @@ class Game:
             print(f"遊戲勝利！所有彈丸已收集。最終分數：{self.pacman.score}")
             self.running = False  # 遊戲結束
 
+        self.ticks += 1
+
     def _check_collision(self, fps: int) -> None:
         """
         檢查 Pac-Man 與鬼魂的碰撞，根據鬼魂狀態更新分數或觸發死亡動畫。
 
         原理：
         - 使用歐幾里得距離檢測 Pac-Man 與鬼魂的碰撞，距離公式：dist = √((x1 - x2)^2 + (y1 - y2)^2)。
-        - 若距離小於半個格子尺寸（CELL_SIZE / 2），則認為發生碰撞。
+        - 若距離小於半個格子尺寸（CELL_SIZE / 2），則認為發生碰撞；比較平方距離以省去開根號。
+        - 由 _colliding_ghosts 經佔用網格只檢查 Pac-Man 周圍 3x3 格子內的鬼魂，
+          並按鬼魂列表順序處理，結果與逐一檢查所有鬼魂相同。
         - 碰撞後的行為取決於鬼魂狀態：
           - 可食用鬼魂：增加分數（根據 GHOST_SCORES 遞增），鬼魂返回重生點。
           - 不可食用鬼魂：Pac-Man 損失一條命，所有鬼魂返回重生點，若無生命則遊戲結束。
@@ -127,26 +198,97 @@ class Game:
         if not self.running:
             return
         
-        for ghost in self.ghosts:
-            distance = ((self.pacman.current_x - ghost.current_x) ** 2 + 
-                        (self.pacman.current_y - ghost.current_y) ** 2) ** 0.5
-            if distance < CELL_SIZE / 2:  # 碰撞檢測
-                if ghost.edible and ghost.edible_timer > 0:
-                    self.pacman.score += GHOST_SCORES[self.ghost_score_index]  # 增加分數
-                    self.ghost_score_index = min(self.ghost_score_index + 1, len(GHOST_SCORES) - 1)  # 更新分數索引
-                    ghost.set_returning_to_spawn(fps)  # 鬼魂返回重生點
-                elif not ghost.edible and not ghost.returning_to_spawn and not ghost.waiting:
-                    self.pacman.lose_life(self.maze)  # Pac-Man 損失一條命
-                    for g in self.ghosts:  # 所有鬼魂返回重生點
-                        g.set_returning_to_spawn(fps)
-                    if self.pacman.lives <= 0:
-                        self.running = False  # 遊戲結束
-                        print(f"遊戲結束！分數：{self.pacman.score}")
-                        self.death_animation = True  # 觸發死亡動畫
-                        self.death_animation_timer = 0
-                    else:
-                        print(f"損失一條命！剩餘生命：{self.pacman.lives}")
-                    break
+        for ghost in self._colliding_ghosts():
+            if ghost.edible and ghost.edible_timer > 0:
+                self.pacman.score += GHOST_SCORES[self.ghost_score_index]  # 增加分數
+                self.ghost_score_index = min(self.ghost_score_index + 1, len(GHOST_SCORES) - 1)  # 更新分數索引
+                ghost.set_returning_to_spawn(fps)  # 鬼魂返回重生點
+            elif not ghost.edible and not ghost.returning_to_spawn and not ghost.waiting:
+                self.pacman.lose_life(self.maze)  # Pac-Man 損失一條命
+                for g in self.ghosts:  # 所有鬼魂返回重生點
+                    g.set_returning_to_spawn(fps)
+                if self.pacman.lives <= 0:
+                    self.running = False  # 遊戲結束
+                    print(f"遊戲結束！分數：{self.pacman.score}")
+                    self.death_animation = True  # 觸發死亡動畫
+                    self.death_animation_timer = 0
+                else:
+                    print(f"損失一條命！剩餘生命：{self.pacman.lives}")
+                break
+
+    def _colliding_ghosts(self) -> List[Ghost]:
+        """
+        返回與 Pac-Man 像素距離小於半個格子的鬼魂（按鬼魂列表順序）。
+
+        原理：
+        - 碰撞距離小於半格，碰撞的鬼魂必定位於 Pac-Man 像素位置所在格子周圍 3x3 範圍內，
+          因此只對佔用網格 query 返回的候選鬼魂計算平方距離：
+          distance_sq = (x1 - x2)^2 + (y1 - y2)^2，並與 (CELL_SIZE / 2)^2 比較；成本與鬼魂總數無關。
+        - query 按列表順序返回索引；距離在處理碰撞之前一次算好，處理碰撞只改變鬼魂狀態，不移動鬼魂。
+
+        Returns:
+            List[Ghost]: 發生碰撞的鬼魂。
+        """
+        pacman_x, pacman_y = self.pacman.current_x, self.pacman.current_y
+        tx, ty = self.occupancy.tile_of(self.pacman)
+        limit = (CELL_SIZE / 2) ** 2
+        hits = []
+        for ghost in self.occupancy.near(tx, ty):
+            dx = ghost.current_x - pacman_x
+            dy = ghost.current_y - pacman_y
+            if dx * dx + dy * dy < limit:
+                hits.append(ghost)
+        return hits
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        擷取遊戲的完整動態狀態，供搜尋式代理與環境分支模擬。
+
+        原理：
+        - 位置、目標、速度與鬼魂狀態旗標存放在 EntityStore 中，一次陣列複製即完成。
+        - 其餘屬性以 attrgetter 取出為元組；彈丸網格複製為 bytes；遊戲與 Pac-Man 的隨機數狀態一併保存，
+          還原後的模擬與原本的模擬逐位相同。
+        - 迷宮與其索引、路口圖為靜態資料，快照與遊戲共用，不複製。
+        - 快照為不可變值，可重複還原任意次數（Pac-Man 的路線在擷取與還原時各複製一次）。
+        - 不包含控制器（ControlManager）與錄製器的狀態。
+
+        Returns:
+            GameSnapshot: 快照。
+        """
+        plan = self.pacman.plan
+        return GameSnapshot(
+            self.store.snapshot(),
+            _pacman_state(self.pacman),
+            plan.copy() if plan is not None else None,
+            tuple(map(_ghost_state, self.ghosts)),
+            self.power_pellets.snapshot(),
+            self.score_pellets.snapshot(),
+            attrgetter(*self.SNAPSHOT_FIELDS)(self),
+            self.rng.getstate(),
+            self.pacman_rng.getstate(),
+        )
+
+    def restore(self, snap: GameSnapshot) -> None:
+        """
+        將 snapshot 的結果原地寫回本遊戲（實體物件與迷宮保持不變）。
+
+        Args:
+            snap (GameSnapshot): 由本遊戲的 snapshot 返回的快照。
+        """
+        self.store.restore(snap.entities)
+        for field, value in zip(PACMAN_STATE_FIELDS, snap.pacman):
+            setattr(self.pacman, field, value)
+        self.pacman.plan = snap.plan.copy() if snap.plan is not None else None
+        for ghost, state in zip(self.ghosts, snap.ghosts):
+            for field, value in zip(GHOST_STATE_FIELDS, state):
+                setattr(ghost, field, value)
+        self.power_pellets.restore(snap.power_pellets)
+        self.score_pellets.restore(snap.score_pellets)
+        for field, value in zip(self.SNAPSHOT_FIELDS, snap.game):
+            setattr(self, field, value)
+        self.rng.setstate(snap.rng_state)
+        self.pacman_rng.setstate(snap.pacman_rng_state)
+        self.occupancy.rebuild(self.ghosts)
 
     def is_running(self) -> bool:
         """
@@ -220,7 +362,7 @@ class Game:
         """
         return self.maze
 
-    def get_power_pellets(self) -> List[PowerPellet]:
+    def get_power_pellets(self) -> PelletGrid:
         """
         獲取能量球列表。
 
@@ -228,11 +370,11 @@ class Game:
         - 返回當前的能量球列表，供遊戲邏輯或渲染使用。
 
         Returns:
-            List[PowerPellet]: 能量球列表。
+            PelletGrid: 能量球網格（支援列表式迭代與 len()）。
         """
         return self.power_pellets
 
-    def get_score_pellets(self) -> List[ScorePellet]:
+    def get_score_pellets(self) -> PelletGrid:
         """
         獲取分數球列表。
 
@@ -240,7 +382,7 @@ class Game:
         - 返回當前的分數球列表，供遊戲邏輯或渲染使用。
 
         Returns:
-            List[ScorePellet]: 分數球列表。
+            PelletGrid: 分數球網格（支援列表式迭代與 len()）。
         """
         return self.score_pellets
 
@@ -300,10 +442,13 @@ class Game:
 
         原理：
         - 計算遊玩時長，公式：play_time = (end_time - start_time) / 1000。
-        - 調用 menu 模塊的 save_score 函數，將玩家名稱、分數、迷宮種子和遊玩時長儲存。
+        - 將玩家名稱、分數、迷宮種子和遊玩時長寫入分數資料庫（game.score_store），不需載入選單模組。
+        - 每局只有一列，加入後立即 flush：緩衝列不會等到下一次 add、top 或進程結束才寫入，
+          進程被終止或崩潰時不會遺失分數，其他進程（例如排行榜）也能立即讀到；批次緩衝只留給大量寫入者。
         - 用於記錄玩家表現，生成排行榜或日誌。
         """
-        from game.menu import save_score
         end_time = pygame.time.get_ticks()  # 獲取結束時間（毫秒）
         play_time = (end_time - self.start_time) / 1000.0  # 轉換為秒
-        save_score(self.player_name, self.pacman.score, MAZE_SEED, play_time)
\ No newline at end of file
+        store = get_score_store()
+        store.add(self.player_name, self.pacman.score, self.seed, play_time)
+        store.flush()
\ No newline at end of file
@@ -0,0 +1,124 @@
+# game/game_config.py
+"""
+每局遊戲的設定（迷宮尺寸、種子、鬼魂數量）。
+Game、PacManEnv 與控制器從傳入的 GameConfig 取得設定，不再讀取 config 模組的全域常數，
+同一進程可同時執行多局不同尺寸與種子的遊戲；設定檔、環境變數與命令列參數依序覆蓋預設值。
+"""
+
+import argparse
+import json
+import os
+from collections import namedtuple
+from typing import Mapping, Optional
+import config
+
+# 每局遊戲的設定（不可變，可在進程間傳遞並作為快取鍵）
+GameConfig = namedtuple('GameConfig', ['width', 'height', 'seed', 'ghost_count'])
+
+MIN_MAZE_SIZE = 7  # 迷宮最小尺寸（需容納中央 5x5 房間與邊界）
+ENV_VARS = {  # 環境變數 -> 設定欄位
+    "PACMAN_WIDTH": "width",
+    "PACMAN_HEIGHT": "height",
+    "PACMAN_SEED": "seed",
+    "PACMAN_GHOST_COUNT": "ghost_count",
+}
+ENV_CONFIG_PATH = "PACMAN_CONFIG"  # 指定設定檔路徑的環境變數
+
+def default_config() -> GameConfig:
+    """返回 config 模組中的預設設定。"""
+    return GameConfig(width=config.MAZE_WIDTH, height=config.MAZE_HEIGHT, seed=config.MAZE_SEED,
+                      ghost_count=config.GHOST_COUNT)
+
+def validate_config(game_config: GameConfig) -> GameConfig:
+    """
+    檢查設定是否有效。
+
+    Returns:
+        GameConfig: 原設定（欄位轉為 int）。
+
+    Raises:
+        ValueError: 若迷宮小於 MIN_MAZE_SIZE 或鬼魂數量為負。
+    """
+    game_config = GameConfig(*(int(value) for value in game_config))
+    if game_config.width < MIN_MAZE_SIZE or game_config.height < MIN_MAZE_SIZE:
+        raise ValueError(f"迷宮最小尺寸為 {MIN_MAZE_SIZE}x{MIN_MAZE_SIZE}，得到 {game_config.width}x{game_config.height}")
+    if game_config.ghost_count < 0:
+        raise ValueError(f"鬼魂數量不得為負，得到 {game_config.ghost_count}")
+    return game_config
+
+def load_config(path: Optional[str] = None, environ: Optional[Mapping[str, str]] = None, **overrides) -> GameConfig:
+    """
+    依序合併預設值、設定檔、環境變數與覆蓋值（例如命令列參數）。
+
+    原理：
+    - 設定檔為 JSON 物件，只需包含要覆蓋的欄位（例如 {"width": 31, "seed": 7}）；
+      path 為 None 時使用環境變數 PACMAN_CONFIG 指定的檔案，再否則使用 config.GAME_CONFIG_PATH（存在時）。
+    - 環境變數 PACMAN_WIDTH、PACMAN_HEIGHT、PACMAN_SEED、PACMAN_GHOST_COUNT 覆蓋設定檔。
+    - overrides 中值為 None 的欄位忽略（未指定的命令列參數）。
+
+    Args:
+        path (str, optional): 設定檔路徑。
+        environ (Mapping[str, str], optional): 環境變數，None 表示 os.environ。
+        **overrides: 欄位覆蓋值。
+
+    Returns:
+        GameConfig: 合併並檢查後的設定。
+
+    Raises:
+        ValueError: 若設定檔包含未知欄位或設定無效。
+    """
+    environ = os.environ if environ is None else environ
+    values = default_config()._asdict()
+    path = path or environ.get(ENV_CONFIG_PATH)
+    if path is None and os.path.exists(config.GAME_CONFIG_PATH):
+        path = config.GAME_CONFIG_PATH
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        unknown = set(profile) - set(GameConfig._fields)
+        if unknown:
+            raise ValueError(f"設定檔 {path} 包含未知欄位：{sorted(unknown)}")
+        values.update(profile)
+    for name, field in ENV_VARS.items():
+        if name in environ:
+            values[field] = environ[name]
+    values.update({field: value for field, value in overrides.items() if value is not None})
+    return validate_config(GameConfig(**values))
+
+def update_profile(path: Optional[str] = None, **values) -> None:
+    """
+    更新設定檔中的欄位（保留其他欄位，原子替換），之後的 load_config 會讀取它。
+
+    Args:
+        path (str, optional): 設定檔路徑，None 表示 config.GAME_CONFIG_PATH。
+        **values: 要更新的欄位與數值（例如 seed=3）。
+
+    Raises:
+        ValueError: 若包含未知欄位。
+    """
+    unknown = set(values) - set(GameConfig._fields)
+    if unknown:
+        raise ValueError(f"未知的設定欄位：{sorted(unknown)}")
+    path = path or config.GAME_CONFIG_PATH
+    profile = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    profile.update(values)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(temp_path, path)
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """為命令列加入遊戲設定參數。"""
+    parser.add_argument('--config', type=str, default=None, help='Game config profile (JSON)')
+    parser.add_argument('--width', type=int, default=None, help='Maze width in tiles')
+    parser.add_argument('--height', type=int, default=None, help='Maze height in tiles')
+    parser.add_argument('--seed', type=int, default=None, help='Maze seed')
+    parser.add_argument('--ghost_count', type=int, default=None, help='Number of ghosts')
+
+def config_from_args(args: argparse.Namespace) -> GameConfig:
+    """由 add_config_arguments 解析的參數載入設定。"""
+    return load_config(args.config, width=args.width, height=args.height, seed=args.seed,
+                       ghost_count=args.ghost_count)
@@ -0,0 +1,121 @@
+# game/map_index.py
+"""
+迷宮特徵索引：在迷宮生成後一次性收集各圖塊類型的位置、可通行鄰居數（度數）網格、
+路口與死路列表，實體與 AI 直接查詢索引，不必重複掃描整個迷宮。
+"""
+
+from typing import Dict, FrozenSet, List, Tuple
+from config import TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN
+
+GHOST_PASSABLE = frozenset((TILE_PATH, TILE_DOOR, TILE_POWER_PELLET, TILE_GHOST_SPAWN))  # 鬼魂可通行的格子
+PACMAN_PASSABLE = frozenset((TILE_PATH, TILE_POWER_PELLET))  # Pac-Man 可通行的格子（不可進入門與重生點）
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+class MapIndex:
+    def __init__(self, maze):
+        """
+        掃描一次迷宮並建立索引。
+
+        原理：
+        - positions：每種圖塊類型的格子列表，按列優先順序（先 y 後 x）排列，與逐格掃描的順序一致。
+        - degree：每個格子的鬼魂可通行鄰居數（不可通行格子為 0），以 degree[y][x] 查詢；
+          其他可通行集合（例如 PACMAN_PASSABLE）的格子與度數由 passable_set / degree_grid 首次查詢時建立並快取，
+          路口圖（JunctionGraph）直接使用，不再自行計算鄰居數。
+        - junctions：度數大於 2 的可通行格子；dead_ends：度數為 1 的可通行格子。
+        - 記錄建立時的迷宮版本（Map.version），迷宮被修改後 get_index 會自動重建。
+
+        Args:
+            maze (Map): 迷宮物件。
+        """
+        self.width = maze.width
+        self.height = maze.height
+        self.version = getattr(maze, "version", None)  # 建立索引時的迷宮版本
+        tiles = [maze.get_tile(x, y) for y in range(self.height) for x in range(self.width)]  # 與 Map.tiles 相同的一維排列
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}
+        for i, tile in enumerate(tiles):
+            self.positions.setdefault(tile, []).append((i % self.width, i // self.width))
+
+        self._passable: Dict[FrozenSet[str], tuple] = {}  # 可通行圖塊集合 -> (可通行格子, 度數網格)
+        self.degree = self.degree_grid(GHOST_PASSABLE)
+        self.junctions: List[Tuple[int, int]] = []
+        self.dead_ends: List[Tuple[int, int]] = []
+        for y in range(self.height):
+            for x in range(self.width):
+                degree = self.degree[y][x]
+                if degree > 2:
+                    self.junctions.append((x, y))
+                elif degree == 1:
+                    self.dead_ends.append((x, y))
+
+    def _passable_data(self, passable_tiles: FrozenSet[str]) -> Tuple[FrozenSet[Tuple[int, int]], List[List[int]]]:
+        """建立（或返回快取的）可通行格子集合與度數網格；孤立的可通行格子度數為 0。"""
+        data = self._passable.get(passable_tiles)
+        if data is None:
+            cells = frozenset(position for tile in passable_tiles for position in self.positions.get(tile, ()))
+            degree = [[0] * self.width for _ in range(self.height)]
+            for x, y in cells:
+                degree[y][x] = sum((x + dx, y + dy) in cells for dx, dy in DIRECTIONS)
+            data = self._passable[passable_tiles] = (cells, degree)
+        return data
+
+    def passable_set(self, passable_tiles: FrozenSet[str]) -> FrozenSet[Tuple[int, int]]:
+        """
+        返回圖塊類型屬於 passable_tiles 的所有格子。
+
+        Args:
+            passable_tiles (frozenset): 可通行的圖塊類型（例如 GHOST_PASSABLE、PACMAN_PASSABLE）。
+
+        Returns:
+            frozenset: 可通行格子 (x, y) 的集合（共用的快取，不可修改）。
+        """
+        return self._passable_data(passable_tiles)[0]
+
+    def degree_grid(self, passable_tiles: FrozenSet[str]) -> List[List[int]]:
+        """
+        返回以 passable_tiles 計算的可通行鄰居數網格（degree[y][x]，不可通行格子為 0）。
+
+        Args:
+            passable_tiles (frozenset): 可通行的圖塊類型。
+
+        Returns:
+            List[List[int]]: 度數網格（共用的快取，不可修改）。
+        """
+        return self._passable_data(passable_tiles)[1]
+
+    def positions_of(self, tile: str) -> List[Tuple[int, int]]:
+        """
+        返回指定圖塊類型的所有格子（列優先順序）。
+
+        Args:
+            tile (str): 圖塊類型（例如 TILE_GHOST_SPAWN）。
+
+        Returns:
+            List[Tuple[int, int]]: 格子列表的副本，呼叫者可自由修改（例如打亂順序）。
+        """
+        return list(self.positions.get(tile, ()))
+
+    def degree_at(self, x: int, y: int) -> int:
+        """返回 (x, y) 的可通行鄰居數，迷宮外或不可通行時為 0。"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.degree[y][x]
+        return 0
+
+    def stale(self, maze) -> bool:
+        """迷宮格子自建立索引後是否改變（比較 Map.version，不需逐格比較）。"""
+        return getattr(maze, "version", None) != self.version
+
+def get_index(maze) -> MapIndex:
+    """
+    獲取迷宮的特徵索引，第一次呼叫時建立並快取於迷宮物件上。
+
+    Args:
+        maze (Map): 迷宮物件。
+
+    Returns:
+        MapIndex: 特徵索引。
+    """
+    index = getattr(maze, "_index", None)
+    if not isinstance(index, MapIndex) or index.stale(maze):
+        index = MapIndex(maze)
+        maze._index = index
+    return index
@@ -8,6 +8,9 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
 import random
+from functools import lru_cache
+from game.maze_graph import JunctionGraph
+from game.map_index import get_index
 from config import MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED, TILE_BOUNDARY, TILE_WALL, TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, TILE_DOOR, TILE_TEMP_WALL, TILE_TEMP_MARKER
 
 class Map:
@@ -17,21 +20,25 @@ class Map:
 
         原理：
         - 創建迷宮物件，指定寬度和高度，初始化所有格子為路徑（TILE_PATH）。
-        - 若提供種子，設置隨機數生成器以確保迷宮可重現。
+        - 建立迷宮專屬的隨機數生成器（random.Random(seed)），不修改全域 random 模組，
+          多個迷宮可在同一進程中獨立且可重現地生成。
         - 定義四個移動方向（上下左右），用於牆壁擴展和連通性檢查。
+        - version 在每次 set_tile 時遞增，路口圖與特徵索引只比較整數即可判斷快取是否過期。
 
         Args:
             width (int): 迷宮寬度（格子數）。
             height (int): 迷宮高度（格子數）。
             seed (int, optional): 隨機種子，用於生成可重現的迷宮。
         """
-        if seed is not None:
-            random.seed(seed)
-            self.seed = seed
+        self.seed = seed
+        self.rng = random.Random(seed)  # 迷宮專屬隨機數生成器（seed 為 None 時以系統熵播種）
         self.width = width
         self.height = height
         self.tiles = [TILE_PATH for _ in range(self.width * self.height)]  # 初始化所有格子為路徑
         self.directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # 上下左右方向
+        self.version = 0  # 格子修改次數（set_tile 遞增）
+        self._graphs = {}  # 可通行圖塊集合 -> 路口圖（game.maze_graph.JunctionGraph）
+        self._index = None  # 特徵索引（game.map_index.MapIndex），由 get_index 建立
         self._initialize_map()
 
     def _initialize_map(self):
@@ -176,7 +183,7 @@ class Map:
         設置指定座標的圖塊類型。
 
         原理：
-        - 根據坐標計算索引，將指定格子設置為給定的圖塊類型。
+        - 根據坐標計算索引，將指定格子設置為給定的圖塊類型，並遞增 version 使快取的路口圖與索引失效。
         - 僅在坐標有效時執行。
 
         Args:
@@ -186,6 +193,26 @@ class Map:
         """
         if self.xy_valid(x, y):
             self.tiles[self.xy_to_i(x, y)] = value
+            self.version += 1
+
+    def junction_graph(self, passable_tiles) -> JunctionGraph:
+        """
+        獲取指定可通行圖塊集合的路口圖。
+
+        原理：
+        - 路口圖在第一次使用時建立並快取，之後的路徑搜尋直接重用。
+        - 迷宮格子在建圖後被修改（例如生成過程中或測試手動設置）時自動重建。
+
+        Args:
+            passable_tiles (frozenset): 可通行的圖塊類型（例如 GHOST_PASSABLE、PACMAN_PASSABLE）。
+
+        Returns:
+            JunctionGraph: 路口圖。
+        """
+        graph = self._graphs.get(passable_tiles)
+        if graph is None or graph.stale(self):
+            graph = self._graphs[passable_tiles] = JunctionGraph(self, passable_tiles)
+        return graph
 
     def _flood_fill(self, start_x, start_y, tile_type):
         """
@@ -342,11 +369,11 @@ class Map:
             if not wall_positions:
                 break
             
-            x, y = random.choice(wall_positions)
+            x, y = self.rng.choice(wall_positions)
             self.set_tile(x, y, TILE_WALL)
-            if random.random() > extend_prob:
+            if self.rng.random() > extend_prob:
                 continue
-            direction = random.choice(self.directions)
+            direction = self.rng.choice(self.directions)
             new_x, new_y = x + direction[0], y + direction[1]
             tries = 1
             connected_size = 1
@@ -356,15 +383,15 @@ class Map:
                     connected_size += 1
                     if connected_size > 3:  # 限制連續牆壁長度
                         break
-                    if random.random() < (extend_prob / (1 + (tries)/10)):  # 隨著嘗試次數增加降低擴展概率
-                        direction = random.choice(self.directions)
+                    if self.rng.random() < (extend_prob / (1 + (tries)/10)):  # 隨著嘗試次數增加降低擴展概率
+                        direction = self.rng.choice(self.directions)
                         new_x, new_y = new_x + direction[0], new_y + direction[1]
                         tries += 1
                     else:
                         break
                 elif tries <= 10:
                     self.set_tile(new_x, new_y, TILE_PATH)  # 回退為路徑
-                    direction = random.choice(self.directions)
+                    direction = self.rng.choice(self.directions)
                     new_x, new_y = x + direction[0], y + direction[1]
                     tries += 1
                 else:
@@ -441,7 +468,7 @@ class Map:
                     continue
                 
                 block = [(x, y), (x + 1, y), (x, y + 1), (x + 1, y + 1)]
-                random.shuffle(block)
+                self.rng.shuffle(block)
 
                 placed = False
                 for bx, by in block:
@@ -485,8 +512,7 @@ class Map:
         Returns:
             int: 放置的能量球數量。
         """
-        if self.seed is not None:
-            random.seed(self.seed + 1000)  # 使用獨立種子
+        rng = random.Random(self.seed + 1000) if self.seed is not None else self.rng  # 使用獨立種子
 
         # 收集有效候選格子（排除鬼魂重生點及其周圍）
         empty_cells = []
@@ -546,7 +572,7 @@ class Map:
                 if not grid_centers:
                     break
                 if not selected_grids:
-                    grid_key, center = random.choice(grid_centers)
+                    grid_key, center = rng.choice(grid_centers)
                     selected_grids.append(grid_key)
                     selected_centers.append(center)
                     grid_centers = [(gk, c) for gk, c in grid_centers if gk != grid_key]
@@ -572,24 +598,21 @@ class Map:
             # 在選定網格中隨機放置能量球
             for grid_key in selected_grids:
                 if grid_cells_map[grid_key]:
-                    pellet_positions.add(random.choice(grid_cells_map[grid_key]))
+                    pellet_positions.add(rng.choice(grid_cells_map[grid_key]))
 
             # 補充剩餘能量球
             remaining_needed = num_pellets - len(pellet_positions)
             if remaining_needed > 0:
                 available_for_random = [cell for cell in all_candidate_cells if cell not in pellet_positions]
                 if available_for_random:
-                    pellet_positions.update(random.sample(available_for_random, min(remaining_needed, len(available_for_random))))
+                    pellet_positions.update(rng.sample(available_for_random, min(remaining_needed, len(available_for_random))))
         elif empty_count > 0:
-            pellet_positions.update(random.sample(all_candidate_cells, empty_count))
+            pellet_positions.update(rng.sample(all_candidate_cells, empty_count))
 
         # 放置能量球
         for x, y in pellet_positions:
             self.set_tile(x, y, TILE_POWER_PELLET)
 
-        if self.seed is not None:
-            random.seed(self.seed)  # 恢復原始種子
-
         return len(pellet_positions)
 
     def generate_maze(self):
@@ -617,6 +640,36 @@ class Map:
         for y in range(self.height):
             for x in range(1, half_width):
                 self.set_tile(self.width - 1 - x, y, self.get_tile(x, y))  # 鏡像到右半部分
+        get_index(self)  # 建立特徵索引（圖塊位置、度數、路口與死路）
+
+def generated_maze(width, height, seed=None):
+    """
+    返回已生成的迷宮，相同尺寸與種子的迷宮在同一進程中只生成一次並共用。
+
+    原理：
+    - 迷宮生成後只被讀取（遊戲不修改格子），同一種子的多局遊戲（環境重置、MCTS 模擬器、
+      Optuna 試驗的每個回合）可共用同一 Map 實例，連同其特徵索引與路口圖快取。
+    - seed 為 None 時每次生成新的隨機迷宮，不快取。
+
+    Args:
+        width (int): 迷宮寬度（格子數）。
+        height (int): 迷宮高度（格子數）。
+        seed (int, optional): 隨機種子。
+
+    Returns:
+        Map: 已生成的迷宮。
+    """
+    if seed is None:
+        maze = Map(width, height)
+        maze.generate_maze()
+        return maze
+    return _cached_maze(width, height, seed)
+
+@lru_cache(maxsize=16)
+def _cached_maze(width, height, seed):
+    maze = Map(width, height, seed=seed)
+    maze.generate_maze()
+    return maze
 
 if __name__ == "__main__":
     width, height, seed = MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED
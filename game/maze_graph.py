@@ -0,0 +1,188 @@
+# game/maze_graph.py
+"""
+迷宮路口圖：將迷宮壓縮為路口與死路節點，節點之間以走廊（連續的二度格子）相連，
+路徑搜尋只在節點上展開，走廊內的格子一次跨過，搜尋成本約降低平均走廊長度倍。
+"""
+
+from collections import namedtuple
+from heapq import heappush, heappop
+from typing import Callable, Dict, List, Optional, Tuple
+from .map_index import GHOST_PASSABLE, PACMAN_PASSABLE, DIRECTIONS, get_index  # 展開順序與 bfs_path、find_path 相同
+
+# 從節點出發的一條走廊：起點節點、第一步方向索引、經過的格子（含終點節點）、終點節點、走廊編號
+Edge = namedtuple('Edge', ['start', 'direction', 'tiles', 'end', 'corridor'])
+
+class JunctionGraph:
+    def __init__(self, maze, passable_tiles):
+        """
+        由迷宮建立路口圖。
+
+        原理：
+        - 可通行鄰居數不等於 2 的格子（路口、死路、孤立格子）為節點，其餘可通行格子屬於走廊；
+          可通行格子與鄰居數取自迷宮特徵索引（get_index），不重新掃描迷宮。
+        - 從每個節點沿每個可通行方向走到下一個節點，得到一條邊（長度即經過的格子數）。
+        - 沒有任何節點的環形走廊會選一個格子作為節點，確保每個可通行格子都在圖上。
+        - 走廊格子記錄所屬的邊與位置，起點或終點位於走廊中時可直接接入圖。
+
+        Args:
+            maze (Map): 已生成的迷宮。
+            passable_tiles (frozenset): 可通行的圖塊類型。
+        """
+        self.width = maze.width
+        self.height = maze.height
+        self.version = maze.version  # 建圖時的迷宮版本，用於判斷迷宮是否改變
+        index = get_index(maze)
+        self.passable = index.passable_set(passable_tiles)
+        degree = index.degree_grid(passable_tiles)
+        self.edges: Dict[Tuple[int, int], List[Edge]] = {}  # 節點 -> 出邊
+        self.corridor: Dict[Tuple[int, int], Tuple[Edge, int]] = {}  # 走廊格子 -> (所屬的邊, 在 tiles 中的位置)
+
+        for x, y in self.passable:
+            if degree[y][x] != 2:
+                self.edges[x, y] = []
+        corridor_id = 0
+        for node in sorted(self.edges):
+            corridor_id = self._connect(node, corridor_id)
+        for tile in sorted(self.passable):  # 環形走廊
+            if tile not in self.edges and tile not in self.corridor:
+                self.edges[tile] = []
+                corridor_id = self._connect(tile, corridor_id)
+
+    def _neighbors(self, tile) -> List[Tuple[int, int]]:
+        """返回 tile 的可通行鄰居（按 DIRECTIONS 順序）。"""
+        x, y = tile
+        return [(x + dx, y + dy) for dx, dy in DIRECTIONS if (x + dx, y + dy) in self.passable]
+
+    def _connect(self, node, corridor_id: int) -> int:
+        """
+        從節點沿每個方向走到下一個節點，建立出邊；同一條走廊的兩個方向共用走廊編號。
+
+        Returns:
+            int: 下一個可用的走廊編號。
+        """
+        for index, (dx, dy) in enumerate(DIRECTIONS):
+            current = (node[0] + dx, node[1] + dy)
+            if current not in self.passable:
+                continue
+            previous, tiles = node, [current]
+            while current not in self.edges:
+                following = [tile for tile in self._neighbors(current) if tile != previous][0]
+                previous, current = current, following
+                tiles.append(current)
+            if len(tiles) > 1 and tiles[0] in self.corridor:  # 反方向已建立過，沿用其走廊編號
+                corridor = self.corridor[tiles[0]][0].corridor
+            else:
+                corridor, corridor_id = corridor_id, corridor_id + 1
+            edge = Edge(node, index, tiles, current, corridor)
+            self.edges[node].append(edge)
+            for position, tile in enumerate(tiles[:-1]):
+                self.corridor.setdefault(tile, (edge, position))
+        return corridor_id
+
+    def _start_edges(self, start) -> List[Edge]:
+        """返回從 start 出發的邊；start 位於走廊中時為通往兩端節點的部分走廊。"""
+        if start in self.edges:
+            return self.edges[start]
+        edge, position = self.corridor[start]
+        backward = [edge.tiles[i] for i in range(position - 1, -1, -1)] + [edge.start]
+        forward = edge.tiles[position + 1:]
+        edges = []
+        for tiles in (forward, backward):
+            dx, dy = tiles[0][0] - start[0], tiles[0][1] - start[1]
+            edges.append(Edge(start, DIRECTIONS.index((dx, dy)), tiles, tiles[-1], edge.corridor))
+        edges.sort(key=lambda e: e.direction)
+        return edges
+
+    def route(self, start: Tuple[int, int], goal: Tuple[int, int],
+              tile_cost: Optional[Callable[[int, int], float]] = None,
+              heuristic: Optional[Callable[[Tuple[int, int]], float]] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        在路口圖上搜尋從 start 到 goal 的最低成本路線。
+
+        原理：
+        - 起點位於走廊中時，先沿走廊走到兩端節點（部分邊）；之後只在節點之間展開整條走廊。
+        - 邊的成本為其格子成本之和（tile_cost 為 None 時每格為 1，即走廊長度）。
+        - 目標位於走廊中時，展開該走廊的邊即可得到到達目標的候選成本，不必展開走廊內每個格子。
+        - 以 (成本, 第一步方向索引) 排序，等成本時選擇方向順序較前的路線，
+          與逐格 BFS 按 DIRECTIONS 順序展開得到的第一步一致。
+        - 提供 heuristic 時為 A* 搜尋（優先值為成本加啟發值）。
+
+        Args:
+            start (Tuple[int, int]): 起點格子。
+            goal (Tuple[int, int]): 終點格子。
+            tile_cost (Callable[[int, int], float], optional): 進入格子的成本。
+            heuristic (Callable[[Tuple[int, int]], float], optional): 節點到終點的估計成本。
+
+        Returns:
+            Optional[List[Tuple[int, int]]]: 路線（不含起點，start == goal 時為空列表），無法到達時為 None。
+        """
+        if start == goal:
+            return []
+        if start not in self.passable or goal not in self.passable:
+            return None
+        goal_corridor = self.corridor[goal][0].corridor if goal in self.corridor else None
+
+        def cost_of(tiles):
+            return len(tiles) if tile_cost is None else sum(tile_cost(x, y) for x, y in tiles)
+
+        counter = 0
+        heap = []
+        parents = {}  # 已確定的格子 -> (前一個節點, 經過的格子)
+        for edge in self._start_edges(start):
+            counter = self._push(heap, edge, start, 0, edge.direction, goal, goal_corridor, cost_of, heuristic, counter)
+        while heap:
+            _, cost, first, _, tile, parent, tiles = heappop(heap)
+            if tile in parents:
+                continue
+            parents[tile] = (parent, tiles)
+            if tile == goal:
+                return self._trace(parents, start, goal)
+            for edge in self.edges.get(tile, ()):
+                if edge.end not in parents or (edge.corridor == goal_corridor and goal not in parents):
+                    counter = self._push(heap, edge, tile, cost, first, goal, goal_corridor, cost_of, heuristic, counter)
+        return None
+
+    def _push(self, heap, edge, origin, cost, first, goal, goal_corridor, cost_of, heuristic, counter) -> int:
+        """將沿 edge 到達的終點節點（以及位於其中的目標）加入優先隊列。"""
+        tiles = edge.tiles
+        if edge.corridor == goal_corridor and goal in tiles:
+            tiles = tiles[:tiles.index(goal) + 1]  # 目標在此走廊中，只走到目標為止
+        end = tiles[-1]
+        end_cost = cost + cost_of(tiles)
+        priority = end_cost + (heuristic(end) if heuristic is not None else 0)
+        heappush(heap, (priority, end_cost, first, counter, end, origin, tiles))
+        return counter + 1
+
+    @staticmethod
+    def _trace(parents, start, goal) -> List[Tuple[int, int]]:
+        """沿節點鏈回溯並串接經過的格子，得到完整路線。"""
+        segments = []
+        tile = goal
+        while tile != start:
+            parent, tiles = parents[tile]
+            segments.append(tiles)
+            tile = parent
+        path = []
+        for tiles in reversed(segments):
+            path.extend(tiles)
+        return path
+
+    def first_step(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        返回從 start 前往 goal 最短路線的第一步方向。
+
+        Args:
+            start (Tuple[int, int]): 起點格子。
+            goal (Tuple[int, int]): 終點格子。
+
+        Returns:
+            Optional[Tuple[int, int]]: 方向 (dx, dy)；start == goal 或無法到達時為 None。
+        """
+        path = self.route(start, goal)
+        if not path:
+            return None
+        return path[0][0] - start[0], path[0][1] - start[1]
+
+    def stale(self, maze) -> bool:
+        """迷宮格子自建圖後是否改變（比較 Map.version，不需逐格比較）。"""
+        return self.version != maze.version
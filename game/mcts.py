@@ -0,0 +1,363 @@
+# game/mcts.py
+"""
+蒙地卡羅樹搜尋（MCTS）規劃器：以 Game.snapshot / restore 在無頭模擬器中分支，
+樹的每個節點為 Pac-Man 的一個決策點（到達格子中心），模擬（rollout）以規則 AI 或隨機策略
+作為預設策略，並可分散到進程池中並行執行。
+"""
+
+import contextlib
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Optional, Tuple
+from .game import Game
+from .maze_graph import PACMAN_PASSABLE
+from config import FPS, PACMAN_AI_SPEED
+
+ACTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # 動作編號與 PacManEnv 一致：上、下、左、右
+ROLLOUT_POLICIES = ("rule", "random")
+DEATH_PENALTY = 500  # 模擬中每損失一條命扣除的價值
+SEGMENT_TICK_LIMIT = 120  # 單一決策段最多模擬的 tick 數（防止 Pac-Man 原地不動時無限模擬）
+DISCOUNT = 0.99  # 每個 tick 的價值折扣
+
+# 一個決策段的模擬結果：到達的決策點快照（遊戲結束時為 None）、折扣價值、經過的 tick 數
+Segment = namedtuple('Segment', ['snapshot', 'reward', 'ticks'])
+
+_worker_game = None  # 進程池工作進程中的模擬器
+
+def legal_actions(game) -> List[int]:
+    """
+    返回 Pac-Man 在當前格子可執行的動作編號。
+
+    Args:
+        game (Game): 位於決策點的遊戲。
+
+    Returns:
+        List[int]: 可通行方向的動作編號（Pac-Man 不進入門與重生點）。
+    """
+    pacman, maze = game.pacman, game.maze
+    actions = []
+    for action, (dx, dy) in enumerate(ACTIONS):
+        x, y = pacman.x + dx, pacman.y + dy
+        if maze.xy_valid(x, y) and maze.get_tile(x, y) in PACMAN_PASSABLE:
+            actions.append(action)
+    return actions
+
+def _simulate(game, move_pacman, ticks: int, discount: float, done=lambda: False) -> Tuple[float, int]:
+    """
+    執行最多 ticks 次 Game.update，返回折扣後的累計價值與實際執行的 tick 數。
+
+    原理：
+    - 每個 tick 的價值為分數增量 − DEATH_PENALTY × 損失的生命數，第 k 個 tick 的價值乘以 discount^k，
+      較早吃到的彈丸價值較高，避免規劃在等值的路線間來回擺動。
+    - 遊戲結束或 done() 為真時停止；模擬中的輸出（死亡、勝利訊息）被丟棄。
+    """
+    pacman = game.pacman
+    score, lives = pacman.score, pacman.lives
+    value, weight, elapsed = 0.0, 1.0, 0
+    with contextlib.redirect_stdout(None):  # sys.stdout 為 None 時 print 不輸出
+        while elapsed < ticks and game.running:
+            game.update(FPS, move_pacman)
+            elapsed += 1
+            gained = pacman.score - score - DEATH_PENALTY * (lives - pacman.lives)
+            if gained:
+                value += weight * gained
+                score, lives = pacman.score, pacman.lives
+            weight *= discount
+            if done():
+                break
+    return value, elapsed
+
+def advance(game, action: int, discount: float = DISCOUNT) -> Segment:
+    """
+    從決策點執行一個動作，模擬到下一個決策點或遊戲結束。
+
+    原理：
+    - 決策點位於 Game.update 的 move_pacman 之中（Pac-Man 剛到達格子中心），
+      因此第一次 update 只設置新目標，由 update 完成該 tick 其餘的步驟（吃彈丸、鬼魂移動、碰撞）。
+    - 之後每個 tick 移動 Pac-Man，到達下一個格子中心時擷取快照作為子節點狀態。
+
+    Args:
+        game (Game): 已還原到決策點狀態的模擬器。
+        action (int): 動作編號。
+        discount (float): 每個 tick 的折扣因子。
+
+    Returns:
+        Segment: 下一個決策點的快照（遊戲結束時為 None）、此段的折扣價值與 tick 數。
+    """
+    dx, dy = ACTIONS[action]
+    pacman = game.pacman
+    state = {"first": True, "snapshot": None}
+
+    def move_pacman():
+        if state["first"]:
+            state["first"] = False
+            pacman.speed = PACMAN_AI_SPEED
+            pacman.set_new_target(dx, dy, game.maze)
+        elif pacman.move_towards_target(FPS):
+            state["snapshot"] = game.snapshot()
+
+    value, elapsed = _simulate(game, move_pacman, SEGMENT_TICK_LIMIT, discount, lambda: state["snapshot"] is not None)
+    snapshot = state["snapshot"]
+    if snapshot is None and game.running:
+        snapshot = game.snapshot()
+    return Segment(snapshot if game.running else None, value, elapsed)
+
+def rollout(game, policy: str, ticks: int, seed: int, discount: float = DISCOUNT) -> float:
+    """
+    從決策點以預設策略模擬固定 tick 數，返回折扣價值。
+
+    原理：
+    - "rule" 策略在每個決策點呼叫 rule_based_ai_move（使用快照中的 Pac-Man 隨機數狀態），
+      "random" 策略以 seed 建立的隨機數生成器選擇可通行方向。
+    - 起點為決策點（Pac-Man 已位於格子中心），第一個 tick 直接決策。
+
+    Args:
+        game (Game): 已還原到決策點狀態的模擬器。
+        policy (str): "rule" 或 "random"。
+        ticks (int): 模擬的 tick 數。
+        seed (int): 隨機策略的種子。
+        discount (float): 每個 tick 的折扣因子。
+
+    Returns:
+        float: 模擬價值。
+    """
+    pacman, maze = game.pacman, game.maze
+    rng = random.Random(seed)
+    state = {"first": True}
+
+    def decide():
+        if policy == "rule":
+            pacman.rule_based_ai_move(maze, game.power_pellets, game.score_pellets, game.ghosts)
+        else:
+            pacman.speed = PACMAN_AI_SPEED
+            actions = legal_actions(game)
+            if actions:
+                dx, dy = ACTIONS[rng.choice(actions)]
+                pacman.set_new_target(dx, dy, maze)
+
+    def move_pacman():
+        if state["first"]:
+            state["first"] = False
+            decide()
+        elif pacman.move_towards_target(FPS):
+            decide()
+
+    return _simulate(game, move_pacman, ticks, discount)[0]
+
+def _init_worker(game_config) -> None:
+    """進程池初始化：在工作進程中建立與主遊戲相同設定（GameConfig）的模擬器。"""
+    global _worker_game
+    _worker_game = Game("MCTS", game_config=game_config)
+
+def _worker_rollout(snapshot, policy: str, ticks: int, seed: int, discount: float) -> float:
+    """在工作進程中還原快照並執行一次模擬。"""
+    _worker_game.restore(snapshot)
+    return rollout(_worker_game, policy, ticks, seed, discount)
+
+class MCTSNode:
+    def __init__(self, snapshot, parent: Optional['MCTSNode'] = None, action: Optional[int] = None,
+                 actions: Tuple[int, ...] = (), ret: float = 0.0, elapsed: int = 0):
+        """
+        初始化搜尋樹節點。
+
+        Args:
+            snapshot (GameSnapshot): 節點對應決策點的遊戲快照，None 表示終局。
+            parent (MCTSNode, optional): 父節點。
+            action (int, optional): 從父節點到達此節點的動作。
+            actions (Tuple[int, ...]): 此節點可執行的動作。
+            ret (float): 從根到此節點途中獲得的折扣價值。
+            elapsed (int): 從根到此節點經過的 tick 數。
+        """
+        self.snapshot = snapshot
+        self.parent = parent
+        self.action = action
+        self.ret = ret
+        self.elapsed = elapsed
+        self.untried = list(actions)  # 尚未展開的動作
+        self.children: List['MCTSNode'] = []
+        self.visits = 0
+        self.value = 0.0  # 累計價值
+        self.pending = 0  # 進行中的模擬數（虛擬損失）
+
+    def select_child(self, exploration: float, scale: float) -> 'MCTSNode':
+        """
+        以 UCB1 選擇子節點：mean + exploration × scale × √(ln N / n)，進行中的模擬視為價值 0 的訪問。
+        """
+        total = math.log(max(1, self.visits + self.pending))
+
+        def ucb(child):
+            visits = child.visits + child.pending
+            if visits == 0:
+                return math.inf
+            return child.value / visits + exploration * scale * math.sqrt(total / visits)
+
+        return max(self.children, key=ucb)
+
+class MCTSPlanner:
+    def __init__(self, time_budget: float = 0.1, workers: Optional[int] = None, policy: str = "rule",
+                 rollout_ticks: int = 60, exploration: float = 1.4, value_scale: float = 20.0,
+                 discount: float = DISCOUNT):
+        """
+        初始化 MCTS 規劃器。
+
+        原理：
+        - 每次決策從當前狀態的快照建立新樹，在 time_budget 內重複「選擇 → 展開 → 模擬 → 回傳」。
+        - 展開在主進程的模擬器中執行（一個決策段約數個 tick），模擬交給進程池；
+          每個工作進程以相同種子建立自己的模擬器，只接收快照（數 KB）。
+        - 同時進行的模擬以虛擬損失計入 UCB，避免所有工作進程擠在同一葉節點。
+        - 葉節點價值 = 從根到葉途中的折扣價值 + discount^經過的 tick 數 × 模擬價值，
+          展開途中吃到的彈丸與死亡都計入，終局節點只計途中價值。
+        - workers 為 0 時在主進程中依序模擬（不建立進程池）。
+        - 時間預算用盡前每個根動作至少模擬一次，最終選擇平均價值最高的根子節點；
+          rollouts_per_sec 記錄最近一次決策的模擬速度。
+
+        Args:
+            time_budget (float): 每次決策的時間預算（秒）。
+            workers (int, optional): 工作進程數，None 表示 CPU 核心數減一。
+            policy (str): 預設策略（"rule" 或 "random"）。
+            rollout_ticks (int): 每次模擬的 tick 數。
+            exploration (float): UCB 探索係數。
+            value_scale (float): 價值尺度（分數），用於將探索項換算為分數單位。
+            discount (float): 每個 tick 的價值折扣。
+
+        Raises:
+            ValueError: 若 policy 不是可用的預設策略或時間預算不為正。
+        """
+        if policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"未知的模擬策略：{policy}，可用：{', '.join(ROLLOUT_POLICIES)}")
+        if time_budget <= 0:
+            raise ValueError(f"時間預算必須大於 0，得到 {time_budget}")
+        self.time_budget = time_budget
+        self.workers = max(0, (os.cpu_count() or 1) - 1) if workers is None else workers
+        self.policy = policy
+        self.rollout_ticks = rollout_ticks
+        self.exploration = exploration
+        self.value_scale = value_scale
+        self.discount = discount
+        self.rollouts = 0  # 最近一次決策的模擬次數
+        self.rollouts_per_sec = 0.0  # 最近一次決策的模擬速度
+        self._simulator = None
+        self._pool = None
+        self._key = None  # 模擬器與進程池對應的遊戲設定（GameConfig）
+        self._seed = 0  # 隨機策略的種子計數
+
+    def _prepare(self, game) -> None:
+        """依遊戲的設定（尺寸、種子與鬼魂數量）建立（或沿用）模擬器與進程池。"""
+        key = game.game_config
+        if key == self._key:
+            return
+        self.close()
+        self._simulator = Game("MCTS", game_config=key)
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(key,))
+        self._key = key
+
+    def close(self) -> None:
+        """關閉進程池。"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self._simulator = None
+        self._key = None
+
+    def _expand(self, node: MCTSNode) -> MCTSNode:
+        """展開節點的一個未嘗試動作，返回新子節點。"""
+        action = node.untried.pop(0)
+        self._simulator.restore(node.snapshot)
+        segment = advance(self._simulator, action, self.discount)
+        actions = tuple(legal_actions(self._simulator)) if segment.snapshot is not None else ()
+        ret = node.ret + self.discount ** node.elapsed * segment.reward
+        child = MCTSNode(segment.snapshot, node, action, actions, ret, node.elapsed + segment.ticks)
+        node.children.append(child)
+        return child
+
+    def _select(self, root: MCTSNode) -> MCTSNode:
+        """由根沿 UCB 下降到可展開或終局的節點，並展開一個子節點。"""
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration, self.value_scale)
+        if node.untried:
+            node = self._expand(node)
+        return node
+
+    def _leaf_value(self, node: MCTSNode, rollout_value: float) -> float:
+        """葉節點價值：途中的折扣價值加上折扣後的模擬價值。"""
+        return node.ret + self.discount ** node.elapsed * rollout_value
+
+    def _evaluate_local(self, node: MCTSNode) -> float:
+        """在主進程中模擬葉節點。"""
+        if node.snapshot is None:
+            return node.ret
+        self._simulator.restore(node.snapshot)
+        self._seed += 1
+        return self._leaf_value(node, rollout(self._simulator, self.policy, self.rollout_ticks, self._seed, self.discount))
+
+    @staticmethod
+    def _backpropagate(node: MCTSNode, value: float) -> None:
+        while node is not None:
+            node.visits += 1
+            node.value += value
+            node = node.parent
+
+    @staticmethod
+    def _mark_pending(node: MCTSNode, delta: int) -> None:
+        while node is not None:
+            node.pending += delta
+            node = node.parent
+
+    def search(self, game) -> Optional[int]:
+        """
+        從遊戲的當前決策點搜尋最佳動作。
+
+        Args:
+            game (Game): 位於決策點（Pac-Man 剛到達格子中心）的遊戲。
+
+        Returns:
+            Optional[int]: 動作編號，無可行動作時為 None。
+        """
+        actions = legal_actions(game)
+        if len(actions) <= 1:
+            self.rollouts, self.rollouts_per_sec = 0, 0.0
+            return actions[0] if actions else None
+        self._prepare(game)
+        root = MCTSNode(game.snapshot(), actions=tuple(actions))
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        rollouts = 0
+        if self._pool is None:
+            while time.perf_counter() < deadline or root.untried:
+                leaf = self._select(root)
+                self._backpropagate(leaf, self._evaluate_local(leaf))
+                rollouts += 1
+        else:
+            in_flight = {}
+            while time.perf_counter() < deadline or in_flight or root.untried:
+                while (time.perf_counter() < deadline or root.untried) and len(in_flight) < 2 * self.workers:
+                    leaf = self._select(root)
+                    if leaf.snapshot is None:
+                        self._backpropagate(leaf, leaf.ret)
+                        rollouts += 1
+                        continue
+                    self._seed += 1
+                    future = self._pool.submit(_worker_rollout, leaf.snapshot, self.policy,
+                                               self.rollout_ticks, self._seed, self.discount)
+                    in_flight[future] = leaf
+                    self._mark_pending(leaf, 1)
+                if not in_flight:
+                    continue
+                done, _ = wait(in_flight, timeout=max(0.0, deadline - time.perf_counter()) or None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    leaf = in_flight.pop(future)
+                    self._mark_pending(leaf, -1)
+                    self._backpropagate(leaf, self._leaf_value(leaf, future.result()))
+                    rollouts += 1
+        elapsed = time.perf_counter() - start
+        self.rollouts = rollouts
+        self.rollouts_per_sec = rollouts / elapsed if elapsed > 0 else 0.0
+        visited = [child for child in root.children if child.visits > 0]
+        return max(visited, key=lambda child: (child.value / child.visits, child.visits)).action
@@ -1,10 +1,8 @@
 import sys
 import pygame
-import json
 import os
-import config
 from config import *
-import importlib
+from game.game_config import update_profile
 
 try:
     import torch
@@ -95,7 +93,7 @@ def show_menu(screen, font, screen_width, screen_height):
     顯示初始選單並返回選擇的模式。
 
     原理：
-    - 創建六個按鈕，分別對應玩家模式、規則 AI 模式、DQN AI 模式、排行榜、設定和退出。
+    - 創建七個按鈕，分別對應玩家模式、規則 AI 模式、DQN AI 模式、MCTS 模式、排行榜、設定和退出。
     - 支援鍵盤（上下鍵選擇，Enter 確認）和滑鼠（懸停、點擊）交互。
     - 按鈕垂直排列，預設第一個按鈕被選中（is_hovered=True）。
     - 返回對應的模式字串，例如 "player" 或 "exit"。
@@ -107,10 +105,10 @@ def show_menu(screen, font, screen_width, screen_height):
         screen_height (int): 螢幕高度。
 
     Returns:
-        str: 選擇的模式（"player", "rule_ai", "dqn_ai", "leaderboard", "settings", "exit"）。
+        str: 選擇的模式（"player", "rule_ai", "dqn_ai", "mcts_ai", "leaderboard", "settings", "exit"）。
     """
     buttons = [MenuButton(mode, screen_width // 2 - 100, 100 + i * 60, 200, 50, font, GRAY, LIGHT_BLUE) 
-               for i, mode in enumerate(["Player Mode", "Rule AI Mode", "DQN AI Mode", "Leaderboard", "Settings", "Exit"])]
+               for i, mode in enumerate(["Player Mode", "Rule AI Mode", "DQN AI Mode", "MCTS Mode", "Leaderboard", "Settings", "Exit"])]
     selected_index = 0
     buttons[selected_index].is_hovered = True  # 預設第一個按鈕被選中
 
@@ -129,7 +127,7 @@ def show_menu(screen, font, screen_width, screen_height):
                     selected_index = (selected_index - 1) % len(buttons)  # 向上循環選擇
                     buttons[selected_index].is_hovered = True
                 elif event.key == pygame.K_RETURN:
-                    return ["player", "rule_ai", "dqn_ai", "leaderboard", "settings", "exit"][selected_index]  # 確認選擇
+                    return ["player", "rule_ai", "dqn_ai", "mcts_ai", "leaderboard", "settings", "exit"][selected_index]  # 確認選擇
             elif event.type == pygame.MOUSEMOTION:
                 mouse_pos = pygame.mouse.get_pos()
                 for button in buttons:
@@ -138,7 +136,7 @@ def show_menu(screen, font, screen_width, screen_height):
                 mouse_pos = pygame.mouse.get_pos()
                 for i, button in enumerate(buttons):
                     if button.rect.collidepoint(mouse_pos):
-                        return ["player", "rule_ai", "dqn_ai", "leaderboard", "settings", "exit"][i]  # 滑鼠點擊選擇
+                        return ["player", "rule_ai", "dqn_ai", "mcts_ai", "leaderboard", "settings", "exit"][i]  # 滑鼠點擊選擇
 
         screen.fill(BLACK)  # 清空螢幕
         title = font.render("Pac-Man Menu", True, YELLOW)  # 渲染標題
@@ -152,10 +150,10 @@ def show_leaderboard(screen, font, screen_width, screen_height):
     顯示排行榜。
 
     原理：
-    - 從 scores.json 讀取分數記錄，按分數降序排列，顯示前 10 名。
+    - 從分數資料庫（game.score_store）查詢每位玩家的最佳成績，按分數降序取前 10 名。
     - 每條記錄包括玩家名稱、分數、迷宮種子和遊玩時間（格式為 mm:ss）。
     - 時間格式化公式：minutes = time // 60, seconds = time % 60。
-    - 支援 ESC 鍵返回主選單，若檔案不存在則顯示空排行榜。
+    - 支援 ESC 鍵返回主選單，沒有記錄時顯示空排行榜。
 
     Args:
         screen (pygame.Surface): 繪製目標的螢幕表面。
@@ -163,13 +161,8 @@ def show_leaderboard(screen, font, screen_width, screen_height):
         screen_width (int): 螢幕寬度。
         screen_height (int): 螢幕高度。
     """
-    records = []
-    try:
-        with open("scores.json", "r") as f:
-            records = json.load(f)
-            records = sorted(records, key=lambda x: x["score"], reverse=True)[:10]  # 按分數降序取前 10
-    except FileNotFoundError:
-        pass  # 若檔案不存在，顯示空排行榜
+    from game.score_store import get_score_store
+    records = get_score_store().top(10)  # 每位玩家的最佳成績，按分數降序取前 10
 
     while True:
         for event in pygame.event.get():
@@ -187,40 +180,17 @@ def show_leaderboard(screen, font, screen_width, screen_height):
         back_text = font.render("Press ESC to return", True, WHITE)
         screen.blit(back_text, (screen_width // 2 - back_text.get_width() // 2, screen_height - 50))  # 提示返回
         pygame.display.flip()
-def update_config_seed(new_seed):
+def show_settings(screen, font, screen_width, screen_height, game_config):
     """
-    更新 config.py 中的 MAZE_SEED 值並儲存到檔案，然後重新加載 config 模組。
-
-    Args:
-        new_seed (int): 新的迷宮種子值。
-    """
-    global MAZE_SEED
-    MAZE_SEED = new_seed
-    try:
-        with open("config.py", "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        with open("config.py", "w", encoding="utf-8") as f:
-            for line in lines:
-                if line.strip().startswith("MAZE_SEED ="):
-                    f.write(f"MAZE_SEED = {new_seed}\n")
-                else:
-                    f.write(line)
-        importlib.reload(config)  # 重新加載 config 模組
-        # 更新 menu 模組中的 MAZE_SEED
-        globals()['MAZE_SEED'] = config.MAZE_SEED
-    except Exception as e:
-        print(f"Error updating config.py: {e}")
-        
-def show_settings(screen, font, screen_width, screen_height):
-    """
-    顯示設定頁面，包含 FPS、迷宮尺寸、種子、DQN 模型、PyTorch 和 CUDA 狀態，並允許修改 MAZE_SEED。
+    顯示設定頁面，包含 FPS、迷宮尺寸、種子、DQN 模型、PyTorch 和 CUDA 狀態，並允許修改迷宮種子。
 
     原理：
-    - 從 config 模組讀取 FPS、MAZE_WIDTH、MAZE_HEIGHT、MAZE_SEED。
+    - 迷宮尺寸與種子取自傳入的 GameConfig；修改後的種子寫入遊戲設定檔（config.GAME_CONFIG_PATH），
+      下次啟動時由 load_config 讀取，不修改 config.py 原始碼。
     - 檢查 pacman_dqn.pth 是否存在，判斷 DQN 模型是否可用。
     - 檢查 PyTorch 是否安裝（版本）以及 CUDA 是否可用（設備名稱）。
     - 垂直排列顯示參數，標題為黃色，內容為白色，與主選單風格一致。
-    - 添加兩個按鈕（+1 和 -1）用於調整 MAZE_SEED，種子值不得小於 1。
+    - 添加兩個按鈕（+1 和 -1）用於調整種子，種子值不得小於 1。
     - 支援滑鼠點擊和鍵盤（上下鍵選擇，Enter 確認，左右鍵調整種子）交互。
     - 支援 ESC 鍵返回主選單，提示文字顯示於底部。
 
@@ -229,11 +199,15 @@ def show_settings(screen, font, screen_width, screen_height):
         font (pygame.font.Font): 文字渲染的字體。
         screen_width (int): 螢幕寬度。
         screen_height (int): 螢幕高度。
+        game_config (GameConfig): 目前的遊戲設定。
+
+    Returns:
+        GameConfig: 更新種子後的遊戲設定。
     """
     # 檢查 DQN 模型檔案
     dqn_available = "Available" if os.path.exists("pacman_dqn.pth") else "Not Available"
 
-    # 創建按鈕：增加和減少 MAZE_SEED
+    # 創建按鈕：增加和減少迷宮種子
     seed_plus_button = MenuButton("+1", screen_width // 2 + 120, 100 + 3 * 40, 50, 40, font, GRAY, LIGHT_BLUE)
     seed_minus_button = MenuButton("-1", screen_width // 2 + 180, 100 + 3 * 40, 50, 40, font, GRAY, LIGHT_BLUE)
     buttons = [seed_plus_button, seed_minus_button]
@@ -241,7 +215,12 @@ def show_settings(screen, font, screen_width, screen_height):
     buttons[selected_index].is_hovered = True  # 預設第一個按鈕被選中
 
     # 本地變數追蹤當前種子值
-    current_seed = MAZE_SEED
+    current_seed = game_config.seed
+
+    def set_seed(seed):
+        nonlocal game_config
+        game_config = game_config._replace(seed=seed)
+        update_profile(seed=seed)  # 只保存種子到遊戲設定檔
 
     while True:
         for event in pygame.event.get():
@@ -250,7 +229,7 @@ def show_settings(screen, font, screen_width, screen_height):
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    return  # 返回主選單
+                    return game_config  # 返回主選單
                 elif event.key == pygame.K_DOWN:
                     buttons[selected_index].is_hovered = False
                     selected_index = (selected_index + 1) % len(buttons)  # 向下循環選擇
@@ -262,16 +241,16 @@ def show_settings(screen, font, screen_width, screen_height):
                 elif event.key == pygame.K_RETURN:
                     if buttons[selected_index] == seed_plus_button:
                         current_seed += 1
-                        update_config_seed(current_seed)
+                        set_seed(current_seed)
                     elif buttons[selected_index] == seed_minus_button and current_seed > 1:
                         current_seed -= 1
-                        update_config_seed(current_seed)
+                        set_seed(current_seed)
                 elif event.key == pygame.K_RIGHT:
                     current_seed += 1
-                    update_config_seed(current_seed)
+                    set_seed(current_seed)
                 elif event.key == pygame.K_LEFT and current_seed > 1:
                     current_seed -= 1
-                    update_config_seed(current_seed)
+                    set_seed(current_seed)
             elif event.type == pygame.MOUSEMOTION:
                 mouse_pos = pygame.mouse.get_pos()
                 for button in buttons:
@@ -282,16 +261,16 @@ def show_settings(screen, font, screen_width, screen_height):
                     if button.rect.collidepoint(mouse_pos):
                         if button == seed_plus_button:
                             current_seed += 1
-                            update_config_seed(current_seed)
+                            set_seed(current_seed)
                         elif button == seed_minus_button and current_seed > 1:
                             current_seed -= 1
-                            update_config_seed(current_seed)
+                            set_seed(current_seed)
 
         # 更新設定清單
         settings = [
             f"FPS: {FPS}",
-            f"Maze Width: {MAZE_WIDTH}",
-            f"Maze Height: {MAZE_HEIGHT}",
+            f"Maze Width: {game_config.width}",
+            f"Maze Height: {game_config.height}",
             f"Maze Seed: {current_seed}",
             f"DQN Model: {dqn_available}",
             f"PyTorch: {PYTORCH_VERSION}",
@@ -320,13 +299,12 @@ def show_settings(screen, font, screen_width, screen_height):
 
 def save_score(name, score, seed, play_time):
     """
-    儲存分數數據到 scores.json。
+    儲存分數數據到分數資料庫。
 
     原理：
-    - 將新分數記錄（名稱、分數、種子、遊玩時間）添加到 scores.json。
-    - 若同一玩家名稱已存在，僅保留分數最高的記錄。
-    - 使用字典 best_scores 去重，鍵為清理後的玩家名稱，值為最高分數記錄。
-    - 記錄格式：{"name": str, "score": int, "seed": int, "time": float}。
+    - 將新分數記錄（名稱、分數、種子、遊玩時間）插入 SQLite 分數資料庫（game.score_store）並立即寫入，
+      不再每局讀取並重寫整個 scores.json；進程中斷也不會遺失緩衝中的分數。
+    - 每局都會保存；排行榜只顯示每位玩家（去除前後空白的名稱）分數最高的記錄。
 
     Args:
         name (str): 玩家名稱。
@@ -334,28 +312,10 @@ def save_score(name, score, seed, play_time):
         seed (int): 迷宮種子。
         play_time (float): 遊玩時間（秒）。
     """
-    records = []
-    try:
-        with open("scores.json", "r") as f:
-            records = json.load(f)  # 讀取現有記錄
-    except FileNotFoundError:
-        pass  # 若檔案不存在，創建新記錄
-
-    new_record = {"name": name.strip(), "score": score, "seed": seed, "time": play_time} 
-    best_scores = {}
-    for record in records:
-        cleaned_existing_name = record["name"].strip()
-        best_scores[cleaned_existing_name] = record
-
-    cleaned_new_name = new_record["name"]
-    if cleaned_new_name in best_scores:
-        if new_record["score"] > best_scores[cleaned_new_name]["score"]:
-            best_scores[cleaned_new_name] = new_record  # 更新更高分數
-    else:
-        best_scores[cleaned_new_name] = new_record  # 添加新記錄
-    updated_records = list(best_scores.values())
-    with open("scores.json", "w") as f:
-        json.dump(updated_records, f)  # 儲存更新記錄
+    from game.score_store import get_score_store
+    store = get_score_store()
+    store.add(name, score, seed, play_time)
+    store.flush()
 
 def get_player_name(screen, font, screen_width, screen_height, default_name="Player"):
     """
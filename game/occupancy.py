@@ -0,0 +1,151 @@
+# game/occupancy.py
+"""
+每 tick 重建的格子佔用網格，將實體按所在格子分桶，
+使碰撞與鄰近查詢只檢查附近格子，成本與實體總數無關。
+"""
+
+from typing import List, Optional
+from config import CELL_SIZE
+
+class OccupancyGrid:
+    def __init__(self, width: int, height: int):
+        """
+        初始化佔用網格。
+
+        原理：
+        - 以一維列表保存每個格子的桶（實體索引列表），索引計算與迷宮相同：i = x + y * width。
+        - 只記錄本 tick 被佔用的格子，清空成本與實體數量成正比，而非迷宮大小。
+
+        Args:
+            width (int): 迷宮寬度（格子數）。
+            height (int): 迷宮高度（格子數）。
+        """
+        self.width = width
+        self.height = height
+        self.cells = [[] for _ in range(width * height)]  # 每個格子的實體索引桶
+        self.entities = []  # 最近一次 rebuild 的實體列表
+        self._occupied = []  # 本 tick 非空的格子索引
+
+    def tile_of(self, entity):
+        """
+        計算實體像素位置所在的格子（限制在迷宮範圍內）。
+
+        原理：
+        - 使用像素坐標而非格子坐標 (x, y)，移動途中的實體會被放入其實際所在的格子，
+          因此任何像素距離小於一格的兩個實體，其格子差距不超過 1。
+
+        Args:
+            entity: 具有 current_x, current_y 的實體。
+
+        Returns:
+            Tuple[int, int]: 格子坐標 (tx, ty)。
+        """
+        tx = min(max(int(entity.current_x // CELL_SIZE), 0), self.width - 1)
+        ty = min(max(int(entity.current_y // CELL_SIZE), 0), self.height - 1)
+        return tx, ty
+
+    def rebuild(self, entities: List) -> None:
+        """
+        依實體當前位置重建網格，每 tick 呼叫一次。
+
+        Args:
+            entities (List): 實體列表（通常為鬼魂），桶內儲存其列表索引。
+        """
+        for i in self._occupied:
+            self.cells[i].clear()
+        self._occupied.clear()
+        self.entities = entities
+        for index, entity in enumerate(entities):
+            tx, ty = self.tile_of(entity)
+            bucket = self.cells[tx + ty * self.width]
+            if not bucket:
+                self._occupied.append(tx + ty * self.width)
+            bucket.append(index)
+
+    def query(self, x: int, y: int, radius: int = 1) -> List[int]:
+        """
+        查詢以 (x, y) 為中心、切比雪夫半徑 radius 範圍內格子中的實體索引。
+
+        Args:
+            x (int): 中心格子 x 坐標。
+            y (int): 中心格子 y 坐標。
+            radius (int): 查詢半徑（格子數）。
+
+        Returns:
+            List[int]: 按列表順序排序的實體索引，與逐一遍歷實體的處理順序一致。
+        """
+        indices = []
+        for ty in range(max(0, y - radius), min(self.height, y + radius + 1)):
+            row = ty * self.width
+            for tx in range(max(0, x - radius), min(self.width, x + radius + 1)):
+                indices.extend(self.cells[row + tx])
+        indices.sort()
+        return indices
+
+    def near(self, x: int, y: int, radius: int = 1) -> List:
+        """
+        查詢 (x, y) 附近的實體。
+
+        Args:
+            x (int): 中心格子 x 坐標。
+            y (int): 中心格子 y 坐標。
+            radius (int): 查詢半徑（格子數）。
+
+        Returns:
+            List: 範圍內的實體，按列表順序排列。
+        """
+        return [self.entities[i] for i in self.query(x, y, radius)]
+
+    def nearest(self, x: int, y: int, exclude=None, max_radius: Optional[int] = None):
+        """
+        尋找距離 (x, y) 最近的實體（歐幾里得格子距離）。
+
+        原理：
+        - 由內向外逐圈搜尋，在半徑 r 找到第一個候選後，最近者可能位於半徑 r√2 內，
+          因此再擴展到 ceil(r√2) 圈後比較距離，平手時取列表順序較前者。
+        - 實體集中在目標附近時只需檢查少數格子。
+
+        Args:
+            x (int): 中心格子 x 坐標。
+            y (int): 中心格子 y 坐標。
+            exclude: 要排除的實體（例如查詢者自己）。
+            max_radius (int, optional): 最大搜尋半徑，None 表示整個迷宮。
+
+        Returns:
+            最近的實體，若範圍內沒有則返回 None。
+        """
+        limit = max(self.width, self.height) if max_radius is None else max_radius
+        best = None
+        best_key = None
+        stop = limit
+        r = 0
+        while r <= stop:
+            for tx, ty in self._ring(x, y, r):
+                for index in self.cells[tx + ty * self.width]:
+                    entity = self.entities[index]
+                    if entity is exclude:
+                        continue
+                    key = ((tx - x) ** 2 + (ty - y) ** 2, index)
+                    if best_key is None or key < best_key:
+                        best, best_key = entity, key
+            if best is not None and stop == limit:
+                stop = min(limit, int(r * 1.4143) + 1)
+            r += 1
+        return best
+
+    def _ring(self, x: int, y: int, r: int):
+        """
+        產生以 (x, y) 為中心、切比雪夫距離恰為 r 且位於迷宮內的格子。
+        """
+        if r == 0:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                yield x, y
+            return
+        for tx in range(x - r, x + r + 1):
+            for ty in (y - r, y + r):
+                if 0 <= tx < self.width and 0 <= ty < self.height:
+                    yield tx, ty
+        for ty in range(y - r + 1, y + r):
+            for tx in (x - r, x + r):
+                if 0 <= tx < self.width and 0 <= ty < self.height:
+                    yield tx, ty
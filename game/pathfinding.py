@@ -0,0 +1,296 @@
+# game/pathfinding.py
+"""
+路徑搜尋輔助工具：以多源 BFS 計算危險鬼魂到每個格子的迷宮距離（危險場），
+供 Pac-Man 的 A* 成本與逃跑目標選擇以 O(1) 查詢；並以單次 BFS 查詢各類目標
+（能量球、分數球、可食用鬼魂）中迷宮距離最近者；PathPlan 保存已規劃的路線，
+跨 tick 沿用直到失效事件發生。
+"""
+
+import copy
+from collections import deque, namedtuple
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .entities.pellets import pellet_lookup
+from config import TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN
+
+UNREACHABLE = np.iinfo(np.int32).max  # 危險鬼魂無法到達的格子
+PACMAN_BLOCKED_TILES = (TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN)  # Pac-Man 不可通行的格子
+STEP_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # 展開順序與 find_path 相同
+
+PLAN_THREAT_RADIUS = 6  # 危險鬼魂進入 Pac-Man 此距離內時重新規劃（與行為樹的 is_threat_nearby 一致）
+PLAN_DANGER_RADIUS = 4  # 危險鬼魂進入剩餘路線此距離內時重新規劃（與 find_path 的 danger_cost 範圍一致）
+EDIBLE_CHASE_RADIUS = 10  # 可食用鬼魂進入此距離內時行為樹改為追擊（has_edible_ghost）
+ENDGAME_PELLETS = 10  # 分數球不多於此數量時進入終局分支（is_endgame）
+
+# 最近目標查詢結果：目標位置、迷宮距離、從起點出發的第一步方向 (dx, dy)、路線（不含起點）
+Target = namedtuple('Target', ['position', 'distance', 'first_step', 'path'])
+
+def is_dangerous(ghost) -> bool:
+    """
+    判斷鬼魂是否具威脅（非可食用、非返回重生點、非等待）。
+
+    Args:
+        ghost (Ghost): 鬼魂物件。
+
+    Returns:
+        bool: 是否為危險鬼魂。
+    """
+    return not ghost.returning_to_spawn and not ghost.waiting and not ghost.edible
+
+def is_chaseable(ghost) -> bool:
+    """
+    判斷可食用鬼魂是否值得追擊（剩餘時間大於 3 且未返回重生點或等待）。
+
+    Args:
+        ghost (Ghost): 鬼魂物件。
+
+    Returns:
+        bool: 是否可追擊。
+    """
+    return ghost.edible and ghost.edible_timer > 3 and not ghost.returning_to_spawn and not ghost.waiting
+
+def pellet_distances(pellets, position: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    計算所有彈丸位置及其與 position 的平方距離。
+
+    Args:
+        pellets (PelletGrid | List[Pellet]): 彈丸。
+        position (Tuple[int, int]): 參考格子。
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (位置陣列 (N, 2), 平方距離陣列 (N,))。
+    """
+    if hasattr(pellets, "positions"):
+        positions = pellets.positions()
+    else:
+        positions = np.array([(p.x, p.y) for p in pellets], dtype=np.int64).reshape(-1, 2)
+    offsets = positions - np.array(position)
+    return positions, (offsets ** 2).sum(axis=1)
+
+def is_power_pellet_closer(position: Tuple[int, int], power_pellets, score_pellets) -> bool:
+    """
+    最近能量球的距離是否小於所有分數球的平均距離（終局分支中決定前往能量球或分數球）。
+    """
+    if not power_pellets or not score_pellets:
+        return False
+    _, power_sq = pellet_distances(power_pellets, position)
+    _, score_sq = pellet_distances(score_pellets, position)
+    return float(np.sqrt(power_sq.min())) < float(np.sqrt(score_sq).mean())
+
+def branch_guards(position: Tuple[int, int], power_pellets, score_pellets, ghosts) -> Tuple[bool, bool, bool]:
+    """
+    計算行為樹中決定彈丸路線分支的條件，用於偵測路線規劃後行為樹的選擇是否改變。
+
+    原理：
+    - endgame：分數球不多於 ENDGAME_PELLETS（終局分支優先於追擊可食用鬼魂）。
+    - power_closer：終局時最近能量球是否比分數球平均距離更近（終局分支內選擇能量球或分數球）。
+    - edible_nearby：非終局時是否有可追擊的鬼魂在 EDIBLE_CHASE_RADIUS 內（追擊分支優先於分數球分支）。
+    - 不會影響選擇的條件固定為 False，避免不相關的變化造成重新規劃；危險鬼魂另由 invalidation 的 danger 檢查。
+
+    Args:
+        position (Tuple[int, int]): Pac-Man 當前格子。
+        power_pellets (PelletGrid | List[PowerPellet]): 能量球。
+        score_pellets (PelletGrid | List[ScorePellet]): 分數球。
+        ghosts (List[Ghost]): 鬼魂列表。
+
+    Returns:
+        Tuple[bool, bool, bool]: (endgame, power_closer, edible_nearby)。
+    """
+    endgame = len(score_pellets) <= ENDGAME_PELLETS
+    if endgame:
+        return True, is_power_pellet_closer(position, power_pellets, score_pellets), False
+    limit = EDIBLE_CHASE_RADIUS ** 2
+    x, y = position
+    edible_nearby = any(is_chaseable(ghost) and (ghost.x - x) ** 2 + (ghost.y - y) ** 2 < limit for ghost in ghosts)
+    return False, False, edible_nearby
+
+def danger_field(maze, ghosts) -> np.ndarray:
+    """
+    計算每個格子與最近危險鬼魂的迷宮距離。
+
+    原理：
+    - 以所有危險鬼魂所在格子為起點（距離 0）同時進行廣度優先搜尋（多源 BFS），
+      第一次到達某格子時的步數即為其與最近危險鬼魂的真實迷宮距離（不穿牆）。
+    - 可通行格子為邊界與牆壁以外的格子（鬼魂可穿過門與重生點）。
+    - 每個格子只入隊一次，成本為 O(W × H)，與鬼魂數量無關。
+
+    Args:
+        maze (Map): 迷宮物件。
+        ghosts (List[Ghost]): 鬼魂列表。
+
+    Returns:
+        np.ndarray: 形狀為 (height, width) 的 int32 陣列，索引為 [y, x]，
+        無危險鬼魂可到達的格子為 UNREACHABLE。
+    """
+    width, height = maze.width, maze.height
+    walkable = [maze.get_tile(x, y) not in (TILE_BOUNDARY, TILE_WALL) for y in range(height) for x in range(width)]
+    dist = [UNREACHABLE] * (width * height)
+    queue = deque()
+    for ghost in ghosts:
+        if is_dangerous(ghost) and 0 <= ghost.x < width and 0 <= ghost.y < height:
+            index = ghost.x + ghost.y * width
+            if dist[index] != 0:
+                dist[index] = 0
+                queue.append(index)
+
+    last_row = width * (height - 1)
+    while queue:
+        index = queue.popleft()
+        step = dist[index] + 1
+        x = index % width
+        for neighbor, inside in ((index - 1, x > 0), (index + 1, x < width - 1),
+                                 (index - width, index >= width), (index + width, index < last_row)):
+            if inside and walkable[neighbor] and dist[neighbor] > step:
+                dist[neighbor] = step
+                queue.append(neighbor)
+    return np.array(dist, dtype=np.int32).reshape(height, width)
+
+def nearest_targets(maze, start: Tuple[int, int], targets: Dict[str, Callable[[int, int], bool]],
+                    avoid: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Optional[Target]]:
+    """
+    從起點進行一次 BFS，同時找出每類目標中迷宮距離最近者及通往它的第一步。
+
+    原理：
+    - BFS 按迷宮距離由近到遠展開 Pac-Man 可通行的格子（邊界、牆壁、門與重生點除外），
+      每類目標第一次被到達的格子即為其最近者，所有類別都找到後立即停止。
+    - 每個格子記錄從起點出發的第一步方向與前一格，到達目標時即得到移動方向，
+      路線只在找到目標時回溯一次。
+    - avoid 標記的格子仍可作為目標被找到，但不會從其繼續展開（例如前往分數球時不穿過能量球）。
+    - 一次遍歷取代「歐幾里得距離選目標 + A* 搜尋」，且不會選中被牆隔開的目標。
+
+    Args:
+        maze (Map): 迷宮物件。
+        start (Tuple[int, int]): 起點格子 (x, y)。
+        targets (Dict[str, Callable[[int, int], bool]]): 目標類別名稱到 (x, y) 判斷函數的映射。
+        avoid (Callable[[int, int], bool], optional): 不從其繼續展開的格子。
+
+    Returns:
+        Dict[str, Optional[Target]]: 每類目標的最近結果，無法到達時為 None。
+    """
+    found = {name: None for name in targets}
+    remaining = dict(targets)
+    visited = {start: None}  # 格子 -> 第一步方向
+    parents = {}  # 格子 -> BFS 樹中的前一格
+    queue = deque([(start, 0)])
+    while queue and remaining:
+        (x, y), distance = queue.popleft()
+        first_step = visited[(x, y)]
+        if distance > 0:
+            for name, is_target in list(remaining.items()):
+                if is_target(x, y):
+                    found[name] = Target((x, y), distance, first_step, _trace(parents, (x, y)))
+                    del remaining[name]
+            if avoid is not None and avoid(x, y):
+                continue
+        for dx, dy in STEP_DIRECTIONS:
+            neighbor = (x + dx, y + dy)
+            if neighbor in visited or not maze.xy_valid(*neighbor) or maze.get_tile(*neighbor) in PACMAN_BLOCKED_TILES:
+                continue
+            visited[neighbor] = first_step if first_step is not None else (dx, dy)
+            parents[neighbor] = (x, y)
+            queue.append((neighbor, distance + 1))
+    return found
+
+def _trace(parents, tile) -> List[Tuple[int, int]]:
+    """沿前一格回溯，返回從起點的下一格到 tile 的路線。"""
+    path = []
+    while tile in parents:
+        path.append(tile)
+        tile = parents[tile]
+    path.reverse()
+    return path
+
+def edible_state(ghosts) -> Tuple[bool, ...]:
+    """鬼魂的可食用狀態，用於偵測路線規劃後的狀態變化。"""
+    return tuple(ghost.edible for ghost in ghosts)
+
+class PathPlan:
+    def __init__(self, path: List[Tuple[int, int]], target_type: str, ghosts,
+                 guards: Optional[Tuple[bool, bool, bool]] = None):
+        """
+        初始化已規劃的路線。
+
+        原理：
+        - 行為樹規劃出前往彈丸的完整路線後保存於此，之後每次到達格子只需檢查失效條件並取下一步，
+          不必重新執行黑板、BFS 與 A*。
+        - 失效條件明確列於 invalidation，任一成立即丟棄路線並回到行為樹重新規劃。
+        - guards 為規劃時的 branch_guards，分支條件改變時行為樹會做出不同選擇，路線隨之失效。
+
+        Args:
+            path (List[Tuple[int, int]]): 從下一格到目標的路線（不含起點）。
+            target_type (str): 目標類型（"score" 或 "power"），決定目標是否已被吃掉的判斷。
+            ghosts (List[Ghost]): 規劃時的鬼魂列表，用於記錄可食用狀態。
+            guards (Tuple[bool, bool, bool], optional): 規劃時的分支條件，None 表示不檢查。
+        """
+        self.path = deque(path)
+        self.target = path[-1] if path else None
+        self.target_type = target_type
+        self.edible_state = edible_state(ghosts)
+        self.guards = guards
+
+    def copy(self) -> 'PathPlan':
+        """返回可獨立前進的副本（剩餘路線另存一份），供遊戲快照使用。"""
+        clone = copy.copy(self)
+        clone.path = deque(self.path)
+        return clone
+
+    def invalidation(self, position: Tuple[int, int], power_pellets, score_pellets, ghosts) -> Optional[str]:
+        """
+        檢查路線是否失效。
+
+        原理：
+        - exhausted：路線已走完。
+        - off_path：下一格與 Pac-Man 當前位置不相鄰（例如位置被重置或移動被打斷）。
+        - target_eaten：目標彈丸已不存在。
+        - edible_changed：任一鬼魂的可食用狀態改變（吃到能量球、恢復或被吃掉）。
+        - endgame_changed / power_closer_changed / edible_nearby_changed：branch_guards 的對應條件改變
+          （進入終局、終局中能量球與分數球的遠近改變、可追擊鬼魂進入或離開追擊範圍，包括剩餘時間降到 3 以下）。
+        - danger：危險鬼魂與 Pac-Man 的歐幾里得距離小於 PLAN_THREAT_RADIUS（行為樹會改為逃跑或前往能量球），
+          或與剩餘路線任一格的距離小於 PLAN_DANGER_RADIUS（A* 會繞開該格）。
+
+        Args:
+            position (Tuple[int, int]): Pac-Man 當前格子。
+            power_pellets (PelletGrid | List[PowerPellet]): 能量球。
+            score_pellets (PelletGrid | List[ScorePellet]): 分數球。
+            ghosts (List[Ghost]): 鬼魂列表。
+
+        Returns:
+            Optional[str]: 失效原因，路線仍有效時為 None。
+        """
+        if not self.path:
+            return "exhausted"
+        next_x, next_y = self.path[0]
+        if abs(next_x - position[0]) + abs(next_y - position[1]) != 1:
+            return "off_path"
+        pellets = power_pellets if self.target_type == "power" else score_pellets
+        if not pellet_lookup(pellets)(*self.target):
+            return "target_eaten"
+        if edible_state(ghosts) != self.edible_state:
+            return "edible_changed"
+        if self.guards is not None:
+            guards = branch_guards(position, power_pellets, score_pellets, ghosts)
+            for name, planned, current in zip(("endgame", "power_closer", "edible_nearby"), self.guards, guards):
+                if planned != current:
+                    return f"{name}_changed"
+        threat_limit, path_limit = PLAN_THREAT_RADIUS ** 2, PLAN_DANGER_RADIUS ** 2
+        for ghost in ghosts:
+            if is_dangerous(ghost):
+                ghost_x, ghost_y = ghost.x, ghost.y
+                if (ghost_x - position[0]) ** 2 + (ghost_y - position[1]) ** 2 < threat_limit:
+                    return "danger"
+                if any((ghost_x - x) ** 2 + (ghost_y - y) ** 2 < path_limit for x, y in self.path):
+                    return "danger"
+        return None
+
+    def next_step(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        取出路線的下一格並返回移動方向，呼叫前應先確認 invalidation 為 None。
+
+        Args:
+            position (Tuple[int, int]): Pac-Man 當前格子。
+
+        Returns:
+            Tuple[int, int]: 方向 (dx, dy)。
+        """
+        next_x, next_y = self.path.popleft()
+        return next_x - position[0], next_y - position[1]
@@ -7,7 +7,7 @@ import math
 from .entities.pellets import PowerPellet, ScorePellet
 from .entities.pacman import PacMan
 from .entities.ghost import Ghost
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from .maze_generator import Map
 from config import BLACK, DARK_GRAY, GRAY, GREEN, PINK, RED, BLUE, ORANGE, YELLOW, WHITE, LIGHT_BLUE, CELL_SIZE, TILE_BOUNDARY, TILE_WALL, TILE_PATH, TILE_POWER_PELLET, TILE_GHOST_SPAWN, TILE_DOOR
@@ -28,36 +28,66 @@ class Renderer:
         self.font = font
         self.screen_width = screen_width
         self.screen_height = screen_height
+        self._maze_surface = None  # 迷宮靜態背景快取
+        self._maze_surface_key = None  # 快取對應的迷宮物件
 
-    def render(self, game: 'Game', control_mode: str, frame_count: int) -> None:
+    def _get_maze_surface(self, maze: Map) -> pygame.Surface:
         """
-        渲染遊戲畫面。
+        取得迷宮靜態背景的快取 Surface，首次呼叫或迷宮更換時重新繪製。
+
+        原理：
+        - 迷宮格子在生成後不再變化，每幀逐格呼叫 pygame.draw.rect 是渲染的主要開銷。
+        - 將所有格子一次繪製到離屏 Surface，之後每幀只需一次 blit。
+        - 以迷宮物件身分作為快取鍵，重新開始遊戲（新迷宮）時自動失效。
 
         Args:
-            game (Game): 遊戲實例。
-            control_mode (str): 當前控制模式名稱。
-            frame_count (int): 動畫幀計數器。
-        """
-        self.screen.fill(BLACK)  # 清空畫面
+            maze (Map): 迷宮物件。
 
-        # 渲染迷宮
-        maze = game.get_maze()
+        Returns:
+            pygame.Surface: 已繪製迷宮的背景 Surface。
+        """
+        if self._maze_surface is not None and self._maze_surface_key is maze:
+            return self._maze_surface
+        surface = pygame.Surface((self.screen_width, self.screen_height))
+        surface.fill(BLACK)
         for y in range(maze.height):
             for x in range(maze.width):
                 tile = maze.get_tile(x, y)
                 rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)  # 計算格子矩形
                 if tile == TILE_BOUNDARY:
-                    pygame.draw.rect(self.screen, DARK_GRAY, rect)  # 繪製邊界（深灰色）
+                    pygame.draw.rect(surface, DARK_GRAY, rect)  # 繪製邊界（深灰色）
                 elif tile == TILE_WALL:
-                    pygame.draw.rect(self.screen, BLACK, rect)  # 繪製牆壁（黑色）
+                    pygame.draw.rect(surface, BLACK, rect)  # 繪製牆壁（黑色）
                 elif tile == TILE_PATH:
-                    pygame.draw.rect(self.screen, GRAY, rect)  # 繪製路徑（灰色）
+                    pygame.draw.rect(surface, GRAY, rect)  # 繪製路徑（灰色）
                 elif tile == TILE_POWER_PELLET:
-                    pygame.draw.rect(self.screen, GRAY, rect)  # 繪製能量球位置（綠色）
+                    pygame.draw.rect(surface, GRAY, rect)  # 繪製能量球位置（綠色）
                 elif tile == TILE_GHOST_SPAWN:
-                    pygame.draw.rect(self.screen, PINK, rect)  # 繪製鬼魂重生點（粉紅色）
+                    pygame.draw.rect(surface, PINK, rect)  # 繪製鬼魂重生點（粉紅色）
                 elif tile == TILE_DOOR:
-                    pygame.draw.rect(self.screen, RED, rect)  # 繪製門（紅色）
+                    pygame.draw.rect(surface, RED, rect)  # 繪製門（紅色）
+        self._maze_surface = surface
+        self._maze_surface_key = maze
+        return surface
+
+    def render(self, game: 'Game', control_mode: str, frame_count: int, positions: Optional[Tuple] = None,
+               speed_label: Optional[str] = None) -> None:
+        """
+        渲染遊戲畫面。
+
+        Args:
+            game (Game): 遊戲實例。
+            control_mode (str): 當前控制模式名稱。
+            frame_count (int): 動畫幀計數器。
+            positions (Tuple[np.ndarray, np.ndarray], optional): 依實體列號的插值像素坐標（SimClock.positions），
+                None 表示使用實體目前坐標。
+            speed_label (str, optional): 模擬倍速文字，None 表示不顯示。
+        """
+        self.screen.fill(BLACK)  # 清空畫面
+
+        # 渲染迷宮（靜態背景已快取，僅需一次 blit）
+        maze = game.get_maze()
+        self.screen.blit(self._get_maze_surface(maze), (0, 0))
 
         # 渲染能量球
         for pellet in game.get_power_pellets():
@@ -77,10 +107,7 @@ class Renderer:
 
         # 渲染 Pac-Man
         pacman = game.get_pacman()
-        pacman_rect = pygame.Rect(
-            pacman.current_x - CELL_SIZE // 4,
-            pacman.current_y - CELL_SIZE // 4,
-            CELL_SIZE // 2, CELL_SIZE // 2)
+        pacman_x, pacman_y = self._position(pacman, positions)
         
         if game.is_death_animation_playing():
             # 死亡動畫：縮小 Pac-Man
@@ -88,16 +115,16 @@ class Renderer:
             scale = 1.0 - progress  # 縮放比例，從 1 減小到 0
             radius = int(CELL_SIZE // 2 * scale)  # 計算縮放後的圓半徑
             pacman_center = (
-                pacman.current_x,
-                pacman.current_y,
+                pacman_x,
+                pacman_y,
                 )  # Pac-Man 當前中心坐標
             if radius > 0:
                 pygame.draw.circle(self.screen, YELLOW, pacman_center, radius)  # 繪製縮小的黃色圓形
         else:
             # 正常繪製 Pac-Man
             pacman_rect = pygame.Rect(
-                pacman.current_x - CELL_SIZE // 4,
-                pacman.current_y - CELL_SIZE // 4,
+                pacman_x - CELL_SIZE // 4,
+                pacman_y - CELL_SIZE // 4,
                 CELL_SIZE // 2, CELL_SIZE // 2)  # 計算 Pac-Man 矩形（居中，半格大小）
             pygame.draw.ellipse(self.screen, YELLOW, pacman_rect)  # 繪製黃色圓形 Pac-Man
 
@@ -114,18 +141,18 @@ class Renderer:
                 break
             direction_rad = math.radians(direction_angle)
 
-            point1 = (pacman.current_x, pacman.current_y)
+            point1 = (pacman_x, pacman_y)
             point2 = (
-                pacman.current_x + CELL_SIZE // 4 * math.cos(direction_rad)*1.3,
-                pacman.current_y + CELL_SIZE // 4 * math.sin(direction_rad)*1.3
+                pacman_x + CELL_SIZE // 4 * math.cos(direction_rad)*1.3,
+                pacman_y + CELL_SIZE // 4 * math.sin(direction_rad)*1.3
             )
             point3 = (
-                pacman.current_x + CELL_SIZE // 4 * math.cos(direction_rad + math.pi / 4),
-                pacman.current_y + CELL_SIZE // 4 * math.sin(direction_rad + math.pi / 4)
+                pacman_x + CELL_SIZE // 4 * math.cos(direction_rad + math.pi / 4),
+                pacman_y + CELL_SIZE // 4 * math.sin(direction_rad + math.pi / 4)
             )
             point4 = (
-                pacman.current_x + CELL_SIZE // 4 * math.cos(direction_rad - math.pi / 4),
-                pacman.current_y + CELL_SIZE // 4 * math.sin(direction_rad - math.pi / 4)
+                pacman_x + CELL_SIZE // 4 * math.cos(direction_rad - math.pi / 4),
+                pacman_y + CELL_SIZE // 4 * math.sin(direction_rad - math.pi / 4)
             )
             pygame.draw.polygon(self.screen, GRAY, [point1, point4, point2, point3])
 
@@ -148,10 +175,21 @@ class Renderer:
             ghost_surface.fill((0, 0, 0, 0))  # 透明背景
             pygame.draw.ellipse(ghost_surface, (*base_color, ghost.alpha),
                                (0, 0, CELL_SIZE // 2, CELL_SIZE // 2))
-            self.screen.blit(ghost_surface, (ghost.current_x - CELL_SIZE // 4, ghost.current_y - CELL_SIZE // 4))
+            ghost_x, ghost_y = self._position(ghost, positions)
+            self.screen.blit(ghost_surface, (ghost_x - CELL_SIZE // 4, ghost_y - CELL_SIZE // 4))
 
         # 渲染分數和控制模式
         score_text = self.font.render(f"Score: {pacman.score}", True, WHITE)
         self.screen.blit(score_text, (10, 10))
         mode_text = self.font.render(control_mode, True, WHITE)
-        self.screen.blit(mode_text, (self.screen_width - 150, 10))
\ No newline at end of file
+        self.screen.blit(mode_text, (self.screen_width - 150, 10))
+        if speed_label is not None:
+            speed_text = self.font.render(speed_label, True, WHITE)
+            self.screen.blit(speed_text, (self.screen_width - 150, 40))
+
+    @staticmethod
+    def _position(entity, positions: Optional[Tuple]) -> Tuple[float, float]:
+        """返回實體的繪製像素坐標：有插值坐標時依實體列號讀取，否則使用實體目前坐標。"""
+        if positions is None:
+            return entity.current_x, entity.current_y
+        return float(positions[0][entity._row]), float(positions[1][entity._row])
\ No newline at end of file
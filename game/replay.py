@@ -0,0 +1,551 @@
+# game/replay.py
+"""
+確定性重播檔案：以「種子 + 每個決策點一個動作位元組 + 週期性關鍵幀」記錄一局遊戲。
+重播時從最近的關鍵幀重新模擬，可快速跳轉到任意 tick，並可選擇以 Renderer 顯示。
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # 添加父目錄到系統路徑
+
+import argparse
+import base64
+import bisect
+import json
+import struct
+import zlib
+from typing import Callable, List, Optional
+from config import CELL_SIZE, FPS, GHOST_COUNT
+from game.game import Game
+from game.game_config import GameConfig, add_config_arguments, config_from_args, load_config
+import numpy as np
+
+REPLAY_MAGIC = b"PMRP"  # 重播檔案標頭
+REPLAY_VERSION = 2  # 版本 2：關鍵幀保存隨機數狀態，錄製不再重新播種遊戲的 rng
+DEFAULT_KEYFRAME_INTERVAL = 300  # 預設每 300 tick（10 秒）一個關鍵幀
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # 動作編號與 PacManEnv 一致：上、下、左、右
+ACTION_NONE = 4  # 決策點未設置新目標
+
+PACMAN_FIELDS = ("x", "y", "initial_x", "initial_y", "target_x", "target_y", "current_x", "current_y", "speed",
+                 "score", "lives", "alive", "stuck_count")
+GHOST_FIELDS = ("x", "y", "target_x", "target_y", "current_x", "current_y", "speed", "default_speed",
+                "edible", "edible_timer", "returning_to_spawn", "death_count", "waiting", "wait_timer",
+                "alpha", "last_x", "last_y", "memory_x", "memory_y")
+GAME_FIELDS = ("ghost_score_index", "running", "death_animation", "death_animation_timer", "ticks")
+ENV_FIELDS = ("frame_count", "current_score", "old_score", "game_over", "eaten_pellets")
+
+def direction_to_action(dx: int, dy: int) -> int:
+    """
+    將方向 (dx, dy) 轉換為動作編號，非單位方向則為 ACTION_NONE。
+
+    Args:
+        dx (int): x 方向偏移。
+        dy (int): y 方向偏移。
+
+    Returns:
+        int: 動作編號（0-3）或 ACTION_NONE。
+    """
+    try:
+        return DIRECTIONS.index((dx, dy))
+    except ValueError:
+        return ACTION_NONE
+
+def encode_rng_state(state: tuple, previous_words: Optional[bytes] = None) -> dict:
+    """
+    將 random.Random.getstate() 的結果編碼為關鍵幀中的精簡表示。
+
+    原理：
+    - Mersenne Twister 狀態為 624 個 32 位元字與一個位置索引；字陣列只在每消耗 624 個字時重新產生一次，
+      鬼魂的隨機決策很少，相鄰關鍵幀的字陣列通常相同。
+    - 字陣列與上一個關鍵幀相同時只記錄位置索引（words 為 None），否則以 zlib 壓縮後 base64 編碼，
+      檔案維持在數 KB，且錄製時不需改動遊戲的隨機數生成器。
+
+    Args:
+        state (tuple): random.Random.getstate() 的結果。
+        previous_words (bytes, optional): 上一個關鍵幀的字陣列（struct 打包後的位元組）。
+
+    Returns:
+        dict: {"version", "pos", "gauss", "words"}，另以 "_words" 鍵附帶本次的字陣列位元組供下一個關鍵幀比較。
+    """
+    version, internal, gauss = state
+    words = struct.pack(f"<{len(internal) - 1}I", *internal[:-1])
+    return {
+        "version": version,
+        "pos": internal[-1],
+        "gauss": gauss,
+        "words": None if words == previous_words else base64.b64encode(zlib.compress(words, 9)).decode("ascii"),
+        "_words": words,
+    }
+
+def decode_rng_state(entry: dict, words: bytes) -> tuple:
+    """
+    將 encode_rng_state 的結果還原為 random.Random.setstate() 可用的狀態。
+
+    Args:
+        entry (dict): 關鍵幀的隨機數狀態。
+        words (bytes): 字陣列（entry["words"] 為 None 時取自較早的關鍵幀）。
+
+    Returns:
+        tuple: 隨機數狀態。
+    """
+    internal = struct.unpack(f"<{len(words) // 4}I", words) + (entry["pos"],)
+    return entry["version"], internal, entry["gauss"]
+
+def _keyframe_rng_words(keyframes: List[dict]) -> List[bytes]:
+    """
+    解碼每個關鍵幀的隨機數字陣列（省略者沿用前一個關鍵幀）。
+    """
+    result = []
+    words = None
+    for keyframe in keyframes:
+        encoded = keyframe["rng"]["words"]
+        if encoded is not None:
+            words = zlib.decompress(base64.b64decode(encoded))
+        result.append(words)
+    return result
+
+def _pellet_mask(pellets, width: int) -> str:
+    """
+    將彈丸網格編碼為以格子索引為位元的十六進位字串。
+
+    Args:
+        pellets (PelletGrid): 彈丸網格。
+        width (int): 迷宮寬度。
+
+    Returns:
+        str: 十六進位位元遮罩。
+    """
+    mask = 0
+    for index in np.flatnonzero(pellets.grid).tolist():  # 網格為列優先，扁平索引即 x + y * width
+        mask |= 1 << index
+    return format(mask, "x")
+
+def _pellet_positions(mask: str, width: int, height: int):
+    """
+    將位元遮罩解碼為依列優先順序（與 initialize_entities 相同）排列的位置列表。
+
+    Args:
+        mask (str): 十六進位位元遮罩。
+        width (int): 迷宮寬度。
+        height (int): 迷宮高度。
+
+    Returns:
+        List[Tuple[int, int]]: 彈丸位置列表。
+    """
+    bits = int(mask, 16)
+    return [(i % width, i // width) for i in range(width * height) if bits >> i & 1]
+
+def capture_state(game) -> dict:
+    """
+    擷取遊戲（或 PacManEnv）的完整動態狀態，作為關鍵幀內容。
+
+    原理：
+    - 迷宮為靜態資料，由種子重建，不寫入關鍵幀。
+    - 彈丸以位元遮罩儲存，鬼魂按列表順序儲存各狀態欄位。
+    - 遊戲 rng 的狀態由 ReplayRecorder 以 encode_rng_state 另行記錄於關鍵幀。
+
+    Args:
+        game (Game): 遊戲實例。
+
+    Returns:
+        dict: 可 JSON 序列化的狀態字典。
+    """
+    state = {
+        "pacman": {field: getattr(game.pacman, field) for field in PACMAN_FIELDS},
+        "ghosts": [{field: getattr(ghost, field) for field in GHOST_FIELDS} for ghost in game.ghosts],
+        "power_pellets": _pellet_mask(game.power_pellets, game.maze.width),
+        "score_pellets": _pellet_mask(game.score_pellets, game.maze.width),
+        "game": {field: getattr(game, field) for field in GAME_FIELDS if hasattr(game, field)},
+    }
+    env_state = {field: getattr(game, field) for field in ENV_FIELDS if hasattr(game, field)}
+    if env_state:
+        state["env"] = env_state
+    return state
+
+def restore_state(game, state: dict) -> None:
+    """
+    將關鍵幀狀態寫回遊戲實例（迷宮保持不變）。
+
+    Args:
+        game (Game): 由相同種子建立的遊戲實例。
+        state (dict): capture_state 的結果。
+    """
+    for field, value in state["pacman"].items():
+        setattr(game.pacman, field, value)
+    for ghost, ghost_state in zip(game.ghosts, state["ghosts"]):
+        for field, value in ghost_state.items():
+            setattr(ghost, field, value)
+    width, height = game.maze.width, game.maze.height
+    game.power_pellets.reset(_pellet_positions(state["power_pellets"], width, height))
+    game.score_pellets.reset(_pellet_positions(state["score_pellets"], width, height))
+    for section in ("game", "env"):
+        for field, value in state.get(section, {}).items():
+            setattr(game, field, value)
+    if hasattr(game, "occupancy"):
+        game.occupancy.rebuild(game.ghosts)
+
+def _at_tile_center(entity) -> bool:
+    """
+    判斷實體是否位於格子中心（即本 tick 的 move_towards_target 已到達目標）。
+    """
+    return (entity.current_x == entity.x * CELL_SIZE + CELL_SIZE // 2 and
+            entity.current_y == entity.y * CELL_SIZE + CELL_SIZE // 2)
+
+class ReplayRecorder:
+    """
+    重播錄製器，掛接於 ControlManager.move（遊戲模式）或 PacManEnv.step（環境模式）。
+
+    原理：
+    - 遊戲模式：每次 Pac-Man 到達格子中心即為一個決策點，記錄決策後的目標方向（1 位元組）。
+    - 環境模式：每次 step 記錄 1 位元組，低 2 位為動作，高位為 step 前 Pac-Man 的目標方向
+      （專家動作會在 step 前改變目標）。
+    - 每 keyframe_interval tick 記錄一個關鍵幀（完整動態狀態與遊戲 rng 狀態）；錄製只讀取遊戲狀態，
+      同一種子在錄製與否、任何關鍵幀間隔下的對局都完全相同。
+    - 控制器只使用 Pac-Man 專屬的 pacman_rng，不影響鬼魂使用的遊戲 rng，
+      因此重播時不需重跑控制器即可完全重現。
+    """
+    def __init__(self, game, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL, source: str = "game",
+                 env_options: Optional[dict] = None):
+        """
+        初始化錄製器。
+
+        Args:
+            game: 被錄製的 Game 或 PacManEnv 實例。
+            keyframe_interval (int): 關鍵幀間隔（tick 或 step）。
+            source (str): "game" 或 "env"。
+            env_options (dict, optional): 環境模式下重建環境所需的參數（例如 random_spawn_seed）。
+        """
+        if keyframe_interval < 1:
+            raise ValueError(f"關鍵幀間隔必須大於 0，得到 {keyframe_interval}")
+        self.game = game
+        self.source = source
+        self.keyframe_interval = keyframe_interval
+        self.env_options = env_options or {}
+        self.actions = bytearray()  # 每個決策點一個位元組
+        self.keyframes = []  # [{"tick", "decision", "state"}]
+        self.speed_changes = []  # [(決策索引, 速度)]，規則 AI 會在決策時改變速度
+        self._last_speed = game.pacman.speed
+        self._next_keyframe = 0
+        self._steps = 0
+        self._rng_words = None  # 上一個關鍵幀的隨機數字陣列
+
+    def _current_tick(self) -> int:
+        return self._steps if self.source == "env" else self.game.ticks
+
+    def _maybe_keyframe(self) -> None:
+        """
+        若已到達下一個關鍵幀位置，記錄關鍵幀（包含遊戲 rng 狀態，不改動遊戲）。
+        """
+        tick = self._current_tick()
+        if tick < self._next_keyframe:
+            return
+        rng = encode_rng_state(self.game.rng.getstate(), self._rng_words)
+        self._rng_words = rng.pop("_words")
+        self.keyframes.append({"tick": tick, "decision": len(self.actions), "state": capture_state(self.game),
+                               "rng": rng})
+        self._next_keyframe = tick + self.keyframe_interval
+
+    def before_move(self) -> None:
+        """
+        ControlManager.move 呼叫策略前的掛鉤：處理關鍵幀。
+        """
+        self._maybe_keyframe()
+
+    def after_move(self, pacman) -> None:
+        """
+        ControlManager.move 呼叫策略後的掛鉤：若本 tick 為決策點，記錄動作位元組。
+
+        Args:
+            pacman (PacMan): Pac-Man 物件。
+        """
+        if not _at_tile_center(pacman):
+            return
+        if pacman.speed != self._last_speed:
+            self.speed_changes.append((len(self.actions), pacman.speed))
+            self._last_speed = pacman.speed
+        self.actions.append(direction_to_action(pacman.target_x - pacman.x, pacman.target_y - pacman.y))
+
+    def before_step(self, action: int) -> None:
+        """
+        PacManEnv.step 執行前的掛鉤：處理關鍵幀並記錄動作與 step 前的目標方向。
+
+        Args:
+            action (int): 本步動作（0-3）。
+        """
+        self._maybe_keyframe()
+        pacman = self.game.pacman
+        pre_target = direction_to_action(pacman.target_x - pacman.x, pacman.target_y - pacman.y)
+        if pacman.speed != self._last_speed:
+            self.speed_changes.append((len(self.actions), pacman.speed))
+            self._last_speed = pacman.speed
+        self.actions.append(action | (pre_target << 2))
+        self._steps += 1
+
+    def to_dict(self) -> dict:
+        """
+        將錄製內容轉換為可序列化的字典。
+
+        Returns:
+            dict: 重播文件內容。
+        """
+        return {
+            "version": REPLAY_VERSION,
+            "source": self.source,
+            "seed": self.game.seed,
+            "width": self.game.maze.width,
+            "height": self.game.maze.height,
+            "ghost_count": self.game.ghost_count,
+            "player_name": getattr(self.game, "player_name", "Replay"),
+            "keyframe_interval": self.keyframe_interval,
+            "ticks": self._current_tick(),
+            "initial_speed": self.keyframes[0]["state"]["pacman"]["speed"] if self.keyframes else self._last_speed,
+            "speed_changes": self.speed_changes,
+            "env_options": self.env_options,
+            "keyframes": self.keyframes,
+            "actions": base64.b64encode(bytes(self.actions)).decode("ascii"),
+        }
+
+    def save(self, path: str) -> int:
+        """
+        將重播寫入檔案（zlib 壓縮的 JSON，前綴魔術位元組）。
+
+        Args:
+            path (str): 輸出檔案路徑。
+
+        Returns:
+            int: 寫入的位元組數。
+        """
+        data = REPLAY_MAGIC + zlib.compress(json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8"), 9)
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+def load_replay(path: str) -> dict:
+    """
+    讀取重播檔案。
+
+    Args:
+        path (str): 重播檔案路徑。
+
+    Returns:
+        dict: 重播文件內容。
+
+    Raises:
+        ValueError: 若檔案格式或版本不符。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(REPLAY_MAGIC):
+        raise ValueError(f"不是有效的重播檔案：{path}")
+    replay = json.loads(zlib.decompress(data[len(REPLAY_MAGIC):]).decode("utf-8"))
+    if replay.get("version") != REPLAY_VERSION:
+        raise ValueError(f"不支援的重播版本：{replay.get('version')}")
+    return replay
+
+class ReplayPlayer:
+    """
+    重播播放器，驅動 Game.update（或 PacManEnv.step）重新模擬錄製的對局。
+
+    原理：
+    - 以錄製時的種子重建迷宮與實體，之後依序套用動作位元組，不需執行任何控制器。
+    - 跳轉（seek）時從不晚於目標的最近關鍵幀還原狀態，再向前模擬不超過一個關鍵幀間隔的 tick。
+    """
+    def __init__(self, replay: dict, game_factory: Optional[Callable[[dict], object]] = None):
+        """
+        初始化播放器。
+
+        Args:
+            replay (dict): load_replay 或 ReplayRecorder.to_dict 的結果。
+            game_factory (Callable, optional): 依重播內容建立遊戲實例的函數，預設依來源建立 Game 或 PacManEnv。
+        """
+        self.replay = replay
+        self.actions = base64.b64decode(replay["actions"])
+        self.keyframes = replay["keyframes"]
+        self.keyframe_ticks = [kf["tick"] for kf in self.keyframes]
+        self._rng_words = _keyframe_rng_words(self.keyframes)
+        self.speed_changes = {decision: speed for decision, speed in replay["speed_changes"]}
+        self.game = (game_factory or self._default_factory)(replay)
+        self.decision = 0
+        self.steps = 0  # 環境模式下已執行的 step 數
+        self.seek(0)
+
+    @staticmethod
+    def _default_factory(replay: dict):
+        game_config = GameConfig(width=replay["width"], height=replay["height"], seed=replay["seed"],
+                                 ghost_count=replay.get("ghost_count", GHOST_COUNT))  # 舊重播未記錄鬼魂數量
+        if replay["source"] == "env":
+            from ai.environment import PacManEnv
+            env = PacManEnv(game_config=game_config)
+            env.reset(seed=replay["seed"], **replay.get("env_options", {}))
+            return env
+        return Game(replay["player_name"], game_config=game_config)
+
+    @property
+    def tick(self) -> int:
+        """
+        目前的重播位置（遊戲模式為 tick，環境模式為 step）。
+        """
+        return self.steps if self.replay["source"] == "env" else self.game.ticks
+
+    @property
+    def total_ticks(self) -> int:
+        """
+        錄製的總長度（tick 或 step）。
+        """
+        return self.replay["ticks"]
+
+    def is_finished(self) -> bool:
+        """
+        檢查重播是否已播放到結尾。
+        """
+        return self.tick >= self.total_ticks
+
+    def _apply_decision_speed(self) -> None:
+        if self.decision in self.speed_changes:
+            self.game.pacman.speed = self.speed_changes[self.decision]
+
+    def _move_pacman(self) -> None:
+        """
+        取代控制器的 Pac-Man 移動函數：到達格子中心時套用下一個動作位元組。
+        """
+        pacman = self.game.pacman
+        if pacman.move_towards_target(FPS) and self.decision < len(self.actions):
+            self._apply_decision_speed()
+            action = self.actions[self.decision]
+            if action != ACTION_NONE:
+                dx, dy = DIRECTIONS[action]
+                pacman.set_new_target(dx, dy, self.game.maze)
+            self.decision += 1
+
+    def step(self) -> bool:
+        """
+        前進一個 tick（或一個 step）。
+
+        Returns:
+            bool: 是否仍有可播放的內容。
+        """
+        if self.is_finished():
+            return False
+        if self.replay["source"] == "env":
+            self._apply_decision_speed()
+            byte = self.actions[self.decision]
+            pre_target = byte >> 2
+            pacman = self.game.pacman
+            if pre_target != ACTION_NONE:
+                pacman.set_new_target(*DIRECTIONS[pre_target], self.game.maze)
+            self.decision += 1
+            self.steps += 1
+            self.game.step(byte & 3)
+        else:
+            self.game.update(FPS, self._move_pacman)
+        return not self.is_finished()
+
+    def seek(self, tick: int) -> None:
+        """
+        跳轉到指定 tick：還原最近的關鍵幀（包含遊戲 rng 狀態）後向前模擬。
+
+        Args:
+            tick (int): 目標 tick（會被限制在 [0, total_ticks]）。
+        """
+        tick = max(0, min(tick, self.total_ticks))
+        if self.keyframes and (tick < self.tick or
+                               self.keyframe_ticks[bisect.bisect_right(self.keyframe_ticks, tick) - 1] > self.tick):
+            position = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+            keyframe = self.keyframes[position]
+            restore_state(self.game, keyframe["state"])
+            self.game.rng.setstate(decode_rng_state(keyframe["rng"], self._rng_words[position]))
+            self.decision = keyframe["decision"]
+            self.steps = keyframe["tick"]
+            self.game.pacman.speed = keyframe["state"]["pacman"]["speed"]
+        while self.tick < tick:
+            self.step()
+
+    def play(self, renderer=None, on_frame: Optional[Callable[[object, int], None]] = None) -> None:
+        """
+        從目前位置播放到結尾，可選擇每 tick 渲染或回呼。
+
+        Args:
+            renderer (Renderer, optional): 渲染器，提供時每 tick 呼叫 render。
+            on_frame (Callable, optional): 每 tick 呼叫 on_frame(game, tick)，例如 pygame.display.flip。
+        """
+        while self.step():
+            if renderer is not None:
+                renderer.render(self.game, "Replay", self.tick)
+            if on_frame is not None:
+                on_frame(self.game, self.tick)
+
+def record_game(path: str, mode: str = "rule_ai", max_ticks: Optional[int] = None,
+                keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL, game_config: Optional[GameConfig] = None) -> dict:
+    """
+    以無頭模式執行一局 AI 對局並錄製為重播檔案。
+
+    Args:
+        path (str): 輸出檔案路徑。
+        mode (str): 控制模式（"rule_ai" 或 "dqn_ai"）。
+        max_ticks (int, optional): 最大 tick 數。
+        keyframe_interval (int): 關鍵幀間隔。
+        game_config (GameConfig, optional): 遊戲設定（迷宮尺寸、種子與鬼魂數量），None 表示以 load_config 載入。
+
+    Returns:
+        dict: 錄製統計，包含 ticks、decisions、keyframes 與 bytes。
+    """
+    from game.strategies import ControlManager
+    game = Game("Replay", game_config=game_config or load_config())
+    control_manager = ControlManager(game.maze.width, game.maze.height)
+    if mode == "dqn_ai" and control_manager.dqn_ai:
+        control_manager.current_strategy = control_manager.dqn_ai
+    else:
+        control_manager.current_strategy = control_manager.rule_based_ai
+    recorder = ReplayRecorder(game, keyframe_interval=keyframe_interval)
+    control_manager.recorder = recorder
+    move = lambda: control_manager.move(game.get_pacman(), game.get_maze(), game.get_power_pellets(),
+                                        game.get_score_pellets(), game.get_ghosts())
+    while (game.is_running() or game.is_death_animation_playing()) and (max_ticks is None or game.ticks < max_ticks):
+        game.update(FPS, move)
+    size = recorder.save(path)
+    return {"ticks": game.ticks, "decisions": len(recorder.actions), "keyframes": len(recorder.keyframes), "bytes": size}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or play deterministic Pac-Man replays")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Record a headless AI game")
+    record_parser.add_argument('path', type=str, help='Replay file to write')
+    record_parser.add_argument('--mode', type=str, default="rule_ai", choices=["rule_ai", "dqn_ai"], help='Control strategy')
+    record_parser.add_argument('--max_ticks', type=int, default=None, help='Stop after N ticks')
+    record_parser.add_argument('--keyframe_interval', type=int, default=DEFAULT_KEYFRAME_INTERVAL, help='Ticks between keyframes')
+    add_config_arguments(record_parser)
+    play_parser = subparsers.add_parser("play", help="Play a replay in a window")
+    play_parser.add_argument('path', type=str, help='Replay file to play')
+    play_parser.add_argument('--start', type=int, default=0, help='Tick to seek to before playing')
+    args = parser.parse_args()
+
+    if args.command == "record":
+        stats = record_game(args.path, mode=args.mode, max_ticks=args.max_ticks,
+                            keyframe_interval=args.keyframe_interval, game_config=config_from_args(args))
+        print(f"錄製完成：{stats['ticks']} tick，{stats['decisions']} 個決策，{stats['keyframes']} 個關鍵幀，"
+              f"{stats['bytes']} 位元組，輸出：{args.path}")
+    else:
+        import pygame
+        from game.renderer import Renderer
+        pygame.init()
+        replay = load_replay(args.path)
+        screen_width, screen_height = replay["width"] * CELL_SIZE, replay["height"] * CELL_SIZE
+        screen = pygame.display.set_mode((screen_width, screen_height))
+        pygame.display.set_caption("Pac-Man Replay")
+        clock = pygame.time.Clock()
+        renderer = Renderer(screen, pygame.font.SysFont(None, 36), screen_width, screen_height)
+        player = ReplayPlayer(replay)
+        player.seek(args.start)
+
+        def on_frame(game, tick):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+            pygame.display.flip()
+            clock.tick(FPS)
+
+        player.play(renderer=renderer, on_frame=on_frame)
+        pygame.quit()
@@ -0,0 +1,159 @@
+# game/score_store.py
+"""
+以 SQLite 保存遊戲分數：每局一列，分數與玩家名稱建有索引，排行榜由「每位玩家最佳成績」視圖查詢。
+寫入先在記憶體中緩衝並以單一交易批次插入，多個進程可同時寫入同一個資料庫；
+首次開啟時自動匯入舊的 scores.json。
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+from config import SCORE_DB_PATH, SCORE_JSON_PATH
+
+SCHEMA_VERSION = 1  # 資料庫結構版本（PRAGMA user_version），0 表示尚未建立
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    seed INTEGER,
+    time REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, score DESC);
+CREATE VIEW IF NOT EXISTS best_scores AS
+    SELECT name, MAX(score) AS score, seed, time FROM scores GROUP BY name;
+"""  # SQLite 的 MAX 聚合中，seed 與 time 取自分數最高的那一列
+
+class ScoreStore:
+    def __init__(self, path: str = SCORE_DB_PATH, json_path: Optional[str] = SCORE_JSON_PATH,
+                 batch_size: int = 64, flush_interval: float = 5.0):
+        """
+        開啟（必要時建立）分數資料庫。
+
+        原理：
+        - 使用 WAL 日誌模式與忙碌等待，多個進程（例如並行的訓練與評估）可同時讀寫，不會互相覆蓋。
+        - 每局保存一列，不再在寫入時去重；排行榜從 best_scores 視圖取每位玩家的最高分，
+          由 (name, score) 索引支援，與原先 scores.json 只保留每位玩家最佳記錄的結果相同。
+        - 建立結構與匯入 scores.json 在同一個 IMMEDIATE 交易中完成並設定 user_version，
+          同時開啟的多個進程只有一個會執行匯入。
+
+        Args:
+            path (str): 資料庫路徑。
+            json_path (str, optional): 舊 scores.json 的路徑，None 表示不匯入。
+            batch_size (int): 緩衝達到此列數時寫入。
+            flush_interval (float): 最早的緩衝列超過此秒數時寫入。
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []  # 尚未寫入的 (名稱, 分數, 種子, 時間)
+        self._pending_since = None  # 最早一筆緩衝列的時間
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)  # 手動管理交易
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._initialize(json_path)
+
+    def _initialize(self, json_path: Optional[str]) -> None:
+        """建立資料表、索引與視圖，並在首次建立時匯入 scores.json。"""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:  # 其他進程可能已完成
+                for statement in SCHEMA.split(";"):
+                    if statement.strip():
+                        self.conn.execute(statement)
+                if json_path and os.path.exists(json_path):
+                    self.conn.executemany("INSERT INTO scores (name, score, seed, time) VALUES (?, ?, ?, ?)",
+                                          _json_rows(json_path))
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def add(self, name: str, score: int, seed: Optional[int], play_time: float) -> None:
+        """
+        記錄一局分數（先緩衝，達到 batch_size 或 flush_interval 時批次寫入）。
+        flush_interval 只在下一次 add 時檢查；每次只寫一列的互動遊戲應在 add 後呼叫 flush，
+        批次緩衝留給大量寫入的呼叫者。
+
+        Args:
+            name (str): 玩家名稱（去除前後空白）。
+            score (int): 分數。
+            seed (int, optional): 迷宮種子。
+            play_time (float): 遊玩時間（秒）。
+        """
+        if not self.pending:
+            self._pending_since = time.monotonic()
+        self.pending.append((name.strip(), int(score), seed, float(play_time)))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self._pending_since >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """以單一交易寫入所有緩衝列。"""
+        if not self.pending:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT INTO scores (name, score, seed, time) VALUES (?, ?, ?, ?)", self.pending)
+        self.pending = []
+        self._pending_since = None
+
+    def top(self, limit: int = 10) -> List[dict]:
+        """
+        返回排行榜：每位玩家的最佳成績，按分數降序。
+
+        Args:
+            limit (int): 返回的玩家數。
+
+        Returns:
+            List[dict]: 記錄列表，格式為 {"name": str, "score": int, "seed": int, "time": float}。
+        """
+        self.flush()
+        rows = self.conn.execute("SELECT name, score, seed, time FROM best_scores ORDER BY score DESC LIMIT ?", (limit,))
+        return [{"name": name, "score": score, "seed": seed, "time": play_time} for name, score, seed, play_time in rows]
+
+    def best(self, name: str) -> Optional[dict]:
+        """返回玩家的最佳成績，沒有記錄時為 None。"""
+        self.flush()
+        row = self.conn.execute("SELECT name, score, seed, time FROM scores WHERE name = ? ORDER BY score DESC LIMIT 1",
+                                (name.strip(),)).fetchone()
+        return None if row is None else {"name": row[0], "score": row[1], "seed": row[2], "time": row[3]}
+
+    def count(self) -> int:
+        """返回已記錄的局數（含緩衝列）。"""
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] + len(self.pending)
+
+    def close(self) -> None:
+        """寫入緩衝列並關閉連線。"""
+        self.flush()
+        self.conn.close()
+
+def _json_rows(json_path: str):
+    """讀取舊 scores.json 的記錄為插入列；檔案損壞時不匯入。"""
+    try:
+        with open(json_path, "r") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [(record["name"].strip(), int(record["score"]), record.get("seed"), float(record.get("time", 0.0)))
+            for record in records]
+
+_default_store = None  # 進程共用的分數資料庫（首次使用時開啟，進程結束時寫入緩衝列）
+
+def get_score_store() -> ScoreStore:
+    """返回進程共用的 ScoreStore（使用 config 中的路徑）。"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ScoreStore()
+        atexit.register(_default_store.close)
+    return _default_store
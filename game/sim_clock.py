@@ -0,0 +1,159 @@
+# game/sim_clock.py
+"""
+固定步長的模擬時鐘，將遊戲邏輯的 tick 與畫面渲染分離。
+每個渲染幀依經過的真實時間與倍速執行 N 次 Game.update（步長固定為 1 / FPS），
+再以上一個 tick 與目前 tick 之間的插值位置繪製實體；倍速只改變每幀的 tick 數，
+遊戲邏輯與正常遊玩、無頭評估逐 tick 相同。
+"""
+
+import time
+from typing import Callable, Optional, Tuple
+import numpy as np
+import pygame
+from config import CELL_SIZE, FPS, SIM_SPEEDS, SIM_MAX_TICKS_PER_FRAME, SIM_MAX_FRAME_TIME
+
+class SimClock:
+    def __init__(self, speed: Optional[int] = 1, render_every: int = 1, tick_rate: int = FPS,
+                 max_ticks_per_frame: int = SIM_MAX_TICKS_PER_FRAME, timer: Callable[[], float] = time.perf_counter):
+        """
+        初始化模擬時鐘。
+
+        原理：
+        - 累加器 accumulator 累積「真實經過時間 × 倍速」，每滿一個步長 step_time = 1 / tick_rate 執行一個 tick。
+        - 限速模式下每幀最多執行 max_ticks_per_frame 個 tick，超出的積壓直接捨棄，避免卡頓後越追越慢。
+        - 不限速模式（speed 為 None）在每個迴圈幀一個步長的真實時間內盡量執行 tick。
+        - render_every = k 表示每 k 個迴圈幀才渲染一次，快轉觀戰時把時間留給模擬。
+
+        Args:
+            speed (int, optional): 倍速，None 表示不限速。
+            render_every (int): 每幾個迴圈幀渲染一次。
+            tick_rate (int): 每秒模擬 tick 數（與 Game.update 的 fps 相同）。
+            max_ticks_per_frame (int): 限速模式下每幀 tick 上限。
+            timer (Callable[[], float]): 真實時間來源（秒），測試時可替換。
+
+        Raises:
+            ValueError: 若倍速或 render_every 不是正數。
+        """
+        if render_every < 1:
+            raise ValueError(f"render_every 必須為正整數，得到 {render_every}")
+        self.step_time = 1.0 / tick_rate  # 固定步長（秒）
+        self.render_every = render_every
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0  # 尚未模擬的遊戲時間（秒）
+        self.frame = 0  # 迴圈幀計數
+        self._timer = timer
+        self._previous = None  # 最後一個 tick 之前的像素坐標 (x, y)
+        self.set_speed(speed)
+
+    def set_speed(self, speed: Optional[int]) -> None:
+        """
+        設置倍速。
+
+        Raises:
+            ValueError: 若倍速不是正數。
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError(f"倍速必須為正數或 None（不限速），得到 {speed}")
+        self.speed = speed
+        self.accumulator = 0.0
+
+    def handle_event(self, event) -> bool:
+        """
+        處理倍速按鍵：數字鍵 1-4 依序選擇 SIM_SPEEDS 中的倍速。
+
+        Returns:
+            bool: 事件是否為倍速按鍵。
+        """
+        if event.type == pygame.KEYDOWN and pygame.K_1 <= event.key < pygame.K_1 + len(SIM_SPEEDS):
+            self.set_speed(SIM_SPEEDS[event.key - pygame.K_1])
+            return True
+        return False
+
+    def label(self) -> str:
+        """返回倍速的顯示文字（例如 "x4"、"Max"）。"""
+        return "Max" if self.speed is None else f"x{self.speed}"
+
+    def reset(self) -> None:
+        """清空累加器與插值狀態（暫停恢復或重新開始遊戲時呼叫）。"""
+        self.accumulator = 0.0
+        self._previous = None
+
+    def advance(self, game, move_pacman: Callable[[], None], elapsed: float) -> int:
+        """
+        依經過的真實時間執行固定步長的 tick。
+
+        原理：
+        - 限速：accumulator += min(elapsed, SIM_MAX_FRAME_TIME) × speed，
+          執行 floor(accumulator / step_time) 個 tick（不超過 max_ticks_per_frame）。
+        - 不限速：在 step_time 的真實時間預算內持續執行 tick（至少一個）；
+          配合 render_every 跳過渲染時，原本的渲染時間也留給模擬。
+        - 每個 tick 前記錄實體像素坐標，供 positions 在最後兩個 tick 之間插值。
+        - 遊戲結束（非執行中且無死亡動畫）時停止。
+
+        Args:
+            game (Game): 遊戲實例。
+            move_pacman (Callable[[], None]): 控制 Pac-Man 移動的函數。
+            elapsed (float): 距上一幀的真實時間（秒）。
+
+        Returns:
+            int: 本幀執行的 tick 數。
+        """
+        self.frame += 1
+        if self.speed is None:
+            deadline = self._timer() + self.step_time
+        else:
+            self.accumulator += min(elapsed, SIM_MAX_FRAME_TIME) * self.speed
+        ticks = 0
+        while game.is_running() or game.is_death_animation_playing():
+            if self.speed is None:
+                if ticks and self._timer() >= deadline:
+                    break
+            elif self.accumulator < self.step_time or ticks >= self.max_ticks_per_frame:
+                break
+            columns = game.store.columns
+            size = game.store.size
+            self._previous = (columns["current_x"][:size].copy(), columns["current_y"][:size].copy())
+            game.update(FPS, move_pacman)
+            ticks += 1
+            if self.speed is not None:
+                self.accumulator -= self.step_time
+        if self.speed is None or ticks >= self.max_ticks_per_frame:
+            self.accumulator = min(self.accumulator, self.step_time)  # 捨棄積壓，只保留插值用的餘量
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """目前時間位於最後兩個 tick 之間的比例（0 到 1），不限速時為 1。"""
+        if self.speed is None:
+            return 1.0
+        return min(self.accumulator / self.step_time, 1.0)
+
+    def should_render(self) -> bool:
+        """本迴圈幀是否需要渲染（每 render_every 幀一次）。"""
+        return self.frame % self.render_every == 0
+
+    def positions(self, game) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        返回各實體（依 EntityStore 列號）插值後的像素坐標。
+
+        原理：
+        - position = previous + (current - previous) × alpha，alpha 為 accumulator / step_time。
+        - 單一 tick 內移動超過一格的實體（死亡後重置、鬼魂重生）視為瞬移，直接使用目前坐標。
+
+        Args:
+            game (Game): 遊戲實例。
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 像素 x 與 y 坐標陣列。
+        """
+        columns = game.store.columns
+        size = game.store.size
+        current_x, current_y = columns["current_x"][:size], columns["current_y"][:size]
+        if self._previous is None or len(self._previous[0]) != size:
+            return current_x.copy(), current_y.copy()
+        previous_x, previous_y = self._previous
+        alpha = self.alpha
+        teleported = (np.abs(current_x - previous_x) > CELL_SIZE) | (np.abs(current_y - previous_y) > CELL_SIZE)
+        x = np.where(teleported, current_x, previous_x + (current_x - previous_x) * alpha)
+        y = np.where(teleported, current_y, previous_y + (current_y - previous_y) * alpha)
+        return x, y
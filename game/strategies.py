@@ -1,5 +1,5 @@
 """
-定義 Pac-Man 的控制策略，包括玩家控制、規則基礎 AI 和 DQN AI。
+定義 Pac-Man 的控制策略，包括玩家控制、規則基礎 AI、DQN AI 和 MCTS 規劃。
 提供動態切換控制模式的功能，支援鍵盤輸入和自動化 AI 控制。
 """
 
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from abc import ABC, abstractmethod
 from typing import List
-from config import MAZE_WIDTH, MAZE_HEIGHT, CELL_SIZE, FPS
+from config import CELL_SIZE, FPS
 import pygame
 try:
     from ai.agent import DQNAgent
@@ -22,7 +22,8 @@ except ImportError as e:
     PYTORCH_AVAILABLE = False  # 表示 PyTorch 不可用
     print("PyTorch not found. AI mode will use rule-based AI instead.")
 
-from config import TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN
+from config import TILE_BOUNDARY, TILE_WALL, TILE_DOOR, TILE_GHOST_SPAWN, PACMAN_AI_SPEED
+from .mcts import MCTSPlanner, ACTIONS
 
 class ControlStrategy(ABC):
     """
@@ -170,7 +171,7 @@ class DQNAIControl(ControlStrategy):
         Args:
             maze_width (int): 迷宮寬度（格子數）。
             maze_height (int): 迷宮高度（格子數）。
-            model_path (str): DQN 模型文件路徑（預設為 "pacman_dqn_final.pth"）。
+            model_path (str): DQN 模型文件路徑（預設為 "pacman_dqn_final.pth"），.pt 為訓練檢查點。
 
         Raises:
             ImportError: 若 PyTorch 不可用。
@@ -197,7 +198,10 @@ class DQNAIControl(ControlStrategy):
             expert_prob_decay_steps=1  # 專家策略衰減步數
         )
         try:
-            self.agent.load(model_path)  # 載入模型
+            if model_path.endswith(".pt"):
+                self.agent.load_checkpoint(model_path)  # 訓練中的完整檢查點（CheckpointWriter）
+            else:
+                self.agent.load(model_path)  # 載入模型
         except FileNotFoundError:
             print(f"Model file '{model_path}' not found. Please train the model first.")
             raise
@@ -231,10 +235,8 @@ class DQNAIControl(ControlStrategy):
                     if maze.get_tile(x, y) in [TILE_BOUNDARY,TILE_WALL]:
                         state[5, y, x] = 1.0
             state[0, pacman.y, pacman.x] = 1.0  # Pac-Man 位置
-            for pellet in power_pellets:
-                state[1, pellet.y, pellet.x] = 1.0  # 能量球位置
-            for pellet in score_pellets:
-                state[2, pellet.y, pellet.x] = 1.0  # 分數球位置
+            state[1] = power_pellets.grid  # 能量球位置（直接複製 PelletGrid 網格）
+            state[2] = score_pellets.grid  # 分數球位置
             for ghost in ghosts:
                 if ghost.returning_to_spawn or ghost.waiting:
                     continue
@@ -250,6 +252,78 @@ class DQNAIControl(ControlStrategy):
                 return True
         return moving
 
+class MCTSControl(ControlStrategy):
+    """
+    MCTS 規劃控制策略，在每個決策點以蒙地卡羅樹搜尋選擇方向。
+
+    原理：
+    - 搜尋需要整局遊戲的狀態（快照），因此需先以 attach 指定遊戲實例。
+    - 在 Pac-Man 到達格子中心時呼叫 MCTSPlanner.search，於時間預算內展開搜尋樹，
+      模擬以規則 AI 或隨機策略執行，可分散到進程池。
+    - rollouts_per_sec 顯示最近一次決策的模擬速度，用於權衡 CPU 與遊玩強度。
+    """
+    def __init__(self, time_budget: float = 0.1, workers: int = None, policy: str = "rule"):
+        """
+        初始化 MCTS 控制策略。
+
+        Args:
+            time_budget (float): 每次決策的時間預算（秒）。
+            workers (int, optional): 模擬的工作進程數，None 表示 CPU 核心數減一，0 表示在主進程中模擬。
+            policy (str): 模擬的預設策略（"rule" 或 "random"）。
+        """
+        self.planner = MCTSPlanner(time_budget=time_budget, workers=workers, policy=policy)
+        self.game = None  # 被控制的遊戲實例
+
+    def close(self) -> None:
+        """關閉規劃器的進程池（之後再次搜尋時會重新建立）。"""
+        self.planner.close()
+
+    def attach(self, game) -> None:
+        """
+        指定被控制的遊戲實例（遊戲重新開始時需重新指定）。
+
+        Args:
+            game (Game): 遊戲實例。
+        """
+        self.game = game
+
+    @property
+    def rollouts_per_sec(self) -> float:
+        """最近一次決策的模擬速度（次/秒）。"""
+        return self.planner.rollouts_per_sec
+
+    def move(self, pacman, maze, power_pellets, score_pellets, ghosts, moving: bool) -> bool:
+        """
+        使用 MCTS 移動 Pac-Man。
+
+        原理：
+        - 若 Pac-Man 已到達當前目標格子，從遊戲的當前狀態搜尋動作並設置新目標。
+        - 速度與規則 AI 相同（PACMAN_AI_SPEED），模擬中的 Pac-Man 與實際遊戲一致。
+
+        Args:
+            pacman (PacMan): Pac-Man 物件。
+            maze (Map): 迷宮物件。
+            power_pellets (PelletGrid): 能量球。
+            score_pellets (PelletGrid): 分數球。
+            ghosts (List[Ghost]): 鬼魂列表。
+            moving (bool): 是否正在移動。
+
+        Returns:
+            bool: 是否開始新移動（True 表示已設置新目標）。
+
+        Raises:
+            RuntimeError: 若尚未以 attach 指定遊戲實例。
+        """
+        if self.game is None:
+            raise RuntimeError("MCTS 控制需要先以 attach 指定遊戲實例")
+        if pacman.move_towards_target(FPS):  # 若到達當前目標格子
+            pacman.speed = PACMAN_AI_SPEED
+            action = self.planner.search(self.game)
+            if action is not None:
+                dx, dy = ACTIONS[action]
+                return pacman.set_new_target(dx, dy, maze)
+        return moving
+
 class ControlManager:
     """
     控制管理器，負責管理不同的控制策略並支援模式切換。
@@ -267,6 +341,7 @@ class ControlManager:
         - 初始化玩家控制和規則 AI 策略。
         - 嘗試初始化 DQN AI，若失敗則設置為 None 並回退到規則 AI。
         - 預設控制策略為玩家控制，追蹤移動狀態（moving）。
+        - MCTS 策略在第一次存取 mcts_ai 時才建立，離開遊戲時以 close 關閉其進程池。
 
         Args:
             maze_width (int): 迷宮寬度（格子數）。
@@ -282,8 +357,49 @@ class ControlManager:
             except (FileNotFoundError, ImportError) as e:
                 print(f"DQN AI initialization failed: {e}")
                 print("Falling back to rule-based AI.")
+        self._mcts_ai = None  # MCTS 規劃策略（首次存取 mcts_ai 時建立，進程池在首次搜尋時建立）
+        self.game = None  # 當前遊戲實例（attach_game 指定）
         self.current_strategy = self.player_control  # 預設為玩家控制
         self.moving = False  # 移動狀態追蹤
+        self.recorder = None  # 重播錄製器（game.replay.ReplayRecorder），None 表示不錄製
+
+    def attach_game(self, game) -> None:
+        """
+        指定當前遊戲實例，供需要完整遊戲狀態的策略（MCTS）使用。
+
+        Args:
+            game (Game): 遊戲實例。
+        """
+        self.game = game
+        if self._mcts_ai is not None:
+            self._mcts_ai.attach(game)
+
+    @property
+    def mcts_ai(self) -> MCTSControl:
+        """MCTS 規劃策略，第一次存取時建立並指定當前遊戲。"""
+        if self._mcts_ai is None:
+            self._mcts_ai = MCTSControl()
+            if self.game is not None:
+                self._mcts_ai.attach(self.game)
+        return self._mcts_ai
+
+    @mcts_ai.setter
+    def mcts_ai(self, strategy: MCTSControl) -> None:
+        if self._mcts_ai is not None and self._mcts_ai is not strategy:
+            self._mcts_ai.close()
+        self._mcts_ai = strategy
+        if self.game is not None:
+            strategy.attach(self.game)
+
+    def close(self) -> None:
+        """
+        釋放策略持有的資源（MCTS 進程池），離開遊戲（返回選單或退出）時呼叫。
+        """
+        if self._mcts_ai is not None:
+            self._mcts_ai.close()
+            if self.current_strategy is self._mcts_ai:
+                self.current_strategy = self.rule_based_ai
+            self._mcts_ai = None
 
     def switch_mode(self):
         """
@@ -326,6 +442,7 @@ class ControlManager:
         原理：
         - 調用當前控制策略的 move 方法，更新 Pac-Man 的移動狀態。
         - 將移動狀態（self.moving）傳遞給策略，確保連續性。
+        - 若設置了 recorder，在策略前後呼叫其掛鉤以記錄決策點動作。
 
         Args:
             pacman (PacMan): Pac-Man 物件。
@@ -334,7 +451,11 @@ class ControlManager:
             score_pellets (List[ScorePellet]): 分數球列表。
             ghosts (List[Ghost]): 鬼魂列表。
         """
+        if self.recorder is not None:
+            self.recorder.before_move()
         self.moving = self.current_strategy.move(pacman, maze, power_pellets, score_pellets, ghosts, self.moving)
+        if self.recorder is not None:
+            self.recorder.after_move(pacman)
 
     def get_mode_name(self) -> str:
         """
@@ -342,11 +463,13 @@ class ControlManager:
 
         原理：
         - 根據 current_strategy 返回對應的模式名稱。
-        - 區分玩家模式、DQN AI 模式和規則 AI 模式。
+        - 區分玩家模式、DQN AI 模式、MCTS 模式和規則 AI 模式；MCTS 模式附帶最近一次決策的模擬速度。
 
         Returns:
-            str: 模式名稱（"Player Mode", "DQN AI Mode" 或 "Rule AI Mode"）。
+            str: 模式名稱（"Player Mode", "DQN AI Mode", "MCTS Mode (N rollouts/s)" 或 "Rule AI Mode"）。
         """
         if self.current_strategy == self.player_control:
             return "Player Mode"
+        if self._mcts_ai is not None and self.current_strategy == self._mcts_ai:
+            return f"MCTS Mode ({self._mcts_ai.rollouts_per_sec:.0f} rollouts/s)"
         return "DQN AI Mode" if self.dqn_ai and self.current_strategy == self.dqn_ai else "Rule AI Mode"
\ No newline at end of file
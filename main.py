@@ -5,31 +5,44 @@ Pac-Man 遊戲的主程式，負責初始化遊戲、處理事件和運行主迴
 """
 
 import sys
+import argparse
 import pygame
 from game.game import Game
 from game.renderer import Renderer
 from game.strategies import ControlManager
-from config import MAZE_WIDTH, MAZE_HEIGHT, CELL_SIZE, FPS
+from config import CELL_SIZE, FPS
+from game.game_config import add_config_arguments, config_from_args, load_config
+from game.sim_clock import SimClock
 from game.menu import show_menu, get_player_name, show_loading_screen, show_leaderboard, show_settings, show_pause_menu, show_game_result
 
 # 初始化 Pygame
 pygame.init()
 
-def main():
+def main(game_config=None, sim_clock=None):
     """
     主遊戲入口，負責設置遊戲環境、運行主迴圈和處理遊戲結束。
 
     原理：
     - 初始化 Pygame 螢幕、時鐘和字體，設置遊戲視窗。
-    - 顯示初始選單，讓使用者選擇遊戲模式（玩家、規則 AI、DQN AI、排行榜、設定、退出）。
+    - 顯示初始選單，讓使用者選擇遊戲模式（玩家、規則 AI、DQN AI、MCTS、排行榜、設定、退出）。
     - 根據模式設置玩家名稱，顯示加載畫面，初始化遊戲實例、渲染器和控制管理器。
     - 運行主迴圈，處理事件、更新遊戲狀態、渲染畫面，支援暫停功能和重新開始遊戲。
-    - 遊戲結束後儲存分數並顯示結果，提供返回選單、重啟或退出選項。
-    - 螢幕尺寸計算公式：screen_width = MAZE_WIDTH * CELL_SIZE, screen_height = MAZE_HEIGHT * CELL_SIZE。
+    - 模擬與渲染分離：SimClock 依經過時間與倍速（數字鍵 1-4：1x、4x、16x、不限速）每幀執行 N 個固定步長的 tick，
+      以插值位置繪製實體，並可每 k 幀才渲染一次；遊戲邏輯與 1x 遊玩逐 tick 相同。
+    - 遊戲結束後儲存分數並顯示結果，提供返回選單、重啟或退出選項；返回選單或退出前以 ControlManager.close
+      關閉 MCTS 進程池（MCTS 策略只在選擇 MCTS 模式時建立）。
+    - 迷宮尺寸、種子與鬼魂數量來自 GameConfig（設定檔、環境變數或命令列參數），傳入每個 Game 實例。
+    - 螢幕尺寸計算公式：screen_width = 迷宮寬度 * CELL_SIZE, screen_height = 迷宮高度 * CELL_SIZE。
+
+    Args:
+        game_config (GameConfig, optional): 遊戲設定，None 表示以 load_config 載入。
+        sim_clock (SimClock, optional): 模擬時鐘，None 表示 1x 且每幀渲染。
     """
+    game_config = game_config or load_config()
+    sim_clock = sim_clock or SimClock()
     # 設置螢幕尺寸
-    screen_width = MAZE_WIDTH * CELL_SIZE  # 螢幕寬度（像素）
-    screen_height = MAZE_HEIGHT * CELL_SIZE  # 螢幕高度（像素）
+    screen_width = game_config.width * CELL_SIZE  # 螢幕寬度（像素）
+    screen_height = game_config.height * CELL_SIZE  # 螢幕高度（像素）
     screen = pygame.display.set_mode((screen_width, screen_height))  # 創建遊戲視窗
     pygame.display.set_caption("Pac-Man Game")  # 設置視窗標題
 
@@ -45,26 +58,27 @@ def main():
         sys.exit()  # 終止程式
     elif mode == "leaderboard":
         show_leaderboard(screen, font, screen_width, screen_height)  # 顯示排行榜
-        main()  # 遞迴調用，返回選單
+        main(game_config, sim_clock)  # 遞迴調用，返回選單
         return
     elif mode == "settings":
-        show_settings(screen, font, screen_width, screen_height)  # 顯示設定頁面
-        main()  # 遞迴調用，返回選單
+        game_config = show_settings(screen, font, screen_width, screen_height, game_config)  # 顯示設定頁面（可修改種子）
+        main(game_config, sim_clock)  # 遞迴調用，返回選單
         return
 
     # 根據模式設置名稱
-    default_name = "Player" if mode == "player" else "RuleAI" if mode == "rule_ai" else "DQNAI"  # 設置預設名稱
+    default_name = {"player": "Player", "rule_ai": "RuleAI", "mcts_ai": "MCTSAI"}.get(mode, "DQNAI")  # 設置預設名稱
     player_name = get_player_name(screen, font, screen_width, screen_height, default_name)  # 獲取玩家名稱
 
     # 顯示加載畫面
     show_loading_screen(screen, font, screen_width, screen_height)  # 顯示加載畫面，延遲 1 秒
 
     # 初始化遊戲實例和渲染器
-    game = Game(player_name)  # 創建遊戲實例，傳入玩家名稱
+    game = Game(player_name, game_config=game_config)  # 創建遊戲實例，傳入玩家名稱與遊戲設定
     renderer = Renderer(screen, font, screen_width, screen_height)  # 創建渲染器
 
     # 初始化操控管理器，根據選單選擇設置初始模式
-    control_manager = ControlManager(MAZE_WIDTH, MAZE_HEIGHT)  # 創建控制管理器
+    control_manager = ControlManager(game_config.width, game_config.height)  # 創建控制管理器
+    control_manager.attach_game(game)  # MCTS 策略需要完整的遊戲狀態
     if mode == "rule_ai":
         control_manager.current_strategy = control_manager.rule_based_ai  # 設置為規則 AI 模式
         print("Starting in Rule AI Mode")
@@ -75,49 +89,66 @@ def main():
         else:
             control_manager.current_strategy = control_manager.rule_based_ai  # 若 DQN AI 不可用，回退到規則 AI
             print("DQN AI unavailable, falling back to Rule AI Mode")
+    elif mode == "mcts_ai":
+        control_manager.current_strategy = control_manager.mcts_ai  # 設置為 MCTS 模式
+        print("Starting in MCTS Mode")
 
     frame_count = 0  # 用於動畫效果的計數器（例如鬼魂閃爍）
     paused = False  # 暫停狀態標誌
+    elapsed = 0.0  # 上一個迴圈幀的真實時間（秒）
+    sim_clock.reset()
 
     # 主遊戲迴圈
     while True:
+        rendered = True  # 本迴圈幀是否更新螢幕
         if not paused and (game.is_running() or game.is_death_animation_playing()):
-            frame_count += 1  # 更新動畫計數器
-
             # 處理 Pygame 事件
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     game.end_game()  # 結束遊戲
+                    control_manager.close()  # 關閉 MCTS 進程池
                     pygame.quit()  # 退出 Pygame
                     sys.exit()  # 終止程式
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         paused = True  # 進入暫停狀態
+                    sim_clock.handle_event(event)  # 數字鍵切換模擬倍速
                 if not game.is_death_animation_playing():
                     control_manager.handle_event(event)  # 處理鍵盤輸入（僅玩家模式）或切換模式
 
-            # 更新遊戲狀態
+            # 更新遊戲狀態（依經過時間與倍速執行固定步長的 tick）
             if not paused:
-                game.update(FPS, lambda: control_manager.move(
+                sim_clock.advance(game, lambda: control_manager.move(
                     game.get_pacman(), game.get_maze(), game.get_power_pellets(),
-                    game.get_score_pellets(), game.get_ghosts()))  # 更新遊戲狀態，執行移動
+                    game.get_score_pellets(), game.get_ghosts()), elapsed)  # 更新遊戲狀態，執行移動
 
-            # 渲染遊戲畫面
-            renderer.render(game, control_manager.get_mode_name(), frame_count)  # 渲染當前畫面
+            # 渲染遊戲畫面（每 render_every 幀一次，實體位置在最後兩個 tick 間插值）
+            rendered = sim_clock.should_render()
+            if rendered:
+                frame_count += 1  # 更新動畫計數器
+                speed_label = None if sim_clock.speed == 1 else sim_clock.label()
+                renderer.render(game, control_manager.get_mode_name(), frame_count,
+                                sim_clock.positions(game), speed_label)  # 渲染當前畫面
 
         elif paused:
             # 顯示暫停選單
             result = show_pause_menu(screen, font, screen_width, screen_height)  # 顯示暫停選單
             if result == "continue":
                 paused = False  # 繼續遊戲
+                sim_clock.reset()  # 暫停期間的時間不計入模擬
             elif result == "menu":
-                main()  # 返回主選單
+                control_manager.close()  # 離開遊戲前關閉 MCTS 進程池
+                main(game_config, sim_clock)  # 返回主選單
             elif result == "exit":
+                control_manager.close()
                 pygame.quit()  # 退出 Pygame
                 sys.exit()  # 終止程式
 
-        pygame.display.flip()  # 更新螢幕顯示
-        clock.tick(FPS)  # 控制幀率為 FPS（每秒幀數）
+        if rendered:
+            pygame.display.flip()  # 更新螢幕顯示
+            elapsed = clock.tick(FPS) / 1000.0  # 控制渲染幀率為 FPS（每秒幀數）
+        else:
+            elapsed = clock.tick() / 1000.0  # 不渲染的幀不限速，時間留給模擬
 
         if not paused and not game.is_running() and not game.is_death_animation_playing():
             # 遊戲結束，儲存數據並顯示結果
@@ -128,12 +159,23 @@ def main():
             result = show_game_result(screen, font, screen_width, screen_height, won, final_score)  # 顯示遊戲結果
 
             if result == "restart":
-                game = Game(player_name)  # 重新初始化遊戲，使用相同玩家名稱
+                game = Game(player_name, game_config=game_config)  # 重新初始化遊戲，使用相同玩家名稱與設定
+                control_manager.attach_game(game)
+                sim_clock.reset()
             elif result == "exit":
+                control_manager.close()
                 pygame.quit()  # 退出 Pygame
                 sys.exit()  # 終止程式
             else:
-                main()  # 返回主選單
+                control_manager.close()  # 離開遊戲前關閉 MCTS 進程池
+                main(game_config, sim_clock)  # 返回主選單
 
 if __name__ == "__main__":
-    main()  # 執行主程式
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pac-Man game")
+    add_config_arguments(parser)
+    parser.add_argument('--speed', type=str, default='1', choices=['1', '4', '16', 'max'],
+                        help='Simulation speed multiplier (keys 1-4 switch at runtime)')
+    parser.add_argument('--render_every', type=int, default=1, help='Render every k-th frame')
+    args = parser.parse_args()
+    speed = None if args.speed == 'max' else int(args.speed)
+    main(config_from_args(args), SimClock(speed, args.render_every))  # 執行主程式
\ No newline at end of file
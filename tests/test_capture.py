@@ -0,0 +1,33 @@
+# test_capture.py
+import os
+import pytest
+import numpy as np
+import pygame
+from game.capture import capture_game, encode_png, FrameWriter
+from config import CELL_SIZE, MAZE_WIDTH, MAZE_HEIGHT
+
+def test_capture_png_stride(tmp_path):
+    output = tmp_path / "frames"
+    stats = capture_game(str(output), fmt="png", stride=3, max_ticks=7)
+    assert stats["ticks"] == 7
+    assert stats["frames"] == 2
+    assert sorted(os.listdir(output)) == ["frame_000003.png", "frame_000006.png"]
+
+def test_capture_npz(tmp_path):
+    output = tmp_path / "frames.npz"
+    stats = capture_game(str(output), fmt="npz", stride=2, max_ticks=4)
+    assert stats["frames"] == 2
+    with np.load(output) as data:
+        assert list(data["ticks"]) == [2, 4]
+        assert data["frame_000002"].shape == (MAZE_HEIGHT * CELL_SIZE, MAZE_WIDTH * CELL_SIZE, 3)
+
+def test_encode_png_roundtrip(tmp_path):
+    array = np.random.randint(0, 256, size=(4, 5, 3), dtype=np.uint8)
+    path = tmp_path / "frame.png"
+    path.write_bytes(encode_png(array))
+    surface = pygame.image.load(str(path))
+    assert pygame.image.tobytes(surface, "RGB") == array.tobytes()
+
+def test_frame_writer_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        FrameWriter(str(tmp_path), "gif", (10, 10))
@@ -0,0 +1,55 @@
+# test_entity_store.py
+import pytest
+from config import FPS, CELL_SIZE
+from game.entity_store import EntityStore
+from game.entities.entity_base import Entity
+from game.entities.ghost import Ghost
+from game.game import Game
+
+def test_entities_are_views_into_store():
+    store = EntityStore(1)
+    first = Entity(1, 2, 'P', store)
+    ghost = Ghost(3, 4, store)  # 超出初始容量時倍增擴充
+    assert (first._row, ghost._row) == (0, 1) and store.capacity == 2
+    ghost.edible = True
+    ghost.wait_timer = 5
+    assert store.columns["edible"][1] and store.columns["wait_timer"][1] == 5
+    assert store.columns["x"][0] == 1 and first.y == 2
+    assert type(first.x) is int and type(ghost.edible) is bool and type(first.current_x) is float
+    assert not hasattr(ghost, "__dict__")
+
+def test_vectorized_move_matches_scalar_move():
+    store = EntityStore()
+    setups = [((1, 1), (2, 1), 140), ((3, 3), (3, 2), 100), ((5, 5), (5, 5), 80), ((2, 6), (1, 6), 3000)]
+    vectorized = [Entity(x, y, 'G', store) for (x, y), _, _ in setups]
+    scalar_store = EntityStore()
+    scalar = [Entity(x, y, 'G', scalar_store) for (x, y), _, _ in setups]
+    for entities in (vectorized, scalar):
+        for entity, (_, (tx, ty), speed) in zip(entities, setups):
+            entity.target_x, entity.target_y, entity.speed = tx, ty, speed
+    rows = [entity._row for entity in vectorized]
+    for _ in range(20):
+        arrived = store.move_towards_target(rows, FPS)
+        assert list(arrived) == [entity.move_towards_target(FPS) for entity in scalar]
+        for a, b in zip(vectorized, scalar):
+            assert (a.x, a.y, a.current_x, a.current_y) == (b.x, b.y, b.current_x, b.current_y)
+    assert vectorized[0].current_x == 2 * CELL_SIZE + CELL_SIZE // 2
+
+def test_game_ghosts_share_store_rows():
+    game = Game("T", seed=4)
+    assert all(ghost._store is game.store for ghost in game.ghosts)
+    assert game.pacman._store is game.store
+    rows = game.store.columns["x"][game.ghost_rows]
+    assert list(rows) == [ghost.x for ghost in game.ghosts]
+
+def test_rows_are_released_explicitly():
+    from game.entities.pacman import PacMan
+    store = EntityStore(2)
+    first, second = PacMan(1, 1, store), PacMan(2, 2, store)
+    assert (first._row, second._row) == (0, 1) and (first.x, second.x) == (1, 2)
+    del first  # 實體被回收時不歸還列
+    assert PacMan(3, 3, store)._row == 2
+    store.release(second._row)  # 由擁有者顯式歸還
+    assert PacMan(4, 4, store)._row == 1 and store.size == 3
+    with pytest.raises(AttributeError):
+        second.unknown = 1  # __slots__，沒有 __dict__
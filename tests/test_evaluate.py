@@ -0,0 +1,43 @@
+# test_evaluate.py
+import pytest
+import game.evaluate as evaluation
+from game.evaluate import GameResult, evaluate, parse_spec, strategy_key, summarize
+from game.game_config import GameConfig
+
+GAME_CONFIG = GameConfig(21, 21, 1, 4)
+
+def test_parse_spec_and_model_key(tmp_path):
+    assert parse_spec("rule") == ("rule", None)
+    assert parse_spec("mcts:0.05:random") == ("mcts", "0.05:random")
+    with pytest.raises(ValueError):
+        parse_spec("unknown")
+    model = tmp_path / "model.pth"
+    model.write_bytes(b"weights-1")
+    key = strategy_key(f"dqn:{model}", 100, GAME_CONFIG)
+    copy = tmp_path / "copy.pth"
+    copy.write_bytes(b"weights-1")
+    assert strategy_key(f"dqn:{copy}", 100, GAME_CONFIG) == key  # 鍵取決於檔案內容而非路徑
+    model.write_bytes(b"weights-2")
+    assert strategy_key(f"dqn:{model}", 100, GAME_CONFIG) != key
+    assert strategy_key("rule", 100, GAME_CONFIG) != strategy_key("rule", 200, GAME_CONFIG)
+    assert strategy_key("rule", 100, GAME_CONFIG) != strategy_key("rule", 100, GAME_CONFIG._replace(ghost_count=2))
+    assert strategy_key("rule", 100, GAME_CONFIG) == strategy_key("rule", 100, GAME_CONFIG._replace(seed=9))
+
+def test_evaluate_caches_results(tmp_path, monkeypatch):
+    results = evaluate(["rule"], [1, 2], max_ticks=200, workers=0, cache_dir=str(tmp_path), game_config=GAME_CONFIG)
+    assert [result.seed for result in results["rule"]] == [1, 2]
+    assert all(result.ticks == 200 and result.decisions > 0 for result in results["rule"])
+
+    def fail(*args):
+        raise AssertionError("快取命中時不應重新模擬")
+    monkeypatch.setattr(evaluation, "play_game", fail)
+    assert evaluate(["rule"], [2, 1], max_ticks=200, workers=0, cache_dir=str(tmp_path),
+                    game_config=GAME_CONFIG)["rule"] == results["rule"][::-1]
+
+def test_summarize():
+    results = [GameResult(seed, score, won, 300, 1, 10, 0.5) for seed, score, won in [(1, 100, True), (2, 300, False)]]
+    summary = summarize(results)
+    assert summary["score_mean"] == 200 and summary["score_median"] == 200
+    assert summary["win_rate"] == 0.5
+    assert summary["survival_seconds"] == 10.0  # 300 tick / 30 FPS
+    assert summary["decisions_per_sec"] == 20.0
@@ -0,0 +1,27 @@
+# test_expert_data.py
+import numpy as np
+from game.game_config import GameConfig
+from ai.expert_data import (ExpertData, pack_states, unpack_states, cache_key, save_expert_data,
+                            collect_expert_data)
+
+def test_pack_states_round_trip():
+    rng = np.random.default_rng(0)
+    states = (rng.random((5, 6, 21, 21)) < 0.3).astype(np.float32)
+    packed = pack_states(states)
+    assert packed.dtype == np.uint8 and packed.shape == (5, (6 * 21 * 21 + 7) // 8)
+    assert np.array_equal(unpack_states(packed, (6, 21, 21)), states)
+
+def test_collect_loads_cached_data_without_simulating(tmp_path):
+    game_config = GameConfig(21, 21, 1, 4)
+    key_args = (game_config, 10, 200, 0.1, 500, 3.0)
+    assert cache_key(*key_args) != cache_key(game_config, 10, 200, 0.2, 500, 3.0)
+    assert cache_key(*key_args) != cache_key(game_config._replace(seed=2), 10, 200, 0.1, 500, 3.0)
+    assert cache_key(*key_args) != cache_key(game_config._replace(ghost_count=2), 10, 200, 0.1, 500, 3.0)
+    states = np.zeros((3, 6, 21, 21), dtype=np.float32)
+    states[:, 0, 1, 1] = 1.0
+    data = ExpertData(pack_states(states), np.array([0, 1, 3], dtype=np.int8), np.array([1.0, 0.5, -2.0], dtype=np.float32),
+                      pack_states(states), np.array([False, False, True]), (6, 21, 21))
+    save_expert_data(str(tmp_path / f"expert_{cache_key(*key_args)}.npz"), data)
+    loaded = collect_expert_data(game_config, 10, 200, 0.1, 500, 3.0, workers=0, cache_dir=str(tmp_path))
+    assert loaded.state_shape == (6, 21, 21)
+    assert all(np.array_equal(a, b) for a, b in zip(loaded[:5], data[:5]))
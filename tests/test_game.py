@@ -0,0 +1,47 @@
+# test_game.py
+from config import FPS, MAZE_WIDTH, MAZE_HEIGHT
+from game.game import Game
+from game.strategies import ControlManager
+
+def _snapshot(game):
+    return ([(ghost.x, ghost.y, ghost.target_x, ghost.target_y) for ghost in game.ghosts],
+            (game.pacman.x, game.pacman.y, game.pacman.score))
+
+def test_games_with_same_seed_are_independent():
+    first = Game("A", seed=3)
+    second = Game("B", seed=3)
+    move_first = lambda: first.pacman.move_towards_target(FPS)
+    move_second = lambda: second.pacman.move_towards_target(FPS)
+    for _ in range(200):
+        first.update(FPS, move_first)
+        second.update(FPS, move_second)
+        second.update(FPS, move_second)  # 第二局多推進一步，不應影響第一局
+    alone = Game("C", seed=3)
+    move_alone = lambda: alone.pacman.move_towards_target(FPS)
+    for _ in range(200):
+        alone.update(FPS, move_alone)
+    assert _snapshot(first) == _snapshot(alone)
+
+def test_restore_replays_identically_from_snapshot():
+    game = Game("S", seed=5)
+    manager = ControlManager(MAZE_WIDTH, MAZE_HEIGHT)
+    manager.current_strategy = manager.rule_based_ai
+    move = lambda: manager.move(game.pacman, game.maze, game.power_pellets, game.score_pellets, game.ghosts)
+    for _ in range(200):
+        game.update(FPS, move)
+    snap = game.snapshot()
+    maze = game.maze
+
+    def run():
+        states = []
+        for _ in range(300):
+            game.update(FPS, move)
+            states.append((_snapshot(game), len(game.score_pellets), game.ticks, game.rng.random()))
+        return states
+
+    first = run()
+    game.restore(snap)
+    assert game.ticks == 200 and game.maze is maze
+    assert run() == first
+    game.restore(snap)  # 同一快照可重複還原
+    assert run() == first
@@ -0,0 +1,33 @@
+# test_game_config.py
+import json
+import pytest
+from game.game import Game
+from game.game_config import GameConfig, default_config, load_config, update_profile
+
+def test_load_config_precedence(tmp_path):
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps({"width": 31, "seed": 7}))
+    environ = {"PACMAN_SEED": "9", "PACMAN_GHOST_COUNT": "2"}
+    game_config = load_config(str(profile), environ=environ, ghost_count=3, height=None)
+    assert game_config.width == 31  # 設定檔
+    assert game_config.seed == 9  # 環境變數覆蓋設定檔
+    assert game_config.ghost_count == 3  # 覆蓋值覆蓋環境變數
+    with pytest.raises(ValueError):  # 迷宮過小
+        load_config(environ={"PACMAN_CONFIG": str(profile), "PACMAN_WIDTH": "5"})
+    profile.write_text(json.dumps({"colour": "blue"}))
+    with pytest.raises(ValueError):  # 未知欄位
+        load_config(str(profile), environ={})
+
+def test_update_profile_merges_fields(tmp_path):
+    path = str(tmp_path / "game_config.json")
+    update_profile(path, width=25)
+    update_profile(path, seed=4)
+    assert load_config(path, environ={}) == default_config()._replace(width=25, seed=4)
+    with pytest.raises(ValueError):
+        update_profile(path, speed=2)
+
+def test_games_with_different_configs_coexist():
+    first = Game("A", game_config=GameConfig(21, 21, 1, 4))
+    second = Game("B", game_config=GameConfig(25, 19, 3, 2))
+    assert (first.maze.width, first.maze.height, len(first.ghosts)) == (21, 21, 4)
+    assert (second.maze.width, second.maze.height, len(second.ghosts)) == (25, 19, 2)
@@ -2,6 +2,7 @@
 import pytest
 from unittest.mock import Mock, patch
 from game.entities.ghost import Ghost
+from game.entity_store import EntityStore
 
 @pytest.fixture
 def mock_maze():
@@ -11,14 +12,14 @@ def mock_maze():
     return maze
 
 def test_ghost_move(mock_maze):
-    ghost = Ghost(1, 1)
+    ghost = Ghost(1, 1, EntityStore())
     pacman = Mock()
     ghost.move(pacman, mock_maze, 60)
     assert not ghost.waiting
     assert not ghost.returning_to_spawn
 
 def test_ghost_set_edible(mock_maze):
-    ghost = Ghost(1, 1)
+    ghost = Ghost(1, 1, EntityStore())
     ghost.set_edible(60)
     assert ghost.edible
     assert ghost.edible_timer == 60
\ No newline at end of file
@@ -0,0 +1,42 @@
+# test_map_index.py
+from game.maze_generator import Map
+from game.map_index import get_index
+from config import MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED, TILE_GHOST_SPAWN, TILE_PATH, TILE_WALL
+
+def test_index_matches_full_scan():
+    maze = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
+    maze.generate_maze()
+    index = get_index(maze)
+    assert index is get_index(maze)  # 生成後建立一次並快取
+    spawns = [(x, y) for y in range(maze.height) for x in range(maze.width) if maze.get_tile(x, y) == TILE_GHOST_SPAWN]
+    assert index.positions_of(TILE_GHOST_SPAWN) == spawns
+    for x, y in index.junctions:
+        assert index.degree_at(x, y) > 2
+    for x, y in index.dead_ends:
+        assert index.degree_at(x, y) == 1
+    assert index.degree_at(0, 0) == 0 and index.degree_at(-1, 5) == 0
+
+def test_index_degree_and_rebuild():
+    maze = Map(7, 5)
+    for x in range(1, 6):
+        maze.set_tile(x, 2, TILE_WALL)
+    index = get_index(maze)
+    assert index.dead_ends == [(1, 1), (5, 1), (1, 3), (5, 3)]
+    assert index.junctions == []
+    assert index.degree_at(3, 1) == 2
+    assert get_index(maze) is index  # 未修改時重用快取
+    maze.set_tile(3, 2, TILE_PATH)
+    index = get_index(maze)
+    assert (3, 1) in index.junctions and index.degree_at(3, 2) == 2
+
+def test_pacman_degree_grid_matches_full_scan():
+    from game.map_index import PACMAN_PASSABLE
+    maze = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
+    maze.generate_maze()
+    index = get_index(maze)
+    cells = {(x, y) for y in range(maze.height) for x in range(maze.width) if maze.get_tile(x, y) in PACMAN_PASSABLE}
+    assert index.passable_set(PACMAN_PASSABLE) == cells
+    degree = index.degree_grid(PACMAN_PASSABLE)
+    for x, y in cells:
+        assert degree[y][x] == sum((x + dx, y + dy) in cells for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)])
+    assert index.degree_grid(PACMAN_PASSABLE) is degree  # 每個可通行集合只計算一次
@@ -1,6 +1,6 @@
 # test_maze_generator.py
 import pytest
-from game.maze_generator import Map
+from game.maze_generator import Map, generated_maze
 from config import MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED
 
 def test_map_initialization():
@@ -12,4 +12,24 @@ def test_map_initialization():
 def test_generate_maze():
     maze = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
     maze.generate_maze()
-    assert any(maze.get_tile(x, y) == 'E' for y in range(MAZE_HEIGHT) for x in range(MAZE_WIDTH))
\ No newline at end of file
+    assert any(maze.get_tile(x, y) == 'E' for y in range(MAZE_HEIGHT) for x in range(MAZE_WIDTH))
+
+def test_generate_maze_does_not_touch_global_random():
+    import random
+    random.seed(123)
+    expected = random.random()
+    random.seed(123)
+    first = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
+    first.generate_maze()
+    assert random.random() == expected
+    second = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
+    second.generate_maze()
+    assert str(first) == str(second)
+
+def test_generated_maze_is_shared_per_seed():
+    maze = generated_maze(MAZE_WIDTH, MAZE_HEIGHT, 7)
+    assert generated_maze(MAZE_WIDTH, MAZE_HEIGHT, 7) is maze
+    fresh = Map(MAZE_WIDTH, MAZE_HEIGHT, 7)
+    fresh.generate_maze()
+    assert fresh.tiles == maze.tiles
+    assert generated_maze(MAZE_WIDTH, MAZE_HEIGHT, 8) is not maze
@@ -0,0 +1,50 @@
+# test_maze_graph.py
+from collections import deque
+from game.maze_generator import Map
+from game.maze_graph import GHOST_PASSABLE, PACMAN_PASSABLE
+from config import MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED, TILE_WALL
+
+def bfs_path(graph, start, goal):
+    queue = deque([(start, [])])
+    visited = {start}
+    while queue:
+        (x, y), path = queue.popleft()
+        if (x, y) == goal:
+            return path
+        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+            neighbor = (x + dx, y + dy)
+            if neighbor in graph.passable and neighbor not in visited:
+                visited.add(neighbor)
+                queue.append((neighbor, path + [neighbor]))
+    return None
+
+def test_route_matches_tile_bfs():
+    maze = Map(MAZE_WIDTH, MAZE_HEIGHT, MAZE_SEED)
+    maze.generate_maze()
+    for passable in (GHOST_PASSABLE, PACMAN_PASSABLE):
+        graph = maze.junction_graph(passable)
+        assert len(graph.edges) < len(graph.passable)
+        tiles = sorted(graph.passable)
+        for start in tiles[::7]:
+            for goal in tiles[::11]:
+                expected = bfs_path(graph, start, goal)
+                path = graph.route(start, goal)
+                assert (path is None) == (expected is None)
+                if path:
+                    assert len(path) == len(expected)
+                    assert path[0] == expected[0]  # 等長路徑的第一步與逐格 BFS 相同
+                    assert path[-1] == goal
+
+def test_graph_rebuilt_after_tile_change():
+    maze = Map(7, 5)
+    for x in range(1, 6):
+        maze.set_tile(x, 2, TILE_WALL)  # 兩條水平走廊
+    graph = maze.junction_graph(PACMAN_PASSABLE)
+    assert set(graph.edges) == {(1, 1), (5, 1), (1, 3), (5, 3)}  # 只有四個死路節點
+    assert graph.route((1, 1), (4, 1)) == [(2, 1), (3, 1), (4, 1)]
+    assert graph.route((1, 1), (1, 3)) is None
+    assert maze.junction_graph(PACMAN_PASSABLE) is graph
+    maze.set_tile(3, 2, '.')  # 打通中間
+    graph = maze.junction_graph(PACMAN_PASSABLE)
+    assert (3, 1) in graph.edges and (3, 3) in graph.edges
+    assert graph.route((1, 1), (1, 3)) == [(2, 1), (3, 1), (3, 2), (3, 3), (2, 3), (1, 3)]
@@ -0,0 +1,45 @@
+# test_metrics_store.py
+import numpy as np
+from ai.metrics_store import MetricsWriter, read_column, downsample, list_runs
+
+def test_metrics_round_trip_with_sparse_columns(tmp_path):
+    writer = MetricsWriter(str(tmp_path / "run1"), chunk_rows=4)
+    for step in range(10):
+        values = {"Sigma": step * 0.5}
+        if step % 3 == 0:
+            values["Loss"] = float(step)
+        writer.log("step", step, **values)
+    writer.log("episode", 0, Reward=12.0)
+    writer.close()
+    steps, loss = read_column(str(tmp_path / "run1"), "step", "Loss")
+    assert list(steps) == [0, 3, 6, 9] and list(loss) == [0.0, 3.0, 6.0, 9.0]
+    steps, sigma = read_column(str(tmp_path / "run1"), "step", "Sigma")
+    assert len(steps) == 10 and sigma[-1] == 4.5
+    assert read_column(str(tmp_path / "run1"), "episode", "Reward")[1].tolist() == [12.0]
+    assert list_runs(str(tmp_path)) == [str(tmp_path / "run1")]
+    resumed = MetricsWriter(str(tmp_path / "run1"), chunk_rows=4)  # 繼續寫入時區塊編號接續
+    resumed.log("episode", 1, Reward=3.0)
+    resumed.close()
+    assert read_column(str(tmp_path / "run1"), "episode", "Reward")[1].tolist() == [12.0, 3.0]
+
+def test_downsample_keeps_envelope():
+    steps = np.arange(1000)
+    values = np.sin(steps / 10.0)
+    x, low, high, mean = downsample(steps, values, 10)
+    assert len(x) == 10 and x[0] == 0 and x[1] == 100
+    assert np.allclose(low, values.reshape(10, 100).min(axis=1))
+    assert np.allclose(high, values.reshape(10, 100).max(axis=1))
+    assert np.allclose(mean, values.reshape(10, 100).mean(axis=1))
+    assert downsample(steps[:5], values[:5], 10)[3].tolist() == values[:5].tolist()
+
+def test_partial_chunks_flush_on_interval(tmp_path):
+    now = [0.0]
+    writer = MetricsWriter(str(tmp_path / "run"), chunk_rows=1000, flush_interval=60.0, timer=lambda: now[0])
+    writer.log("episode", 0, Reward=1.0)
+    assert read_column(str(tmp_path / "run"), "episode", "Reward")[1].tolist() == []  # 未滿區塊仍在緩衝
+    now[0] = 61.0
+    writer.log("episode", 1, Reward=2.0)
+    assert read_column(str(tmp_path / "run"), "episode", "Reward")[1].tolist() == [1.0, 2.0]
+    writer.log("episode", 2, Reward=3.0)
+    writer.flush()  # 檢查點時手動寫出
+    assert read_column(str(tmp_path / "run"), "episode", "Reward")[1].tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,51 @@
+# test_occupancy.py
+import pytest
+from unittest.mock import Mock
+from config import CELL_SIZE
+from game.occupancy import OccupancyGrid
+from game.game import Game
+
+def _entity(x, y):
+    entity = Mock()
+    entity.current_x = x * CELL_SIZE + CELL_SIZE // 2
+    entity.current_y = y * CELL_SIZE + CELL_SIZE // 2
+    return entity
+
+def test_near_returns_entities_in_list_order():
+    grid = OccupancyGrid(10, 10)
+    entities = [_entity(5, 5), _entity(9, 9), _entity(4, 6), _entity(5, 5)]
+    grid.rebuild(entities)
+    assert grid.near(5, 5) == [entities[0], entities[2], entities[3]]
+    assert grid.near(0, 0) == []
+
+def test_nearest_matches_linear_scan():
+    grid = OccupancyGrid(20, 20)
+    positions = [(1, 1), (18, 3), (7, 12), (10, 10), (15, 15)]
+    entities = [_entity(x, y) for x, y in positions]
+    grid.rebuild(entities)
+    for x, y in [(0, 0), (9, 9), (19, 19), (16, 2)]:
+        expected = min(range(len(positions)), key=lambda i: ((positions[i][0] - x) ** 2 + (positions[i][1] - y) ** 2, i))
+        assert grid.nearest(x, y) is entities[expected]
+    assert grid.nearest(10, 10, exclude=entities[3]) is entities[2]
+
+def test_game_with_many_ghosts():
+    game = Game("Stress", ghost_count=32)
+    assert len(game.ghosts) == 32
+    assert game.ghosts[4].name == "Ghost5"
+    game.pacman.current_x = game.ghosts[7].current_x
+    game.pacman.current_y = game.ghosts[7].current_y
+    lives = game.pacman.lives
+    game.occupancy.rebuild(game.ghosts)
+    game._check_collision(30)
+    assert game.pacman.lives == lives - 1
+
+def test_grid_collisions_match_linear_scan():
+    game = Game("Stress", ghost_count=16)
+    pacman = game.pacman
+    for i, ghost in enumerate(game.ghosts):  # 鬼魂散佈在 Pac-Man 周圍，部分在碰撞距離內
+        ghost.current_x = pacman.current_x + (i % 5 - 2) * CELL_SIZE / 4
+        ghost.current_y = pacman.current_y + (i // 5 - 1) * CELL_SIZE / 3
+    game.occupancy.rebuild(game.ghosts)
+    expected = [g for g in game.ghosts
+                if (g.current_x - pacman.current_x) ** 2 + (g.current_y - pacman.current_y) ** 2 < (CELL_SIZE / 2) ** 2]
+    assert expected and game._colliding_ghosts() == expected
@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch
 from game.entities.pacman import PacMan
 from game.entities.pellets import PowerPellet, ScorePellet
 from game.entities.ghost import Ghost
+from game.entity_store import EntityStore
 
 @pytest.fixture
 def mock_maze():
@@ -13,17 +14,71 @@ def mock_maze():
     return maze
 
 def test_pacman_eat_pellet(mock_maze):
-    pacman = PacMan(1, 1)
-    pellets = [PowerPellet(1, 1)]
+    store = EntityStore()
+    pacman = PacMan(1, 1, store)
+    pellets = [PowerPellet(1, 1, store)]
     score = pacman.eat_pellet(pellets)
     assert score == 10
     assert len(pellets) == 0
     assert pacman.score == 10
 
 def test_pacman_rule_based_ai_move(mock_maze):
-    pacman = PacMan(1, 1)
-    pacman.set_new_target = Mock(return_value=True)
-    with patch('game.entities.pacman.PacMan.find_path', return_value=(1, 0)):
-        result = pacman.rule_based_ai_move(mock_maze, [], [ScorePellet(2, 1)], [])
+    store = EntityStore()
+    pacman = PacMan(1, 1, store)
+    with patch.object(PacMan, 'set_new_target', return_value=True), patch.object(PacMan, 'find_path', return_value=(1, 0)):
+        result = pacman.rule_based_ai_move(mock_maze, [], [ScorePellet(2, 1, store)], [])
         assert result
-        assert pacman.last_direction == (1, 0)
\ No newline at end of file
+        assert pacman.last_direction == (1, 0)
+
+def test_blackboard_computes_each_quantity_once():
+    from game.entities.pacman import Blackboard
+    from game.entities.pellets import PelletGrid
+    store = EntityStore()
+    pacman = PacMan(1, 1, store)
+    ghost = Ghost(4, 1, store)
+    score_pellets = PelletGrid(8, 8, 2, [(6, 6), (2, 1), (1, 3)])
+    maze = Mock()
+    maze.xy_valid.side_effect = lambda x, y: 0 <= x < 8 and 0 <= y < 8
+    maze.get_tile.return_value = '.'
+    blackboard = Blackboard(pacman, maze, [PowerPellet(5, 5, store)], score_pellets, [ghost])
+    assert blackboard.min_danger_dist == 3.0
+    assert blackboard.closest_score == (2, 1)
+    assert blackboard.closest_power == (5, 5)
+    ghost.x = 2  # 快取後不再重新計算
+    assert blackboard.min_danger_dist == 3.0
+    assert blackboard.closest_edible_ghost is None
+
+def test_blackboard_nearest_uses_maze_distance():
+    from game.entities.pacman import Blackboard
+    from game.entities.pellets import PelletGrid
+    from config import TILE_WALL
+    rows = [".....",
+            ".###.",
+            "....."]
+    maze = Mock()
+    maze.xy_valid.side_effect = lambda x, y: 0 <= x < 5 and 0 <= y < 3
+    maze.get_tile.side_effect = lambda x, y: TILE_WALL if rows[y][x] == '#' else '.'
+    pacman = PacMan(2, 0, EntityStore())
+    score_pellets = PelletGrid(5, 3, 2, [(2, 2), (4, 0)])  # (2, 2) 直線最近但需繞牆
+    blackboard = Blackboard(pacman, maze, [], score_pellets, [])
+    target = blackboard.nearest["score"]
+    assert target.position == (4, 0)
+    assert target.distance == 2
+    assert target.first_step == (1, 0)
+    assert blackboard.closest_score == (4, 0)
+    assert blackboard.is_route_safe(target)
+
+def test_rule_based_ai_reuses_plan_until_invalidated(mock_maze):
+    from game.entities.pellets import PelletGrid
+    pacman = PacMan(1, 1, EntityStore())
+    score_pellets = PelletGrid(8, 8, 2, [(4, 1), (6, 6)])
+    assert pacman.rule_based_ai_move(mock_maze, [], score_pellets, [])
+    assert pacman.plan is not None and pacman.last_direction == (1, 0)
+    pacman.x = pacman.target_x
+    with patch('game.entities.pacman.Blackboard') as blackboard:
+        assert pacman.rule_based_ai_move(mock_maze, [], score_pellets, [])
+        blackboard.assert_not_called()  # 沿用路線，不執行行為樹
+    pacman.x = pacman.target_x
+    score_pellets.eat(4, 1)  # 目標被吃掉後重新規劃
+    assert pacman.rule_based_ai_move(mock_maze, [], score_pellets, [])
+    assert pacman.plan.target == (6, 6)
@@ -0,0 +1,87 @@
+# test_pathfinding.py
+from unittest.mock import Mock
+from game.pathfinding import danger_field, UNREACHABLE
+from config import TILE_WALL, TILE_PATH
+
+def make_maze(rows):
+    maze = Mock()
+    maze.width, maze.height = len(rows[0]), len(rows)
+    maze.get_tile.side_effect = lambda x, y: TILE_WALL if rows[y][x] == '#' else TILE_PATH
+    return maze
+
+def make_ghost(x, y, edible=False, edible_timer=0):
+    return Mock(x=x, y=y, edible=edible, edible_timer=edible_timer, returning_to_spawn=False, waiting=False)
+
+def test_danger_field_follows_maze_distance():
+    maze = make_maze(["....",
+                      ".##.",
+                      "...#"])
+    field = danger_field(maze, [make_ghost(0, 0)])
+    assert field[0, 3] == 3
+    assert field[2, 2] == 4  # 繞過牆壁而非直線距離
+    assert field[1, 1] == UNREACHABLE
+    assert field[2, 3] == UNREACHABLE
+
+def test_danger_field_takes_nearest_dangerous_ghost():
+    maze = make_maze(["....."])
+    field = danger_field(maze, [make_ghost(0, 0), make_ghost(4, 0), make_ghost(2, 0, edible=True)])
+    assert field.tolist() == [[0, 1, 2, 1, 0]]
+    assert (danger_field(maze, []) == UNREACHABLE).all()
+
+def test_path_plan_invalidation_rules():
+    from game.pathfinding import PathPlan
+    from game.entities.pellets import PelletGrid
+    score_pellets = PelletGrid(10, 10, 2, [(3, 1)])
+    ghost = make_ghost(8, 8)
+    plan = PathPlan([(2, 1), (3, 1)], "score", [ghost])
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) is None
+    assert plan.invalidation((5, 5), [], score_pellets, [ghost]) == "off_path"
+    ghost.x, ghost.y = 3, 4  # 靠近剩餘路線
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) == "danger"
+    ghost.edible = True
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) == "edible_changed"
+    score_pellets.eat(3, 1)
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) == "target_eaten"
+
+def test_path_plan_followed_until_exhausted():
+    from game.pathfinding import PathPlan
+    from game.entities.pellets import PelletGrid
+    score_pellets = PelletGrid(10, 10, 2, [(2, 2)])
+    plan = PathPlan([(2, 1), (2, 2)], "score", [])
+    assert plan.next_step((1, 1)) == (1, 0)
+    assert plan.invalidation((2, 1), [], score_pellets, []) is None
+    assert plan.next_step((2, 1)) == (0, 1)
+    assert plan.invalidation((2, 2), [], score_pellets, []) == "exhausted"
+
+def _guarded_plan(path, target_type, position, power_pellets, score_pellets, ghosts):
+    from game.pathfinding import PathPlan, branch_guards
+    return PathPlan(path, target_type, ghosts, branch_guards(position, power_pellets, score_pellets, ghosts))
+
+def test_path_plan_invalidated_when_edible_ghost_enters_chase_range():
+    from game.entities.pellets import PelletGrid
+    score_pellets = PelletGrid(30, 30, 2, [(3, 1)] + [(x, 20) for x in range(15)])  # 非終局
+    ghost = make_ghost(25, 25, edible=True, edible_timer=15)
+    plan = _guarded_plan([(2, 1), (3, 1)], "score", (1, 1), [], score_pellets, [ghost])
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) is None
+    ghost.x, ghost.y = 5, 5
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) == "edible_nearby_changed"
+
+def test_path_plan_invalidated_when_edible_timer_runs_low():
+    from game.entities.pellets import PelletGrid
+    score_pellets = PelletGrid(30, 30, 2, [(3, 1)] + [(x, 20) for x in range(15)])
+    ghost = make_ghost(5, 5, edible=True, edible_timer=10)
+    plan = _guarded_plan([(2, 1), (3, 1)], "score", (1, 1), [], score_pellets, [ghost])
+    ghost.edible_timer = 3  # 行為樹不再追擊
+    assert plan.invalidation((1, 1), [], score_pellets, [ghost]) == "edible_nearby_changed"
+
+def test_path_plan_invalidated_on_endgame_branch_changes():
+    from game.entities.pellets import PelletGrid
+    power_pellets = PelletGrid(30, 30, 10, [(1, 8)])
+    score_pellets = PelletGrid(30, 30, 2, [(3, 1)] + [(x, 20) for x in range(10)])
+    plan = _guarded_plan([(2, 1), (3, 1)], "score", (1, 1), power_pellets, score_pellets, [])
+    score_pellets.eat(0, 20)  # 剩 10 個分數球，進入終局
+    assert plan.invalidation((1, 1), power_pellets, score_pellets, []) == "endgame_changed"
+    plan = _guarded_plan([(2, 1), (3, 1)], "score", (1, 1), power_pellets, score_pellets, [])
+    assert plan.invalidation((1, 1), power_pellets, score_pellets, []) is None  # 遠處分數球多，能量球較近
+    score_pellets.reset([(3, 1), (1, 2)])  # 剩下的分數球都比能量球近
+    assert plan.invalidation((1, 1), power_pellets, score_pellets, []) == "power_closer_changed"
@@ -5,6 +5,7 @@ from game.entities.entity_initializer import initialize_entities
 from game.entities.pacman import PacMan
 from game.entities.ghost import Ghost
 from game.entities.pellets import PowerPellet, ScorePellet
+from game.entity_store import EntityStore
 
 @pytest.fixture
 def mock_maze():
@@ -22,4 +23,26 @@ def test_initialize_entities(mock_maze):
         assert len(ghosts) == 4
         assert all(isinstance(ghost, Ghost) for ghost in ghosts)
         assert len(power_pellets) == 0  # 依賴 maze.get_tile 返回 'E'
-        assert len(score_pellets) > 0
\ No newline at end of file
+        assert len(score_pellets) > 0
+
+def test_pellet_grid_list_interface():
+    from game.entities.pellets import PelletGrid
+    pellets = PelletGrid(5, 4, 2, [(3, 1), (1, 2), (0, 0)])
+    assert len(pellets) == 3
+    assert [(p.x, p.y) for p in pellets] == [(0, 0), (3, 1), (1, 2)]  # 列優先順序
+    assert (3, 1) in pellets and (2, 2) not in pellets
+    assert pellets[0] in pellets and all(pellet in pellets for pellet in pellets)  # Pellet 視圖本身也是 tuple
+    assert pellets[1].x == 3 and pellets[-1].y == 2
+    assert pellets.grid[2, 1] and pellets.grid.sum() == 3
+
+def test_pacman_eat_from_pellet_grid():
+    from game.entities.pellets import PelletGrid
+    store = EntityStore()
+    pacman = PacMan(3, 1, store)
+    pellets = PelletGrid(5, 4, 2, [(3, 1), (1, 2)])
+    assert pacman.eat_score_pellet(pellets) == 2
+    assert pacman.eat_score_pellet(pellets) == 0
+    assert len(pellets) == 1 and (3, 1) not in pellets
+    assert pacman.score == 2
+    with pytest.raises(ValueError):
+        pellets.remove(ScorePellet(3, 1, store))
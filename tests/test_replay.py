@@ -0,0 +1,59 @@
+# test_replay.py
+import pytest
+from config import FPS, MAZE_WIDTH, MAZE_HEIGHT
+from game.game import Game
+from game.strategies import ControlManager
+from game.replay import ReplayRecorder, ReplayPlayer, capture_state, load_replay
+
+def _record(path, ticks, keyframe_interval=50, seed=None):
+    game = Game("Replay", seed=seed)
+    control_manager = ControlManager(MAZE_WIDTH, MAZE_HEIGHT)
+    control_manager.current_strategy = control_manager.rule_based_ai
+    recorder = ReplayRecorder(game, keyframe_interval=keyframe_interval)
+    control_manager.recorder = recorder
+    move = lambda: control_manager.move(game.get_pacman(), game.get_maze(), game.get_power_pellets(),
+                                        game.get_score_pellets(), game.get_ghosts())
+    states = {}
+    while game.ticks < ticks and (game.is_running() or game.is_death_animation_playing()):
+        game.update(FPS, move)
+        states[game.ticks] = capture_state(game)
+    size = recorder.save(str(path))
+    return states, size
+
+def test_replay_reproduces_game(tmp_path):
+    path = tmp_path / "game.rpl"
+    states, size = _record(path, 400)
+    assert size < 8192  # 動作、關鍵幀與一份約 2.5KB 的隨機數狀態
+    player = ReplayPlayer(load_replay(str(path)))
+    while player.step():
+        assert capture_state(player.game) == states[player.tick]
+    assert player.tick == max(states)
+
+def test_replay_seek(tmp_path):
+    path = tmp_path / "game.rpl"
+    states, _ = _record(path, 300)
+    player = ReplayPlayer(load_replay(str(path)))
+    for tick in (275, 120, 121, 10):
+        player.seek(tick)
+        assert player.tick == tick
+        assert capture_state(player.game) == states[tick]
+
+def test_recording_does_not_change_the_game(tmp_path):
+    game = Game("Plain", seed=3)
+    control_manager = ControlManager(MAZE_WIDTH, MAZE_HEIGHT)
+    control_manager.current_strategy = control_manager.rule_based_ai
+    move = lambda: control_manager.move(game.get_pacman(), game.get_maze(), game.get_power_pellets(),
+                                        game.get_score_pellets(), game.get_ghosts())
+    plain = {}
+    while game.ticks < 600 and (game.is_running() or game.is_death_animation_playing()):
+        game.update(FPS, move)
+        plain[game.ticks] = capture_state(game)
+    for interval in (7, 50):  # 錄製與否、關鍵幀間隔皆不影響對局
+        states, _ = _record(tmp_path / f"game{interval}.rpl", 600, keyframe_interval=interval, seed=3)
+        assert states == plain
+
+def test_load_replay_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_replay.rpl"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        load_replay(str(path))
@@ -0,0 +1,45 @@
+# test_score_store.py
+import json
+from game.score_store import ScoreStore
+
+def test_migrates_json_once_and_keeps_player_best(tmp_path):
+    json_path = tmp_path / "scores.json"
+    json_path.write_text(json.dumps([{"name": "Player", "score": 500, "seed": 1, "time": 10.0},
+                                     {"name": "RuleAI ", "score": 900, "seed": 2, "time": 20.0}]))
+    db_path = str(tmp_path / "scores.db")
+    store = ScoreStore(db_path, json_path=str(json_path))
+    assert [record["name"] for record in store.top()] == ["RuleAI", "Player"]
+    store.add(" Player", 1200, 3, 30.0)
+    store.add("Player", 100, 4, 5.0)
+    assert store.top(1) == [{"name": "Player", "score": 1200, "seed": 3, "time": 30.0}]
+    assert store.best("RuleAI")["seed"] == 2 and store.best("Nobody") is None
+    store.close()
+    reopened = ScoreStore(db_path, json_path=str(json_path))  # 已建立的資料庫不再重複匯入
+    assert reopened.count() == 4
+    reopened.close()
+
+def test_writes_are_batched(tmp_path):
+    db_path = str(tmp_path / "scores.db")
+    writer = ScoreStore(db_path, json_path=None, batch_size=3, flush_interval=3600)
+    reader = ScoreStore(db_path, json_path=None)
+    writer.add("A", 1, 1, 1.0)
+    writer.add("B", 2, 1, 1.0)
+    assert reader.count() == 0  # 仍在寫入緩衝中
+    writer.add("C", 3, 1, 1.0)
+    assert reader.count() == 3
+    writer.add("D", 4, 1, 1.0)
+    writer.close()
+    assert [record["name"] for record in reader.top()] == ["D", "C", "B", "A"]
+    reader.close()
+
+def test_finished_game_is_written_immediately(tmp_path, monkeypatch):
+    import game.score_store as score_store
+    from game.game import Game
+    from game.game_config import GameConfig
+    db_path = str(tmp_path / "scores.db")
+    monkeypatch.setattr(score_store, "_default_store", ScoreStore(db_path, json_path=None))
+    reader = ScoreStore(db_path, json_path=None)
+    Game("Player", game_config=GameConfig(21, 21, 1, 4)).end_game()
+    assert reader.count() == 1  # 不等待下一次寫入或進程結束
+    score_store._default_store.close()
+    reader.close()
@@ -0,0 +1,57 @@
+# test_sim_clock.py
+import pytest
+from game.game import Game
+from game.game_config import GameConfig
+from game.sim_clock import SimClock
+from game.strategies import ControlManager
+from config import CELL_SIZE, FPS
+
+def make_game():
+    game = Game("Spectator", game_config=GameConfig(21, 21, 1, 4))
+    control_manager = ControlManager(21, 21)
+    control_manager.current_strategy = control_manager.rule_based_ai
+    control_manager.attach_game(game)
+    move = lambda: control_manager.move(game.pacman, game.maze, game.power_pellets, game.score_pellets, game.ghosts)
+    return game, move
+
+def test_fast_forward_matches_normal_play():
+    normal, move = make_game()
+    for _ in range(400):
+        normal.update(FPS, move)
+    fast, fast_move = make_game()
+    sim_clock = SimClock(speed=16)
+    ticks = sum(sim_clock.advance(fast, fast_move, 1.0 / FPS) for _ in range(25))
+    assert ticks == fast.ticks == 400
+    assert (fast.pacman.x, fast.pacman.y, fast.pacman.score) == (normal.pacman.x, normal.pacman.y, normal.pacman.score)
+    assert (fast.store.snapshot() == normal.store.snapshot()).all()
+
+def test_tick_budget_and_render_every():
+    game, move = make_game()
+    sim_clock = SimClock(speed=4, render_every=3, max_ticks_per_frame=10)
+    assert sim_clock.advance(game, move, 0.5 / FPS) == 2  # 半個步長 × 4 倍
+    assert sim_clock.advance(game, move, 1.0) == 10  # 卡頓後不追趕超過上限
+    assert not sim_clock.should_render()
+    sim_clock.advance(game, move, 0.0)
+    assert sim_clock.should_render()
+    now = [0.0]
+
+    def timer():
+        now[0] += 0.1 / FPS
+        return now[0]
+    uncapped = SimClock(speed=None, timer=timer)
+    assert uncapped.advance(game, move, 0.0) == 10  # 在一個步長的真實時間預算內執行
+    with pytest.raises(ValueError):
+        SimClock(speed=0)
+    with pytest.raises(ValueError):
+        SimClock(render_every=0)
+
+def test_positions_interpolate_between_ticks():
+    game, move = make_game()
+    sim_clock = SimClock(speed=1)
+    sim_clock.advance(game, move, 1.5 / FPS)
+    row = game.pacman._row
+    previous_x, current_x = sim_clock._previous[0][row], game.pacman.current_x
+    x, _ = sim_clock.positions(game)
+    assert x[row] == pytest.approx(previous_x + (current_x - previous_x) * 0.5)
+    game.pacman.current_x += 3 * CELL_SIZE  # 瞬移（例如死亡後重置）不插值
+    assert sim_clock.positions(game)[0][row] == game.pacman.current_x
@@ -1,7 +1,7 @@
 # test_strategies.py
 import pytest
 from unittest.mock import Mock, patch
-from game.strategies import RuleBasedAIControl, DQNAIControl, ControlManager
+from game.strategies import RuleBasedAIControl, DQNAIControl, ControlManager, MCTSControl
 
 def test_rule_based_ai_move():
     ai = RuleBasedAIControl()
@@ -15,4 +15,35 @@ def test_control_manager_switch():
     manager = ControlManager(21, 21)
     initial_mode = manager.get_mode_name()
     manager.switch_mode()
-    assert manager.get_mode_name() != initial_mode
\ No newline at end of file
+    assert manager.get_mode_name() != initial_mode
+
+def test_mcts_control_picks_legal_action():
+    from config import FPS
+    from game.game import Game
+    from game.mcts import ACTIONS, MCTSPlanner, legal_actions
+    game = Game("T", seed=3)
+    manager = ControlManager(21, 21)
+    manager.mcts_ai = MCTSControl(time_budget=0.02, workers=0)
+    manager.attach_game(game)
+    manager.current_strategy = manager.mcts_ai
+    start = (game.pacman.x, game.pacman.y)
+    actions = legal_actions(game)
+    game.update(FPS, lambda: manager.move(game.pacman, game.maze, game.power_pellets, game.score_pellets, game.ghosts))
+    pacman = game.pacman
+    assert (pacman.target_x - start[0], pacman.target_y - start[1]) in [ACTIONS[a] for a in actions]
+    assert manager.mcts_ai.planner.rollouts >= len(actions) and "MCTS" in manager.get_mode_name()
+    with pytest.raises(ValueError):
+        MCTSPlanner(policy="greedy")
+
+def test_mcts_created_lazily_and_closed():
+    from game.game import Game
+    game = Game("T", seed=3)
+    manager = ControlManager(21, 21)
+    manager.attach_game(game)
+    assert manager._mcts_ai is None and manager.get_mode_name() == "Player Mode"
+    manager.current_strategy = manager.mcts_ai
+    assert manager.mcts_ai.game is game  # 建立時指定當前遊戲
+    closed = []
+    manager.mcts_ai.planner.close = lambda: closed.append(True)
+    manager.close()
+    assert closed and manager._mcts_ai is None and manager.current_strategy is manager.rule_based_ai
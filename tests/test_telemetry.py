@@ -0,0 +1,43 @@
+# test_telemetry.py
+import pytest
+from ai.metrics_store import MetricsWriter, read_column
+from ai.telemetry import Telemetry
+
+class FakeSummaryWriter:
+    def __init__(self):
+        self.histograms = []
+
+    def add_histogram_raw(self, tag, **kwargs):
+        self.histograms.append((tag, kwargs))
+
+def test_telemetry_flushes_aggregates_on_interval(tmp_path):
+    run_dir = str(tmp_path / "run")
+    metrics = MetricsWriter(run_dir)
+    reads = []
+    telemetry = Telemetry(metrics, interval=10)
+    telemetry.add_gauge("noise", lambda: reads.append(1) or {"Sigma": 0.5})
+    for step in range(25):
+        telemetry.record("Loss", float(step))
+        telemetry.step(step)
+    metrics.close()
+    steps, loss = read_column(run_dir, "step", "Loss")
+    assert list(steps) == [10, 20]
+    assert loss.tolist() == [5.0, 15.5]  # 0..10 與 11..20 的平均（第一次 step 只設定起點）
+    assert read_column(run_dir, "step", "Loss_min")[1].tolist() == [0.0, 11.0]
+    assert read_column(run_dir, "step", "Loss_count")[1].tolist() == [11.0, 10.0]
+    assert read_column(run_dir, "step", "Sigma")[1].tolist() == [0.5, 0.5]
+    assert len(reads) == 2  # gauge 只在寫出時讀取
+
+def test_telemetry_histogram_counts(tmp_path):
+    summary = FakeSummaryWriter()
+    telemetry = Telemetry(MetricsWriter(str(tmp_path / "run")), interval=100, summary_writer=summary)
+    telemetry.histogram("Q_Value", [0, 10])
+    telemetry.record_values("Q_Value", [-5.0, 1.0, 2.0, 10.0, 30.0])
+    telemetry.flush(7)
+    tag, histogram = summary.histograms[0]
+    assert tag == "Q_Value" and histogram["global_step"] == 7
+    assert histogram["bucket_counts"] == [1, 2, 2]
+    assert histogram["bucket_limits"] == [0, 10, 30.0]
+    assert histogram["num"] == 5 and histogram["sum_squares"] == 25 + 1 + 4 + 100 + 900
+    with pytest.raises(ValueError):
+        Telemetry(None, interval=0)